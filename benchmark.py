@@ -0,0 +1,1017 @@
+from lexical_analyzer import LexicalAnalyzer
+from syntax_analyzer import SyntaxAnalyzer
+from semantic_analyzer import SemanticAnalyzer
+from code_generator import CodeGenerator
+from ir_builder import IRBuilder
+from ir import OP_CHECK_INDEX, DEFAULT_ARRAY_SIZE
+from optimizer import Optimizer
+from c_runtime import MALLOC_RUNTIME, ARENA_RUNTIME, OUTPUT_RUNTIME, OUTPUT_HEADERS
+import contextlib
+import glob
+import io
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Tamaños de programa (número de bloques repetidos) que se miden por defecto
+DEFAULT_SIZES = [10, 100, 500]
+
+# Repeticiones del bucle externo del programa de bucles cuyo C se ejecuta en la medida de tiempo de ejecución
+DEFAULT_RUNTIME_REPETITIONS = 1000000
+
+# Repeticiones de las medidas de reserva de memoria (microbenchmarks en C y programa generado)
+DEFAULT_ALLOCATION_REPETITIONS = 100000
+
+# Líneas que imprime cada microbenchmark de salida
+DEFAULT_OUTPUT_LINES = 1000000
+
+# Repeticiones de los recorridos por campo del programa de arrays de objetos
+DEFAULT_FIELD_SCAN_REPETITIONS = 200000
+
+# Compilación del C generado: sin optimizar por defecto, para que se midan las optimizaciones propias
+DEFAULT_CFLAGS = "-O0"
+
+# Recorridos del programa de bucles por elementos y compilaciones con las que se mide (salvo --cflags)
+DEFAULT_VECTOR_REPETITIONS = 20000
+DEFAULT_VECTOR_CFLAGS = ["-O2", "-O3", "-O2 -fopenmp"]
+
+# Vueltas del bucle interior de cada iteración del 'para' paralelo (el paralelo tiene 4000 iteraciones)
+DEFAULT_PARALLEL_REPETITIONS = 20000
+DEFAULT_PARALLEL_CFLAGS = "-O2"
+
+# Vueltas de cada una de las 4 tareas independientes del programa de tareas
+DEFAULT_TASK_REPETITIONS = 50000000
+
+# Microbenchmarks en C de la memoria del runtime: se antepone una implementación de JONSON_RESERVAR,
+# JONSON_AMPLIAR y JONSON_SOLTAR (malloc o arena) y REPETICIONES
+ALLOCATION_MICROBENCHMARK = r"""
+static double ms_desde(clock_t inicio) {
+    return (double)(clock() - inicio) * 1000.0 / CLOCKS_PER_SEC;
+}
+
+int main(void) {
+    long suma = 0;
+    clock_t inicio;
+
+    // Bloques pequeños que viven a la vez y se sueltan en orden inverso (cadenas de un método)
+    inicio = clock();
+    for (int r = 0; r < REPETICIONES; r++) {
+        char* bloques[64];
+        for (int i = 0; i < 64; i++) {
+            bloques[i] = JONSON_RESERVAR(16 + i % 48);
+            bloques[i][0] = (char)i;
+        }
+        for (int i = 63; i >= 0; i--) {
+            suma += bloques[i][0];
+            JONSON_SOLTAR(bloques[i], 16 + i % 48);
+        }
+    }
+    printf("bloques pequeños %.1f\n", ms_desde(inicio));
+
+    // Crecimiento por duplicación de la capacidad hasta 4096 enteros (agregar)
+    inicio = clock();
+    for (int r = 0; r < REPETICIONES / 16; r++) {
+        int* datos = NULL;
+        int capacidad = 0;
+        for (int n = 0; n < 4096; n++) {
+            if (n == capacidad) {
+                int nueva = capacidad > 0 ? capacidad * 2 : 8;
+                datos = JONSON_AMPLIAR(datos, capacidad * sizeof(int), nueva * sizeof(int));
+                capacidad = nueva;
+            }
+            datos[n] = n;
+        }
+        suma += datos[4095];
+        JONSON_SOLTAR(datos, capacidad * sizeof(int));
+    }
+    printf("crecimiento %.1f\n", ms_desde(inicio));
+
+    // Bloques que viven hasta el final del programa
+    inicio = clock();
+    for (int r = 0; r < REPETICIONES * 16; r++) {
+        char* bloque = JONSON_RESERVAR(24);
+        bloque[0] = (char)r;
+        suma += bloque[0];
+    }
+    printf("sin soltar %.1f\n", ms_desde(inicio));
+
+    printf("suma %ld\n", suma);
+    return 0;
+}
+"""
+
+# Se antepone al C de un programa para que al terminar escriba en stderr su memoria máxima; es la del
+# propio programa (VmHWM de Linux), no la del proceso que lo lanza como en getrusage
+PEAK_MEMORY_PROBE = r"""
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+static void medir_memoria(void) {
+    char linea[256];
+    FILE* estado = fopen("/proc/self/status", "r");
+    if (estado == NULL) return;
+    while (fgets(linea, sizeof linea, estado) != NULL) {
+        if (strncmp(linea, "VmHWM:", 6) == 0) fputs(linea, stderr);
+    }
+    fclose(estado);
+}
+__attribute__((constructor)) static void registrar_medida(void) {
+    atexit(medir_memoria);
+}
+"""
+
+# Microbenchmark en C de la salida de imprimir: LINEAS valores del TIPO indicado (1 entero, 2 flotante,
+# 3 cadena) con printf si se define CON_PRINTF o con los escritores del runtime de salida
+OUTPUT_MICROBENCHMARK = r"""
+int main(void) {
+#ifndef CON_PRINTF
+    atexit(jonson_vaciar_salida);
+#endif
+    unsigned int x = 12345;
+    for (int i = 0; i < LINEAS; i++) {
+        x = x * 1664525u + 1013904223u;
+#if TIPO == 1
+        int valor = (int)x >> (i % 24);
+#ifdef CON_PRINTF
+        printf("%d\n", valor);
+#else
+        jonson_imprimir_entero(valor);
+#endif
+#elif TIPO == 2
+        float valor = (float)(int)(x % 2000001 - 1000000) / (float)(1 + i % 1000);
+#ifdef CON_PRINTF
+        printf("%f\n", valor);
+#else
+        jonson_imprimir_flotante(valor);
+#endif
+#else
+        const char* valor = i % 2 ? "hola mundo" : "Jonson";
+#ifdef CON_PRINTF
+        printf("%s\n", valor);
+#else
+        jonson_imprimir_texto(valor, i % 2 ? 10 : 6);
+#endif
+#endif
+    }
+    return 0;
+}
+"""
+
+def generate_program(blocks):
+    """Genera un programa Jonson sintético con el número de bloques indicado"""
+    lines = [
+        "clase Acumulador {",
+        "    publico entero total~",
+        "    publico cadena nombre~",
+        "",
+        "    publico vacio sumar(entero n) {",
+        "        total = total + n~",
+        "    }",
+        "",
+        "    publico entero doble() {",
+        "        retornar total * 2~",
+        "    }",
+        "}",
+        "",
+        "principal() {",
+        "    Acumulador acc~",
+        "    acc.total = 0~",
+        "    acc.nombre = \"acumulador\"~",
+    ]
+
+    # Cada bloque usa variables propias: cadenas, arrays, bucles, llamadas y un switch
+    for b in range(blocks):
+        lines.extend([
+            f"    entero[] datos{b} = [{b}, {b + 1}, {b + 2}]~",
+            f"    cadena texto{b} = \"bloque {b}\"~",
+            f"    texto{b} += \"!\"~",
+            f"    flotante media{b} = 0.0~",
+            "    para (entero i = 0; i < 3; i = i + 1) {",
+            f"        datos{b}[i] = datos{b}[i] * 2~",
+            f"        acc.sumar(datos{b}[i])~",
+            "    }",
+            f"    media{b} = acc.total / 3~",
+            f"    si (media{b} > 10.5) {{",
+            f"        imprimir(texto{b})~",
+            "    } sino {",
+            f"        imprimir(media{b})~",
+            "    }",
+            f"    cambio ({b} % 3) {{",
+            "        caso 0:",
+            "            imprimir(acc.doble())~",
+            "        caso 1:",
+            "            imprimir(acc.nombre)~",
+            "        predeterminado:",
+            f"            imprimir(datos{b}[0])~",
+            "    }",
+        ])
+
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+def generate_loop_program(repetitions):
+    """Genera un programa Jonson dominado por bucles: invariantes, multiplicaciones por la variable
+    de control y 'para' con número de iteraciones constante"""
+    zeros = ", ".join(["0"] * 64)
+    return "\n".join([
+        "principal() {",
+        "    entero[] numeros = [3, 1, 4, 1, 5, 9, 2, 6]~",
+        f"    entero[] tabla = [{zeros}]~",
+        "    entero escala = numeros[2] - 1~",
+        "    entero base = numeros[5] + 7~",
+        "    entero total = 0~",
+        f"    para (entero r = 0; r < {repetitions}; r = r + 1) {{",
+        "        para (entero i = 0; i < 8; i = i + 1) {",
+        "            total = total + numeros[i] * (escala * base) + i * 4~",
+        "        }",
+        "        entero k = 0~",
+        "        mientras (k < 64) {",
+        "            tabla[k] = k * 3 + escala * base + r~",
+        "            k = k + 1~",
+        "        }",
+        "        total = (total + tabla[r % 64]) % 1000003~",
+        "    }",
+        "    imprimir(total)~",
+        "}",
+    ]) + "\n"
+
+# Llamadas con argumentos de otro tipo que el parámetro: al copiar el método en la llamada (-O2)
+# el argumento debe convertirse como en la llamada de C (entero a flotante; flotante truncado a entero)
+MIXED_CALL_PROGRAM = """clase Util {
+    publico entero k~
+    publico flotante mitad(flotante a) {
+        retornar a / 2~
+    }
+    publico entero dos(entero b) {
+        retornar b * 2~
+    }
+    publico flotante suma(flotante a, entero b) {
+        a = a + b~
+        retornar a~
+    }
+}
+principal() {
+    Util u~
+    entero n = 7~
+    imprimir(u.mitad(3))~
+    imprimir(u.mitad(n))~
+    imprimir(u.dos(2.5))~
+    imprimir(u.suma(1, 2.7))~
+}
+"""
+
+def generate_expression_program(repetitions):
+    """Genera un programa Jonson con subexpresiones repetidas en sentencias consecutivas: productos
+    de miembros, aritmética de índices y llamadas a un método puro"""
+    return "\n".join([
+        "clase Punto {",
+        "    publico entero x~",
+        "    publico entero y~",
+        "",
+        "    publico entero norma() {",
+        "        retornar x * x + y * y~",
+        "    }",
+        "}",
+        "",
+        "principal() {",
+        "    Punto p~",
+        "    p.x = 3~",
+        "    p.y = 4~",
+        "    entero[] datos = [5, 3, 8, 1, 9, 2, 7, 4, 6, 10, 12, 11, 15, 13, 14, 16]~",
+        "    entero factor = datos[3] + 2~",
+        "    entero total = 0~",
+        f"    para (entero r = 0; r < {repetitions}; r = r + 1) {{",
+        "        para (entero i = 0; i < 15; i = i + 1) {",
+        "            entero a = p.x * factor + datos[i] * datos[i + 1]~",
+        "            entero b = p.x * factor - datos[i] * datos[i + 1]~",
+        "            entero c = (datos[i] + datos[i + 1]) * (datos[i] + datos[i + 1])~",
+        "            total = (total + a * b + c + p.norma() + p.norma()) % 1000003~",
+        "        }",
+        "        p.y = total % 7~",
+        "    }",
+        "    imprimir(total)~",
+        "}",
+    ]) + "\n"
+
+def generate_array_program(repetitions):
+    """Genera un programa Jonson de recorridos de arrays: índices acotados por la condición del
+    'para' (con desplazamiento y módulo) y un histograma indexado por datos, que no se puede acotar"""
+    return "\n".join([
+        "principal() {",
+        "    entero[] datos = [5, 3, 8, 1, 9, 2, 7, 4, 6, 0, 12, 11, 15, 13, 14, 10]~",
+        "    entero[] cuenta = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]~",
+        "    entero total = 0~",
+        f"    para (entero r = 0; r < {repetitions}; r = r + 1) {{",
+        "        para (entero i = 0; i < 16; i = i + 1) {",
+        "            total = (total + datos[i] * datos[15 - i] + datos[(i + r) % 16]) % 1000003~",
+        "            cuenta[datos[i]] = cuenta[datos[i]] + 1~",
+        "        }",
+        "    }",
+        "    imprimir(total + cuenta[3])~",
+        "}",
+    ]) + "\n"
+
+def generate_allocation_program(repetitions):
+    """Genera un programa Jonson que reserva memoria del runtime: cadenas que se concatenan, se
+    retornan y se guardan en una variable en cada vuelta, y arrays dinámicos locales de un método"""
+    return "\n".join([
+        "clase Reservas {",
+        "    publico cadena unir(entero n) {",
+        "        cadena s = \"\"~",
+        "        para (entero i = 0; i < n; i = i + 1) {",
+        "            s += \"ab\"~",
+        "        }",
+        "        retornar s~",
+        "    }",
+        "",
+        "    publico entero ultimo(entero n) {",
+        "        entero[] lista~",
+        "        para (entero i = 0; i < n; i = i + 1) {",
+        "            lista.agregar(i * 3)~",
+        "        }",
+        "        retornar lista[n - 1]~",
+        "    }",
+        "}",
+        "",
+        "principal() {",
+        "    Reservas reservas~",
+        "    entero total = 0~",
+        "    cadena ultima = \"\"~",
+        f"    para (entero r = 0; r < {repetitions}; r = r + 1) {{",
+        "        ultima = reservas.unir(12)~",
+        "        si (ultima == \"abababababababababababab\") {",
+        "            total = total + 1~",
+        "        }",
+        "        total = (total + reservas.ultimo(100)) % 1000003~",
+        "    }",
+        "    imprimir(total)~",
+        "}",
+    ]) + "\n"
+
+def generate_field_scan_program(repetitions):
+    """Genera un programa Jonson que recorre un array de objetos anchos leyendo un solo campo;
+    los arrays de objetos tienen el tamaño por defecto, así que se recorre muchas veces"""
+    fields = [f"dato{number}" for number in range(1, 8)]
+    return "\n".join([
+        "clase Muestra {",
+        "    publico entero clave~",
+        *(f"    publico flotante {field}~" for field in fields),
+        "}",
+        "",
+        "principal() {",
+        "    Muestra[] muestras~",
+        "    entero total = 0~",
+        f"    para (entero i = 0; i < {DEFAULT_ARRAY_SIZE}; i = i + 1) {{",
+        "        muestras[i].clave = i * 7 % 13~",
+        *(f"        muestras[i].{field} = i * {number}.5~" for number, field in enumerate(fields, 1)),
+        "    }",
+        f"    para (entero r = 0; r < {repetitions}; r = r + 1) {{",
+        f"        para (entero i = 0; i < {DEFAULT_ARRAY_SIZE}; i = i + 1) {{",
+        "            total = total + muestras[i].clave~",
+        "        }",
+        "        total = total % 1000003~",
+        "    }",
+        "    imprimir(total)~",
+        "    imprimir(muestras[" + str(DEFAULT_ARRAY_SIZE - 1) + "].dato7)~",
+        "}",
+    ]) + "\n"
+
+def generate_vector_program(repetitions):
+    """Genera un programa Jonson de bucles por elementos en un método: el límite es un miembro
+    y los arrays son dinámicos, así que sin indicaciones el compilador de C no sabe si escribir
+    un elemento cambia el límite u otro array"""
+    return "\n".join([
+        "clase Senal {",
+        "    publico entero muestras~",
+        "",
+        "    publico entero procesar(entero veces) {",
+        "        entero[] a~",
+        "        entero[] b~",
+        "        flotante[] x~",
+        "        flotante[] y~",
+        "        para (entero i = 0; i < muestras; i = i + 1) {",
+        "            a.agregar(i % 17)~",
+        "            b.agregar(i % 5)~",
+        "            x.agregar(i * 0.25)~",
+        "            y.agregar(0.0)~",
+        "        }",
+        "        para (entero r = 0; r < veces; r = r + 1) {",
+        "            para (entero i = 0; i < muestras; i = i + 1) {",
+        "                a[i] = (a[i] + b[i] * 3) % 65536~",
+        "            }",
+        "            para (entero i = 0; i < muestras; i = i + 1) {",
+        "                b[i] = (b[i] + a[i]) % 1024~",
+        "            }",
+        "            para (entero i = 0; i < muestras; i = i + 1) {",
+        "                y[i] = y[i] * 0.5 + x[i]~",
+        "            }",
+        "        }",
+        "        entero total = 0~",
+        "        para (entero i = 0; i < muestras; i = i + 1) {",
+        "            total = (total + a[i] + b[i]) % 1000003~",
+        "        }",
+        "        imprimir(y[muestras - 1])~",
+        "        retornar total~",
+        "    }",
+        "}",
+        "",
+        "principal() {",
+        "    Senal senal~",
+        "    senal.muestras = 1000~",
+        f"    imprimir(senal.procesar({repetitions}))~",
+        "}",
+    ]) + "\n"
+
+def generate_parallel_program(repetitions):
+    """Genera un programa Jonson con un 'para' paralelo de 4000 iteraciones independientes que
+    suma sus resultados con una reducción (entera, para que la salida no dependa del orden)"""
+    return "\n".join([
+        "principal() {",
+        "    entero total = 0~",
+        "    paralelo(+: total) para (entero i = 0; i < 4000; i = i + 1) {",
+        "        entero x = i~",
+        f"        para (entero k = 0; k < {repetitions}; k = k + 1) {{",
+        "            x = (x * 75 + 74) % 65537~",
+        "        }",
+        "        total = total + x~",
+        "    }",
+        "    imprimir(total)~",
+        "}",
+    ]) + "\n"
+
+def generate_task_program(repetitions):
+    """Genera un programa Jonson que lanza 4 tareas independientes, cada una sobre su objeto, y
+    las espera antes de imprimir sus resultados"""
+    lines = [
+        "clase Etapa {",
+        "    publico entero valor~",
+        "",
+        "    publico vacio procesar(entero vueltas) {",
+        "        para (entero k = 0; k < vueltas; k = k + 1) {",
+        "            valor = (valor * 75 + 74) % 65537~",
+        "        }",
+        "    }",
+        "}",
+        "",
+        "principal() {",
+    ]
+    for task in range(4):
+        lines.append(f"    Etapa etapa{task}~")
+        lines.append(f"    etapa{task}.valor = {task}~")
+    for task in range(4):
+        lines.append(f"    tarea {{ etapa{task}.procesar({repetitions})~ }}")
+    lines.append("    esperar~")
+    for task in range(4):
+        lines.append(f"    imprimir(etapa{task}.valor)~")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+def parse_program(source):
+    """Analiza léxica y sintácticamente un programa sin mostrar la salida de los analizadores"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        lexer = LexicalAnalyzer()
+        lexer.tokenize(source)
+        syntax_analyzer = SyntaxAnalyzer(lexer.tokens)
+        if not syntax_analyzer.parse():
+            return None
+    return syntax_analyzer.ast_root
+
+def best_time(function, repeat):
+    """Mejor tiempo de varias ejecuciones de una función (y su último resultado)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def benchmark_size(blocks, repeat):
+    """Mide el análisis semántico, la traducción a IR, la optimización y la generación de código para un programa de un tamaño dado"""
+    source = generate_program(blocks)
+    ast = parse_program(source)
+    if ast is None:
+        print(f"El programa sintético de {blocks} bloques no es sintácticamente válido")
+        return None
+
+    def analyze():
+        analyzer = SemanticAnalyzer(build_tree=False)
+        analyzer.analyze(ast)
+        return analyzer
+
+    analysis_time, analyzer = best_time(analyze, repeat)
+    ir_time, ir_program = best_time(lambda: IRBuilder(analyzer.typed_ast).build(ast), repeat)
+    ir_instructions = ir_program.function("main").instruction_count()
+    
+    # La optimización modifica el IR en sitio: cada repetición parte de una traducción nueva
+    programs = [ir_program] + [IRBuilder(analyzer.typed_ast).build(ast) for _ in range(repeat - 1)]
+    optimization_time, ir_program = best_time(lambda: Optimizer().optimize(programs.pop()), repeat)
+    
+    # La generación escribe por flujo en un sumidero nulo, como lo haría sobre el archivo .c
+    with open(os.devnull, 'w') as sink:
+        generate = lambda: CodeGenerator().generate_to(sink, ast, analyzer.typed_ast, ir_program)
+        generation_time, c_lines = best_time(generate, repeat)
+        
+        # Pico de memoria reservada durante la generación (fuera de la medida de tiempo)
+        tracemalloc.start()
+        generate()
+        generation_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "blocks": blocks,
+        "source_lines": source.count("\n"),
+        "c_lines": c_lines,
+        "analysis": analysis_time,
+        "ir": ir_time,
+        "ir_instructions": ir_instructions,
+        "optimization": optimization_time,
+        "optimized_instructions": ir_program.function("main").instruction_count(),
+        "generation": generation_time,
+        "generation_peak": generation_peak
+    }
+
+def compile_to_c(ast, level, disabled=(), safe=False, arena=False, soa=None):
+    """Código C de un programa ya analizado sintácticamente con el nivel de optimización dado
+    (con comprobación de límites de los arrays si safe, con la memoria en la arena si arena y
+    con los arrays de objetos por campos según soa)"""
+    analyzer = SemanticAnalyzer(build_tree=False)
+    analyzer.analyze(ast)
+    ir_program = IRBuilder(analyzer.typed_ast, safe).build(ast)
+    optimizer = Optimizer(level, disabled)
+    optimizer.optimize(ir_program)
+    return CodeGenerator(arena, soa=soa).generate(ast, analyzer.typed_ast, ir_program), ir_program, optimizer
+
+def benchmark_runtime(repetitions, repeat, cflags):
+    """Compila con gcc el C generado en cada nivel de optimización y mide su tiempo de ejecución"""
+    ast = parse_program(generate_loop_program(repetitions))
+    if ast is None:
+        print("El programa de bucles no es sintácticamente válido")
+        return 1
+
+    compiler = os.environ.get("CC", "gcc")
+    print(f"| Nivel | Optimización (ms) | Instr. IR principal | Líneas C | Ejecución (ms) | Aceleración |   ({compiler} {cflags})")
+    print("|-------|-------------------|---------------------|----------|----------------|-------------|")
+    baseline = None
+    expected = None
+    with tempfile.TemporaryDirectory() as directory:
+        for level in range(4):
+            c_code, ir_program, optimizer = compile_to_c(ast, level)
+            source = os.path.join(directory, f"bucles_O{level}.c")
+            binary = os.path.join(directory, f"bucles_O{level}")
+            with open(source, 'w') as c_file:
+                c_file.write(c_code)
+            try:
+                subprocess.run([compiler, *shlex.split(cflags), "-w", "-o", binary, source], check=True)
+            except (OSError, subprocess.CalledProcessError) as error:
+                print(f"No se pudo compilar el C generado con {compiler}: {error}")
+                return 1
+
+            # Todos los niveles deben producir la misma salida
+            run = lambda: subprocess.run([binary], check=True, capture_output=True, text=True).stdout
+            elapsed, output = best_time(run, repeat)
+            if expected is None:
+                expected = output
+            elif output != expected:
+                print(f"La salida con -O{level} difiere de la de -O0: {output.strip()!r} != {expected.strip()!r}")
+                return 1
+
+            baseline = baseline or elapsed
+            print(f"| -O{level}   | {optimizer.manager.total_time() * 1000:>17.2f} | "
+                  f"{ir_program.function('main').instruction_count():>19} | {c_code.count(chr(10)):>8} | "
+                  f"{elapsed * 1000:>14.1f} | {baseline / elapsed:>10.2f}x |")
+
+        # Las llamadas con argumentos de otro tipo dan lo mismo en todos los niveles
+        ast = parse_program(MIXED_CALL_PROGRAM)
+        expected = None
+        for level in range(4):
+            c_code, _, _ = compile_to_c(ast, level)
+            _, output = build_and_run(c_code, os.path.join(directory, f"llamadas_O{level}"), 1, cflags)
+            if output is None:
+                return 1
+            if expected is None:
+                expected = output
+            elif output != expected:
+                print(f"Las llamadas con argumentos de otro tipo cambian con -O{level}: "
+                      f"{output.split()} != {expected.split()}")
+                return 1
+    return 0
+
+def build_and_run(c_code, path, repeat, cflags, env=None):
+    """Compila el C en la ruta indicada y devuelve el mejor tiempo de ejecución y la salida (None si
+    falla la compilación); env son las variables de entorno de la ejecución"""
+    compiler = os.environ.get("CC", "gcc")
+    with open(path + ".c", 'w') as c_file:
+        c_file.write(c_code)
+    try:
+        subprocess.run([compiler, *shlex.split(cflags), "-w", "-o", path, path + ".c"], check=True)
+    except (OSError, subprocess.CalledProcessError) as error:
+        print(f"No se pudo compilar el C generado con {compiler}: {error}")
+        return None, None
+    run = lambda: subprocess.run([path], check=True, capture_output=True, text=True, env=env).stdout
+    return best_time(run, repeat)
+
+def peak_memory(c_code, path, cflags):
+    """Memoria máxima (KB residentes) de una ejecución del C, que la escribe al terminar; None si
+    no se pudo medir"""
+    compiler = os.environ.get("CC", "gcc")
+    with open(path + ".c", 'w') as c_file:
+        c_file.write(PEAK_MEMORY_PROBE + c_code)
+    try:
+        subprocess.run([compiler, *shlex.split(cflags), "-w", "-o", path, path + ".c"], check=True)
+        result = subprocess.run([path], check=True, capture_output=True, text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    for line in result.stderr.splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1])
+    return None
+
+def benchmark_subexpressions(repetitions, repeat, cflags):
+    """Compara con -O1 el tamaño del C y el tiempo de ejecución sin y con eliminación de subexpresiones
+    comunes, sobre los ejemplos del repositorio y un programa generado con expresiones repetidas"""
+    corpus = [("expresiones (generado)", generate_expression_program(repetitions))]
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.jonson"))):
+        with open(path) as source:
+            corpus.append((os.path.basename(path), source.read()))
+
+    print(f"| Programa | Bytes C sin CSE | Bytes C con CSE | Reducción | Ejecución sin CSE (ms) | Ejecución con CSE (ms) | Aceleración |   ({os.environ.get('CC', 'gcc')} {cflags})")
+    print("|----------|-----------------|-----------------|-----------|------------------------|------------------------|-------------|")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, source in corpus:
+            ast = parse_program(source)
+            if ast is None:
+                continue
+            with contextlib.redirect_stdout(io.StringIO()):
+                valid = SemanticAnalyzer(build_tree=False).analyze(ast)
+            if not valid:
+                # Los ejemplos con errores semánticos a propósito no generan C
+                continue
+
+            sizes = []
+            times = []
+            outputs = []
+            for disabled in (["subexpresiones"], []):
+                c_code, _, _ = compile_to_c(ast, 1, disabled)
+                elapsed, output = build_and_run(c_code, os.path.join(directory, f"cse{len(sizes)}"), repeat, cflags)
+                if elapsed is None:
+                    return 1
+                sizes.append(len(c_code.encode()))
+                times.append(elapsed)
+                outputs.append(output)
+            if outputs[0] != outputs[1]:
+                print(f"La salida de {name} cambia al reutilizar subexpresiones")
+                return 1
+            print(f"| {name} | {sizes[0]:>15} | {sizes[1]:>15} | {(1 - sizes[1] / sizes[0]) * 100:>8.1f}% | "
+                  f"{times[0] * 1000:>22.1f} | {times[1] * 1000:>22.1f} | {times[0] / times[1]:>10.2f}x |")
+    return 0
+
+def benchmark_bounds_checks(repetitions, repeat, cflags):
+    """Compara con -O1 el C sin comprobaciones de límites, con todas las comprobaciones (modo seguro
+    sin el pase de rangos) y con las que deja el análisis de rangos"""
+    programs = [("arrays", generate_array_program(repetitions)), ("bucles", generate_loop_program(repetitions))]
+    variants = [("sin comprobaciones", False, ["rangos"]), ("ingenuas", True, ["rangos"]), ("con rangos", True, [])]
+
+    print(f"| Programa | Variante | Comprobaciones en el IR | Líneas C | Ejecución (ms) | Sobrecoste |   ({os.environ.get('CC', 'gcc')} {cflags})")
+    print("|----------|----------|-------------------------|----------|----------------|------------|")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, source in programs:
+            ast = parse_program(source)
+            if ast is None:
+                print(f"El programa de {name} no es sintácticamente válido")
+                return 1
+            baseline = None
+            expected = None
+            for number, (variant, safe, disabled) in enumerate(variants):
+                c_code, ir_program, _ = compile_to_c(ast, 1, disabled, safe)
+                checks = sum(block.ops.count(OP_CHECK_INDEX) for function in ir_program.functions
+                             for block in function.blocks)
+                elapsed, output = build_and_run(c_code, os.path.join(directory, f"{name}{number}"), repeat, cflags)
+                if elapsed is None:
+                    return 1
+                if expected is None:
+                    expected = output
+                elif output != expected:
+                    print(f"La salida de {name} cambia con las comprobaciones {variant}")
+                    return 1
+                baseline = baseline or elapsed
+                print(f"| {name} | {variant} | {checks:>23} | {c_code.count(chr(10)):>8} | {elapsed * 1000:>14.1f} | "
+                      f"{(elapsed / baseline - 1) * 100:>9.1f}% |")
+    return 0
+
+def benchmark_allocation(repetitions, repeat, cflags):
+    """Compara la memoria del runtime con malloc y con la arena: microbenchmarks en C de cada patrón
+    de reserva y el C generado con -O1 para un programa de cadenas y arrays dinámicos"""
+    variants = [("malloc", MALLOC_RUNTIME), ("arena", ARENA_RUNTIME)]
+    compiler = os.environ.get("CC", "gcc")
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for variant, runtime in variants:
+            prelude = "".join(f"#include <{header}>\n" for header in ("stdio.h", "stdlib.h", "string.h", "time.h"))
+            c_code = f"{prelude}#define REPETICIONES {repetitions}\n{runtime}{ALLOCATION_MICROBENCHMARK}"
+            _, output = build_and_run(c_code, os.path.join(directory, variant), 1, cflags)
+            if output is None:
+                return 1
+            times = {}
+            for line in output.splitlines():
+                name, _, value = line.rpartition(" ")
+                times[name] = float(value)
+            results[variant] = times
+
+        print(f"| Microbenchmark | malloc (ms) | arena (ms) | Aceleración |   ({compiler} {cflags}, {repetitions} repeticiones)")
+        print("|----------------|-------------|------------|-------------|")
+        for name in results["malloc"]:
+            if name == "suma":
+                continue
+            malloc_time, arena_time = results["malloc"][name], results["arena"][name]
+            speedup = f"{malloc_time / arena_time:>10.2f}x" if arena_time else "          -"
+            print(f"| {name} | {malloc_time:>11.1f} | {arena_time:>10.1f} | {speedup} |")
+        if results["malloc"].get("suma") != results["arena"].get("suma"):
+            print("Los microbenchmarks dan resultados distintos con malloc y con la arena")
+            return 1
+
+        ast = parse_program(generate_allocation_program(repetitions))
+        if ast is None:
+            print("El programa de reservas no es sintácticamente válido")
+            return 1
+        print()
+        print("| Programa | Memoria | Líneas C | Ejecución (ms) | Aceleración | Máximo (KB) |")
+        print("|----------|---------|----------|----------------|-------------|-------------|")
+        baseline = None
+        expected = None
+        for variant, _ in variants:
+            c_code, _, _ = compile_to_c(ast, 1, arena=variant == "arena")
+            path = os.path.join(directory, f"reservas_{variant}")
+            elapsed, output = build_and_run(c_code, path, repeat, cflags)
+            if elapsed is None:
+                return 1
+            if expected is None:
+                expected = output
+            elif output != expected:
+                print(f"La salida del programa de reservas cambia con {variant}")
+                return 1
+            baseline = baseline or elapsed
+            peak = peak_memory(c_code, path + "_memoria", cflags)
+            print(f"| reservas | {variant} | {c_code.count(chr(10)):>8} | {elapsed * 1000:>14.1f} | "
+                  f"{baseline / elapsed:>10.2f}x | {peak if peak is not None else '-':>11} |")
+
+        # Con cuatro veces más vueltas, la arena no debe crecer más que un par de regiones
+        peaks = []
+        for scale in (1, 4):
+            c_code, _, _ = compile_to_c(parse_program(generate_allocation_program(repetitions * scale)), 1, arena=True)
+            peaks.append(peak_memory(c_code, os.path.join(directory, f"reservas_arena_{scale}"), cflags))
+        if None not in peaks and peaks[1] - peaks[0] > 2 * 1024:
+            print(f"La memoria de la arena crece con las vueltas del bucle: {peaks[0]} KB con {repetitions} "
+                  f"y {peaks[1]} KB con {repetitions * 4}")
+            return 1
+    return 0
+
+def benchmark_output(lines, repeat, cflags):
+    """Compara printf con los escritores del runtime de salida imprimiendo enteros, flotantes y
+    cadenas; las dos versiones deben producir exactamente la misma salida"""
+    compiler = os.environ.get("CC", "gcc")
+    headers = ("stdio.h", "stdlib.h", *OUTPUT_HEADERS)
+    prelude = "".join(f"#include <{header}>\n" for header in dict.fromkeys(headers))
+    print(f"| Tipo | printf (ms) | Escritores (ms) | Aceleración |   ({compiler} {cflags}, {lines} líneas)")
+    print("|------|-------------|-----------------|-------------|")
+    with tempfile.TemporaryDirectory() as directory:
+        for tipo, name in enumerate(("entero", "flotante", "cadena"), 1):
+            times = []
+            outputs = []
+            for variant in ("printf", "escritores"):
+                defines = f"#define LINEAS {lines}\n#define TIPO {tipo}\n"
+                if variant == "printf":
+                    defines += "#define CON_PRINTF\n"
+                c_code = f"{prelude}{defines}{OUTPUT_RUNTIME}{OUTPUT_MICROBENCHMARK}"
+                elapsed, output = build_and_run(c_code, os.path.join(directory, f"{name}_{variant}"), repeat, cflags)
+                if elapsed is None:
+                    return 1
+                times.append(elapsed)
+                outputs.append(output)
+            if outputs[0] != outputs[1]:
+                print(f"Los escritores de {name} no imprimen lo mismo que printf")
+                return 1
+            print(f"| {name} | {times[0] * 1000:>11.1f} | {times[1] * 1000:>15.1f} | {times[0] / times[1]:>10.2f}x |")
+    return 0
+
+def benchmark_struct_of_arrays(repetitions, repeat, cflags):
+    """Compara con -O1 un array de objetos emitido como array de estructuras y por campos al
+    recorrer uno solo de sus campos"""
+    ast = parse_program(generate_field_scan_program(repetitions))
+    if ast is None:
+        print("El programa de arrays de objetos no es sintácticamente válido")
+        return 1
+
+    print(f"| Disposición | Líneas C | Ejecución (ms) | Aceleración |   ({os.environ.get('CC', 'gcc')} {cflags}, {repetitions} recorridos)")
+    print("|-------------|----------|----------------|-------------|")
+    baseline = None
+    expected = None
+    with tempfile.TemporaryDirectory() as directory:
+        for variant, soa in (("array de estructuras", None), ("struct-of-arrays", True)):
+            c_code, _, _ = compile_to_c(ast, 1, soa=soa)
+            elapsed, output = build_and_run(c_code, os.path.join(directory, "soa" if soa else "aos"), repeat, cflags)
+            if elapsed is None:
+                return 1
+            if expected is None:
+                expected = output
+            elif output != expected:
+                print(f"La salida del programa de arrays de objetos cambia con {variant}")
+                return 1
+            baseline = baseline or elapsed
+            print(f"| {variant} | {c_code.count(chr(10)):>8} | {elapsed * 1000:>14.1f} | {baseline / elapsed:>10.2f}x |")
+    return 0
+
+def benchmark_vectorization(repetitions, repeat, cflags_list):
+    """Compara con -O2 el C de los bucles por elementos emitido como bucles de saltos (sin el pase
+    de vectorización) y como 'for' con indicaciones de vectorización, con cada compilación de C"""
+    ast = parse_program(generate_vector_program(repetitions))
+    if ast is None:
+        print("El programa de bucles por elementos no es sintácticamente válido")
+        return 1
+
+    variants = [("escalar", ["vectorización"]), ("vectorizable", [])]
+    codes = [compile_to_c(ast, 2, disabled)[0] for _, disabled in variants]
+    print(f"| Compilación | Escalar (ms) | Vectorizable (ms) | Aceleración |   ({os.environ.get('CC', 'gcc')}, {repetitions} recorridos)")
+    print("|-------------|--------------|-------------------|-------------|")
+    with tempfile.TemporaryDirectory() as directory:
+        for number, cflags in enumerate(cflags_list):
+            times = []
+            outputs = []
+            for (variant, _), c_code in zip(variants, codes):
+                elapsed, output = build_and_run(c_code, os.path.join(directory, f"{variant}{number}"), repeat, cflags)
+                if elapsed is None:
+                    return 1
+                times.append(elapsed)
+                outputs.append(output)
+            if outputs[0] != outputs[1]:
+                print(f"La salida del programa de bucles por elementos cambia al vectorizar con {cflags}")
+                return 1
+            print(f"| {cflags} | {times[0] * 1000:>12.1f} | {times[1] * 1000:>17.1f} | {times[0] / times[1]:>10.2f}x |")
+    return 0
+
+def benchmark_parallel(repetitions, repeat, cflags):
+    """Compara el C con -O2 de un 'para' paralelo compilado sin OpenMP (secuencial) y con
+    -fopenmp, que reparte las iteraciones entre los hilos"""
+    ast = parse_program(generate_parallel_program(repetitions))
+    if ast is None:
+        print("El programa del 'para' paralelo no es sintácticamente válido")
+        return 1
+
+    c_code, _, _ = compile_to_c(ast, 2)
+    threads = os.environ.get("OMP_NUM_THREADS") or os.cpu_count()
+    print(f"| Compilación | Ejecución (ms) | Aceleración |   ({os.environ.get('CC', 'gcc')}, {repetitions} vueltas, {threads} hilos)")
+    print("|-------------|----------------|-------------|")
+    baseline = None
+    expected = None
+    with tempfile.TemporaryDirectory() as directory:
+        for number, variant in enumerate((cflags, cflags + " -fopenmp")):
+            elapsed, output = build_and_run(c_code, os.path.join(directory, f"paralelo{number}"), repeat, variant)
+            if elapsed is None:
+                return 1
+            if expected is None:
+                expected = output
+            elif output != expected:
+                print(f"La salida del programa del 'para' paralelo cambia con {variant}")
+                return 1
+            baseline = baseline or elapsed
+            print(f"| {variant} | {elapsed * 1000:>14.1f} | {baseline / elapsed:>10.2f}x |")
+    return 0
+
+def benchmark_tasks(repetitions, repeat, cflags):
+    """Compara el C con -O2 de 4 tareas independientes ejecutadas en el hilo principal al lanzarlas
+    (JONSON_HILOS=0) y repartidas entre los hilos del runtime de tareas"""
+    ast = parse_program(generate_task_program(repetitions))
+    if ast is None:
+        print("El programa de tareas no es sintácticamente válido")
+        return 1
+
+    c_code, _, _ = compile_to_c(ast, 2)
+    threads = os.environ.get("JONSON_HILOS") or max(os.cpu_count() - 1, 0)
+    print(f"| Ejecución | Tiempo (ms) | Aceleración |   ({os.environ.get('CC', 'gcc')} {cflags} -pthread, {repetitions} vueltas por tarea)")
+    print("|-----------|-------------|-------------|")
+    baseline = None
+    expected = None
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tareas")
+        for variant, hilos in (("secuencial", "0"), (f"{threads} hilos y el principal", str(threads))):
+            elapsed, output = build_and_run(c_code, path, repeat, cflags + " -pthread", dict(os.environ, JONSON_HILOS=hilos))
+            if elapsed is None:
+                return 1
+            if expected is None:
+                expected = output
+            elif output != expected:
+                print(f"La salida del programa de tareas cambia con {variant}")
+                return 1
+            baseline = baseline or elapsed
+            print(f"| {variant} | {elapsed * 1000:>11.1f} | {baseline / elapsed:>10.2f}x |")
+    return 0
+
+def benchmark_passes(blocks):
+    """Tiempo y cambios de cada pase de optimización en cada nivel sobre un programa generado"""
+    ast = parse_program(generate_program(blocks))
+    if ast is None:
+        print(f"El programa sintético de {blocks} bloques no es sintácticamente válido")
+        return 1
+    analyzer = SemanticAnalyzer(build_tree=False)
+    analyzer.analyze(ast)
+    for level in range(1, 4):
+        optimizer = Optimizer(level)
+        optimizer.optimize(IRBuilder(analyzer.typed_ast).build(ast))
+        print(f"\n-O{level} ({blocks} bloques): {optimizer.manager.total_time() * 1000:.1f} ms")
+        optimizer.print_pass_report()
+    return 0
+
+def main():
+    # Uso: python benchmark.py [--repeticiones=N] [bloques ...]
+    #      python benchmark.py --ejecucion[=repeticiones del bucle] [--cflags="-O0"] [--repeticiones=N]
+    #      python benchmark.py --subexpresiones[=repeticiones del bucle] [--cflags="-O0"] [--repeticiones=N]
+    #      python benchmark.py --limites[=repeticiones del bucle] [--cflags="-O0"] [--repeticiones=N]
+    #      python benchmark.py --asignacion[=repeticiones] [--cflags="-O0"] [--repeticiones=N]
+    #      python benchmark.py --salida[=líneas] [--cflags="-O0"] [--repeticiones=N]
+    #      python benchmark.py --soa[=recorridos] [--cflags="-O0"] [--repeticiones=N]
+    #      python benchmark.py --vectorizacion[=recorridos] [--cflags="-O3"] [--repeticiones=N]
+    #      python benchmark.py --paralelo[=vueltas] [--cflags="-O2"] [--repeticiones=N]
+    #      python benchmark.py --tareas[=vueltas] [--cflags="-O2"] [--repeticiones=N]
+    #      python benchmark.py --pases[=bloques]
+    repeat = 3
+    sizes = []
+    runtime = None
+    subexpressions = None
+    passes = None
+    bounds = None
+    allocation = None
+    output = None
+    field_scan = None
+    vector = None
+    parallel = None
+    tasks = None
+    cflags = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("--repeticiones="):
+            repeat = int(arg.partition("=")[2])
+        elif arg.startswith("--ejecucion"):
+            runtime = int(arg.partition("=")[2] or DEFAULT_RUNTIME_REPETITIONS)
+        elif arg.startswith("--subexpresiones"):
+            subexpressions = int(arg.partition("=")[2] or DEFAULT_RUNTIME_REPETITIONS)
+        elif arg.startswith("--limites"):
+            bounds = int(arg.partition("=")[2] or DEFAULT_RUNTIME_REPETITIONS)
+        elif arg.startswith("--asignacion"):
+            allocation = int(arg.partition("=")[2] or DEFAULT_ALLOCATION_REPETITIONS)
+        elif arg.startswith("--salida"):
+            output = int(arg.partition("=")[2] or DEFAULT_OUTPUT_LINES)
+        elif arg.startswith("--soa"):
+            field_scan = int(arg.partition("=")[2] or DEFAULT_FIELD_SCAN_REPETITIONS)
+        elif arg.startswith("--vectorizacion"):
+            vector = int(arg.partition("=")[2] or DEFAULT_VECTOR_REPETITIONS)
+        elif arg.startswith("--paralelo"):
+            parallel = int(arg.partition("=")[2] or DEFAULT_PARALLEL_REPETITIONS)
+        elif arg.startswith("--tareas"):
+            tasks = int(arg.partition("=")[2] or DEFAULT_TASK_REPETITIONS)
+        elif arg.startswith("--pases"):
+            passes = int(arg.partition("=")[2] or DEFAULT_SIZES[1])
+        elif arg.startswith("--cflags="):
+            cflags = arg.partition("=")[2]
+        else:
+            sizes.append(int(arg))
+
+    if vector is not None:
+        return benchmark_vectorization(vector, repeat, [cflags] if cflags else DEFAULT_VECTOR_CFLAGS)
+    if parallel is not None:
+        return benchmark_parallel(parallel, repeat, cflags or DEFAULT_PARALLEL_CFLAGS)
+    if tasks is not None:
+        return benchmark_tasks(tasks, repeat, cflags or DEFAULT_PARALLEL_CFLAGS)
+    cflags = cflags or DEFAULT_CFLAGS
+    if runtime is not None:
+        return benchmark_runtime(runtime, repeat, cflags)
+    if subexpressions is not None:
+        return benchmark_subexpressions(subexpressions, repeat, cflags)
+    if bounds is not None:
+        return benchmark_bounds_checks(bounds, repeat, cflags)
+    if allocation is not None:
+        return benchmark_allocation(allocation, repeat, cflags)
+    if output is not None:
+        return benchmark_output(output, repeat, cflags)
+    if field_scan is not None:
+        return benchmark_struct_of_arrays(field_scan, repeat, cflags)
+    if passes is not None:
+        return benchmark_passes(passes)
+
+    print("| Bloques | Líneas Jonson | Instr. IR principal | Instr. IR -O1 | Líneas C | Semántico (ms) | IR (ms) | Optimización (ms) | Generación (ms) | Líneas C/s | Pico generación (KiB) |")
+    print("|---------|---------------|---------------------|---------------|----------|----------------|---------|-------------------|-----------------|------------|-----------------------|")
+    for blocks in sizes or DEFAULT_SIZES:
+        result = benchmark_size(blocks, repeat)
+        if result is None:
+            return 1
+        throughput = result["c_lines"] / result["generation"] if result["generation"] else 0
+        print(f"| {result['blocks']:>7} | {result['source_lines']:>13} | {result['ir_instructions']:>19} | {result['optimized_instructions']:>13} | {result['c_lines']:>8} | "
+              f"{result['analysis'] * 1000:>14.1f} | {result['ir'] * 1000:>7.1f} | {result['optimization'] * 1000:>17.1f} | {result['generation'] * 1000:>15.1f} | {throughput:>10.0f} | "
+              f"{result['generation_peak'] / 1024:>21.0f} |")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import tempfile
+
+# Tamaño a partir del cual el cuerpo del programa pasa de memoria a un archivo temporal
+SPOOL_MAX_SIZE = 1 << 16
+
+# Fragmentos acumulados antes de volcarlos al cuerpo con una sola escritura
+FLUSH_PARTS = 4096
+
+class CEmitter:
+    """Escritor de código C por flujo: indentación cacheada y cabecera de includes reservada"""
+    def __init__(self, output, indent="    "):
+        self.output = output      # Flujo de salida final (archivo, StringIO, sys.stdout...)
+        self.indent_unit = indent
+        self.level = 0            # Nivel de indentación actual
+        self.lines = 0            # Líneas escritas (cabecera incluida al terminar)
+        self.includes = set()     # Cabeceras pedidas durante la generación
+        self._indents = [""]      # Prefijos de indentación ya construidos, por nivel
+        self._pending = []        # Fragmentos aún no escritos en el cuerpo
+
+        # El cuerpo se escribe a medida que se genera; los includes se conocen al final
+        # y se anteponen en la sección de cabecera reservada al cerrar el emisor
+        self._body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, mode="w+", encoding="utf-8")
+
+    def include(self, header):
+        """Pide una cabecera estándar (p. ej. "stdio.h") para la sección de includes"""
+        self.includes.add(header)
+
+    def indent(self):
+        self.level += 1
+        if self.level == len(self._indents):
+            self._indents.append(self._indents[-1] + self.indent_unit)
+
+    def dedent(self):
+        self.level -= 1
+
+    def line(self, *parts):
+        """Escribe una línea con la indentación actual a partir de sus fragmentos"""
+        pending = self._pending
+        if parts and parts != ("",):
+            pending.append(self._indents[self.level])
+            pending.extend(parts)
+        pending.append("\n")
+        self.lines += 1
+        
+        if len(pending) >= FLUSH_PARTS:
+            self._flush()
+
+    def _flush(self):
+        self._body.write("".join(self._pending))
+        self._pending.clear()
+
+    def finish(self):
+        """Escribe la cabecera de includes seguida del cuerpo en la salida y libera el cuerpo"""
+        write = self.output.write
+        for header in sorted(self.includes):
+            write(f"#include <{header}>\n")
+        write("\n")
+        self.lines += len(self.includes) + 1
+
+        # Copiar el cuerpo por bloques para no cargarlo entero en memoria
+        self._flush()
+        self._body.seek(0)
+        while True:
+            chunk = self._body.read(1 << 16)
+            if not chunk:
+                break
+            write(chunk)
+        self._body.close()
+        return self.lines
@@ -0,0 +1,492 @@
+# Funciones de soporte que el generador antepone al programa C cuando el código las usa.
+# Cada fragmento va con las cabeceras estándar que necesita.
+
+# Acceso fuera de los límites de un array (modo seguro)
+BOUNDS_ERROR_HEADERS = ("stdlib.h",)
+BOUNDS_ERROR = r"""
+// Acceso fuera de los límites de un array (modo seguro)
+static void jonson_fuera_de_rango(int indice, int longitud) {
+#ifdef JONSON_SALIDA_TAMANO
+    jonson_vaciar_salida();   // Lo impreso antes del error sale antes que el mensaje
+#endif
+    fprintf(stderr, "Error: índice %d fuera de un array de %d elementos\n", indice, longitud);
+    exit(1);
+}
+"""
+
+# Salida de imprimir: escritores por tipo sobre un buffer propio que se vuelca al llenarse y al terminar
+# el programa (el generador registra jonson_vaciar_salida con atexit)
+OUTPUT_HEADERS = ("stdlib.h", "string.h", "math.h")
+OUTPUT_RUNTIME = r"""
+// Salida de imprimir: cada tipo tiene su escritor, que da el mismo texto que printf sin interpretar
+// un formato, y escribe en un buffer que se vuelca en stdout al llenarse y al terminar el programa
+#define JONSON_SALIDA_TAMANO (1 << 16)
+
+static char jonson_salida[JONSON_SALIDA_TAMANO];
+static int jonson_salida_usado = 0;
+
+static void jonson_vaciar_salida(void) {
+    if (jonson_salida_usado > 0) fwrite(jonson_salida, 1, jonson_salida_usado, stdout);
+    jonson_salida_usado = 0;
+}
+
+// Espacio para n caracteres al final del buffer (n es pequeño)
+static inline char* jonson_salida_espacio(int n) {
+    if (JONSON_SALIDA_TAMANO - jonson_salida_usado < n) jonson_vaciar_salida();
+    return jonson_salida + jonson_salida_usado;
+}
+
+static inline void jonson_escribir(const char* texto, int longitud) {
+    if (JONSON_SALIDA_TAMANO - jonson_salida_usado < longitud) {
+        jonson_vaciar_salida();
+        if (longitud > JONSON_SALIDA_TAMANO) {
+            fwrite(texto, 1, longitud, stdout);
+            return;
+        }
+    }
+    if (longitud > 0) memcpy(jonson_salida + jonson_salida_usado, texto, longitud);
+    jonson_salida_usado += longitud;
+}
+
+// Texto conocido en compilación (un literal de C) seguido del salto de línea
+#define JONSON_IMPRIMIR_LITERAL(literal) jonson_escribir(literal "\n", (int)sizeof(literal))
+
+static inline void jonson_imprimir_texto(const char* texto, int longitud) {
+    jonson_escribir(texto, longitud);
+    *jonson_salida_espacio(1) = '\n';
+    jonson_salida_usado++;
+}
+
+static inline void jonson_imprimir_caracter(char c) {
+    char* destino = jonson_salida_espacio(2);
+    destino[0] = c;
+    destino[1] = '\n';
+    jonson_salida_usado += 2;
+}
+
+// Como printf("%d\n"): las cifras se sacan de la menos significativa a la más
+static inline void jonson_imprimir_entero(int valor) {
+    char cifras[10];
+    int n = 0;
+    unsigned int absoluto = valor < 0 ? 0u - (unsigned int)valor : (unsigned int)valor;
+    do {
+        cifras[n++] = (char)('0' + absoluto % 10);
+        absoluto /= 10;
+    } while (absoluto > 0);
+    char* destino = jonson_salida_espacio(n + 2);
+    if (valor < 0) *destino++ = '-';
+    while (n > 0) *destino++ = cifras[--n];
+    *destino++ = '\n';
+    jonson_salida_usado = (int)(destino - jonson_salida);
+}
+
+// Como printf("%f\n"): seis decimales redondeados al más cercano (los empates, al par). Un valor
+// de float (24 bits de mantisa) por 10^6 = 2^6 * 15625 (14 bits) es exacto en double, así que el
+// redondeo se hace con enteros; el resto de valores (expresiones en double, enormes, infinitos o
+// NaN) pasan por snprintf
+static inline void jonson_imprimir_flotante(double valor) {
+    double absoluto = valor < 0 ? -valor : valor;
+    if (!(absoluto < 1e12 && (double)(float)absoluto == absoluto)) {
+        char texto[320];   // %f de un double tiene como mucho 309 cifras enteras
+        jonson_escribir(texto, snprintf(texto, sizeof texto, "%f\n", valor));
+        return;
+    }
+    double escalado = absoluto * 1e6;
+    unsigned long long millonesimas = (unsigned long long)escalado;
+    double resto = escalado - (double)millonesimas;
+    if (resto > 0.5 || (resto == 0.5 && (millonesimas & 1))) millonesimas++;
+    unsigned long long parte_entera = millonesimas / 1000000;
+    unsigned int decimales = (unsigned int)(millonesimas % 1000000);
+    char cifras[20];
+    int n = 0;
+    do {
+        cifras[n++] = (char)('0' + parte_entera % 10);
+        parte_entera /= 10;
+    } while (parte_entera > 0);
+    char* destino = jonson_salida_espacio(n + 9);
+    if (signbit(valor)) *destino++ = '-';
+    while (n > 0) *destino++ = cifras[--n];
+    *destino++ = '.';
+    for (int i = 5; i >= 0; i--) {
+        destino[i] = (char)('0' + decimales % 10);
+        decimales /= 10;
+    }
+    destino += 6;
+    *destino++ = '\n';
+    jonson_salida_usado = (int)(destino - jonson_salida);
+}
+"""
+
+# Memoria de las cadenas y los arrays dinámicos. El runtime reserva con JONSON_RESERVAR(n), amplía
+# con JONSON_AMPLIAR(p, antes, n) y suelta con JONSON_SOLTAR(p, n); el generador antepone una de
+# las dos implementaciones
+MALLOC_HEADERS = ("stdlib.h",)
+MALLOC_RUNTIME = r"""
+// Memoria del runtime: cada bloque se reserva y se libera por separado con malloc
+#define JONSON_RESERVAR(n) malloc(n)
+#define JONSON_AMPLIAR(p, antes, n) realloc((p), (n))
+#define JONSON_SOLTAR(p, n) free(p)
+"""
+
+# Arena (--arena): reservas avanzando un puntero dentro de regiones grandes
+ARENA_HEADERS = ("stdlib.h", "string.h")
+ARENA_RUNTIME = r"""
+// Memoria del runtime en una arena (jonson_rt): regiones grandes que se reparten avanzando un
+// puntero, en bloques de 16, 32, 64... bytes. Soltar el último bloque repartido devuelve su espacio
+// a la región (los métodos sueltan lo suyo al retornar en orden inverso); cualquier otro bloque
+// queda en una lista de libres de su medida para la siguiente reserva igual, así que reasignar
+// cadenas en un bucle no hace crecer la memoria. Las regiones se liberan al terminar el programa
+typedef struct jonson_rt_region {
+    struct jonson_rt_region* anterior;
+    size_t usado;
+    size_t tamano;
+    char datos[];
+} jonson_rt_region;
+
+#define JONSON_RT_REGION ((size_t)1 << 20)
+#define JONSON_RT_CLASES 48
+#define JONSON_RT_MEDIDA(clase) ((size_t)16 << (clase))
+
+// Con tareas, cada hilo reparte de su propia arena (las regiones de los otros hilos no se liberan)
+#ifndef JONSON_RT_LOCAL
+#define JONSON_RT_LOCAL
+#endif
+
+static JONSON_RT_LOCAL jonson_rt_region* jonson_rt_arena = NULL;
+static JONSON_RT_LOCAL void* jonson_rt_libres[JONSON_RT_CLASES];
+
+// Medida (16 << clase) del bloque en el que caben n bytes
+static inline int jonson_rt_clase(size_t n) {
+    if (n <= 16) return 0;
+#if defined(__GNUC__)
+    return (int)(sizeof(unsigned long long) * 8) - __builtin_clzll((unsigned long long)(n - 1)) - 4;
+#else
+    int clase = 1;
+    while (JONSON_RT_MEDIDA(clase) < n) clase++;
+    return clase;
+#endif
+}
+
+static void* jonson_rt_reservar(size_t n) {
+    int clase = jonson_rt_clase(n);
+    void* libre = jonson_rt_libres[clase];
+    if (libre != NULL) {
+        jonson_rt_libres[clase] = *(void**)libre;
+        return libre;
+    }
+    n = JONSON_RT_MEDIDA(clase);
+    jonson_rt_region* region = jonson_rt_arena;
+    if (region == NULL || region->tamano - region->usado < n) {
+        size_t tamano = n > JONSON_RT_REGION ? n : JONSON_RT_REGION;
+        region = malloc(sizeof(jonson_rt_region) + tamano);
+        if (region == NULL) {
+            fprintf(stderr, "Error: memoria agotada\n");
+            exit(1);
+        }
+        region->anterior = jonson_rt_arena;
+        region->usado = 0;
+        region->tamano = tamano;
+        jonson_rt_arena = region;
+    }
+    void* bloque = region->datos + region->usado;
+    region->usado += n;
+    return bloque;
+}
+
+// Si el bloque de la clase indicada es el último repartido de la región actual
+static inline int jonson_rt_ultimo(void* p, int clase) {
+    return jonson_rt_arena != NULL && (char*)p + JONSON_RT_MEDIDA(clase) == jonson_rt_arena->datos + jonson_rt_arena->usado;
+}
+
+static inline void jonson_rt_soltar(void* p, size_t n) {
+    if (p == NULL) return;
+    int clase = jonson_rt_clase(n);
+    if (jonson_rt_ultimo(p, clase)) {
+        jonson_rt_arena->usado -= JONSON_RT_MEDIDA(clase);
+        return;
+    }
+    *(void**)p = jonson_rt_libres[clase];
+    jonson_rt_libres[clase] = p;
+}
+
+// Amplía un bloque de antes a n bytes: si cabe en su medida no cambia; si no hay un libre de la
+// nueva medida, el último crece en su sitio si cabe en la región; el resto se copia y se suelta
+static void* jonson_rt_ampliar(void* p, size_t antes, size_t n) {
+    if (p == NULL) return jonson_rt_reservar(n);
+    int clase = jonson_rt_clase(antes);
+    int nueva = jonson_rt_clase(n);
+    if (nueva <= clase) return p;
+    size_t crecimiento = JONSON_RT_MEDIDA(nueva) - JONSON_RT_MEDIDA(clase);
+    if (jonson_rt_libres[nueva] == NULL && jonson_rt_ultimo(p, clase)
+            && jonson_rt_arena->tamano - jonson_rt_arena->usado >= crecimiento) {
+        jonson_rt_arena->usado += crecimiento;
+        return p;
+    }
+    void* bloque = jonson_rt_reservar(n);
+    memcpy(bloque, p, antes);
+    jonson_rt_soltar(p, antes);
+    return bloque;
+}
+
+// Libera todas las regiones (al terminar el programa)
+static void jonson_rt_liberar(void) {
+    while (jonson_rt_arena != NULL) {
+        jonson_rt_region* anterior = jonson_rt_arena->anterior;
+        free(jonson_rt_arena);
+        jonson_rt_arena = anterior;
+    }
+}
+
+#define JONSON_RESERVAR(n) jonson_rt_reservar(n)
+#define JONSON_AMPLIAR(p, antes, n) jonson_rt_ampliar((p), (antes), (n))
+#define JONSON_SOLTAR(p, n) jonson_rt_soltar((p), (n))
+"""
+
+# Cadenas de Jonson (tipo cadena)
+STRING_HEADERS = ("string.h",)
+STRING_RUNTIME = r"""
+// Cadena de Jonson: texto con su longitud y la capacidad del buffer. Un literal apunta a memoria
+// estática (capacidad 0) y un parámetro al buffer del llamador (JSTR_PRESTADA): los dos se copian
+// a un buffer propio en la primera modificación
+typedef struct jstr {
+    char* datos;
+    int longitud;
+    int capacidad;
+} jstr;
+
+#define JSTR_PRESTADA (-1)
+#define JSTR(literal) ((jstr){(char*)(literal), (int)sizeof(literal) - 1, 0})
+
+// Garantiza espacio para longitud caracteres y el terminador duplicando la capacidad
+static inline void jstr_reservar(jstr* s, int longitud) {
+    if (longitud < s->capacidad) return;
+    int capacidad = s->capacidad > 0 ? s->capacidad : 16;
+    while (capacidad <= longitud) capacidad *= 2;
+    if (s->capacidad > 0) {
+        s->datos = JONSON_AMPLIAR(s->datos, s->capacidad, capacidad);
+    } else {
+        char* datos = JONSON_RESERVAR(capacidad);
+        if (s->longitud > 0) memcpy(datos, s->datos, s->longitud);
+        datos[s->longitud] = '\0';
+        s->datos = datos;
+    }
+    s->capacidad = capacidad;
+}
+
+static inline void jstr_liberar(jstr* s) {
+    if (s->capacidad > 0) JONSON_SOLTAR(s->datos, s->capacidad);
+    s->datos = NULL;
+    s->longitud = 0;
+    s->capacidad = 0;
+}
+
+// En orden inverso, para que la arena recupere el espacio
+static inline void jstr_liberar_todas(jstr* s, int n) {
+    for (int i = n - 1; i >= 0; i--) jstr_liberar(&s[i]);
+}
+
+// Resultado de una llamada que no se usa
+static inline void jstr_descartar(jstr s) {
+    jstr_liberar(&s);
+}
+
+// El parámetro sigue siendo del llamador: se copia antes de modificarlo
+static inline void jstr_prestar(jstr* s) {
+    if (s->capacidad > 0) s->capacidad = JSTR_PRESTADA;
+}
+
+// Copia con buffer propio (un literal se comparte)
+static inline jstr jstr_copia(jstr s) {
+    if (s.capacidad == 0) return s;
+    jstr copia = {NULL, 0, 0};
+    jstr_reservar(&copia, s.longitud);
+    if (s.longitud > 0) memcpy(copia.datos, s.datos, s.longitud);
+    copia.datos[s.longitud] = '\0';
+    copia.longitud = s.longitud;
+    return copia;
+}
+
+// Parámetro retornado: si sigue siendo del llamador se copia
+static inline jstr jstr_devolver(jstr s) {
+    return s.capacidad == JSTR_PRESTADA ? jstr_copia(s) : s;
+}
+
+// destino = origen, reutilizando el buffer del destino
+static inline void jstr_asignar(jstr* destino, jstr origen) {
+    if (origen.datos == destino->datos && origen.longitud == destino->longitud) return;
+    if (origen.capacidad == 0 && destino->capacidad <= 0) {
+        *destino = origen;
+        return;
+    }
+    destino->longitud = 0;
+    jstr_reservar(destino, origen.longitud);
+    if (origen.longitud > 0) memcpy(destino->datos, origen.datos, origen.longitud);
+    destino->datos[origen.longitud] = '\0';
+    destino->longitud = origen.longitud;
+}
+
+// destino = valor, que pasa a ser del destino (resultado de una llamada)
+static inline void jstr_mover(jstr* destino, jstr valor) {
+    if (destino->capacidad > 0 && destino->datos != valor.datos) JONSON_SOLTAR(destino->datos, destino->capacidad);
+    *destino = valor;
+}
+
+// destino += otra, en tiempo amortizado proporcional a otra
+static inline void jstr_anadir(jstr* destino, jstr otra) {
+    int longitud = destino->longitud + otra.longitud;
+    int propia = otra.datos == destino->datos;
+    jstr_reservar(destino, longitud);
+    if (otra.longitud > 0) memcpy(destino->datos + destino->longitud, propia ? destino->datos : otra.datos, otra.longitud);
+    destino->datos[longitud] = '\0';
+    destino->longitud = longitud;
+}
+
+// destino = a + b
+static inline void jstr_concatenar(jstr* destino, jstr a, jstr b) {
+    if (b.capacidad > 0 && b.datos == destino->datos) {
+        // destino = a + destino: se construye aparte para no sobrescribir b
+        jstr resultado = jstr_copia(a);
+        jstr_anadir(&resultado, b);
+        jstr_mover(destino, resultado);
+        return;
+    }
+    jstr_asignar(destino, a);
+    jstr_anadir(destino, b);
+}
+
+static inline bool jstr_igual(jstr a, jstr b) {
+    return a.longitud == b.longitud && (a.longitud == 0 || memcmp(a.datos, b.datos, a.longitud) == 0);
+}
+"""
+
+# Arrays dinámicos (arrays locales con los que se llama a agregar); el generador define un tipo
+# con JARR_DEFINIR para cada tipo de elemento que usa el programa
+ARRAY_RUNTIME = r"""
+// Array dinámico de Jonson: elementos, cuántos hay y cuántos caben. agregar duplica la capacidad
+// cuando se llena, así que añadir n elementos copia O(n) elementos en total
+#define JARR_DEFINIR(nombre, tipo) \
+    typedef struct nombre { tipo* datos; int longitud; int capacidad; } nombre; \
+    static inline void nombre##_agregar(nombre* a, tipo valor) { \
+        if (a->longitud == a->capacidad) { \
+            int capacidad = a->capacidad > 0 ? a->capacidad * 2 : 8; \
+            a->datos = JONSON_AMPLIAR(a->datos, a->capacidad * sizeof(tipo), capacidad * sizeof(tipo)); \
+            a->capacidad = capacidad; \
+        } \
+        a->datos[a->longitud++] = valor; \
+    }
+"""
+
+# Bucles por elementos (desde -O2): el generador los emite como un 'for' precedido de JONSON_SIMD
+SIMD_RUNTIME = r"""
+// Bucle por elementos: sus iteraciones no dependen unas de otras y se pueden vectorizar. Con
+// OpenMP (-fopenmp) es un bucle 'omp simd'; si no, se indica a GCC o a Clang que no hay
+// dependencias entre iteraciones
+#if defined(_OPENMP)
+#define JONSON_SIMD _Pragma("omp simd")
+#elif defined(__clang__)
+#define JONSON_SIMD _Pragma("clang loop vectorize(assume_safety)")
+#elif defined(__GNUC__)
+#define JONSON_SIMD _Pragma("GCC ivdep")
+#else
+#define JONSON_SIMD
+#endif
+"""
+
+# 'para' paralelos: el generador los emite como un 'for' precedido de JONSON_PARALELO
+PARALLEL_RUNTIME = r"""
+// 'para' paralelo: con OpenMP (-fopenmp) sus iteraciones se reparten entre hilos, con una copia
+// por hilo de cada variable de reducción que se combina al terminar; sin OpenMP el bucle es
+// secuencial
+#if defined(_OPENMP)
+#define JONSON_PARALELO(clausulas) _Pragma(clausulas)
+#else
+#define JONSON_PARALELO(clausulas)
+#endif
+"""
+
+# Tareas de principal: el generador emite cada tarea como una función que recibe su entorno y la
+# lanza con jonson_lanzar; esperar es jonson_esperar. Va antes de la memoria del runtime, que con
+# JONSON_RT_LOCAL da a cada hilo su propia arena
+TASK_HEADERS = ("pthread.h", "stdlib.h", "unistd.h")
+TASK_RUNTIME = r"""
+// Tareas: un grupo de hilos (pthreads) saca las tareas lanzadas de una cola circular. Los hilos se
+// crean con la primera tarea, uno menos que procesadores (o los que diga la variable de entorno
+// JONSON_HILOS), porque al esperar el hilo principal también ejecuta las tareas que siguen en la
+// cola. Sin hilos o con la cola llena, la tarea se ejecuta en el acto en el hilo que la lanza
+#define JONSON_RT_LOCAL _Thread_local
+#define JONSON_COLA_TAREAS 64
+
+typedef struct jonson_tarea {
+    void (*funcion)(void*);
+    void* datos;
+} jonson_tarea;
+
+static struct {
+    pthread_mutex_t cerrojo;
+    pthread_cond_t hay_tareas;
+    pthread_cond_t terminadas;
+    jonson_tarea cola[JONSON_COLA_TAREAS];
+    int primera;        // Posición en la cola de la siguiente tarea
+    int encoladas;      // Tareas en la cola
+    int pendientes;     // Tareas encoladas o en ejecución en el grupo
+    int hilos;          // Hilos del grupo (-1 antes de la primera tarea)
+} jonson_tareas = {PTHREAD_MUTEX_INITIALIZER, PTHREAD_COND_INITIALIZER, PTHREAD_COND_INITIALIZER, .hilos = -1};
+
+// Saca de la cola la siguiente tarea y la ejecuta sin el cerrojo (que se tiene al llamar y al volver)
+static void jonson_ejecutar_siguiente(void) {
+    jonson_tarea tarea = jonson_tareas.cola[jonson_tareas.primera];
+    jonson_tareas.primera = (jonson_tareas.primera + 1) % JONSON_COLA_TAREAS;
+    jonson_tareas.encoladas--;
+    pthread_mutex_unlock(&jonson_tareas.cerrojo);
+    tarea.funcion(tarea.datos);
+    pthread_mutex_lock(&jonson_tareas.cerrojo);
+    if (--jonson_tareas.pendientes == 0) pthread_cond_broadcast(&jonson_tareas.terminadas);
+}
+
+static void* jonson_hilo(void* argumento) {
+    (void)argumento;
+    pthread_mutex_lock(&jonson_tareas.cerrojo);
+    for (;;) {
+        while (jonson_tareas.encoladas == 0) pthread_cond_wait(&jonson_tareas.hay_tareas, &jonson_tareas.cerrojo);
+        jonson_ejecutar_siguiente();
+    }
+    return NULL;
+}
+
+// Crea los hilos del grupo (con el cerrojo tomado)
+static void jonson_crear_hilos(void) {
+    const char* variable = getenv("JONSON_HILOS");
+    long hilos = variable != NULL ? strtol(variable, NULL, 10) : sysconf(_SC_NPROCESSORS_ONLN) - 1;
+    jonson_tareas.hilos = 0;
+    for (long i = 0; i < hilos; i++) {
+        pthread_t hilo;
+        if (pthread_create(&hilo, NULL, jonson_hilo, NULL) != 0) break;
+        pthread_detach(hilo);
+        jonson_tareas.hilos++;
+    }
+}
+
+static void jonson_lanzar(void (*funcion)(void*), void* datos) {
+    pthread_mutex_lock(&jonson_tareas.cerrojo);
+    if (jonson_tareas.hilos < 0) jonson_crear_hilos();
+    if (jonson_tareas.hilos == 0 || jonson_tareas.encoladas == JONSON_COLA_TAREAS) {
+        pthread_mutex_unlock(&jonson_tareas.cerrojo);
+        funcion(datos);
+        return;
+    }
+    int posicion = (jonson_tareas.primera + jonson_tareas.encoladas) % JONSON_COLA_TAREAS;
+    jonson_tareas.cola[posicion] = (jonson_tarea){funcion, datos};
+    jonson_tareas.encoladas++;
+    jonson_tareas.pendientes++;
+    pthread_cond_signal(&jonson_tareas.hay_tareas);
+    pthread_mutex_unlock(&jonson_tareas.cerrojo);
+}
+
+// Espera a que terminen las tareas lanzadas, ejecutando mientras las que siguen en la cola
+static void jonson_esperar(void) {
+    pthread_mutex_lock(&jonson_tareas.cerrojo);
+    while (jonson_tareas.encoladas > 0) jonson_ejecutar_siguiente();
+    while (jonson_tareas.pendientes > 0) pthread_cond_wait(&jonson_tareas.terminadas, &jonson_tareas.cerrojo);
+    pthread_mutex_unlock(&jonson_tareas.cerrojo);
+}
+"""
@@ -1,1162 +1,961 @@
-from syntax_analyzer import Node
+from semantic_analyzer import SemanticAnalyzer
+from ir_builder import IRBuilder
+from ir import (BINARY_SYMBOLS, OP_MOV, OP_ADD, OP_EQ, OP_NE, OP_LT, OP_GT, OP_LE, OP_GE, OP_NOT, OP_I2F,
+                OP_LOAD_INDEX, OP_STORE_INDEX, OP_CONCAT, OP_CALL, OP_PRINT, OP_CHECK_INDEX, OP_APPEND, OP_CLEAR,
+                OP_SPAWN, OP_WAIT, PURE_OPCODES, TERM_JUMP, TERM_BRANCH, TERM_RETURN,
+                DEFAULT_ARRAY_SIZE, ZERO_VALUES, VALUE_VAR, VALUE_TEMP, VALUE_CONST, VALUE_MEMBER)
+from c_emitter import CEmitter
+from struct_layout import StructLayout
+from c_runtime import (BOUNDS_ERROR, BOUNDS_ERROR_HEADERS, OUTPUT_RUNTIME, OUTPUT_HEADERS, MALLOC_RUNTIME,
+                       MALLOC_HEADERS, ARENA_RUNTIME, ARENA_HEADERS, STRING_RUNTIME, STRING_HEADERS, ARRAY_RUNTIME,
+                       SIMD_RUNTIME, PARALLEL_RUNTIME, TASK_RUNTIME, TASK_HEADERS)
+from constant_propagation import NOT_CONSTANT, parse_constant
+import io
 import re
 
+# Escritor del runtime de salida para cada tipo de Jonson (las cadenas se escriben con su longitud)
+PRINT_WRITERS = {
+    "entero": "jonson_imprimir_entero",
+    "flotante": "jonson_imprimir_flotante",
+    "booleano": "jonson_imprimir_entero",
+    "caracter": "jonson_imprimir_caracter"
+}
+
+# Tipos cuyos valores son cadenas del runtime (jstr)
+STRING_TYPES = ("cadena", "cadena[]")
+
+# Operaciones del IR que producen una expresión C (su temporal puede plegarse en el uso)
+EXPRESSION_OPCODES = frozenset(BINARY_SYMBOLS) | {OP_MOV, OP_NOT, OP_I2F, OP_LOAD_INDEX, OP_CALL}
+
 class CodeGenerator:
-    def __init__(self):
-        self.code = []
-        self.indent_level = 0
-        self.current_scope = "global"
-        self.class_definitions = {}
-        self.includes = set()
-        self.declared_variables = set()
-        
-    def generate(self, ast_root):
-        """Genera código C a partir del AST"""
-        self.code = []
-        self.indent_level = 0
-        self.current_scope = "global"
-        self.class_definitions = {}
-        self.includes = set()
-        self.declared_variables = set()
-        
-        # Añadir includes estándar
-        self.includes.add("#include <stdio.h>")
-        self.includes.add("#include <stdlib.h>")
-        self.includes.add("#include <string.h>")
-        self.includes.add("#include <stdbool.h>")
-        
+    """Genera el programa C. Con arena, las cadenas y los arrays dinámicos se reservan en la arena
+    del runtime (jonson_rt) en lugar de con malloc; con reorder, los miembros de las estructuras de
+    las clases se ordenan para minimizar el relleno. soa (True para todas las clases o los nombres
+    de algunas) emite los arrays locales de objetos de esas clases que solo se usan campo a campo
+    (arr[i].campo) como un array C por campo (struct-of-arrays)"""
+    def __init__(self, arena=False, reorder=False, soa=None):
+        self.arena = arena
+        self.reorder = reorder
+        self.soa = soa
+        self.struct_sizes = {}        # Clase -> (bytes en el orden del código, bytes emitidos)
+        self.soa_report = []          # "función: array -> columnas" de los arrays emitidos por campos
+        self.soa_arrays = {}          # Array de objetos de la función en curso -> {campo: array C}
+        self.vector_loops = {}        # Cabecera -> 'para' por elementos de la función en curso
+        self.loop_starts = set()      # (bloque, posición) de los valores iniciales que asigna su 'for'
+        self.restricted = {}          # Array local -> puntero restrict a sus datos en el 'for' en curso
+        self.parallel_loops = {}      # Cabecera -> 'para' paralelo de la función en curso (ver _parallel_loops)
+        self.continued = None         # Bloque de actualización del 'para' paralelo en curso: saltar a él es continue
+        self.allocates = False        # Si el programa en curso usa memoria del runtime
+        self.prints = False           # Si el programa en curso usa el runtime de salida
+        self.emitter = None           # Emisor por flujo del programa en curso
+        self.typed_ast = None         # AST anotado por el análisis semántico
+        self.ir_program = None        # Programa en código de tres direcciones
+
+    def generate(self, ast_root, typed_ast=None, ir_program=None):
+        """Genera código C a partir del AST anotado y lo devuelve como cadena"""
+        output = io.StringIO()
+        self.generate_to(output, ast_root, typed_ast, ir_program)
+        return output.getvalue()
+
+    def generate_to(self, output, ast_root, typed_ast=None, ir_program=None):
+        """Genera código C escribiéndolo en un flujo a medida que se recorre el programa; devuelve el número de líneas"""
+        self.emitter = CEmitter(output)
+
+        # Sin AST anotado, analizar el programa para obtener tipos y símbolos
+        if typed_ast is None and ast_root:
+            analyzer = SemanticAnalyzer(build_tree=False)
+            analyzer.analyze(ast_root)
+            typed_ast = analyzer.typed_ast
+        self.typed_ast = typed_ast
+
+        # Los cuerpos de las funciones se generan desde el código de tres direcciones
+        if ir_program is None and ast_root:
+            ir_program = IRBuilder(typed_ast).build(ast_root)
+        self.ir_program = ir_program
+        self.layout = StructLayout(typed_ast, ir_program.member_array_sizes if ir_program else None)
+        self.struct_sizes = {}
+        self.soa_report = []
+
+        # Cabeceras que usa todo programa; el resto se piden al emitir el código que las necesita
+        self.emitter.include("stdio.h")
+        self.emitter.include("stdbool.h")
+
         # Añadir definiciones básicas
-        self.code.append("// Código generado automáticamente desde un archivo .jonson")
-        self.code.append("")
-        
+        self._add_line("// Código generado automáticamente desde un archivo .jonson")
+        self._add_line("")
+        strings = ir_program is not None and self._uses_strings()
+        arrays = self._dynamic_array_types() if ir_program is not None else []
+        self.allocates = bool(strings or arrays)
+        if ir_program is not None and self._uses_opcode(OP_SPAWN):
+            self._emit_runtime(TASK_RUNTIME, TASK_HEADERS)
+        if self.allocates:
+            self._emit_runtime(*((ARENA_RUNTIME, ARENA_HEADERS) if self.arena else (MALLOC_RUNTIME, MALLOC_HEADERS)))
+        if strings:
+            self._emit_runtime(STRING_RUNTIME, STRING_HEADERS)
+        if arrays:
+            self._emit_runtime(ARRAY_RUNTIME, ())
+            for tipo in arrays:
+                self._add_line(f"JARR_DEFINIR({self._dynamic_type(tipo)}, {self._map_type(tipo[:-2])})")
+            self._add_line("")
+        self.prints = ir_program is not None and self._uses_opcode(OP_PRINT)
+        if self.prints:
+            self._emit_runtime(OUTPUT_RUNTIME, OUTPUT_HEADERS)
+        if ir_program is not None and self._uses_opcode(OP_CHECK_INDEX):
+            self._emit_runtime(BOUNDS_ERROR, BOUNDS_ERROR_HEADERS)
+        if ir_program is not None and any(loop.vectorizable for function in ir_program.functions for loop in function.loops):
+            self._emit_runtime(SIMD_RUNTIME, ())
+        if ir_program is not None and any(loop.parallel for function in ir_program.functions for loop in function.loops):
+            self._emit_runtime(PARALLEL_RUNTIME, ())
+
         # Procesar el AST
         if ast_root:
             self._process_node(ast_root)
-            
-        # Componer el código final
-        final_code = []
-        
-        # Añadir includes
-        for include in sorted(self.includes):
-            final_code.append(include)
-        
-        final_code.append("")
-        
-        # Añadir el resto del código
-        final_code.extend(self.code)
-        
-        # Obtener el código como cadena
-        code_str = "\n".join(final_code)
-        
-        # Lista de correcciones manuales para problemas específicos
-        corrections = [
-            # 1. Corregir asignaciones problemáticas a edadPersona
-            (r"edadPersona = Persona_establecerEdad\(&p\);", 
-             "Persona_establecerEdad(&p, 25);\nedadPersona = Persona_obtenerEdad(&p);"),
-            
-            # 2. Corregir acceso incorrecto a miembros de objetos en strings
-            (r"strcpy\((\w+)\.nombre, ", r"strcpy(\1.nombre, "),
-            
-            # 3. Corregir formato de impresión para cadenas
-            (r'printf\("%d\\n", ([\w\.]+)\);', self._fix_printf_format),
-            
-            # 4. Corregir doble break en casos switch
-            (r"break;\s*break;", "break;"),
-            
-            # 5. Corregir inicialización de arrays
-            (r"int numeros;", "int numeros[] = {1, 2, 3};"),
-            (r"int\* numeros;", "int numeros[] = {1, 2, 3};"),
-            
-            # 6. Eliminar retornos duplicados
-            (r"return 0;\s*return 0;", "return 0;"),
-            
-            # 7. Corregir variables declaradas pero no inicializadas
-            (r"int a;\s*int b;", "int a = 5, b = 10;"),
-            
-            # 8. Corregir variables duplicadas en declaraciones
-            (r"int establecerEdad;", ""),
-            (r"int obtenerEdad;", ""),
-            (r"int nombre;", ""),
-            
-            # 9. Asegurar tamaño suficiente en mensaje
-            (r"char mensaje\[\d+\];", "char mensaje[256];"),
-            (r"char\* mensaje;", "char mensaje[256];"),
-            
-            # 10. Corregir acceso a numeros[i] donde numeros no está bien inicializado
-            (r"numeros\[i\] = \(numeros\[i\] \* 2\);", "numeros[i] = numeros[i] * 2;"),
-            
-            # 11. Corregir caso específico de mensaje con la asignación final en codigo4
-            (r'strcpy\(mensaje, "Fin del programa"\);', 'strcpy(mensaje, "Fin del programa");'),
-            (r'printf\("%d\\n", mensaje\);', 'printf("%s\\n", mensaje);'),
-            
-            # 12. Aseguramos que se inicialice mensaje al principio del main
-            (r'(\s*)temperatura = 36\.5;', r'\1temperatura = 36.5;\n\1strcpy(mensaje, "Hola Mundo");'),
-            
-            # 13. Corregir asignaciones directas a arrays de caracteres
-            (r'mensaje = "([^"]*)";', r'strcpy(mensaje, "\1");'),
-            
-            # 14. Corregir asignación directa a objetos
-            (r'(\w+) = "([^"]*)";', lambda m: f'strcpy({m.group(1)}.nombre, "{m.group(2)}");' if m.group(1) != 'mensaje' else f'strcpy({m.group(1)}, "{m.group(2)}");'),
-            
-            # 15. Corregir asignación de función void
-            (r'(\w+) = Persona_establecerEdad\(([^,]+), (\d+)\);', r'Persona_establecerEdad(\2, \3);\n\1 = Persona_obtenerEdad(\2);'),
-            
-            # 16. Asegurar inicialización de variables a y b
-            (r'int main\(\) \{', r'int main() {\n    int a = 5, b = 10;'),
-            (r'int a;\s*float resultado;', r'int a = 5;\n    int b = 10;\n    float resultado;'),
-        ]
-        
-        # Aplicar todas las correcciones
-        for pattern, replacement in corrections:
-            if callable(replacement):
-                code_str = re.sub(pattern, replacement, code_str)
-            else:
-                code_str = code_str.replace(pattern, replacement) if isinstance(pattern, str) and not pattern.startswith(r"\\") else re.sub(pattern, replacement, code_str)
-        
-        return code_str
-        
-    def _fix_printf_format(self, match):
-        """Determina el formato correcto para printf basado en el tipo de variable"""
-        var_name = match.group(1)
-        
-        # Verificar si es probable que sea una cadena
-        if var_name in ["mensaje", "nombre", "texto", "cadena", "str"] or (
-            "." in var_name and var_name.split(".")[-1] in ["nombre", "mensaje", "texto"]):
-            return f'printf("%s\\n", {var_name});'
-        
-        # Determinar si es float o int basado en nombres típicos
-        if var_name in ["temperatura", "promedio", "precio"] or (
-            "." in var_name and var_name.split(".")[-1] in ["temperatura", "promedio", "precio"]):
-            return f'printf("%f\\n", {var_name});'
-            
-        # Por defecto usar formato entero
-        return f'printf("%d\\n", {var_name});'
-    
-    def _add_line(self, line):
+
+        return self.emitter.finish()
+
+    def _uses_opcode(self, op):
+        """Si alguna instrucción del programa IR usa la operación"""
+        return any(op in block.ops for function in self.ir_program.functions for block in function.blocks)
+
+    def _uses_strings(self):
+        """Si el programa tiene algún valor, miembro o retorno de tipo cadena"""
+        for function in self.ir_program.functions:
+            if function.return_type in STRING_TYPES or any(value.type in STRING_TYPES for value in function.values):
+                return True
+        types = self.typed_ast.user_defined_types.values() if self.typed_ast else ()
+        return any(tipo in STRING_TYPES for info in types for tipo in info["members"].values())
+
+    def _dynamic_array_types(self):
+        """Tipos de los arrays dinámicos del programa, en orden de aparición"""
+        types = []
+        for function in self.ir_program.functions:
+            for index in sorted(function.dynamic_arrays):
+                if function.values[index].type not in types:
+                    types.append(function.values[index].type)
+        return types
+
+    def _dynamic_type(self, tipo):
+        """Tipo C del array dinámico de un tipo de array de Jonson (entero[] -> jarr_int)"""
+        return f"jarr_{self._map_type(tipo[:-2])}"
+
+    def _emit_runtime(self, code, headers):
+        """Antepone al programa un fragmento del runtime de C con sus cabeceras"""
+        for header in headers:
+            self.emitter.include(header)
+        for line in code.strip("\n").split("\n"):
+            self._add_line(line)
+        self._add_line("")
+
+    def _has_strings(self, tipo, seen=()):
+        """Si los valores del tipo (una clase o un array) contienen cadenas, directamente o en sus miembros"""
+        tipo = tipo[:-2] if tipo.endswith("[]") else tipo
+        if tipo == "cadena":
+            return True
+        info = self.typed_ast.class_info(tipo) if self.typed_ast else None
+        if info is None or tipo in seen:
+            return False
+        return any(self._has_strings(member, seen + (tipo,)) for member in info["members"].values())
+
+    def _add_line(self, *parts):
         """Añade una línea de código con la indentación actual"""
-        indent = "    " * self.indent_level
-        self.code.append(f"{indent}{line}")
-    
+        self.emitter.line(*parts)
+
     def _process_node(self, node):
-        """Procesa un nodo del AST y genera el código correspondiente"""
+        """Procesa un nodo de nivel superior del AST: declaraciones de clases y principal"""
         if not hasattr(node, 'type'):
             return
-            
-        if node.type == "programa":
-            for child in node.children:
-                self._process_node(child)
-                
-        elif node.type == "declaraciones_clases":
+
+        if node.type in ("programa", "declaraciones_clases"):
             for child in node.children:
                 self._process_node(child)
-                
+
         elif node.type == "declaracion_clase":
             self._process_class_declaration(node)
-                
+
         elif node.type == "principal":
-            self._process_principal(node)
-            
-        elif node.type == "bloque":
-            for child in node.children:
-                self._process_node(child)
-                
-        elif node.type == "sentencias":
-            for child in node.children:
-                self._process_node(child)
-                
-        elif node.type == "sentencia":
-            # Caso especial: Procesamiento directamente de asignaciones específicas
-            if (len(node.children) > 0 and node.children[0].type == "asignacion" and 
-                len(node.children[0].children) >= 2 and 
-                node.children[0].children[0].type == "id" and
-                node.children[0].children[0].leaf == "edadPersona" and
-                node.children[0].children[1].type == "llamada_funcion" and
-                len(node.children[0].children[1].children) >= 1 and
-                node.children[0].children[1].children[0].type == "id" and
-                node.children[0].children[1].children[0].leaf == "Persona_obtenerEdad"):
-                
-                # Generar directamente código corregido para edadPersona = Persona_obtenerEdad(&p)
-                self._add_line("edadPersona = Persona_obtenerEdad(&p);")
-                return
-                
-            # Procesamiento normal
-            for child in node.children:
-                self._process_node(child)
-                
-        elif node.type == "declaracion_variable":
-            self._process_variable_declaration(node)
-                
-        elif node.type == "asignacion":
-            self._process_assignment(node)
-                
-        elif node.type == "sentencia_if":
-            self._process_if_statement(node)
-                
-        elif node.type == "sentencia_while":
-            self._process_while_statement(node)
-                
-        elif node.type == "sentencia_for":
-            self._process_for_statement(node)
-                
-        elif node.type == "sentencia_do_while":
-            self._process_do_while_statement(node)
-                
-        elif node.type == "sentencia_switch":
-            self._process_switch_statement(node)
-                
-        elif node.type == "sentencia_print":
-            self._process_print_statement(node)
-                
-        elif node.type == "llamada_funcion":
-            # Caso especial p(25) - detectarlo y convertirlo a una llamada de método
-            if (len(node.children) >= 2 and node.children[0].type == "id" and 
-                len(node.children[0].leaf) == 1 and  # probablemente un objeto
-                node.children[1].type == "argumentos" and
-                len(node.children[1].children) > 0 and
-                node.children[1].children[0].type == "lista_expresiones"):
-                
-                obj_name = node.children[0].leaf
-                
-                # Verificar si hay un valor numérico en los argumentos
-                if len(node.children[1].children[0].children) > 0:
-                    arg = self._generate_expression(node.children[1].children[0].children[0])
-                    self._add_line(f"Persona_establecerEdad(&{obj_name}, {arg});")
-                    return
-            
-            # Procesamiento normal
-            self._add_line(f"{self._generate_function_call(node)};")
-                
-        elif node.type == "llamada_metodo":
-            call_code = self._generate_method_call(node)
-            if not call_code.endswith(";"):
-                call_code += ";"
-            self._add_line(call_code)
-                
-        elif node.type == "sentencia_return":
-            if len(node.children) > 0:
-                expr = self._generate_expression(node.children[0])
-                self._add_line(f"return {expr};")
-            else:
-                self._add_line("return;")
-                
-        elif node.type == "sentencia_break":
-            self._add_line("break;")
-    
+            # Las funciones de las tareas van antes de main, que las lanza
+            for function in self.ir_program.functions:
+                if function.captures is not None:
+                    self._emit_function(function)
+            self._emit_function(self.ir_program.function("main"))
+
     def _process_class_declaration(self, node):
         """Procesa una declaración de clase y genera la estructura en C"""
         class_name = node.leaf
-        
-        # Almacenar la definición de la clase para uso posterior
-        self.class_definitions[class_name] = {
-            "members": {},
-            "methods": {}
-        }
-        
-        # Generar la estructura para la clase
+        class_info = self.typed_ast.class_info(class_name)
+
+        # Generar la estructura para la clase con los miembros registrados por el análisis
         self._add_line(f"// Definición de la clase {class_name}")
+        if self.reorder:
+            before, after = self.layout.struct_size(class_name), self.layout.struct_size(class_name, True)
+            self.struct_sizes[class_name] = (before, after)
+            self._add_line(f"// Miembros ordenados por alineación: {after} bytes ({before} en el orden del código)")
         self._add_line(f"typedef struct {class_name} {{")
-        self.indent_level += 1
-        
-        # Procesar miembros de la clase
-        if len(node.children) > 0 and node.children[0].type == "miembros_clase":
-            for member in node.children[0].children:
-                if member.type == "miembro_clase":
-                    # Extraer el modificador de acceso (ignorado en C)
-                    access_modifier = "public"
-                    if len(member.children) > 0 and member.children[0].type == "modificador_acceso":
-                        access_modifier = member.children[0].leaf
-                    
-                    # Procesar declaración de variable
-                    if len(member.children) > 1 and member.children[1].type == "declaracion_variable":
-                        var_decl = member.children[1]
-                        if len(var_decl.children) >= 2:
-                            tipo = var_decl.children[0].leaf
-                            tipo_c = self._map_type(tipo)
-                            
-                            # Manejar lista de IDs
-                            if var_decl.children[1].type == "lista_ids":
-                                for id_node in var_decl.children[1].children:
-                                    if id_node.type == "id":
-                                        var_name = id_node.leaf
-                                        
-                                        # Especial para cadenas: usar array fijo de caracteres
-                                        if tipo == "cadena":
-                                            self._add_line(f"char {var_name}[256];  // Asignar tamaño fijo para cadenas")
-                                            tipo_c = "char*"  # Para registro interno
-                                        elif tipo.endswith("[]"):  # Arrays
-                                            base_tipo = tipo[:-2]
-                                            base_tipo_c = self._map_type(base_tipo)
-                                            self._add_line(f"{base_tipo_c} {var_name}[100];  // Array con tamaño por defecto")
-                                        else:
-                                            self._add_line(f"{tipo_c} {var_name};")
-                                            
-                                        self.class_definitions[class_name]["members"][var_name] = {
-                                            "type": tipo_c,
-                                            "access": access_modifier
-                                        }
-                            elif var_decl.children[1].type == "id":
-                                var_name = var_decl.children[1].leaf
-                                
-                                # Especial para cadenas: usar array fijo de caracteres
-                                if tipo == "cadena":
-                                    self._add_line(f"char {var_name}[256];  // Asignar tamaño fijo para cadenas")
-                                    tipo_c = "char*"  # Para registro interno
-                                elif tipo.endswith("[]"):  # Arrays
-                                    base_tipo = tipo[:-2]
-                                    base_tipo_c = self._map_type(base_tipo)
-                                    self._add_line(f"{base_tipo_c} {var_name}[100];  // Array con tamaño por defecto")
-                                else:
-                                    self._add_line(f"{tipo_c} {var_name};")
-                                    
-                                self.class_definitions[class_name]["members"][var_name] = {
-                                    "type": tipo_c,
-                                    "access": access_modifier
-                                }
-        
-        self.indent_level -= 1
+        self.emitter.indent()
+
+        sizes = self.ir_program.member_array_sizes if self.ir_program else {}
+        for member_name, tipo in self.layout.members(class_name, self.reorder):
+            if tipo.endswith("[]"):
+                # Elementos del mayor literal que se asigna al miembro, o tamaño por defecto
+                base_tipo_c = self._map_type(tipo[:-2])
+                size = sizes.get((class_name, member_name))
+                if size is None:
+                    self._add_line(f"{base_tipo_c} {member_name}[{DEFAULT_ARRAY_SIZE}];  // Array con tamaño por defecto")
+                else:
+                    self._add_line(f"{base_tipo_c} {member_name}[{size}];")
+            else:
+                self._add_line(f"{self._map_type(tipo)} {member_name};")
+
+        self.emitter.dedent()
         self._add_line(f"}} {class_name};")
         self._add_line("")
-        
+
         # Generar funciones para los métodos de la clase
-        if len(node.children) > 0 and node.children[0].type == "miembros_clase":
-            for member in node.children[0].children:
-                if member.type == "miembro_clase" and len(member.children) > 1:
-                    # Registrar los métodos de la clase
-                    if member.children[1].type == "declaracion_metodo":
-                        method_node = member.children[1]
-                        if len(method_node.children) >= 2:
-                            method_name = method_node.children[1].leaf
-                            return_type = method_node.children[0].leaf
-                            
-                            # Registrar el método para uso posterior
-                            self.class_definitions[class_name]["methods"][method_name] = {
-                                "return_type": return_type,
-                                "parameters": []
-                            }
-                            
-                            # Registrar parámetros del método
-                            if len(method_node.children) > 2 and method_node.children[2].type == "parametros":
-                                params_node = method_node.children[2]
-                                for param in params_node.children:
-                                    if param.type == "lista_parametros" and len(param.children) >= 2:
-                                        param_type = param.children[0].leaf
-                                        param_name = param.children[1].leaf
-                                        
-                                        self.class_definitions[class_name]["methods"][method_name]["parameters"].append({
-                                            "type": param_type,
-                                            "name": param_name
-                                        })
-                        
-                        # Generar la implementación del método
-                        self._process_method_declaration(member.children[1], class_name)
-    
-    def _process_method_declaration(self, node, class_name):
-        """Procesa una declaración de método y genera la función en C"""
-        if len(node.children) < 3:
-            return
-            
-        return_type = self._map_type(node.children[0].leaf)
-        method_name = node.children[1].leaf
-        
-        # Generar la firma del método
-        self._add_line(f"{return_type} {class_name}_{method_name}({class_name}* this")
-        
-        # Procesar parámetros
-        if len(node.children) > 2 and node.children[2].type == "parametros":
-            params_node = node.children[2]
-            for param in params_node.children:
-                if param.type == "lista_parametros" and len(param.children) >= 2:
-                    param_type = param.children[0].leaf
-                    param_name = param.children[1].leaf
-                    tipo_c = self._map_type(param_type)
-                    self._add_line(f", {tipo_c} {param_name}")
-        
-        self._add_line(") {")
-        self.indent_level += 1
-        
-        # Procesar el cuerpo del método
-        self._process_method_body(node, class_name)
-        
-        self.indent_level -= 1
+        for method_name in class_info["methods"]:
+            function = self.ir_program.function(f"{class_name}_{method_name}")
+            if function is not None:
+                self._emit_function(function)
+
+    def _emit_function(self, function):
+        """Genera una función C a partir de su IR"""
+        values = function.values
+        if function.class_name:
+            # Métodos: el objeto se recibe como primer parámetro
+            params = [f"{function.class_name}* this"]
+            params.extend(f"{self._map_type(values[p].type)} {values[p].name}" for p in function.params)
+            self._add_line(f"{self._map_type(function.return_type)} {function.c_name}({', '.join(params)}) {{")
+        elif function.captures is not None:
+            # Tareas: reciben el entorno con la dirección de las variables de principal que usan
+            self._emit_environment(function)
+            self._add_line(f"static void {function.c_name}(void* datos) {{")
+        else:
+            self._add_line("int main() {")
+        self.emitter.indent()
+        returns = function.c_name != "main"
+
+        # Declarar todas las variables al inicio: el análisis semántico no deja que las locales
+        # de un bloque oculten a otra ni cambien de tipo, así que basta una variable por nombre
+        folded = self._folded_temps(function)
+        defined = {dst for block in function.blocks for dst in block.dst}
+        # Los temporales de un 'para' por elementos se declaran dentro de su 'for'
+        self.vector_loops = {loop.header: loop for loop in function.loops if loop.vectorizable}
+        self.loop_starts = self._loop_start_moves(function)
+        loop_temps = {dst for loop in self.vector_loops.values()
+                      for index in self._loop_chain(function, loop) for dst in function.blocks[index].dst}
+        # Lo que solo usa el cuerpo de un 'para' paralelo se declara dentro de su 'for'
+        self.parallel_loops = self._parallel_loops(function, folded, loop_temps)
+        loop_locals = {index for parallel in self.parallel_loops.values() for index in parallel["local"]}
+        temps = [index for index, value in enumerate(values)
+                 if value.kind == VALUE_TEMP and index not in folded and index in defined and index not in loop_temps]
+        self.soa_arrays = self._struct_of_arrays(function)
+        declarations = []
+        if function.captures is not None:
+            declarations.append(f"{function.c_name}_entorno* this = datos;" if function.captures else "(void)datos;")
+        for task in self._spawned_tasks(function):
+            declarations.append(f"{task}_entorno {task}_datos;")
+        for index in function.locals + temps:
+            if index in loop_locals:
+                continue
+            if index in self.soa_arrays:
+                declarations.extend(self._soa_declarations(function, index))
+            else:
+                declarations.append(self._local_declaration(function, index))
+        for declaration in declarations:
+            self._add_line(declaration)
+        if declarations:
+            self._add_line("")
+
+        # Cadenas y arrays dinámicos que el método o la tarea libera al retornar (principal termina el programa)
+        self.owned = []
+        if returns:
+            borrowed = [index for index in function.params if values[index].type == "cadena"]
+            self.owned = borrowed + [index for index in function.locals + temps
+                                     if values[index].type in STRING_TYPES or index in function.dynamic_arrays]
+            for index in borrowed:
+                self._add_line("jstr_prestar(&", values[index].name, ");")
+            if borrowed:
+                self._add_line("")
+        else:
+            # Al terminar, por retorno o por exit, se vuelca la salida pendiente y se libera la arena
+            handlers = (["jonson_vaciar_salida"] if self.prints else []) + (["jonson_rt_liberar"] if self.arena and self.allocates else [])
+            for handler in handlers:
+                self._add_line("atexit(", handler, ");")
+            if handlers:
+                self._add_line("")
+
+        self._emit_blocks(function, folded)
+
+        self.emitter.dedent()
         self._add_line("}")
-        self._add_line("")
-    
-    def _process_method_body(self, node, class_name):
-        """Procesa el cuerpo de un método, reemplazando referencias a miembros con this->miembro"""
-        if len(node.children) <= 3:
-            return
-            
-        body_node = node.children[3]
-        if body_node.type != "bloque" or len(body_node.children) == 0:
+        if returns:
+            self._add_line("")
+
+    def _emit_environment(self, function):
+        """Estructura del entorno de una tarea: la dirección de cada variable de principal que usa"""
+        if not function.captures:
             return
-            
-        # Procesar sentencias dentro del bloque
-        for child in body_node.children:
-            if child.type == "sentencias":
-                for stmt in child.children:
-                    # Manejar declaración return
-                    if stmt.type == "sentencia" and len(stmt.children) > 0 and stmt.children[0].type == "sentencia_return":
-                        return_stmt = stmt.children[0]
-                        if len(return_stmt.children) > 0:
-                            if self._is_id_or_expression(return_stmt.children[0]):
-                                # Obtener las variables referenciadas
-                                refs = self._find_id_references(return_stmt.children[0])
-                                for ref in refs:
-                                    if ref in self.class_definitions[class_name]["members"]:
-                                        # Si la expresión contiene referencias a miembros, reemplazarlos
-                                        # y generar el return directamente
-                                        expr = self._generate_expression(return_stmt.children[0])
-                                        # Reemplazar todos los miembros con this->miembro
-                                        for member in self.class_definitions[class_name]["members"]:
-                                            expr = re.sub(r'\b' + member + r'\b', f"this->{member}", expr)
-                                        self._add_line(f"return {expr};")
-                                        break
-                                else:
-                                    # No se encontraron referencias a miembros
-                                    self._process_node(stmt)
-                            else:
-                                self._process_node(stmt)
-                        else:
-                            self._process_node(stmt)
-                    # Resto del código igual...
-                    elif stmt.type == "sentencia" and len(stmt.children) > 0 and stmt.children[0].type == "asignacion":
-                        assign_node = stmt.children[0]
-                        if len(assign_node.children) > 0 and assign_node.children[0].type == "id":
-                            lhs = assign_node.children[0].leaf
-                            if lhs in self.class_definitions[class_name]["members"]:
-                                rhs = self._generate_expression(assign_node.children[1])
-                                # Reemplazar referencias a miembros en el lado derecho
-                                rhs = self._replace_member_references_with_this_str(rhs, class_name)
-                                self._add_line(f"this->{lhs} = {rhs};")
-                                continue
-                        
-                        # En otros casos, procesar normalmente
-                        self._process_node(stmt)
-                        
-                    else:
-                        # Procesar otros tipos de sentencias normalmente
-                        self._process_node(stmt)
+        principal = self.ir_program.function("main")
+        self._add_line("typedef struct {")
+        self.emitter.indent()
+        for _, source in function.captures:
+            value = principal.values[source]
+            if source in principal.dynamic_arrays:
+                self._add_line(f"{self._dynamic_type(value.type)}* {value.name};")
+            elif value.type.endswith("[]"):
+                size = principal.array_sizes.get(source, DEFAULT_ARRAY_SIZE)
+                self._add_line(f"{self._map_type(value.type[:-2])} (*{value.name})[{size}];")
             else:
-                # Procesar otros nodos normalmente
-                self._process_node(child)
-    
-    def _is_id_or_expression(self, node):
-        """Verifica si un nodo es un ID o una expresión que puede contener IDs"""
-        if not hasattr(node, 'type'):
+                self._add_line(f"{self._map_type(value.type)}* {value.name};")
+        self.emitter.dedent()
+        self._add_line(f"}} {function.c_name}_entorno;")
+        self._add_line("")
+
+    def _spawned_tasks(self, function):
+        """Funciones de las tareas con entorno que lanza la función, en orden"""
+        tasks = []
+        for block in function.blocks:
+            for position, (callee, _, args) in sorted(block.calls.items()):
+                if block.ops[position] == OP_SPAWN and args and callee not in tasks:
+                    tasks.append(callee)
+        return tasks
+
+    def _local_declaration(self, function, index):
+        """Declaración C de una variable local según su tipo, con su inicializador si es constante"""
+        value = function.values[index]
+        tipo = value.type
+        static_value = function.initializers.get(index)
+
+        if index in function.dynamic_arrays:
+            return f"{self._dynamic_type(tipo)} {value.name} = {{0}};"
+
+        if tipo.endswith("[]"):
+            # Arrays: tamaño del mayor literal que se les asigna, o tamaño por defecto
+            base_tipo_c = self._map_type(tipo[:-2])
+            if static_value is not None and tipo == "cadena[]":
+                static_value = [f"JSTR({element})" for element in static_value]
+            initial = f" = {{{', '.join(static_value)}}}" if static_value is not None else ""
+            if not initial and self._has_strings(tipo):
+                initial = " = {0}"
+            size = function.array_sizes.get(index)
+            if size is None:
+                return f"{base_tipo_c} {value.name}[{DEFAULT_ARRAY_SIZE}]{initial};  // Array con tamaño por defecto"
+            return f"{base_tipo_c} {value.name}[{size}]{initial};"
+
+        if tipo == "cadena":
+            # Los literales se usan sin copiarlos; sin valor inicial, la cadena vacía
+            literal = static_value if static_value is not None else '""'
+            return f"jstr {value.name} = JSTR({literal});"
+
+        if static_value is None and index in function.zero_initialized and tipo in ZERO_VALUES:
+            static_value = ZERO_VALUES[tipo]
+        if static_value is None and self._has_strings(tipo):
+            # Los miembros de tipo cadena empiezan vacíos
+            static_value = "{0}"
+        initial = f" = {static_value}" if static_value is not None else ""
+        return f"{self._map_type(tipo)} {value.name}{initial};"
+
+    def _folded_temps(self, function):
+        """Temporales que se pliegan en la expresión C de su único uso en lugar de declararse.
+
+        Un temporal se pliega si se define una vez con una operación de expresión, se usa una
+        sola vez en el mismo bloque y no se emite ninguna sentencia entre su definición y su
+        uso, de modo que se conserva el orden de evaluación.
+        """
+        uses = {}
+        defs = {}
+        for block in function.blocks:
+            for position in range(len(block)):
+                for operand in block.reads(position):
+                    uses[operand] = uses.get(operand, 0) + 1
+                defs[block.dst[position]] = defs.get(block.dst[position], 0) + 1
+            if block.cond >= 0:
+                uses[block.cond] = uses.get(block.cond, 0) + 1
+
+        values = function.values
+        # Un método que libera cadenas o arrays dinámicos al retornar calcula antes el valor retornado
+        frees = function.c_name != "main" and (function.dynamic_arrays or any(
+            value.kind in (VALUE_VAR, VALUE_TEMP) and value.type in STRING_TYPES for value in values))
+        folded = set()
+        for block in function.blocks:
+            pending = set()
+            for position in range(len(block)):
+                consumed = pending.intersection(block.reads(position))
+                folded |= consumed
+                pending -= consumed
+
+                dst = block.dst[position]
+                if (block.ops[position] in EXPRESSION_OPCODES and dst >= 0 and values[dst].kind == VALUE_TEMP
+                        and values[dst].type != "cadena" and uses.get(dst) == 1 and defs.get(dst) == 1):
+                    pending.add(dst)
+                else:
+                    # Se emite una sentencia: los temporales pendientes se materializan en su sitio
+                    pending = set()
+            if block.cond in pending and not (frees and block.terminator == TERM_RETURN):
+                folded.add(block.cond)
+        return folded
+
+    def _emit_blocks(self, function, folded):
+        """Genera los bloques básicos alcanzables en orden, con etiquetas solo donde hay saltos"""
+        reachable = set(function.reachable())
+        # El cuerpo de un 'para' por elementos o paralelo se emite dentro del 'for' de su cabecera
+        inner = {index for loop in self.vector_loops.values() for index in self._loop_chain(function, loop)}
+        for parallel in self.parallel_loops.values():
+            inner.update(parallel["blocks"])
+            inner.add(parallel["latch"])
+        layout = [index for index in function.layout if index in reachable and index not in inner]
+        self._emit_layout(function, layout, folded, None)
+
+    def _emit_layout(self, function, layout, folded, end):
+        """Genera una secuencia de bloques; end es el bloque al que se llega al terminarla (None
+        al final de la función)"""
+        following = {index: layout[position + 1] if position + 1 < len(layout) else end
+                     for position, index in enumerate(layout)}
+
+        # Bloques que son destino de un goto (los que no se alcanzan cayendo desde el anterior)
+        labeled = set()
+        for index in layout:
+            block = function.blocks[index]
+            if index in self.vector_loops or index in self.parallel_loops:
+                # Al terminar el 'for' se sigue en la salida del bucle
+                if block.targets[1] != following[index]:
+                    labeled.add(block.targets[1])
+            elif block.terminator == TERM_JUMP and block.targets[0] != following[index]:
+                labeled.add(block.targets[0])
+            elif block.terminator == TERM_BRANCH:
+                labeled.update(target for target in block.targets if target != following[index])
+
+        for index in layout:
+            block = function.blocks[index]
+            if index in labeled:
+                self.emitter.dedent()
+                self._add_line(f"B{index}: ;")
+                self.emitter.indent()
+            if index in self.vector_loops:
+                self._emit_vector_loop(function, self.vector_loops[index], folded, following[index])
+                continue
+            if index in self.parallel_loops:
+                self._emit_parallel_loop(function, self.parallel_loops[index], folded, following[index])
+                continue
+
+            texts = {}  # Temporal plegado -> texto C de su expresión
+            for position in range(len(block)):
+                if (index, position) not in self.loop_starts:
+                    self._emit_instruction(function, block, position, folded, texts)
+            self._emit_terminator(function, block, following[index], texts)
+
+    def _loop_chain(self, function, loop):
+        """Bloques del cuerpo de un 'para' por elementos en orden de ejecución (sin la cabecera)"""
+        chain = []
+        index = function.blocks[loop.header].targets[0]
+        while index != loop.header:
+            chain.append(index)
+            index = function.blocks[index].targets[0]
+        return chain
+
+    def _emit_vector_loop(self, function, loop, folded, following):
+        """Genera un 'para' por elementos como un 'for' de C precedido de JONSON_SIMD, dentro de
+        un bloque con una copia del límite leído de memoria, del valor inicial si no es constante
+        y un puntero restrict a los datos de cada array local (dinámico o de tamaño fijo) que recorre"""
+        values = function.values
+        header = function.blocks[loop.header]
+        chain = [function.blocks[index] for index in self._loop_chain(function, loop)]
+        variable = values[loop.variable].name
+        names = {value.name for value in values}
+
+        def fresh(name):
+            # Los miembros del entorno de una tarea, (*this->x), no son nombres de C
+            name = re.sub(r"\W+", "_", name).strip("_")
+            while name in names:
+                name += "_"
+            names.add(name)
+            return name
+
+        declarations = []
+        arrays = sorted({operand for block in chain for position in range(len(block))
+                         for operand in (block.dst[position], block.a[position]) if self._local_array(function, operand)})
+        for index in arrays:
+            data = self._value(function, index, {})
+            self.restricted[index] = fresh(f"{values[index].name}_datos")
+            declarations.append(f"{self._map_type(values[index].type)} restrict {self.restricted[index]} = {data};")
+
+        texts = {}
+        a, b = header.a[0], header.b[0]
+        bound = b if a == loop.variable else a
+        if values[bound].kind == VALUE_MEMBER:
+            texts[bound] = fresh(f"{variable}_limite")
+            declarations.append(f"const int {texts[bound]} = {values[bound].name};")
+        start = values[loop.start].name
+        if loop.start == loop.variable:
+            start = fresh(f"{variable}_inicio")
+            declarations.append(f"const int {start} = {variable};")
+        condition = f"{self._value(function, a, texts)} {BINARY_SYMBOLS[header.ops[0]]} {self._value(function, b, texts)}"
+        latch = chain[-1]
+        step = self._expression(function, latch, len(latch) - 1, {})
+
+        # Las copias y los punteros van en un bloque propio que termina con el bucle
+        if declarations:
+            self._add_line("{")
+            self.emitter.indent()
+            for declaration in declarations:
+                self._add_line(declaration)
+        self._add_line("JONSON_SIMD")
+        self._add_line(f"for ({variable} = {start}; {condition}; {variable} = {step}) {{")
+        self.emitter.indent()
+        temps = [dst for block in chain for dst in dict.fromkeys(block.dst)
+                 if dst >= 0 and values[dst].kind == VALUE_TEMP and dst not in folded]
+        for index in temps:
+            self._add_line(self._local_declaration(function, index))
+        for block in chain:
+            texts = {}
+            for position in range(len(block) - (block is latch)):
+                self._emit_instruction(function, block, position, folded, texts)
+        self.emitter.dedent()
+        self._add_line("}")
+        if declarations:
+            self.emitter.dedent()
+            self._add_line("}")
+        self.restricted = {}
+        if header.targets[1] != following:
+            self._add_line(self._goto(header.targets[1]))
+
+    def _local_array(self, function, index):
+        """Si el operando es un array local de la función: dinámico o de tamaño fijo, sin los
+        campos de los elementos de un array de objetos"""
+        if index < 0 or index in function.element_fields:
             return False
-        return node.type in ["id", "expresion", "expresion_aritmetica", 
-                           "expresion_relacional", "expresion_logica", "termino", "factor"]
-    
-    def _find_id_references(self, node):
-        """Encuentra todas las referencias a variables en una expresión"""
-        refs = set()
-        
-        if not hasattr(node, 'type'):
-            return refs
-            
-        if node.type == "id":
-            refs.add(node.leaf)
-            
-        if hasattr(node, 'children'):
-            for child in node.children:
-                child_refs = self._find_id_references(child)
-                refs.update(child_refs)
-                
-        return refs
-    
-    def _process_principal(self, node):
-        """Procesa el método principal y genera el código C correspondiente"""
-        # Recopilar todas las variables que se usarán
-        variables = self._collect_variables(node)
-        already_declared = set()
-        
-        self._add_line("int main() {")
-        self.indent_level += 1
-        
-        # Declarar todas las variables al inicio
-        for var_name, var_type in variables.items():
-            # Caso especial para a y b - asegurar que se inicialicen
-            if var_name == "a":
-                self._add_line(f"int a = 5;")
-                already_declared.add("a")
+        if index in function.dynamic_arrays:
+            return True
+        return index in function.locals and function.values[index].type.endswith("[]")
+
+    def _loop_start_moves(self, function):
+        """(bloque, posición) de la asignación del valor inicial constante de cada 'para' por
+        elementos al final de su preencabezado, que no se emite porque la hace el propio 'for'"""
+        moves = set()
+        preds = function.predecessors()
+        for loop in self.vector_loops.values():
+            if loop.start == loop.variable:
                 continue
-            elif var_name == "b":
-                self._add_line(f"int b = 10;")
-                already_declared.add("b")
+            latch = self._loop_chain(function, loop)[-1]
+            outside = [pred for pred in preds[loop.header] if pred != latch]
+            if len(outside) != 1:
                 continue
-            
-            # Caso especial para numeros (array)
-            if var_name == "numeros" and var_type in ["int*", "float*"]:
-                base_type = "int" if var_type == "int*" else "float"
-                self._add_line(f"{base_type} {var_name}[] = {{1, 2, 3}};  // Array inicializado")
-            # Caso especial para mensaje (cadena)
-            elif var_name == "mensaje" and var_type == "char*":
-                self._add_line(f"char {var_name}[256];  // Cadena con tamaño suficiente")
-            # Caso general
-            else:
-                self._add_line(f"{var_type} {var_name};")
-            
-            already_declared.add(var_name)
-        
-        # Añadir una línea en blanco si se declararon variables
-        if variables:
-            self._add_line("")
-            
-        # Procesar el contenido del método principal, evitando declaraciones duplicadas
-        self._process_main_body(node, already_declared)
-        
-        self.indent_level -= 1
-        self._add_line("    return 0;")
+            block = function.blocks[outside[0]]
+            last = len(block) - 1
+            if (last >= 0 and block.terminator == TERM_JUMP and block.ops[last] == OP_MOV
+                    and block.dst[last] == loop.variable and block.a[last] == loop.start):
+                moves.add((outside[0], last))
+        return moves
+
+    def _parallel_loops(self, function, folded, loop_temps):
+        """'para' paralelos de la función que conservan la forma de un 'for' de OpenMP: la
+        cabecera solo calcula el límite y compara con él la variable de control, un único bloque
+        vuelve a la cabecera con la actualización de la variable y el resto del cuerpo no sale del
+        bucle, y ni la variable de control ni lo que escribe el cuerpo se lee tras el bucle. Devuelve
+        cabecera -> {"loop", "latch", "blocks" (el cuerpo en orden de emisión, sin la cabecera ni
+        la actualización), "private" (variables y temporales que escribe el cuerpo, una copia por
+        iteración) y "local" (los que solo usa el cuerpo)}. Un 'para' paralelo que no cumpla esto
+        se emite secuencial"""
+        if not any(loop.parallel for loop in function.loops):
+            return {}
+        values = function.values
+        natural = dict(function.natural_loops())
+        preds = function.predecessors()
+        reachable = set(function.reachable())
+        chains = {index for loop in self.vector_loops.values() for index in self._loop_chain(function, loop)}
+        liveness = None
+        parallel = {}
+        for loop in function.loops:
+            body = natural.get(loop.header)
+            if not loop.parallel or body is None or not self._parallel_shape(function, loop, body, preds):
+                continue
+            latch = next(pred for pred in preds[loop.header] if pred in body)
+            inner = body - {loop.header, latch}
+            private = {}
+            for index in sorted(inner):
+                block = function.blocks[index]
+                for position in range(len(block)):
+                    dst = block.writes(position)
+                    if dst < 0 or dst == loop.variable or dst in loop.reductions or dst in folded:
+                        continue
+                    # Los temporales de un 'para' por elementos ya se declaran en su 'for'
+                    if values[dst].kind == VALUE_VAR or (values[dst].kind == VALUE_TEMP and dst not in loop_temps):
+                        private[dst] = True
+            # Tras el 'for' de OpenMP no queda el valor de las copias de cada iteración
+            if liveness is None:
+                liveness = function.liveness()
+            live = liveness.live_in[function.blocks[loop.header].targets[1]]
+            if any(liveness.contains(live, index) for index in [loop.variable, *private]):
+                continue
+            outside = set()
+            for block in function.blocks:
+                if block.index not in inner:
+                    for position in range(len(block)):
+                        outside.update(block.reads(position))
+                        outside.add(block.dst[position])
+                    outside.add(block.cond)
+            parallel[loop.header] = {
+                "loop": loop,
+                "latch": latch,
+                "blocks": [index for index in function.layout if index in inner and index in reachable and index not in chains],
+                "private": list(private),
+                "local": {index for index in private if index not in outside}
+            }
+        return parallel
+
+    def _parallel_shape(self, function, loop, body, preds):
+        """Si el 'para' paralelo conserva la forma que se emite como 'for' de OpenMP"""
+        values = function.values
+        variable = loop.variable
+        header = function.blocks[loop.header]
+        last = len(header) - 1
+        if (header.terminator != TERM_BRANCH or last < 0 or header.dst[last] != header.cond
+                or header.ops[last] not in (OP_LT, OP_GT, OP_LE, OP_GE) or header.targets[1] in body
+                or variable not in (header.a[last], header.b[last]) or header.a[last] == header.b[last]):
+            return False
+        for position in range(last):
+            if (header.ops[position] not in PURE_OPCODES or variable in header.reads(position)
+                    or values[header.dst[position]].kind != VALUE_TEMP):
+                return False
+        latches = [pred for pred in preds[loop.header] if pred in body]
+        if len(latches) != 1 or latches[0] == loop.header:
+            return False
+        latch = function.blocks[latches[0]]
+        if latch.terminator != TERM_JUMP or any(
+                latch.ops[position] not in PURE_OPCODES
+                or (latch.dst[position] != variable and values[latch.dst[position]].kind != VALUE_TEMP)
+                for position in range(len(latch))):
+            return False
+        for index in body - {loop.header, latch.index}:
+            block = function.blocks[index]
+            if block.terminator not in (TERM_JUMP, TERM_BRANCH) or any(target not in body or target == loop.header
+                                                                        for target in block.targets):
+                return False
+            if variable in block.dst:
+                return False
+        return all(values[index].kind in (VALUE_VAR, VALUE_TEMP) for index in loop.reductions)
+
+    def _emit_parallel_loop(self, function, parallel, folded, following):
+        """Genera un 'para' paralelo como un 'for' de C precedido de JONSON_PARALELO ('omp parallel
+        for' con una cláusula reduction por operador). El límite se calcula una vez antes del
+        bucle, las variables y temporales que escribe el cuerpo se declaran dentro del 'for' y los
+        saltos a la actualización son continue"""
+        loop = parallel["loop"]
+        values = function.values
+        header = function.blocks[loop.header]
+        variable = values[loop.variable].name
+        texts = {}
+        for position in range(len(header) - 1):
+            self._emit_instruction(function, header, position, folded, texts)
+        last = len(header) - 1
+        condition = (f"{self._value(function, header.a[last], texts)} {BINARY_SYMBOLS[header.ops[last]]} "
+                     f"{self._value(function, header.b[last], texts)}")
+
+        # El valor inicial no puede leer la variable del 'for': si no es constante, se copia antes
+        natural = dict(function.natural_loops())
+        start = function.loop_start(loop, natural[loop.header], function.predecessors())
+        declaration = None
+        if start == loop.variable:
+            names = {value.name for value in values}
+            start_name = re.sub(r"\W+", "_", f"{variable}_inicio").strip("_")
+            while start_name in names:
+                start_name += "_"
+            declaration = f"const int {start_name} = {variable};"
+        else:
+            start_name = values[start].name
+        step = f"{variable} += {loop.step}" if loop.step > 0 else f"{variable} -= {-loop.step}"
+
+        clauses = "omp parallel for"
+        operators = {}
+        for index, operator in loop.reductions.items():
+            operators.setdefault(operator, []).append(values[index].name)
+        for operator, names in operators.items():
+            clauses += f" reduction({operator}:{','.join(names)})"
+
+        if declaration:
+            self._add_line("{")
+            self.emitter.indent()
+            self._add_line(declaration)
+        self._add_line(f'JONSON_PARALELO("{clauses}")')
+        self._add_line(f"for ({variable} = {start_name}; {condition}; {step}) {{")
+        self.emitter.indent()
+        for index in parallel["private"]:
+            self._add_line(self._local_declaration(function, index))
+        outer, self.continued = self.continued, parallel["latch"]
+        self._emit_layout(function, parallel["blocks"], folded, parallel["latch"])
+        self.continued = outer
+        self.emitter.dedent()
         self._add_line("}")
-        
-    def _process_main_body(self, node, already_declared):
-        """Procesa el cuerpo del método principal, evitando declaraciones duplicadas"""
-        for child in node.children:
-            if child.type == "bloque":
-                for child2 in child.children:
-                    if child2.type == "sentencias":
-                        for stmt in child2.children:
-                            if stmt.type == "sentencia":
-                                # Verificar si es una declaración de variable que ya se hizo
-                                if (len(stmt.children) > 0 and 
-                                    stmt.children[0].type == "declaracion_variable" and 
-                                    len(stmt.children[0].children) >= 2):
-                                    
-                                    var_decl = stmt.children[0]
-                                    
-                                    # Si es declaración de lista de IDs
-                                    if var_decl.children[1].type == "lista_ids":
-                                        all_declared = True
-                                        for id_node in var_decl.children[1].children:
-                                            if id_node.type == "id" and id_node.leaf not in already_declared:
-                                                all_declared = False
-                                                break
-                                                
-                                        if all_declared:
-                                            continue  # Saltar esta declaración
-                                    
-                                    # Si es una declaración con inicialización, convertirla en asignación
-                                    elif len(var_decl.children) >= 3 and var_decl.children[1].type == "id":
-                                        var_name = var_decl.children[1].leaf
-                                        if var_name in already_declared:
-                                            # Generar solo la asignación
-                                            expr = self._generate_expression(var_decl.children[2])
-                                            
-                                            # Caso especial para cadenas
-                                            if var_name == "mensaje" and expr.startswith('"') and expr.endswith('"'):
-                                                self._add_line(f"strcpy({var_name}, {expr});")
-                                            # Caso especial para objetos y cadenas
-                                            elif expr.startswith('"') and expr.endswith('"') and var_name != "mensaje" and var_name != "cadena":
-                                                self._add_line(f"strcpy({var_name}.nombre, {expr});")
-                                            # Caso especial para asignación de función void
-                                            elif "Persona_establecerEdad" in expr:
-                                                obj_match = re.search(r"Persona_establecerEdad\(&(\w+)", expr)
-                                                if obj_match:
-                                                    obj_name = obj_match.group(1)
-                                                    self._add_line(f"{expr};")
-                                                    self._add_line(f"{var_name} = Persona_obtenerEdad(&{obj_name});")
-                                                else:
-                                                    self._add_line(f"{var_name} = {expr};")
-                                            else:
-                                                self._add_line(f"{var_name} = {expr};")
-                                            continue
-                                
-                                # En otros casos, procesar normalmente
-                                self._process_node(stmt)
-                            else:
-                                self._process_node(stmt)
-                    else:
-                        self._process_node(child2)
-            else:
-                self._process_node(child)
-                
-    def _process_variable_declaration(self, node):
-        """Procesa una declaración de variable y genera el código C correspondiente"""
-        if len(node.children) < 2:
-            return
-            
-        tipo_original = node.children[0].leaf
-        tipo = self._map_type(tipo_original)
-        
-        # Detectar si es una declaración de array
-        is_array = tipo_original.endswith("[]")
-        
-        # Manejar declaración simple: tipo id1, id2, ...
-        if node.children[1].type == "lista_ids":
-            ids = []
-            initializations = {}
-            
-            # Procesar todos los identificadores en la lista
-            for i, id_node in enumerate(node.children[1].children):
-                if id_node.type == "id":
-                    var_name = id_node.leaf
-                    if var_name not in self.declared_variables:
-                        ids.append(var_name)
-                        self.declared_variables.add(var_name)
-                        
-                        # Verificar si hay inicialización para este ID
-                        if i + 1 < len(node.children[1].children) and node.children[1].children[i + 1].type == "expresion":
-                            expr = self._generate_expression(node.children[1].children[i + 1])
-                            initializations[var_name] = expr
-                    
-            if ids:
-                # Si es un array, declarar con tamaño por defecto
-                if is_array:
-                    # Extraer el tipo base (sin los corchetes)
-                    base_tipo = tipo_original[:-2]
-                    base_tipo_c = self._map_type(base_tipo)
-                    
-                    for id_name in ids:
-                        if id_name == "numeros":
-                            self._add_line(f"{base_tipo_c} {id_name}[] = {{1, 2, 3}};  // Array inicializado")
-                        else:
-                            self._add_line(f"{base_tipo_c} {id_name}[100];  // Array size set to default")
-                elif tipo_original == "cadena":
-                    # Para cadenas, usar array de caracteres con tamaño suficientemente grande
-                    for id_name in ids:
-                        self._add_line(f"char {id_name}[256];  // Cadena de tamaño fijo")
+        if declaration:
+            self.emitter.dedent()
+            self._add_line("}")
+        if header.targets[1] != following:
+            self._add_line(self._goto(header.targets[1]))
+
+    def _goto(self, target):
+        """Salto a un bloque: continue si es la actualización del 'para' paralelo en curso"""
+        return "continue;" if target == self.continued else f"goto B{target};"
+
+    def _value(self, function, index, texts):
+        """Texto C de un operando"""
+        if index in texts:
+            return texts.pop(index)
+        if index in self.restricted:
+            return self.restricted[index]
+        value = function.values[index]
+        if value.kind == VALUE_CONST and value.type == "cadena":
+            return f"JSTR({value.name})"
+        if index in function.dynamic_arrays:
+            return f"{value.name}.datos"
+        return value.name
+
+    def _element(self, function, array, array_text, index_text):
+        """Texto C de un elemento: arr[i] o, en un campo de los elementos de un array de objetos,
+        arr[i].campo (arr_campo[i] si el array se emite por campos)"""
+        if array not in function.element_fields:
+            return f"{array_text}[{index_text}]"
+        base, field = function.element_fields[array]
+        if base in self.soa_arrays:
+            return f"{self.soa_arrays[base][field]}[{index_text}]"
+        return f"{function.values[base].name}[{index_text}].{field}"
+
+    def _struct_of_arrays(self, function):
+        """Arrays locales de objetos que se emiten por campos: los de las clases elegidas que las
+        instrucciones solo usan a través de arr[i].campo. Devuelve array -> {campo: nombre C}"""
+        if not self.soa:
+            return {}
+        values = function.values
+        used = set()
+        for block in function.blocks:
+            for position in range(len(block)):
+                used.update(block.reads(position))
+                used.add(block.dst[position])
+            used.add(block.cond)
+
+        names = {value.name for value in values if value.kind == VALUE_VAR}
+        arrays = {}
+        for index in function.locals:
+            tipo = values[index].type
+            class_name = tipo[:-2]
+            if (not tipo.endswith("[]") or index in function.dynamic_arrays or self.typed_ast.class_info(class_name) is None
+                    or (self.soa is not True and class_name not in self.soa)):
+                continue
+            if index in used:
+                self.soa_report.append(f"{function.c_name}: {values[index].name} sigue como array de estructuras (se usa completo)")
+                continue
+            columns = {}
+            for field_index, (base, field) in sorted(function.element_fields.items()):
+                if base == index and field_index in used and field not in columns:
+                    name = f"{values[index].name}_{field}"
+                    while name in names:
+                        name += "_"
+                    names.add(name)
+                    columns[field] = name
+            arrays[index] = columns
+            self.soa_report.append(f"{function.c_name}: {values[index].name} -> {', '.join(columns.values()) or 'sin campos usados'}")
+        return arrays
+
+    def _soa_declarations(self, function, index):
+        """Declaraciones de los arrays por campo de un array de objetos (con el tamaño del array)"""
+        value = function.values[index]
+        members = self.typed_ast.class_info(value.type[:-2])["members"]
+        size = function.array_sizes.get(index, DEFAULT_ARRAY_SIZE)
+        declarations = [f"// {value.type} {value.name}: un array por campo (struct-of-arrays)"]
+        for field, name in self.soa_arrays[index].items():
+            tipo = members[field]
+            initial = " = {0}" if tipo == "cadena" else ""
+            declarations.append(f"{self._map_type(tipo)} {name}[{size}]{initial};")
+        return declarations
+
+    def _expression(self, function, block, position, texts):
+        """Texto C de una instrucción de expresión"""
+        op = block.ops[position]
+        values = function.values
+
+        if op == OP_CALL:
+            callee, receiver, args = block.calls[position]
+            parts = []
+            if receiver >= 0:
+                value = values[receiver]
+                parts.append("this" if value.kind == VALUE_VAR and value.name == "this" else f"&{value.name}")
+            parts.extend(self._value(function, arg, texts) for arg in args)
+            return f"{callee}({', '.join(parts)})"
+
+        a = self._value(function, block.a[position], texts)
+        if op == OP_MOV:
+            return a
+        if op == OP_NOT:
+            return f"!({a})"
+        if op == OP_I2F:
+            return f"(float){a}"
+
+        b = self._value(function, block.b[position], texts)
+        if op == OP_LOAD_INDEX:
+            return self._element(function, block.a[position], a, b)
+        if op in (OP_EQ, OP_NE) and values[block.a[position]].type == "cadena":
+            # Las cadenas se comparan por contenido (primero la longitud)
+            return f"jstr_igual({a}, {b})" if op == OP_EQ else f"!jstr_igual({a}, {b})"
+        return f"({a} {BINARY_SYMBOLS[op]} {b})"
+
+    def _emit_instruction(self, function, block, position, folded, texts):
+        """Genera una instrucción como sentencia C (o la pliega si su temporal se usa en una expresión)"""
+        op = block.ops[position]
+        dst = block.dst[position]
+        values = function.values
+
+        if op in EXPRESSION_OPCODES:
+            if dst >= 0 and values[dst].type == "cadena" and op == OP_ADD:
+                # Concatenación de cadenas en el buffer del destino
+                a = self._value(function, block.a[position], texts)
+                b = self._value(function, block.b[position], texts)
+                target = values[dst].name
+                if target == a:
+                    self._add_line("jstr_anadir(&", target, ", ", b, ");")
                 else:
-                    # Para tipos normales con posibles inicializaciones
-                    declarations = []
-                    for id_name in ids:
-                        if id_name in initializations:
-                            declarations.append(f"{id_name} = {initializations[id_name]}")
-                        else:
-                            declarations.append(id_name)
-                    
-                    self._add_line(f"{tipo} {', '.join(declarations)};")
-        
-        # Manejar declaración con inicialización: tipo id = expresion
-        elif len(node.children) >= 3 and node.children[1].type == "id":
-            var_name = node.children[1].leaf
-            
-            # Verificar si la variable ya fue declarada
-            if var_name not in self.declared_variables:
-                self.declared_variables.add(var_name)
-                
-                # Si es un array literal
-                if node.children[2].type == "array_literal":
-                    # Generar inicialización de array con valores específicos
-                    if len(node.children[2].children) > 0 and node.children[2].children[0].type == "lista_expresiones":
-                        exprs = []
-                        for expr_node in node.children[2].children[0].children:
-                            exprs.append(self._generate_expression(expr_node))
-                            
-                        if exprs:
-                            # Si es un array, usar el tipo base sin los corchetes
-                            if is_array:
-                                base_tipo = tipo_original[:-2]
-                                base_tipo_c = self._map_type(base_tipo)
-                                self._add_line(f"{base_tipo_c} {var_name}[] = {{{', '.join(exprs)}}};")
-                            else:
-                                self._add_line(f"{tipo} {var_name}[] = {{{', '.join(exprs)}}};")
-                        else:
-                            if is_array:
-                                base_tipo = tipo_original[:-2]
-                                base_tipo_c = self._map_type(base_tipo)
-                                self._add_line(f"{base_tipo_c} {var_name}[1];  // Empty array")
-                            else:
-                                self._add_line(f"{tipo} {var_name}[1];  // Empty array")
-                    else:
-                        if is_array:
-                            base_tipo = tipo_original[:-2]
-                            base_tipo_c = self._map_type(base_tipo)
-                            self._add_line(f"{base_tipo_c} {var_name}[1];  // Empty array")
-                        else:
-                            self._add_line(f"{tipo} {var_name}[1];  // Empty array")
+                    self._add_line("jstr_concatenar(&", target, ", ", a, ", ", b, ");")
+                return
+
+            expression = self._expression(function, block, position, texts)
+            if dst in folded:
+                texts[dst] = expression
+            elif dst < 0:
+                if op == OP_CALL and self.ir_program.function(block.calls[position][0]).return_type == "cadena":
+                    # La cadena retornada es del llamador aunque no la use
+                    self._add_line("jstr_descartar(", expression, ");")
                 else:
-                    # Para tipos normales con inicialización
-                    expr = self._generate_expression(node.children[2])
-                    
-                    # Si es una cadena, usar un buffer lo suficientemente grande
-                    if tipo_original == "cadena" and expr.startswith('"') and expr.endswith('"'):
-                        # Calcular el tamaño necesario (longitud + 1 para el nulo)
-                        string_len = len(expr) - 1  # -2 para quitar comillas + 1 para nulo = -1
-                        min_size = max(256, string_len)  # Al menos 256 o lo que necesite
-                        self._add_line(f"char {var_name}[{min_size}];  // Cadena con tamaño suficiente")
-                        self._add_line(f"strcpy({var_name}, {expr});")
-                    else:
-                        self._add_line(f"{tipo} {var_name} = {expr};")
+                    self._add_line(expression, ";")
             else:
-                # Si la variable ya fue declarada, solo hacer la asignación
-                expr = self._generate_expression(node.children[2])
-                
-                # Si es una cadena, usar un buffer lo suficientemente grande
-                if tipo_original == "cadena" and expr.startswith('"') and expr.endswith('"'):
-                    # Calcular el tamaño necesario (longitud + 1 para el nulo)
-                    string_len = len(expr) - 1  # -2 para quitar comillas + 1 para nulo = -1
-                    min_size = max(256, string_len)  # Al menos 256 o lo que necesite
-                    self._add_line(f"char {var_name}[{min_size}];  // Cadena con tamaño suficiente")
-                    self._add_line(f"strcpy({var_name}, {expr});")
-                else:
-                    self._add_line(f"{var_name} = {expr};")
-            
-    def _process_assignment(self, node):
-        """Procesa una asignación y genera el código C correspondiente"""
-        if len(node.children) < 2:
+                self._emit_store(values[dst], expression, moved=op == OP_CALL)
             return
-            
-        # Obtener el lado izquierdo (LHS)
-        lhs = ""
-        if node.children[0].type == "id":
-            lhs = node.children[0].leaf
-        elif node.children[0].type == "acceso_array":
-            if len(node.children[0].children) >= 2:
-                array_name = node.children[0].children[0].leaf
-                index_expr = self._generate_expression(node.children[0].children[1])
-                lhs = f"{array_name}[{index_expr}]"
-        elif node.children[0].type == "acceso_objeto":
-            if len(node.children[0].children) >= 2:
-                obj_name = node.children[0].children[0].leaf
-                member_name = node.children[0].children[1].leaf
-                lhs = f"{obj_name}.{member_name}"
-                
-        # Obtener el lado derecho (RHS)
-        rhs = self._generate_expression(node.children[1])
-        
-        # Caso especial para asignación a edadPersona
-        if lhs == "edadPersona" and "Persona_establecerEdad" in rhs:
-            self._add_line("// Caso especial: llamada a método y asignación")
-            obj_match = re.search(r"Persona_establecerEdad\(&(\w+)", rhs)
-            if obj_match:
-                obj_name = obj_match.group(1)
-                self._add_line(f"Persona_establecerEdad(&{obj_name}, 25);")
-                self._add_line(f"edadPersona = Persona_obtenerEdad(&{obj_name});")
+
+        if op == OP_STORE_INDEX:
+            array = self._value(function, dst, texts)
+            index = self._value(function, block.a[position], texts)
+            value = self._value(function, block.b[position], texts)
+            element = self._element(function, dst, array, index)
+            if values[dst].type == "cadena[]":
+                self._add_line("jstr_asignar(&", element, ", ", value, ");")
+            else:
+                self._add_line(element, " = ", value, ";")
+        elif op == OP_CHECK_INDEX:
+            # La comparación sin signo detecta también los índices negativos
+            index = self._value(function, block.a[position], texts)
+            length = values[block.b[position]]
+            if length.kind == VALUE_CONST:
+                self._add_line("if ((unsigned)", index, " >= ", length.name, "u) jonson_fuera_de_rango(", index, ", ",
+                               length.name, ");")
+            else:
+                length = f"{length.name}.longitud"
+                self._add_line("if ((unsigned)", index, " >= (unsigned)", length, ") jonson_fuera_de_rango(", index,
+                               ", ", length, ");")
+        elif op == OP_APPEND:
+            value = self._value(function, block.a[position], texts)
+            if values[dst].type == "cadena[]":
+                # El array guarda su propia copia de la cadena
+                value = f"jstr_copia({value})"
+            self._add_line(self._dynamic_type(values[dst].type), "_agregar(&", values[dst].name, ", ", value, ");")
+        elif op == OP_CLEAR:
+            if values[dst].type == "cadena[]":
+                self._add_line("jstr_liberar_todas(", values[dst].name, ".datos, ", values[dst].name, ".longitud);")
+            self._add_line(values[dst].name, ".longitud = 0;")
+        elif op == OP_CONCAT:
+            self._add_line("jstr_anadir(&", values[dst].name, ", ", self._value(function, block.a[position], texts), ");")
+        elif op == OP_SPAWN:
+            task, _, args = block.calls[position]
+            environment = "NULL"
+            if args:
+                # Las variables de principal se pasan por dirección; la tarea termina antes del esperar
+                addresses = ", ".join(f"&{values[arg].name}" for arg in args)
+                self._add_line(f"{task}_datos = ({task}_entorno){{{addresses}}};")
+                environment = f"&{task}_datos"
+            self._add_line("jonson_lanzar(", task, ", ", environment, ");")
+        elif op == OP_WAIT:
+            self._add_line("jonson_esperar();")
+        elif op == OP_PRINT:
+            # El escritor depende del tipo inferido para la expresión; las constantes se formatean al compilar
+            printed = values[block.a[position]]
+            literal = self._print_literal(printed)
+            if literal is not None:
+                self._add_line("JONSON_IMPRIMIR_LITERAL(", literal, ");")
                 return
-        
-        # Caso especial para asignación a objeto (p = "Juan")
-        if rhs.startswith('"') and rhs.endswith('"') and lhs in self.declared_variables:
-            # Verificar si lhs es un objeto (no una cadena)
-            if lhs != "mensaje" and lhs != "nombre" and lhs != "texto" and lhs != "cadena" and lhs != "str":
-                self._add_line(f"// Asignación a miembro nombre del objeto")
-                self._add_line(f"strcpy({lhs}.nombre, {rhs});")
+            value = self._value(function, block.a[position], texts)
+            if printed.type == "cadena":
+                self._add_line("jonson_imprimir_texto(", value, ".datos, ", value, ".longitud);")
                 return
-                
-        # Caso especial para asignación de cadenas
-        if ((lhs.endswith(".nombre") or 
-            lhs in ["mensaje", "nombre", "texto", "cadena", "str"]) and 
-            rhs.startswith('"') and rhs.endswith('"')):
-            # Para cadenas, siempre usar strcpy
-            self._add_line(f"// Asignación de cadena usando strcpy")
-            self._add_line(f"strcpy({lhs}, {rhs});")
+            self._add_line(PRINT_WRITERS.get(printed.type, "jonson_imprimir_entero"), "(", value, ");")
+
+    def _print_literal(self, value):
+        """Literal de C con el texto que imprime una constante (None si no se conoce al compilar)"""
+        if value.kind != VALUE_CONST or value.type == "caracter":
+            return None
+        if value.type == "cadena":
+            return value.name
+        constant = parse_constant(value)
+        if constant is NOT_CONSTANT:
+            return None
+        if isinstance(constant, float):
+            # El %f de Python redondea igual que el de C
+            return f'"{constant:f}"'
+        return f'"{int(constant)}"'
+
+    def _emit_store(self, target, value, moved=False):
+        """Genera una asignación según el tipo del destino. Las cadenas se copian en el buffer del
+        destino, salvo el resultado de una llamada, que pasa a ser suyo"""
+        if target.type == "cadena":
+            self._add_line("jstr_mover(&" if moved else "jstr_asignar(&", target.name, ", ", value, ");")
         else:
-            # Asignación normal
-            self._add_line(f"{lhs} = {rhs};")
-            
-    def _process_if_statement(self, node):
-        """Procesa una sentencia if y genera el código C correspondiente"""
-        if len(node.children) < 2:
-            return
-            
-        # Generar la condición
-        condition = self._generate_expression(node.children[0])
-        self._add_line(f"if ({condition}) {{")
-        self.indent_level += 1
-        
-        # Procesar el bloque then
-        self._process_node(node.children[1])
-        
-        self.indent_level -= 1
-        
-        # Procesar el bloque else si existe
-        if len(node.children) >= 3:
-            self._add_line("} else {")
-            self.indent_level += 1
-            
-            self._process_node(node.children[2])
-            
-            self.indent_level -= 1
-        
-        self._add_line("}")
-    
-    def _process_while_statement(self, node):
-        """Procesa una sentencia while y genera el código C correspondiente"""
-        if len(node.children) < 2:
-            return
-            
-        # Generar la condición
-        condition = self._generate_expression(node.children[0])
-        self._add_line(f"while ({condition}) {{")
-        self.indent_level += 1
-        
-        # Procesar el bloque
-        self._process_node(node.children[1])
-        
-        # Tratar caso especial del bucle que modifica numeros
-        if condition == "activo" and "numeros" in str(node.children[1]):
-            # Verificar si hay acceso a numeros[i]
-            has_array_access = False
-            if hasattr(node.children[1], 'children'):
-                for child in node.children[1].children:
-                    if hasattr(child, 'type') and child.type == "sentencias":
-                        for stmt in child.children:
-                            if "numeros[i]" in str(stmt):
-                                has_array_access = True
-                                break
-            
-            if has_array_access:
-                self._add_line("// Aseguramos que numeros está correctamente inicializado")
-                self._add_line("if (numeros[0] == 0) {")
-                self.indent_level += 1
-                self._add_line("numeros[0] = 1; numeros[1] = 2; numeros[2] = 3;")
-                self.indent_level -= 1
-                self._add_line("}")
-        
-        self.indent_level -= 1
-        self._add_line("}")
-    
-    def _process_for_statement(self, node):
-        """Procesa una sentencia for y genera el código C correspondiente"""
-        if len(node.children) < 4:
-            return
-            
-        # Generar la inicialización
-        init = self._generate_for_initialization(node.children[0])
-        
-        # Generar la condición
-        condition = self._generate_expression(node.children[1])
-        
-        # Generar la actualización
-        update = self._generate_for_update(node.children[2])
-        
-        self._add_line(f"for ({init}; {condition}; {update}) {{")
-        self.indent_level += 1
-        
-        # Procesar el bloque
-        self._process_node(node.children[3])
-        
-        self.indent_level -= 1
-        self._add_line("}")
-    
-    def _process_do_while_statement(self, node):
-        """Procesa una sentencia do-while y genera el código C correspondiente"""
-        if len(node.children) < 2:
-            return
-            
-        self._add_line("do {")
-        self.indent_level += 1
-        
-        # Procesar el bloque
-        self._process_node(node.children[0])
-        
-        self.indent_level -= 1
-        
-        # Generar la condición
-        condition = self._generate_expression(node.children[1])
-        self._add_line(f"}} while ({condition});")
-    
-    def _process_switch_statement(self, node):
-        """Procesa una sentencia switch y genera el código C correspondiente"""
-        if len(node.children) < 2:
-            return
-            
-        # Generar la expresión del switch
-        expr = self._generate_expression(node.children[0])
-        self._add_line(f"switch ({expr}) {{")
-        
-        # Procesar los casos
-        if len(node.children) >= 2:
-            self._process_switch_cases(node.children[1])
-        
-        self._add_line("}")
-    
-    def _process_switch_cases(self, node):
-        """Procesa los casos de un switch y genera el código C correspondiente"""
-        if node.type != "casos_switch":
-            return
-            
-        for case in node.children:
-            if case.type == "caso_switch":
-                if len(case.children) >= 2:
-                    # Generar la expresión del caso
-                    case_expr = self._generate_expression(case.children[0])
-                    self._add_line(f"case {case_expr}:")
-                    self.indent_level += 1
-                    
-                    # Procesar las sentencias del caso
-                    self._process_node(case.children[1])
-                    
-                    # Si no hay un break explícito, añadirlo
-                    if len(case.children) < 3 or case.children[2].type != "sentencia_break":
-                        self._add_line("break;")
-                        
-                    self.indent_level -= 1
-            elif case.type == "caso_default":
-                self._add_line("default:")
-                self.indent_level += 1
-                
-                # Procesar las sentencias del caso predeterminado
-                if len(case.children) >= 1:
-                    self._process_node(case.children[0])
-                    
-                self.indent_level -= 1
-    
-    def _process_print_statement(self, node):
-        """Procesa una sentencia de impresión y genera el código C correspondiente"""
-        if len(node.children) == 0:
-            return
-            
-        # Obtener la expresión a imprimir
-        expr = self._generate_expression(node.children[0])
-        
-        # Determinar el tipo de formato
-        fmt = "%d"  # Por defecto, asumir entero
-        
-        # Si es una cadena literal
-        if expr.startswith('"') and expr.endswith('"'):
-            fmt = "%s"
-        # Si es un nombre que sugiere que es una cadena
-        elif expr in ["mensaje", "nombre", "texto", "cadena", "str"] or expr.endswith(".nombre") or expr.endswith(".mensaje"):
-            fmt = "%s"
-        # Si es un número flotante literal
-        elif "." in expr and expr.replace(".", "").isdigit():
-            fmt = "%f"
-        # Si es un nombre que sugiere que es un flotante
-        elif expr in ["temperatura", "promedio", "precio"] or expr.endswith(".temperatura") or expr.endswith(".promedio"):
-            fmt = "%f"
-                
-        self._add_line(f'printf("{fmt}\\n", {expr});')
-    
-    def _generate_expression(self, node):
-        """Genera el código C para una expresión"""
-        if not hasattr(node, 'type'):
-            return ""
-            
-        if node.type == "expresion":
-            if len(node.children) > 0:
-                return self._generate_expression(node.children[0])
-            return ""
-            
-        elif node.type == "expresion_logica":
-            if len(node.children) == 1:
-                return self._generate_expression(node.children[0])
-            elif len(node.children) == 2 and node.leaf == "NOT":
-                return f"!({self._generate_expression(node.children[0])})"
-            elif len(node.children) >= 2:
-                left = self._generate_expression(node.children[0])
-                right = self._generate_expression(node.children[1])
-                op = self._map_logical_operator(node.leaf)
-                return f"({left} {op} {right})"
-            return ""
-            
-        elif node.type == "expresion_relacional":
-            if len(node.children) == 1:
-                return self._generate_expression(node.children[0])
-            elif len(node.children) >= 2:
-                left = self._generate_expression(node.children[0])
-                right = self._generate_expression(node.children[1])
-                op = self._map_operator(node.leaf)
-                return f"({left} {op} {right})"
-            return ""
-            
-        elif node.type == "expresion_aritmetica":
-            if len(node.children) == 1:
-                return self._generate_expression(node.children[0])
-            elif len(node.children) >= 2:
-                left = self._generate_expression(node.children[0])
-                right = self._generate_expression(node.children[1])
-                return f"({left} {node.leaf} {right})"
-            return ""
-            
-        elif node.type == "termino":
-            if len(node.children) == 1:
-                return self._generate_expression(node.children[0])
-            elif len(node.children) >= 2:
-                left = self._generate_expression(node.children[0])
-                right = self._generate_expression(node.children[1])
-                return f"({left} {node.leaf} {right})"
-            return ""
-            
-        elif node.type == "factor":
-            if node.leaf is not None:
-                if isinstance(node.leaf, str):
-                    if node.leaf.lower() == "verdadero":
-                        return "true"
-                    elif node.leaf.lower() == "falso":
-                        return "false"
-                    else:
-                        return node.leaf
-                else:
-                    return str(node.leaf)
-            elif len(node.children) > 0:
-                return self._generate_expression(node.children[0])
-            return ""
-            
-        elif node.type == "id":
-            return node.leaf
-            
-        elif node.type == "booleano":
-            return "true" if node.leaf.lower() == "verdadero" else "false"
-            
-        elif node.type == "llamada_metodo":
-            return self._generate_method_call(node)
-            
-        elif node.type == "acceso_array":
-            if len(node.children) >= 2:
-                array_name = self._generate_expression(node.children[0])
-                index = self._generate_expression(node.children[1])
-                return f"{array_name}[{index}]"
-            return ""
-            
-        elif node.type == "acceso_objeto":
-            if len(node.children) >= 2:
-                obj_name = self._generate_expression(node.children[0])
-                member_name = node.children[1].leaf
-                return f"{obj_name}.{member_name}"
-            return ""
-            
-        return ""
-    
-    def _generate_function_call(self, node):
-        """Genera el código C para una llamada a función"""
-        if len(node.children) < 1:
-            return ""
-            
-        # Caso especial 1: llamada a método p_obtenerEdad
-        if node.children[0].type == "id" and node.children[0].leaf.endswith("_obtenerEdad"):
-            # Asumimos que es una llamada del tipo p_obtenerEdad(p)
-            obj_method = node.children[0].leaf  # p_obtenerEdad
-            parts = obj_method.split('_')
-            obj_name = parts[0]  # p
-            method_name = parts[1]  # obtenerEdad
-            
-            # Generar llamada corregida
-            return f"Persona_{method_name}(&{obj_name})"
-            
-        # Caso especial 2: llamada a Persona_establecerEdad con solo el puntero al objeto
-        if (node.children[0].type == "id" and node.children[0].leaf == "Persona_establecerEdad" and
-            len(node.children) >= 2 and node.children[1].type == "argumentos" and
-            len(node.children[1].children) > 0 and node.children[1].children[0].type == "lista_expresiones" and
-            len(node.children[1].children[0].children) == 1):
-            
-            # Solo hay un argumento, añadir el valor de edad
-            obj_ptr = self._generate_expression(node.children[1].children[0].children[0])
-            return f"Persona_establecerEdad({obj_ptr}, 25)"
-            
-        # Caso especial 3: edadPersona = Persona_obtenerEdad(&p) sin argumentos
-        if (node.children[0].type == "id" and node.children[0].leaf == "Persona_obtenerEdad" and
-            len(node.children) >= 2 and node.children[1].type == "argumentos" and
-            len(node.children[1].children) > 0 and node.children[1].children[0].type == "lista_expresiones" and
-            len(node.children[1].children[0].children) == 1):
-            
-            obj_ptr = self._generate_expression(node.children[1].children[0].children[0])
-            return f"Persona_obtenerEdad({obj_ptr})"
-        
-        # Caso normal: función regular
-        func_name = node.children[0].leaf
-        args = []
-        
-        # Procesar argumentos
-        if len(node.children) >= 2 and node.children[1].type == "argumentos":
-            args_node = node.children[1]
-            if len(args_node.children) > 0 and args_node.children[0].type == "lista_expresiones":
-                for expr_node in args_node.children[0].children:
-                    args.append(self._generate_expression(expr_node))
-        
-        return f"{func_name}({', '.join(args)})"
-    
-    def _generate_method_call(self, node):
-        """Genera el código C para una llamada a método de un objeto"""
-        if len(node.children) < 1:
-            return ""
-            
-        # Obtener el objeto y el método
-        obj_name = ""
-        method_name = ""
-        
-        # Caso 1: Llamada directa a un método de objeto (e.g., p.establecerEdad(25))
-        if len(node.children) >= 2 and node.children[0].type == "acceso_objeto":
-            obj_node = node.children[0]
-            if len(obj_node.children) >= 2:
-                obj_name = obj_node.children[0].leaf
-                method_name = obj_node.children[1].leaf
-                clase_name = "Persona"  # Por defecto, asumimos Persona
-                
-                # Obtener argumentos
-                args = [f"&{obj_name}"]  # Primer argumento es puntero al objeto
-                
-                if len(node.children) >= 2 and node.children[1].type == "argumentos":
-                    args_node = node.children[1]
-                    if len(args_node.children) > 0 and args_node.children[0].type == "lista_expresiones":
-                        for expr_node in args_node.children[0].children:
-                            args.append(self._generate_expression(expr_node))
-                
-                # Verificar si no hay argumentos adicionales y es establecerEdad
-                if method_name == "establecerEdad" and len(args) == 1:
-                    args.append("25")  # Valor por defecto
-                
-                # Generar llamada
-                return f"{clase_name}_{method_name}({', '.join(args)})"
-        
-        # Caso 2: Llamada como si el objeto fuera una función (e.g., p(25))
-        # Tratamos esto como una llamada al método establecerEdad
-        if node.children[0].type == "id":
-            obj_name = node.children[0].leaf
-            method_name = "establecerEdad"  # Asumimos que quiere llamar a este método
-            clase_name = "Persona"  # Por defecto, asumimos Persona
-            
-            # Obtener argumentos
-            args = [f"&{obj_name}"]  # Primer argumento es puntero al objeto
-            
-            if len(node.children) >= 2 and node.children[1].type == "argumentos":
-                args_node = node.children[1]
-                if len(args_node.children) > 0 and args_node.children[0].type == "lista_expresiones":
-                    for expr_node in args_node.children[0].children:
-                        args.append(self._generate_expression(expr_node))
-            
-            # Verificar si no hay argumentos adicionales
-            if len(args) == 1:
-                args.append("25")  # Valor por defecto
-                
-            # Generar llamada
-            return f"{clase_name}_{method_name}({', '.join(args)})"
-            
-        # Caso 3: Cuando el acceso al método está mal formado
-        if node.children[0].type == "id" and node.leaf:
-            obj_name = node.children[0].leaf
-            method_name = node.leaf
-            clase_name = "Persona"  # Por defecto, asumimos Persona
-            
-            # Obtener argumentos
-            args = [f"&{obj_name}"]
-            
-            # Verificar si no hay argumentos adicionales y es establecerEdad
-            if method_name == "establecerEdad" and len(args) == 1:
-                args.append("25")  # Valor por defecto
-                
-            # Generar llamada
-            return f"{clase_name}_{method_name}({', '.join(args)})"
-            
-        # Por defecto, si no podemos determinar el objeto y método
-        return "/* Error: No se pudo determinar la llamada a método */"
-    
-    def _generate_for_initialization(self, node):
-        """Genera el código C para la inicialización de un for"""
-        if node.type == "asignacion_for":
-            if len(node.children) >= 2:
-                if len(node.children) >= 3:  # tipo id = expr
-                    tipo = self._map_type(node.children[0].leaf)
-                    var_name = node.children[1].leaf
-                    expr = self._generate_expression(node.children[2])
-                    return f"{tipo} {var_name} = {expr}"
-                else:  # id = expr
-                    var_name = node.children[0].leaf
-                    expr = self._generate_expression(node.children[1])
-                    return f"{var_name} = {expr}"
-        return ""
-    
-    def _generate_for_update(self, node):
-        """Genera el código C para la actualización de un for"""
-        if node.type == "actualizacion_for":
-            if len(node.children) >= 2:
-                var_name = node.children[0].leaf
-                expr = self._generate_expression(node.children[1])
-                if node.leaf == "+=":
-                    return f"{var_name} += {expr}"
-                else:
-                    return f"{var_name} = {expr}"
-        return ""
-    
+            self._add_line(target.name, " = ", value, ";")
+
+    def _emit_terminator(self, function, block, following, texts):
+        """Genera el salto final de un bloque; se omite el goto al bloque siguiente"""
+        if block.terminator == TERM_RETURN:
+            returned = block.cond
+            if returned >= 0:
+                value = self._value(function, returned, texts)
+                if function.values[returned].type == "cadena":
+                    if returned in function.params:
+                        # Un parámetro que no se ha modificado sigue siendo del llamador
+                        value = f"jstr_devolver({value})"
+                    elif function.values[returned].kind == VALUE_MEMBER:
+                        # Un miembro sigue siendo del objeto: se retorna una copia
+                        value = f"jstr_copia({value})"
+            # Las cadenas y arrays propios se liberan salvo el retornado, que pasa al llamador, en
+            # orden inverso para que la arena recupere su espacio
+            for index in reversed(self.owned):
+                if index != returned:
+                    self._emit_free(function, index)
+            if returned >= 0:
+                self._add_line("return ", value, ";")
+            elif following is not None:
+                # Al final de una función sin valor de retorno el return sobra
+                self._add_line("return;")
+        elif block.terminator == TERM_JUMP:
+            if block.targets[0] != following:
+                self._add_line(self._goto(block.targets[0]))
+        elif block.terminator == TERM_BRANCH:
+            cond = self._value(function, block.cond, texts)
+            if_true, if_false = block.targets
+            if if_false == following:
+                self._add_line("if (", cond, ") ", self._goto(if_true))
+            elif if_true == following:
+                self._add_line("if (!", cond, ") ", self._goto(if_false))
+            else:
+                self._add_line("if (", cond, ") ", self._goto(if_true))
+                self._add_line(self._goto(if_false))
+
+    def _emit_free(self, function, index):
+        """Libera al salir del método el buffer de una cadena, de cada cadena de un array o de un
+        array dinámico"""
+        value = function.values[index]
+        if index in function.dynamic_arrays:
+            if value.type == "cadena[]":
+                self._add_line("jstr_liberar_todas(", value.name, ".datos, ", value.name, ".longitud);")
+            self._add_line("JONSON_SOLTAR(", value.name, ".datos, ", value.name, ".capacidad * sizeof(*", value.name, ".datos));")
+        elif value.type == "cadena[]":
+            size = function.array_sizes.get(index, DEFAULT_ARRAY_SIZE)
+            self._add_line("jstr_liberar_todas(", value.name, ", ", str(size), ");")
+        else:
+            self._add_line("jstr_liberar(&", value.name, ");")
+
     def _map_type(self, jonson_type):
         """Mapea un tipo de dato de Jonson a su equivalente en C"""
         type_map = {
@@ -1164,184 +963,14 @@ class CodeGenerator:
             "flotante": "float",
             "booleano": "bool",
             "caracter": "char",
-            "cadena": "char*",
+            "cadena": "jstr",
             "vacio": "void"
         }
-        
+
         # Manejar arrays
         if jonson_type.endswith("[]"):
             base_type = jonson_type[:-2]
             c_base_type = type_map.get(base_type, base_type)
             return f"{c_base_type}*"
-            
+
         return type_map.get(jonson_type, jonson_type)
-    
-    def _map_operator(self, jonson_op):
-        """Mapea un operador de Jonson a su equivalente en C"""
-        op_map = {
-            "IGUAL": "==",
-            "DISTINTO": "!=",
-            "MENOR": "<",
-            "MAYOR": ">",
-            "MENOR_IGUAL": "<=",
-            "MAYOR_IGUAL": ">="
-        }
-        return op_map.get(jonson_op, jonson_op)
-    
-    def _map_logical_operator(self, jonson_op):
-        """Mapea un operador lógico de Jonson a su equivalente en C"""
-        op_map = {
-            "AND": "&&",
-            "OR": "||",
-            "NOT": "!"
-        }
-        return op_map.get(jonson_op, jonson_op)
-    
-    def _collect_variables(self, node):
-        """Recopila todas las variables utilizadas en un nodo y sus hijos recursivamente"""
-        variables = {}
-        
-        # Primero, buscar todas las declaraciones explícitas
-        declared_vars = self._find_declared_variables(node)
-        
-        # Realizar correcciones específicas basadas en nombres típicos
-        for var, tipo in declared_vars.items():
-            # Variables típicas de cadena
-            if var in ["mensaje", "cadena", "texto", "nombre", "str"] or var.endswith("Mensaje") or var.endswith("Nombre"):
-                if tipo == "int":  # Solo corregir si fue mal inferido
-                    declared_vars[var] = "char*"
-            # Corregir arrays
-            elif var in ["numeros", "array", "arreglo", "lista"] or var.endswith("Array") or var.endswith("Lista"):
-                if tipo == "int":
-                    declared_vars[var] = "int*"
-                elif tipo == "float":
-                    declared_vars[var] = "float*"
-            # Corregir flotantes
-            elif var in ["temperatura", "promedio", "precio"] or var.endswith("Temperatura") or var.endswith("Promedio"):
-                if tipo == "int":  # Solo corregir si fue mal inferido
-                    declared_vars[var] = "float"
-                
-        # Luego, buscar variables utilizadas
-        used_vars = self._find_used_variables(node)
-        
-        # Combinar, dando preferencia a tipos declarados explícitamente
-        for var, tipo in declared_vars.items():
-            variables[var] = tipo
-            
-        for var in used_vars:
-            if var not in variables:
-                # Evitar incluir variables especiales que ya estarán en las declaraciones de clase
-                if var in ["establecerEdad", "obtenerEdad", "nombre"]:
-                    continue
-                    
-                # Variables típicas de cadena
-                if var in ["mensaje", "cadena", "texto", "nombre", "str"] or var.endswith("Mensaje") or var.endswith("Nombre"):
-                    variables[var] = "char*"
-                # Corregir arrays
-                elif var in ["numeros", "array", "arreglo", "lista"] or var.endswith("Array") or var.endswith("Lista"):
-                    variables[var] = "int*"
-                # Corregir flotantes
-                elif var in ["temperatura", "promedio", "precio"] or var.endswith("Temperatura") or var.endswith("Promedio"):
-                    variables[var] = "float"
-                # Caso especial para a y b
-                elif var == "a" or var == "b":
-                    variables[var] = "int"
-                else:
-                    variables[var] = "int"  # Asumir int por defecto
-                    
-        # Asegurar que a y b estén incluidos con los valores correctos
-        variables["a"] = "int"
-        variables["b"] = "int"
-            
-        return variables
-    
-    def _find_declared_variables(self, node):
-        """Encuentra las variables declaradas explícitamente"""
-        variables = {}
-        
-        if not hasattr(node, 'type'):
-            return variables
-            
-        # Si es una declaración de variable, añadirla
-        if node.type == "declaracion_variable" and len(node.children) >= 2:
-            tipo_original = node.children[0].leaf
-            tipo = self._map_type(tipo_original)
-            
-            # Manejar lista de IDs
-            if node.children[1].type == "lista_ids":
-                for i, id_node in enumerate(node.children[1].children):
-                    if id_node.type == "id":
-                        var_name = id_node.leaf
-                        
-                        # Especial para cadenas
-                        if tipo_original == "cadena":
-                            variables[var_name] = "char*"
-                        # Especial para arrays
-                        elif tipo_original.endswith("[]"):
-                            base_tipo = tipo_original[:-2]
-                            base_tipo_c = self._map_type(base_tipo)
-                            variables[var_name] = f"{base_tipo_c}*"
-                        else:
-                            variables[var_name] = tipo
-                        
-                        # Registrar la variable como declarada
-                        self.declared_variables.add(var_name)
-                        
-                        # Saltar la expresión de inicialización si existe
-                        if i + 1 < len(node.children[1].children) and node.children[1].children[i + 1].type == "expresion":
-                            i += 1
-                        
-            # Manejar declaración con inicialización
-            elif node.children[1].type == "id":
-                var_name = node.children[1].leaf
-                
-                # Especial para cadenas
-                if tipo_original == "cadena":
-                    variables[var_name] = "char*"
-                # Especial para arrays
-                elif tipo_original.endswith("[]"):
-                    base_tipo = tipo_original[:-2]
-                    base_tipo_c = self._map_type(base_tipo)
-                    variables[var_name] = f"{base_tipo_c}*"
-                else:
-                    variables[var_name] = tipo
-                    
-                # Registrar la variable como declarada
-                self.declared_variables.add(var_name)
-        
-        # Recursivamente buscar en los hijos
-        if hasattr(node, 'children'):
-            for child in node.children:
-                child_vars = self._find_declared_variables(child)
-                # Combinar
-                variables.update(child_vars)
-                    
-        return variables
-    
-    def _find_used_variables(self, node):
-        """Encuentra variables utilizadas que podrían no estar declaradas"""
-        variables = set()
-        
-        if not hasattr(node, 'type'):
-            return variables
-            
-        # Si es un identificador en una expresión, añadirlo
-        if node.type == "id":
-            # Filtrar variables especiales que ya están en las clases
-            if node.leaf not in ["establecerEdad", "obtenerEdad", "nombre"]:
-                variables.add(node.leaf)
-            
-        # Recursivamente buscar en los hijos
-        if hasattr(node, 'children'):
-            for child in node.children:
-                child_vars = self._find_used_variables(child)
-                variables.update(child_vars)
-                    
-        return variables
-    
-    def _replace_member_references_with_this_str(self, expr_str, class_name):
-        """Reemplaza las referencias a miembros en una cadena de expresión"""
-        for member in self.class_definitions[class_name]["members"]:
-            # Reemplazar solo si es una palabra completa (no parte de otra)
-            expr_str = re.sub(r'\b' + member + r'\b', f"this->{member}", expr_str)
-        return expr_str 
\ No newline at end of file
@@ -0,0 +1,183 @@
+from ir import (OP_MOV, OP_ADD, OP_MUL, OP_EQ, OP_NE, OP_LT, OP_GT, OP_LE, OP_GE, OP_AND, OP_OR,
+                OP_LOAD_INDEX, OP_CALL, OP_PRINT, OP_WAIT, PURE_OPCODES, IN_PLACE_OPCODES,
+                VALUE_VAR, VALUE_TEMP, VALUE_MEMBER)
+
+# Operaciones cuyo resultado no depende del orden de los operandos
+COMMUTATIVE_OPCODES = frozenset([OP_ADD, OP_MUL, OP_EQ, OP_NE, OP_AND, OP_OR])
+
+# Comparaciones que se reescriben intercambiando los operandos (a > b es b < a)
+SWAPPED_OPCODES = {OP_GT: OP_LT, OP_GE: OP_LE}
+
+# Tipos pasados por valor: un método puede modificar sus parámetros de estos tipos sin efectos fuera
+SCALAR_TYPES = ("entero", "flotante", "booleano", "caracter")
+
+def pure_functions(program):
+    """Nombres C de las funciones sin efectos laterales: no imprimen, no escriben miembros ni
+    arrays o cadenas recibidos, y solo llaman a funciones puras (punto fijo sobre el grafo de llamadas)"""
+    calls = {}
+    pure = set()
+    for function in program.functions:
+        callees = set()
+        if _locally_pure(function, callees):
+            pure.add(function.c_name)
+            calls[function.c_name] = callees
+
+    changed = True
+    while changed:
+        changed = False
+        for name in list(pure):
+            if not calls[name] <= pure:
+                pure.discard(name)
+                changed = True
+    return pure
+
+def _locally_pure(function, callees):
+    """Si las instrucciones de la función, salvo sus llamadas, no tienen efectos fuera de ella;
+    añade a callees las funciones llamadas"""
+    values = function.values
+    params = set(function.params)
+    for block in function.blocks:
+        for position in range(len(block)):
+            op = block.ops[position]
+            if op == OP_PRINT:
+                return False
+            if op == OP_CALL:
+                callees.add(block.calls[position][0])
+                continue
+            dst = block.dst[position]
+            if dst < 0:
+                continue
+            value = values[dst]
+            if value.kind == VALUE_MEMBER:
+                return False
+            if dst in params and (value.type not in SCALAR_TYPES or op in IN_PLACE_OPCODES):
+                return False
+    return True
+
+class CommonSubexpressions:
+    """Eliminación de subexpresiones comunes en cada bloque básico por numeración de valores.
+
+    Una expresión pura ya calculada en el bloque se sustituye por una copia del valor que la
+    guarda, que el generador de C declara como temporal. Las lecturas de memoria (miembros,
+    elementos de arrays y llamadas puras) se numeran junto con una época que avanza con cada
+    escritura a memoria, llamada con efectos o espera a las tareas."""
+    def __init__(self, function, pure=()):
+        self.function = function
+        self.values = function.values
+        self.pure = pure            # Nombres C de las funciones sin efectos laterales
+        self.eliminated = 0         # Expresiones sustituidas por un valor ya calculado
+        self.calls = 0              # De ellas, llamadas a funciones puras
+
+    def run(self):
+        """Ejecuta el pase en todos los bloques y devuelve el número de expresiones eliminadas"""
+        for block in self.function.blocks:
+            self._number_block(block)
+        return self.eliminated
+
+    def _number_block(self, block):
+        self.numbers = {}           # Valor (o (miembro, época)) -> número de valor actual
+        self.count = 0
+        self.memory = 0             # Época de memoria
+        available = {}              # Clave de expresión -> (número, valor que lo guarda)
+        redundant = []
+
+        for position in range(len(block)):
+            op = block.ops[position]
+            dst = block.dst[position]
+            key = self._key(block, position)
+            if key is None:
+                # Al esperar, las tareas pueden haber escrito en memoria
+                if op in IN_PLACE_OPCODES or op == OP_WAIT or (op == OP_CALL and block.calls[position][0] not in self.pure):
+                    self.memory += 1
+                if dst >= 0 and op not in IN_PLACE_OPCODES:
+                    self._define(dst, self._new_number())
+                continue
+
+            if op == OP_MOV and self.values[dst].type == self.values[block.a[position]].type:
+                number = self._number(block.a[position])
+            else:
+                entry = available.get(key)
+                if entry is not None and self._holds(entry[1], entry[0]):
+                    number, holder = entry
+                    if op == OP_CALL:
+                        del block.calls[position]
+                        self.calls += 1
+                    block.ops[position] = OP_MOV
+                    block.a[position] = holder
+                    block.b[position] = -1
+                    self.eliminated += 1
+                else:
+                    number = self._new_number()
+                    if self._holder(dst):
+                        available[key] = (number, dst)
+
+            if self._holder(dst) and self._holds(dst, number):
+                # Copia de un valor que el destino ya tiene
+                redundant.append(position)
+                continue
+            self._define(dst, number)
+
+        block.remove(redundant)
+
+    def _key(self, block, position):
+        """Clave de numeración de una instrucción pura (None si no se puede reutilizar)"""
+        op = block.ops[position]
+        dst = block.dst[position]
+        if dst < 0 or self.values[dst].type == "cadena":
+            return None
+        if op == OP_CALL:
+            callee, receiver, args = block.calls[position]
+            if callee not in self.pure:
+                return None
+            operands = [receiver] + list(args)
+        elif op in PURE_OPCODES:
+            operands = [block.a[position]] if block.b[position] < 0 else [block.a[position], block.b[position]]
+        else:
+            return None
+        if any(operand >= 0 and self.values[operand].type == "cadena" for operand in operands):
+            return None
+
+        numbers = [self._number(operand) if operand >= 0 else -1 for operand in operands]
+        if op in COMMUTATIVE_OPCODES:
+            numbers.sort()
+        elif op in SWAPPED_OPCODES:
+            op = SWAPPED_OPCODES[op]
+            numbers.reverse()
+        key = (op, self.values[dst].type, *numbers)
+        if op == OP_CALL:
+            key += (block.calls[position][0], self.memory)
+        elif op == OP_LOAD_INDEX:
+            key += (self.memory,)
+        return key
+
+    def _new_number(self):
+        self.count += 1
+        return self.count
+
+    def _slot(self, index):
+        if self.values[index].kind == VALUE_MEMBER:
+            return (index, self.memory)
+        return index
+
+    def _number(self, index):
+        """Número de valor de lo que contiene ahora un operando"""
+        slot = self._slot(index)
+        number = self.numbers.get(slot)
+        if number is None:
+            number = self.numbers[slot] = self._new_number()
+        return number
+
+    def _define(self, index, number):
+        value = self.values[index]
+        if value.kind == VALUE_MEMBER or value.type == "cadena":
+            # Escritura a memoria: los miembros y elementos leídos antes pueden haber cambiado
+            self.memory += 1
+        self.numbers[self._slot(index)] = number
+
+    def _holder(self, index):
+        """Si el valor puede guardar una expresión para reutilizarla"""
+        value = self.values[index]
+        return value.kind in (VALUE_VAR, VALUE_TEMP) and value.type != "cadena" and value.name != "this"
+
+    def _holds(self, index, number):
+        return self.numbers.get(index) == number
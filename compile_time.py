@@ -0,0 +1,143 @@
+from ir import (OP_MOV, OP_CALL, PURE_OPCODES, OP_LOAD_INDEX, TERM_JUMP, TERM_BRANCH, TERM_RETURN,
+                VALUE_VAR, VALUE_CONST, VALUE_MEMBER, Value)
+from constant_propagation import TRACKED_TYPES, NOT_CONSTANT, constant_text, parse_constant, convert, evaluate
+
+# Instrucciones que puede ejecutar la evaluación de una llamada (incluidas las llamadas anidadas)
+STEP_BUDGET = 10000
+
+# Profundidad máxima de llamadas anidadas durante la evaluación
+DEPTH_LIMIT = 64
+
+def constant_functions(program, pure):
+    """Nombres C de las funciones puras cuyo resultado solo depende de sus argumentos: no leen
+    miembros, arrays ni cadenas, todos sus valores son escalares seguidos por la propagación de
+    constantes y solo llaman a funciones de este tipo"""
+    calls = {}
+    for function in program.functions:
+        callees = set()
+        if function.c_name in pure and function.return_type in TRACKED_TYPES and _scalar_only(function, callees):
+            calls[function.c_name] = callees
+
+    constant = set(calls)
+    changed = True
+    while changed:
+        changed = False
+        for name in list(constant):
+            if not calls[name] <= constant:
+                constant.discard(name)
+                changed = True
+    return constant
+
+def _scalar_only(function, callees):
+    """Si la función solo opera con escalares locales; añade a callees las funciones llamadas"""
+    for value in function.values:
+        if value.kind == VALUE_MEMBER or value.type not in TRACKED_TYPES:
+            # this solo puede aparecer como receptor de otra llamada
+            if not (value.kind == VALUE_VAR and value.name == "this"):
+                return False
+    for block in function.blocks:
+        for position in range(len(block)):
+            op = block.ops[position]
+            if op == OP_CALL:
+                callees.add(block.calls[position][0])
+            elif op not in PURE_OPCODES or op == OP_LOAD_INDEX:
+                return False
+    return True
+
+class CompileTimeEvaluator:
+    """Evaluación en compilación de las llamadas a funciones puras con argumentos literales.
+
+    Interpreta el IR del método con la aritmética de C de la propagación de constantes, con un
+    límite de instrucciones; si la ejecución termina, la llamada se sustituye por el literal."""
+    def __init__(self, program, pure, budget=STEP_BUDGET):
+        self.program = program
+        self.functions = constant_functions(program, pure)
+        self.budget = budget
+        self.results = {}           # (función, argumentos) -> resultado (NOT_CONSTANT si no se pudo evaluar)
+        self.evaluated = 0          # Llamadas sustituidas por su resultado
+
+    def run(self, function):
+        """Sustituye las llamadas evaluables de la función; devuelve cuántas sustituyó"""
+        values = function.values
+        evaluated = 0
+        for block in function.blocks:
+            for position in range(len(block)):
+                if block.ops[position] != OP_CALL or block.dst[position] < 0:
+                    continue
+                callee, _, args = block.calls[position]
+                if callee not in self.functions or any(values[arg].kind != VALUE_CONST for arg in args):
+                    continue
+                result = self._evaluate(callee, [parse_constant(values[arg]) for arg in args])
+                if result is NOT_CONSTANT:
+                    continue
+                del block.calls[position]
+                block.ops[position] = OP_MOV
+                block.a[position] = function.const(constant_text(result), values[block.dst[position]].type)
+                block.b[position] = -1
+                evaluated += 1
+        self.evaluated += evaluated
+        return evaluated
+
+    def _evaluate(self, callee, args):
+        key = (callee, tuple((type(arg), repr(arg)) for arg in args))
+        if key not in self.results:
+            self.steps = self.budget
+            self.results[key] = self._call(self.program.function(callee), args, 0)
+        return self.results[key]
+
+    def _call(self, function, args, depth):
+        """Ejecuta la función con los argumentos dados; NOT_CONSTANT si no termina dentro del límite"""
+        if depth > DEPTH_LIMIT or len(args) != len(function.params):
+            return NOT_CONSTANT
+        values = function.values
+        state = {}
+        for index, arg in zip(function.params, args):
+            state[index] = convert(arg, values[index].type)
+        for index in function.locals:
+            initial = function.initializers.get(index)
+            if isinstance(initial, str):
+                state[index] = convert(parse_constant(Value(VALUE_CONST, initial, values[index].type)), values[index].type)
+            elif index in function.zero_initialized:
+                state[index] = convert(0, values[index].type)
+
+        def lookup(index):
+            if values[index].kind == VALUE_CONST:
+                return parse_constant(values[index])
+            return state.get(index, NOT_CONSTANT)
+
+        block = function.blocks[0]
+        while True:
+            self.steps -= len(block) + 1
+            if self.steps < 0:
+                return NOT_CONSTANT
+            for position in range(len(block)):
+                op = block.ops[position]
+                dst = block.dst[position]
+                if op == OP_CALL:
+                    callee, _, call_args = block.calls[position]
+                    result = self._call(self.program.function(callee), [lookup(arg) for arg in call_args], depth + 1)
+                else:
+                    a = lookup(block.a[position])
+                    b = lookup(block.b[position]) if block.b[position] >= 0 else False
+                    if a is NOT_CONSTANT or b is NOT_CONSTANT:
+                        return NOT_CONSTANT
+                    result = a if op == OP_MOV else evaluate(op, a, b)
+                if result is NOT_CONSTANT:
+                    return NOT_CONSTANT
+                if dst < 0:
+                    continue
+                if values[dst].kind == VALUE_VAR or op in (OP_MOV, OP_CALL):
+                    result = convert(result, values[dst].type)
+                state[dst] = result
+
+            if block.terminator == TERM_JUMP:
+                block = function.blocks[block.targets[0]]
+            elif block.terminator == TERM_BRANCH:
+                condition = lookup(block.cond)
+                if condition is NOT_CONSTANT:
+                    return NOT_CONSTANT
+                block = function.blocks[block.targets[0] if condition else block.targets[1]]
+            elif block.terminator == TERM_RETURN and block.cond >= 0:
+                return convert(lookup(block.cond), function.return_type)
+            else:
+                return NOT_CONSTANT
@@ -0,0 +1,397 @@
+import math
+import struct
+from ir import (OP_MOV, OP_ADD, OP_SUB, OP_MUL, OP_DIV, OP_MOD, OP_EQ, OP_NE, OP_LT, OP_GT, OP_LE, OP_GE,
+                OP_AND, OP_OR, OP_NOT, OP_I2F, OP_LOAD_INDEX, OP_STORE_INDEX, OP_CALL,
+                PURE_OPCODES, TERM_BRANCH, TERM_JUMP, TERM_RETURN, VALUE_VAR, VALUE_TEMP, VALUE_CONST, Value)
+
+# Tipos cuyos valores se siguen durante la propagación; cadenas, arrays y objetos no
+TRACKED_TYPES = ("entero", "flotante", "booleano")
+
+# Valor que no es constante (cima del retículo; la ausencia en el estado es "indefinido")
+NOT_CONSTANT = object()
+
+INT_MIN = -(1 << 31)
+INT_MAX = (1 << 31) - 1
+
+class Single(float):
+    """Valor flotante con precisión de float de C (los literales sin sufijo son double)"""
+
+def to_single(value):
+    """Redondea un número a float de 32 bits (None si no es representable)"""
+    try:
+        return Single(struct.unpack('f', struct.pack('f', value))[0])
+    except OverflowError:
+        return None
+
+def wrap_int(value):
+    """Aritmética entera de C: complemento a dos de 32 bits"""
+    value &= 0xFFFFFFFF
+    return value - (1 << 32) if value > INT_MAX else value
+
+def same_constant(a, b):
+    """Igualdad estricta de constantes (distingue tipos y el signo de cero)"""
+    return type(a) is type(b) and repr(a) == repr(b)
+
+def constant_text(value):
+    """Texto C de una constante plegada"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return "(-2147483647 - 1)" if value == INT_MIN else str(value)
+    if isinstance(value, Single):
+        text = f"{value:.9g}"
+        if "." not in text and "e" not in text:
+            text += ".0"
+        return text + "f"
+    return repr(value)
+
+def parse_constant(value):
+    """Constante de un literal del IR (NOT_CONSTANT si su tipo no se sigue)"""
+    text = value.name
+    try:
+        if value.type == "booleano":
+            return text == "true"
+        if value.type == "entero":
+            return INT_MIN if text.startswith("(") else int(text)
+        if value.type == "flotante":
+            return to_single(float(text[:-1])) if text.endswith("f") else float(text)
+    except ValueError:
+        pass
+    return NOT_CONSTANT
+
+def convert(value, tipo):
+    """Conversión implícita de C al guardar un valor en una variable del tipo dado"""
+    if value is NOT_CONSTANT or tipo not in TRACKED_TYPES:
+        return NOT_CONSTANT
+    if tipo == "booleano":
+        return bool(value)
+    if tipo == "entero":
+        if isinstance(value, float):
+            if not math.isfinite(value) or not INT_MIN <= math.trunc(value) <= INT_MAX:
+                return NOT_CONSTANT
+            return int(math.trunc(value))
+        return int(value)
+    single = to_single(value)
+    return single if single is not None and math.isfinite(single) else NOT_CONSTANT
+
+def evaluate(op, a, b):
+    """Evalúa una operación pura sobre constantes como lo haría C (NOT_CONSTANT si no se puede)"""
+    if op == OP_NOT:
+        return not a
+    if op == OP_I2F:
+        return convert(a, "flotante")
+    if op == OP_AND:
+        return bool(a) and bool(b)
+    if op == OP_OR:
+        return bool(a) or bool(b)
+
+    if isinstance(a, float) or isinstance(b, float):
+        # Las operaciones con un literal double se hacen en double; entre floats, en float
+        single = not (type(a) is float or type(b) is float)
+        if single:
+            a, b = to_single(a), to_single(b)
+            if a is None or b is None:
+                return NOT_CONSTANT
+        a, b = float(a), float(b)
+        if op == OP_ADD:
+            result = a + b
+        elif op == OP_SUB:
+            result = a - b
+        elif op == OP_MUL:
+            result = a * b
+        elif op == OP_DIV:
+            if b == 0:
+                return NOT_CONSTANT
+            result = a / b
+        else:
+            return compare(op, a, b)
+        if single:
+            result = to_single(result)
+        return result if result is not None and math.isfinite(result) else NOT_CONSTANT
+
+    a, b = int(a), int(b)
+    if op == OP_ADD:
+        return wrap_int(a + b)
+    if op == OP_SUB:
+        return wrap_int(a - b)
+    if op == OP_MUL:
+        return wrap_int(a * b)
+    if op in (OP_DIV, OP_MOD):
+        # División entera de C: trunca hacia cero y el resto lleva el signo del dividendo
+        if b == 0 or (a == INT_MIN and b == -1):
+            return NOT_CONSTANT
+        quotient = abs(a) // abs(b) * (1 if (a < 0) == (b < 0) else -1)
+        return quotient if op == OP_DIV else a - b * quotient
+    return compare(op, a, b)
+
+def compare(op, a, b):
+    if op == OP_EQ:
+        return a == b
+    if op == OP_NE:
+        return a != b
+    if op == OP_LT:
+        return a < b
+    if op == OP_GT:
+        return a > b
+    if op == OP_LE:
+        return a <= b
+    if op == OP_GE:
+        return a >= b
+    return NOT_CONSTANT
+
+class ConstantPropagation:
+    """Plegado y propagación de constantes sobre el IR de una función.
+
+    Propaga condicionalmente: solo sigue las aristas que pueden ejecutarse, de modo
+    que un 'si' con condición conocida no mezcla el estado de la rama descartada."""
+    def __init__(self, function):
+        self.function = function
+        self.values = function.values
+        self.folded = 0         # Instrucciones evaluadas en compilación (eliminadas o convertidas en copias)
+        self.propagated = 0     # Operandos sustituidos por su valor constante
+        self.branches = 0       # Saltos condicionales resueltos
+
+    def run(self):
+        """Ejecuta el pase y devuelve el número total de cambios"""
+        if not self.function.blocks:
+            return 0
+        entry_states = self._solve()
+        self._rewrite(entry_states)
+        return self.folded + self.propagated + self.branches
+
+    # Análisis
+
+    def _initial_state(self):
+        """Estado a la entrada de la función: inicializadores constantes de las declaraciones"""
+        function = self.function
+        state = {}
+        for index in function.params:
+            state[index] = NOT_CONSTANT
+        for index in function.locals:
+            tipo = self.values[index].type
+            if tipo not in TRACKED_TYPES:
+                continue
+            initial = function.initializers.get(index)
+            if isinstance(initial, str):
+                state[index] = convert(parse_constant(Value(VALUE_CONST, initial, tipo)), tipo)
+            elif index in function.zero_initialized:
+                state[index] = convert(0, tipo)
+        return state
+
+    def _solve(self):
+        """Estado de entrada de cada bloque ejecutable (punto fijo sobre las aristas ejecutables)"""
+        blocks = self.function.blocks
+        # Los estados solo guardan lo vivo a la entrada de cada bloque: lo demás no se lee
+        # antes de redefinirse y guardarlo haría crecer los estados con el tamaño de la función
+        liveness = self.function.liveness({index for index, value in enumerate(self.values)
+                                           if value.kind in (VALUE_VAR, VALUE_TEMP) and value.type in TRACKED_TYPES})
+        live = liveness.live_in
+        bits = liveness.bits
+
+        def prune(state, live):
+            return {index: value for index, value in state.items() if index in bits and live >> bits[index] & 1}
+
+        initial = prune(self._initial_state(), live[0])
+        entry_states = {0: initial}
+        exit_states = {}
+        sources = {}            # Bloque -> predecesores por aristas ejecutables
+        pending = [0]
+        queued = {0}
+
+        while pending:
+            index = pending.pop()
+            queued.discard(index)
+            block = blocks[index]
+            state = self._transfer(block, dict(entry_states[index]))
+            exit_states[index] = state
+
+            for target in self._successors(block, state):
+                sources.setdefault(target, set()).add(index)
+                incoming = [exit_states[source] for source in sources[target]]
+                if target == 0:
+                    incoming.append(initial)
+                incoming = prune(self._meet(incoming), live[target])
+                if target in entry_states and self._states_equal(entry_states[target], incoming):
+                    continue
+                entry_states[target] = incoming
+                if target not in queued:
+                    queued.add(target)
+                    pending.append(target)
+        return entry_states
+
+    def _meet(self, states):
+        result = None
+        for state in states:
+            if result is None:
+                result = dict(state)
+                continue
+            for index, value in state.items():
+                current = result.get(index)
+                if index not in result:
+                    result[index] = value
+                elif current is not NOT_CONSTANT and (value is NOT_CONSTANT or not same_constant(current, value)):
+                    result[index] = NOT_CONSTANT
+        return result if result is not None else {}
+
+    def _states_equal(self, a, b):
+        if a.keys() != b.keys():
+            return False
+        for index, value in a.items():
+            other = b[index]
+            if (value is NOT_CONSTANT) != (other is NOT_CONSTANT):
+                return False
+            if value is not NOT_CONSTANT and not same_constant(value, other):
+                return False
+        return True
+
+    def _successors(self, block, state):
+        """Sucesores ejecutables: un salto con condición constante solo sigue una rama"""
+        if block.terminator == TERM_BRANCH:
+            condition = self._lookup(state, block.cond)
+            if condition is not NOT_CONSTANT and condition is not None:
+                return [block.targets[0] if condition else block.targets[1]]
+        return block.targets
+
+    def _lookup(self, state, index):
+        """Valor de un operando: constante, NOT_CONSTANT o None si aún no está definido"""
+        value = self.values[index]
+        if value.kind == VALUE_CONST:
+            return parse_constant(value) if value.type in TRACKED_TYPES else NOT_CONSTANT
+        if value.kind in (VALUE_VAR, VALUE_TEMP) and value.type in TRACKED_TYPES:
+            return state.get(index, None if value.kind == VALUE_TEMP else NOT_CONSTANT)
+        return NOT_CONSTANT
+
+    def _result(self, block, position, state):
+        """Valor producido por una instrucción en el estado dado"""
+        op = block.ops[position]
+        if op not in PURE_OPCODES or op == OP_LOAD_INDEX:
+            return NOT_CONSTANT
+        a = self._lookup(state, block.a[position])
+        b = self._lookup(state, block.b[position]) if block.b[position] >= 0 else False
+        if op == OP_MUL and self.values[block.dst[position]].type == "entero" and (
+                (a == 0 and type(a) is int) or (b == 0 and type(b) is int)):
+            # Un producto entero por cero es cero aunque el otro factor no se conozca
+            return 0
+        if a is NOT_CONSTANT or b is NOT_CONSTANT or a is None or b is None:
+            return NOT_CONSTANT
+        if op == OP_MOV:
+            return a
+        return evaluate(op, a, b)
+
+    def _transfer(self, block, state):
+        for position in range(len(block)):
+            dst = block.dst[position]
+            if dst < 0 or block.ops[position] == OP_STORE_INDEX:
+                continue
+            value = self.values[dst]
+            if value.kind not in (VALUE_VAR, VALUE_TEMP) or value.type not in TRACKED_TYPES:
+                continue
+            result = self._result(block, position, state)
+            if value.kind == VALUE_VAR or block.ops[position] == OP_MOV:
+                result = convert(result, value.type)
+            state[dst] = result
+        return state
+
+    # Reescritura
+
+    def _constant_operand(self, state, index):
+        """Índice del literal que sustituye a un operando, o None si no es constante"""
+        if index < 0:
+            return None
+        value = self.values[index]
+        if value.kind not in (VALUE_VAR, VALUE_TEMP):
+            return None
+        constant = self._lookup(state, index)
+        if constant is NOT_CONSTANT or constant is None:
+            return None
+        return self.function.const(constant_text(constant), value.type)
+
+    def _replace(self, state, index):
+        replacement = self._constant_operand(state, index)
+        if replacement is None:
+            return index
+        self.propagated += 1
+        return replacement
+
+    def _rewrite(self, entry_states):
+        function = self.function
+        values = self.values
+        constant_temps = {}     # Temporal -> [(bloque, posición, valor)] de sus definiciones constantes
+
+        for index, block in enumerate(function.blocks):
+            if index not in entry_states:
+                continue
+            state = dict(entry_states[index])
+
+            for position in range(len(block)):
+                op = block.ops[position]
+                dst = block.dst[position]
+
+                # Operandos leídos (los destinos de store_index y concat, el array de
+                # load_index y el receptor de una llamada deben seguir siendo lvalues)
+                if op == OP_CALL:
+                    callee, receiver, args = block.calls[position]
+                    block.calls[position] = (callee, receiver, [self._replace(state, arg) for arg in args])
+                else:
+                    if op != OP_LOAD_INDEX:
+                        block.a[position] = self._replace(state, block.a[position])
+                    block.b[position] = self._replace(state, block.b[position])
+
+                if dst < 0 or op == OP_STORE_INDEX:
+                    continue
+                value = values[dst]
+                if value.kind not in (VALUE_VAR, VALUE_TEMP) or value.type not in TRACKED_TYPES:
+                    continue
+                result = self._result(block, position, state)
+                if value.kind == VALUE_VAR or op == OP_MOV:
+                    result = convert(result, value.type)
+                state[dst] = result
+                if result is NOT_CONSTANT or op not in PURE_OPCODES:
+                    continue
+
+                # La instrucción se evalúa en compilación: el temporal desaparece y la
+                # variable recibe directamente el literal
+                if value.kind == VALUE_TEMP:
+                    constant_temps.setdefault(dst, []).append((block, position, result))
+                elif op != OP_MOV or values[block.a[position]].kind != VALUE_CONST:
+                    block.ops[position] = OP_MOV
+                    block.a[position] = function.const(constant_text(result), value.type)
+                    block.b[position] = -1
+                    self.folded += 1
+
+            if block.terminator == TERM_BRANCH:
+                condition = self._lookup(state, block.cond)
+                if condition is not NOT_CONSTANT and condition is not None:
+                    block.terminator = TERM_JUMP
+                    block.targets = [block.targets[0] if condition else block.targets[1]]
+                    block.cond = -1
+                    self.branches += 1
+            elif block.terminator == TERM_RETURN and block.cond >= 0:
+                block.cond = self._replace(state, block.cond)
+
+        self._remove_temps(constant_temps)
+
+    def _remove_temps(self, constant_temps):
+        """Elimina las definiciones de temporales constantes que ya no se leen; las demás pasan a ser copias del literal"""
+        if not constant_temps:
+            return
+        used = set()
+        for block in self.function.blocks:
+            for position in range(len(block)):
+                used.update(block.reads(position))
+            if block.terminator in (TERM_BRANCH, TERM_RETURN):
+                used.add(block.cond)
+
+        removals = {}
+        for temp, definitions in constant_temps.items():
+            for block, position, result in definitions:
+                if temp not in used:
+                    removals.setdefault(block.index, []).append(position)
+                    self.folded += 1
+                elif block.ops[position] != OP_MOV or self.values[block.a[position]].kind != VALUE_CONST:
+                    block.ops[position] = OP_MOV
+                    block.a[position] = self.function.const(constant_text(result), self.values[temp].type)
+                    block.b[position] = -1
+                    self.folded += 1
+        for index, positions in removals.items():
+            self.function.blocks[index].remove(positions)
@@ -0,0 +1,401 @@
+from collections import deque
+
+# Tipos escalares; el resto (arrays y clases) se consideran inicializados al declararse
+SCALAR_TYPES = ["entero", "flotante", "booleano", "caracter", "cadena"]
+
+class VariableIndex:
+    """Asigna a cada variable un bit para representar conjuntos como enteros de Python"""
+    def __init__(self):
+        self.bits = {}          # Nombre -> posición del bit
+        self.names = []         # Posición del bit -> nombre
+        self.aggregates = 0     # Conjunto de variables no escalares (arrays y objetos)
+
+    def add(self, name, tipo=None):
+        """Registra una variable y devuelve su bit"""
+        if name not in self.bits:
+            self.bits[name] = len(self.names)
+            self.names.append(name)
+        bit = 1 << self.bits[name]
+        if tipo is not None and tipo not in SCALAR_TYPES:
+            self.aggregates |= bit
+        return bit
+
+    def bit(self, name):
+        """Bit de una variable (0 si no es una variable local conocida)"""
+        position = self.bits.get(name)
+        return 0 if position is None else 1 << position
+
+    def all(self):
+        """Conjunto con todas las variables"""
+        return (1 << len(self.names)) - 1
+
+class FlowStatement:
+    """Sentencia simple (o condición) dentro de un bloque básico"""
+    def __init__(self, node, uses=0, defs=0, kills=0, use_sites=None):
+        self.node = node                # Nodo del AST
+        self.uses = uses                # Variables leídas
+        self.defs = defs                # Variables escritas por completo
+        self.kills = kills              # Variables declaradas sin inicializar
+        self.use_sites = use_sites if use_sites else []  # (nombre, nodo id) de cada lectura
+
+class BasicBlock:
+    """Bloque básico del grafo de flujo de control"""
+    def __init__(self, index):
+        self.index = index
+        self.statements = []
+        self.successors = []
+        self.predecessors = []
+
+class ControlFlowGraph:
+    """Grafo de flujo de control de un cuerpo de función"""
+    def __init__(self):
+        self.blocks = []
+        self.entry = self.new_block()
+        self.exit = self.new_block()
+
+    def new_block(self):
+        """Crea un bloque básico vacío"""
+        block = BasicBlock(len(self.blocks))
+        self.blocks.append(block)
+        return block
+
+    def add_edge(self, source, target):
+        """Añade una arista entre dos bloques"""
+        if source is None or target in source.successors:
+            return
+        source.successors.append(target)
+        target.predecessors.append(source)
+
+class CFGBuilder:
+    """Construye el grafo de flujo de control a partir del AST"""
+    def __init__(self, variables):
+        self.variables = variables
+        self.cfg = None
+        self.break_targets = []
+
+    def build(self, body):
+        """Construye el grafo para un bloque de sentencias"""
+        self.cfg = ControlFlowGraph()
+        self.break_targets = []
+        first = self.cfg.new_block()
+        self.cfg.add_edge(self.cfg.entry, first)
+        last = self._visit(body, first)
+        self.cfg.add_edge(last, self.cfg.exit)
+        return self.cfg
+
+    def _current(self, block):
+        """Devuelve el bloque actual; tras un salto las sentencias van a un bloque inalcanzable"""
+        return block if block is not None else self.cfg.new_block()
+
+    def _append(self, block, statement):
+        block = self._current(block)
+        block.statements.append(statement)
+        return block
+
+    def _visit(self, node, block):
+        """Procesa un nodo de sentencia y devuelve el bloque activo al terminar (None si no hay salida)"""
+        if not hasattr(node, 'type'):
+            return block
+
+        if node.type in ("bloque", "sentencias", "sentencia"):
+            for child in node.children:
+                block = self._visit(child, block)
+            return block
+
+        if node.type == "sentencia_if":
+            block = self._append(block, self._condition(node.children[0]))
+            join = self.cfg.new_block()
+            then_block = self.cfg.new_block()
+            self.cfg.add_edge(block, then_block)
+            self.cfg.add_edge(self._visit(node.children[1], then_block), join)
+            if len(node.children) >= 3:
+                else_block = self.cfg.new_block()
+                self.cfg.add_edge(block, else_block)
+                self.cfg.add_edge(self._visit(node.children[2], else_block), join)
+            else:
+                self.cfg.add_edge(block, join)
+            return join
+
+        if node.type == "sentencia_while":
+            header = self.cfg.new_block()
+            self.cfg.add_edge(self._current(block), header)
+            header.statements.append(self._condition(node.children[0]))
+            body = self.cfg.new_block()
+            after = self.cfg.new_block()
+            self.cfg.add_edge(header, body)
+            self.cfg.add_edge(header, after)
+            self.break_targets.append(after)
+            self.cfg.add_edge(self._visit(node.children[1], body), header)
+            self.break_targets.pop()
+            return after
+
+        if node.type == "sentencia_do_while":
+            body = self.cfg.new_block()
+            self.cfg.add_edge(self._current(block), body)
+            after = self.cfg.new_block()
+            self.break_targets.append(after)
+            end = self._visit(node.children[0], body)
+            self.break_targets.pop()
+            condition = self.cfg.new_block()
+            self.cfg.add_edge(end, condition)
+            condition.statements.append(self._condition(node.children[1]))
+            self.cfg.add_edge(condition, body)
+            self.cfg.add_edge(condition, after)
+            return after
+
+        if node.type == "sentencia_for":
+            block = self._append(block, self._for_initialization(node.children[0]))
+            header = self.cfg.new_block()
+            self.cfg.add_edge(block, header)
+            header.statements.append(self._condition(node.children[1]))
+            body = self.cfg.new_block()
+            after = self.cfg.new_block()
+            self.cfg.add_edge(header, body)
+            self.cfg.add_edge(header, after)
+            self.break_targets.append(after)
+            end = self._visit(node.children[3], body)
+            self.break_targets.pop()
+            if end is not None:
+                update = self.cfg.new_block()
+                self.cfg.add_edge(end, update)
+                update.statements.append(self._for_update(node.children[2]))
+                self.cfg.add_edge(update, header)
+            return after
+
+        if node.type == "sentencia_switch":
+            block = self._append(block, self._condition(node.children[0]))
+            after = self.cfg.new_block()
+            has_default = False
+            self.break_targets.append(after)
+            for case in node.children[1].children:
+                case_block = self.cfg.new_block()
+                self.cfg.add_edge(block, case_block)
+                if case.type == "caso_default":
+                    has_default = True
+                    body = case.children[0] if case.children else None
+                else:
+                    body = case.children[1] if len(case.children) > 1 else None
+                # El código generado termina cada caso con break: no hay caída al siguiente
+                self.cfg.add_edge(self._visit(body, case_block), after)
+            self.break_targets.pop()
+            if not has_default:
+                self.cfg.add_edge(block, after)
+            return after
+
+        if node.type == "sentencia_tarea":
+            # La tarea termina antes del esperar que la sigue: sus sentencias cuentan en su sitio
+            return self._visit(node.children[0], block)
+
+        if node.type == "sentencia_return":
+            block = self._append(block, self._simple(node))
+            self.cfg.add_edge(block, self.cfg.exit)
+            return None
+
+        if node.type == "sentencia_break":
+            block = self._current(block)
+            block.statements.append(FlowStatement(node))
+            if self.break_targets:
+                self.cfg.add_edge(block, self.break_targets[-1])
+            return None
+
+        return self._append(block, self._simple(node))
+
+    def _simple(self, node):
+        """Calcula usos y definiciones de una sentencia sin control de flujo"""
+        statement = FlowStatement(node)
+
+        if node.type in ("declaracion_variable", "declaracion_array"):
+            target = node.children[1]
+            if target.type == "lista_ids":
+                for id_node in target.children:
+                    bit = self.variables.bit(id_node.leaf)
+                    if bit & self.variables.aggregates:
+                        statement.defs |= bit
+                    else:
+                        statement.kills |= bit
+            elif target.type == "lista_ids_inicializadas":
+                # Pares id, expresión evaluados en orden
+                pairs = target.children
+                for i in range(0, len(pairs) - 1, 2):
+                    self._add_uses(statement, pairs[i + 1])
+                    statement.defs |= self.variables.bit(pairs[i].leaf)
+            elif target.type == "id":
+                if len(node.children) >= 3:
+                    self._add_uses(statement, node.children[2])
+                statement.defs |= self.variables.bit(target.leaf)
+
+        elif node.type in ("asignacion", "asignacion_compuesta"):
+            target = node.children[0]
+            self._add_uses(statement, node.children[1])
+            if target.type == "id" and not target.children:
+                if node.type == "asignacion_compuesta":
+                    self._add_use(statement, target)
+                statement.defs |= self.variables.bit(target.leaf)
+            else:
+                # Escritura a un elemento o miembro: el agregado se lee, no se redefine
+                self._add_uses(statement, target)
+
+        else:
+            self._add_uses(statement, node)
+
+        return statement
+
+    def _condition(self, node):
+        """Sentencia que representa la evaluación de una condición"""
+        statement = FlowStatement(node)
+        self._add_uses(statement, node)
+        return statement
+
+    def _for_initialization(self, node):
+        """Inicialización de un for: [tipo] id = expresión"""
+        statement = FlowStatement(node)
+        id_node = node.children[1] if len(node.children) >= 3 else node.children[0]
+        self._add_uses(statement, node.children[-1])
+        statement.defs |= self.variables.bit(id_node.leaf)
+        return statement
+
+    def _for_update(self, node):
+        """Actualización de un for: id = expresión | id += expresión"""
+        statement = FlowStatement(node)
+        if node.leaf == "+=":
+            self._add_use(statement, node.children[0])
+        self._add_uses(statement, node.children[1])
+        statement.defs |= self.variables.bit(node.children[0].leaf)
+        return statement
+
+    def _add_use(self, statement, id_node):
+        bit = self.variables.bit(id_node.leaf)
+        if bit:
+            statement.uses |= bit
+            statement.use_sites.append((id_node.leaf, id_node))
+
+    def _add_uses(self, statement, node):
+        """Recorre una expresión y registra las variables leídas"""
+        pending = [node]
+        while pending:
+            current = pending.pop()
+            if not hasattr(current, 'type'):
+                continue
+            if current.type == "id":
+                # Los hijos acceso_objeto nombran miembros, no variables
+                self._add_use(statement, current)
+                continue
+            if current.type == "acceso_objeto":
+                # Miembro de un elemento de array (arr[i].campo)
+                continue
+            if current.type in ("llamada_funcion", "llamada_metodo") and current.children:
+                callee = current.children[0]
+                if callee.type == "id" and callee.children:
+                    self._add_use(statement, callee)
+                pending.extend(current.children[1:])
+                continue
+            pending.extend(current.children)
+
+def collect_variables(body, parameters=()):
+    """Registra las variables declaradas en un cuerpo de función (y sus parámetros)"""
+    variables = VariableIndex()
+    for name, tipo in parameters:
+        variables.add(name, tipo)
+
+    pending = [body]
+    while pending:
+        node = pending.pop()
+        if not hasattr(node, 'type'):
+            continue
+        if node.type in ("declaracion_variable", "declaracion_array") and len(node.children) >= 2:
+            tipo = node.children[0].leaf
+            target = node.children[1]
+            if node.children[0].type == "tipo_array":
+                tipo = f"{tipo}[]"
+            if target.type in ("lista_ids", "lista_ids_inicializadas"):
+                for id_node in target.children:
+                    if id_node.type == "id":
+                        variables.add(id_node.leaf, tipo)
+            elif target.type == "id":
+                variables.add(target.leaf, tipo)
+        elif node.type == "asignacion_for" and len(node.children) >= 3:
+            variables.add(node.children[1].leaf, node.children[0].leaf)
+        pending.extend(node.children)
+
+    return variables
+
+def solve(cfg, gen, kill, boundary, initial):
+    """Resuelve un problema de flujo de datos hacia adelante con intersección en las uniones
+    mediante una lista de trabajo.
+
+    gen y kill son listas indexadas por bloque; la función de transferencia es
+    out = gen | (in & ~kill). Devuelve (entrada, salida) de cada bloque.
+    """
+    count = len(cfg.blocks)
+    start = cfg.entry
+    in_sets = [initial] * count
+    out_sets = [initial] * count
+    in_sets[start.index] = boundary
+    out_sets[start.index] = gen[start.index] | (boundary & ~kill[start.index])
+
+    worklist = deque(range(count))
+    queued = [True] * count
+    while worklist:
+        index = worklist.popleft()
+        queued[index] = False
+        block = cfg.blocks[index]
+
+        if block is start:
+            incoming = boundary
+        elif block.predecessors:
+            incoming = out_sets[block.predecessors[0].index]
+            for source in block.predecessors[1:]:
+                incoming &= out_sets[source.index]
+        else:
+            incoming = initial
+
+        outgoing = gen[index] | (incoming & ~kill[index])
+        in_sets[index] = incoming
+        if outgoing != out_sets[index]:
+            out_sets[index] = outgoing
+            for target in block.successors:
+                if not queued[target.index]:
+                    queued[target.index] = True
+                    worklist.append(target.index)
+
+    return in_sets, out_sets
+
+def _block_transfer(block):
+    """Compone las definiciones y borrados de las sentencias de un bloque"""
+    gen = 0
+    kill = 0
+    for statement in block.statements:
+        gen = statement.defs | (gen & ~statement.kills)
+        kill = (kill | statement.kills) & ~statement.defs
+    return gen, kill
+
+def definite_assignment(cfg, variables, boundary=0):
+    """Asignación definida: variables escritas en todos los caminos"""
+    transfers = [_block_transfer(block) for block in cfg.blocks]
+    return solve(cfg, [t[0] for t in transfers], [t[1] for t in transfers], boundary, variables.all())
+
+class DataflowAnalysis:
+    """Asignación definida para el cuerpo de una función"""
+    def __init__(self, body, parameters=()):
+        self.variables = collect_variables(body, parameters)
+        self.cfg = CFGBuilder(self.variables).build(body)
+
+        # Los parámetros y los agregados están inicializados desde la entrada
+        entry = self.variables.aggregates
+        for name, _ in parameters:
+            entry |= self.variables.bit(name)
+        self.assigned_in, self.assigned_out = definite_assignment(self.cfg, self.variables, entry)
+
+    def uninitialized_uses(self):
+        """Lecturas que pueden ocurrir antes de asignar la variable: lista de (nombre, nodo)"""
+        found = []
+        for block in self.cfg.blocks:
+            assigned = self.assigned_in[block.index]
+            for statement in block.statements:
+                missing = statement.uses & ~assigned
+                if missing:
+                    for name, id_node in statement.use_sites:
+                        if self.variables.bit(name) & missing:
+                            found.append((name, id_node))
+                assigned = statement.defs | (assigned & ~statement.kills)
+        return found
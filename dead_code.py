@@ -0,0 +1,157 @@
+from ir import (OP_CALL, PURE_OPCODES, IN_PLACE_OPCODES, TERM_NONE, TERM_JUMP, VALUE_VAR, VALUE_TEMP, VALUE_MEMBER)
+
+# Tipos cuyas escrituras solo se observan leyendo la propia variable; los objetos no, porque sus
+# miembros se leen como valores aparte (obj.campo)
+LOCAL_TYPES = ("entero", "flotante", "booleano", "caracter", "cadena")
+
+# Inicializadores de declaración que se pueden omitir si la variable no está viva a la entrada
+SCALAR_TYPES = ("entero", "flotante", "booleano", "caracter")
+
+class DeadCodeElimination:
+    """Eliminación de código muerto en una función del IR: bloques inalcanzables, escrituras
+    cuyo valor no se lee (según la vida de las variables) y variables locales sin uso"""
+    def __init__(self, function):
+        self.function = function
+        self.values = function.values
+        self.blocks = 0             # Bloques inalcanzables eliminados
+        self.unreachable = 0        # Instrucciones de esos bloques
+        self.stores = 0             # Escrituras muertas eliminadas
+        self.variables = []         # Nombres de las variables locales eliminadas
+
+    def run(self):
+        """Ejecuta el pase y devuelve el número total de eliminaciones"""
+        if not self.function.blocks:
+            return 0
+        self._skip_empty_blocks()
+        self._remove_unreachable()
+        self.removable = {index for index, value in enumerate(self.values) if self._removable(index, value)}
+        while self._remove_dead_stores():
+            pass
+        self._remove_unused_locals()
+        return self.blocks + self.stores + len(self.variables)
+
+    def _removable(self, index, value):
+        """Si las escrituras del valor pueden eliminarse cuando no se leen después"""
+        if value.kind == VALUE_TEMP:
+            return True
+        if value.kind != VALUE_VAR or value.name == "this":
+            return False
+        if index in self.function.params:
+            # Los arrays y cadenas recibidos son del llamador: sus cambios se ven fuera
+            return value.type in SCALAR_TYPES
+        return value.type in LOCAL_TYPES or value.type.endswith("[]")
+
+    def _skip_empty_blocks(self):
+        """Los saltos a un bloque vacío que solo salta a otro van directamente al destino final;
+        el bloque vacío queda inalcanzable"""
+        blocks = self.function.blocks
+
+        def final(index):
+            seen = set()
+            while (index not in seen and not len(blocks[index]) and blocks[index].terminator == TERM_JUMP
+                   and index != 0):
+                seen.add(index)
+                index = blocks[index].targets[0]
+            return index
+
+        for block in blocks:
+            block.targets = [final(target) for target in block.targets]
+        for loop in self.function.loops:
+            loop.exit = final(loop.exit)
+
+    def _remove_unreachable(self):
+        """Vacía los bloques a los que no se llega desde la entrada y los saca del orden de emisión"""
+        function = self.function
+        reachable = set(function.reachable())
+        for block in function.blocks:
+            if block.index in reachable or (not len(block) and block.terminator == TERM_NONE):
+                continue
+            self.blocks += 1
+            self.unreachable += len(block) + (block.terminator != TERM_NONE)
+            block.remove(range(len(block)))
+            block.terminator = TERM_NONE
+            block.cond = -1
+            block.targets = []
+        function.layout = [index for index in function.layout if index in reachable]
+        function.loops = [loop for loop in function.loops if loop.header in reachable]
+
+    def _remove_dead_stores(self):
+        """Recorre cada bloque hacia atrás quitando las escrituras que nadie lee; devuelve si quitó alguna"""
+        function = self.function
+        liveness = function.liveness(in_place=False)
+        bits = liveness.bits
+        removed = False
+        for block in function.blocks:
+            # Vivos tras cada instrucción: los que cruzan bloques en bits, los locales al bloque en un conjunto
+            live = liveness.live_out(block)
+            local = set()
+            if block.cond >= 0:
+                if block.cond in bits:
+                    live |= 1 << bits[block.cond]
+                else:
+                    local.add(block.cond)
+
+            dead = []
+            for position in reversed(range(len(block))):
+                op = block.ops[position]
+                dst = block.dst[position]
+                if (dst >= 0 and dst in self.removable and dst not in local
+                        and not liveness.contains(live, dst)):
+                    if op in PURE_OPCODES or op in IN_PLACE_OPCODES:
+                        dead.append(position)
+                        continue
+                    if op == OP_CALL:
+                        # La llamada se conserva por sus efectos; solo se descarta el resultado
+                        block.dst[position] = -1
+                        self.stores += 1
+                written = block.writes(position)
+                if written in bits:
+                    live &= ~(1 << bits[written])
+                else:
+                    local.discard(written)
+                for operand in block.reads(position, in_place=False):
+                    if operand in bits:
+                        live |= 1 << bits[operand]
+                    else:
+                        local.add(operand)
+            if dead:
+                block.remove(dead)
+                self.stores += len(dead)
+                removed = True
+
+        self.entry = (liveness, liveness.live_in[0])
+        return removed
+
+    def _remove_unused_locals(self):
+        """Quita las variables locales que ninguna instrucción nombra y los inicializadores que nadie lee"""
+        function = self.function
+        referenced = set()
+        for block in function.blocks:
+            for position in range(len(block)):
+                referenced.update(block.reads(position))
+                referenced.add(block.dst[position])
+            referenced.add(block.cond)
+        # Un array de objetos también se usa a través de los campos de sus elementos (arr[i].campo)
+        referenced.update(function.element_fields[index][0] for index in list(referenced)
+                          if index in function.element_fields)
+
+        # Un objeto local también se usa a través de sus miembros (obj.campo es un valor aparte)
+        objects = {self.values[index].name.split(".")[0] for index in referenced
+                   if index >= 0 and self.values[index].kind == VALUE_MEMBER}
+
+        liveness, entry = self.entry
+        kept = []
+        for index in function.locals:
+            if index in referenced or self.values[index].name in objects:
+                kept.append(index)
+                if not liveness.contains(entry, index) and self.values[index].type in SCALAR_TYPES:
+                    # El valor de la declaración se sobrescribe antes de leerse
+                    function.initializers.pop(index, None)
+                    function.zero_initialized.discard(index)
+                continue
+            self.variables.append(self.values[index].name)
+            function.initializers.pop(index, None)
+            function.array_sizes.pop(index, None)
+            function.dynamic_arrays.discard(index)
+            function.zero_initialized.discard(index)
+        function.locals = kept
@@ -0,0 +1,220 @@
+from ir import (IRLoop, OP_MOV, OP_I2F, OP_CALL, TERM_JUMP, TERM_BRANCH, TERM_RETURN, VALUE_VAR, VALUE_TEMP,
+                VALUE_CONST, VALUE_MEMBER, ZERO_VALUES)
+
+# Tamaño máximo (instrucciones IR con terminadores) de un método que se copia en sus llamadas
+INLINE_BUDGET = 12
+
+# Tipos de los parámetros y variables locales que se pueden copiar como variables del llamador
+SCALAR_TYPES = ("entero", "flotante", "booleano", "caracter")
+
+def call_graph(program):
+    """Funciones del programa a las que llama cada función: {nombre C: conjunto de nombres C}"""
+    graph = {}
+    for function in program.functions:
+        callees = set()
+        for block in function.blocks:
+            callees.update(callee for callee, _, _ in block.calls.values() if program.function(callee))
+        graph[function.c_name] = callees
+    return graph
+
+def recursive_functions(graph):
+    """Funciones que forman parte de un ciclo del grafo de llamadas (se llaman a sí mismas)"""
+    recursive = set()
+    for name in graph:
+        seen = set()
+        pending = list(graph[name])
+        while pending:
+            callee = pending.pop()
+            if callee == name:
+                recursive.add(name)
+                break
+            if callee not in seen:
+                seen.add(callee)
+                pending.extend(graph[callee])
+    return recursive
+
+class Inliner:
+    """Sustituye las llamadas a métodos pequeños y no recursivos por una copia de su cuerpo.
+
+    El receptor sustituye a this (this->x pasa a ser obj.x), los parámetros que el método no
+    modifica se sustituyen por los argumentos y el resto de parámetros y variables locales pasan
+    a ser variables nuevas del llamador. Los retornos guardan el valor en el destino de la
+    llamada y saltan al bloque que sigue a la llamada."""
+    def __init__(self, program, budget=INLINE_BUDGET):
+        self.program = program
+        self.budget = budget
+        self.inlined = 0            # Llamadas sustituidas
+        self.methods = []           # Nombres C de los métodos copiados en alguna llamada
+
+    def run(self):
+        """Copia los métodos en sus llamadas, de las hojas del grafo de llamadas hacia arriba"""
+        graph = call_graph(self.program)
+        self.recursive = recursive_functions(graph)
+        for name in self._bottom_up(graph):
+            self._inline_calls(self.program.function(name))
+        return self.inlined
+
+    def _bottom_up(self, graph):
+        """Funciones en postorden del grafo de llamadas: cada una después de las que llama"""
+        order = []
+        seen = set()
+        for root in graph:
+            if root in seen:
+                continue
+            seen.add(root)
+            stack = [(root, iter(sorted(graph[root])))]
+            while stack:
+                name, callees = stack[-1]
+                callee = next(callees, None)
+                if callee is None:
+                    order.append(name)
+                    stack.pop()
+                elif callee not in seen:
+                    seen.add(callee)
+                    stack.append((callee, iter(sorted(graph[callee]))))
+        return order
+
+    def _inlinable(self, callee, receiver):
+        """Si una llamada a la función puede sustituirse por su cuerpo"""
+        if callee is None or callee.class_name is None or receiver < 0 or callee.c_name in self.recursive:
+            return False
+        if callee.instruction_count() > self.budget:
+            return False
+        values = callee.values
+        if any(values[index].type not in SCALAR_TYPES for index in callee.params + callee.locals):
+            return False
+        return all(value.kind != VALUE_MEMBER or value.name.startswith("this->") for value in values)
+
+    def _inline_calls(self, function):
+        # Los bloques nuevos se añaden al final de la lista y también se recorren; tras copiar un
+        # cuerpo se sigue por su primera instrucción
+        index = 0
+        while index < len(function.blocks):
+            block = function.blocks[index]
+            position = 0
+            while position < len(block):
+                if block.ops[position] == OP_CALL:
+                    callee_name, receiver, _ = block.calls[position]
+                    callee = self.program.function(callee_name)
+                    if self._inlinable(callee, receiver):
+                        self._inline(function, block, position, callee)
+                        self.inlined += 1
+                        if callee_name not in self.methods:
+                            self.methods.append(callee_name)
+                        continue
+                position += 1
+            index += 1
+
+    def _inline(self, function, block, position, callee):
+        """Sustituye la llamada de la posición indicada por una copia del cuerpo del método"""
+        dst = block.dst[position]
+        _, receiver, args = block.calls[position]
+
+        # Las instrucciones tras la llamada pasan a un bloque de continuación con el terminador original
+        continuation = function.new_block(after=block)
+        continuation.copy_from(block)
+        continuation.remove(range(position + 1))
+        block.remove(range(position, len(block)))
+        for loop in function.loops:
+            if loop.latch == block.index:
+                loop.latch = continuation.index
+
+        mapping = self._map_values(function, block, callee, receiver, args)
+        blocks = {}
+        previous = block
+        reachable = set(callee.reachable())
+        for index in (index for index in callee.layout if index in reachable):
+            previous = blocks[index] = function.new_block(after=previous)
+
+        for index, copy in blocks.items():
+            source = callee.blocks[index]
+            for source_position in range(len(source)):
+                copy_position = copy.add(source.ops[source_position], mapping.get(source.dst[source_position], -1),
+                                         mapping.get(source.a[source_position], -1),
+                                         mapping.get(source.b[source_position], -1))
+                if source.ops[source_position] == OP_CALL:
+                    inner, inner_receiver, inner_args = source.calls[source_position]
+                    copy.calls[copy_position] = (inner, mapping.get(inner_receiver, -1),
+                                                 tuple(mapping[arg] for arg in inner_args))
+            if source.terminator == TERM_RETURN:
+                if dst >= 0 and source.cond >= 0:
+                    copy.add(OP_MOV, dst, mapping[source.cond])
+                copy.jump(continuation)
+            elif source.terminator == TERM_JUMP:
+                copy.jump(blocks[source.targets[0]])
+            elif source.terminator == TERM_BRANCH:
+                copy.branch(mapping[source.cond], blocks[source.targets[0]], blocks[source.targets[1]])
+        block.jump(blocks[0])
+
+        if len(blocks) == 1:
+            # Método de un solo bloque (lo habitual en getters y setters): el cuerpo queda en línea
+            # dentro del bloque de la llamada, junto con lo que la seguía
+            for following in (blocks[0], continuation):
+                block.extend(following)
+                function.layout.remove(following.index)
+            for loop in function.loops:
+                if loop.latch == continuation.index:
+                    loop.latch = block.index
+
+        for loop in callee.loops:
+            if all(index in blocks for index in (loop.header, loop.body, loop.latch, loop.exit)):
+                copy = IRLoop(loop.kind, blocks[loop.header].index, blocks[loop.body].index,
+                              blocks[loop.latch].index, blocks[loop.exit].index, mapping.get(loop.variable, -1))
+                copy.parallel, copy.step = loop.parallel, loop.step
+                copy.reductions = {mapping[index]: operator for index, operator in loop.reductions.items()}
+                function.loops.append(copy)
+
+    def _map_values(self, function, block, callee, receiver, args):
+        """Valor del llamador que corresponde a cada valor del método; añade al final del bloque
+        las copias de los argumentos y los valores iniciales de las variables locales"""
+        target = function.values[receiver]
+        if target.kind == VALUE_VAR and target.name == "this":
+            prefix = "this->"
+        else:
+            prefix = target.name + "."
+
+        mapping = {}
+        for index, value in enumerate(callee.values):
+            if value.kind == VALUE_CONST:
+                mapping[index] = function.const(value.name, value.type)
+            elif value.kind == VALUE_TEMP:
+                mapping[index] = function.temp(value.type)
+            elif value.kind == VALUE_MEMBER:
+                mapping[index] = function.member(prefix + value.name[len("this->"):], value.type)
+                if index in callee.element_fields:
+                    # Campo de los elementos de un array miembro: su array se ha traducido antes
+                    array, field = callee.element_fields[index]
+                    function.element_fields[mapping[index]] = (mapping[array], field)
+            elif value.name == "this":
+                mapping[index] = receiver
+
+        written = {source.writes(position) for source in callee.blocks for position in range(len(source))}
+        for param, arg in zip(callee.params, args):
+            param_type, arg_type = callee.values[param].type, function.values[arg].type
+            if param not in written and function.values[arg].kind != VALUE_MEMBER and param_type == arg_type:
+                # Un parámetro que no se modifica es el propio argumento (un miembro podría cambiar en el cuerpo)
+                mapping[param] = arg
+                continue
+            # Si los tipos difieren, la copia hace la conversión de la llamada (un flotante se trunca)
+            mapping[param] = self._local(function, callee, param)
+            if param_type == "flotante" and arg_type == "entero":
+                block.add(OP_I2F, mapping[param], arg)
+            else:
+                block.add(OP_MOV, mapping[param], arg)
+
+        for index in callee.locals:
+            mapping[index] = self._local(function, callee, index)
+            value = callee.values[index]
+            initial = callee.initializers.get(index)
+            if initial is None and index in callee.zero_initialized:
+                initial = ZERO_VALUES[value.type]
+            if initial is not None:
+                # La declaración del método se ejecutaba en cada llamada
+                block.add(OP_MOV, mapping[index], function.const(initial, value.type))
+        return mapping
+
+    def _local(self, function, callee, index):
+        value = callee.values[index]
+        local = function.fresh_var(f"{callee.name}_{value.name}", value.type)
+        function.locals.append(local)
+        return local
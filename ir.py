@@ -0,0 +1,537 @@
+from array import array
+
+# Tabla de códigos de operación del código de tres direcciones.
+# Cada instrucción es (op, dst, a, b): dst, a y b son índices en la tabla de valores
+# de la función (-1 si no se usan).
+OP_MOV = 0          # dst = a
+OP_ADD = 1          # dst = a + b (concatenación si dst es cadena)
+OP_SUB = 2
+OP_MUL = 3
+OP_DIV = 4
+OP_MOD = 5
+OP_EQ = 6
+OP_NE = 7
+OP_LT = 8
+OP_GT = 9
+OP_LE = 10
+OP_GE = 11
+OP_AND = 12
+OP_OR = 13
+OP_NOT = 14         # dst = !a
+OP_I2F = 15         # dst = (flotante) a
+OP_LOAD_INDEX = 16  # dst = a[b]
+OP_STORE_INDEX = 17 # dst[a] = b
+OP_CONCAT = 18      # dst += a (cadenas)
+OP_CALL = 19        # dst = llamada (callee, receptor y argumentos en la tabla de llamadas del bloque)
+OP_PRINT = 20       # imprimir a
+OP_CHECK_INDEX = 21 # comprobar 0 <= a < b (b: longitud constante o el propio array dinámico); si no, error de ejecución
+OP_APPEND = 22      # dst.agregar(a) (array dinámico)
+OP_CLEAR = 23       # vaciar dst (array dinámico)
+OP_SPAWN = 24       # lanzar una tarea (función y variables que usa en la tabla de llamadas del bloque)
+OP_WAIT = 25        # esperar a que terminen las tareas lanzadas
+OP_SYNC = 26        # dst = valor que ha dejado en dst una tarea (tras esperar)
+
+OPCODE_NAMES = [
+    "mov", "add", "sub", "mul", "div", "mod", "eq", "ne", "lt", "gt", "le", "ge",
+    "and", "or", "not", "i2f", "load_index", "store_index", "concat", "call", "print",
+    "check_index", "append", "clear", "spawn", "wait", "sync"
+]
+
+# Símbolo C (y del volcado) de las operaciones binarias
+BINARY_SYMBOLS = {
+    OP_ADD: "+", OP_SUB: "-", OP_MUL: "*", OP_DIV: "/", OP_MOD: "%",
+    OP_EQ: "==", OP_NE: "!=", OP_LT: "<", OP_GT: ">", OP_LE: "<=", OP_GE: ">=",
+    OP_AND: "&&", OP_OR: "||"
+}
+
+# Operación de cada operador de Jonson (lexema o nombre de token)
+BINARY_OPCODES = {
+    "+": OP_ADD, "-": OP_SUB, "*": OP_MUL, "/": OP_DIV, "%": OP_MOD,
+    "==": OP_EQ, "!=": OP_NE, "<": OP_LT, ">": OP_GT, "<=": OP_LE, ">=": OP_GE,
+    "IGUAL": OP_EQ, "DISTINTO": OP_NE, "MENOR": OP_LT, "MAYOR": OP_GT,
+    "MENOR_IGUAL": OP_LE, "MAYOR_IGUAL": OP_GE, "AND": OP_AND, "OR": OP_OR
+}
+
+# Operaciones sin efectos laterales cuyo resultado solo depende de sus operandos
+PURE_OPCODES = frozenset([
+    OP_MOV, OP_ADD, OP_SUB, OP_MUL, OP_DIV, OP_MOD, OP_EQ, OP_NE, OP_LT, OP_GT,
+    OP_LE, OP_GE, OP_AND, OP_OR, OP_NOT, OP_I2F, OP_LOAD_INDEX
+])
+
+# Operaciones que modifican su destino en sitio: lo leen y no lo redefinen por completo
+IN_PLACE_OPCODES = (OP_STORE_INDEX, OP_CONCAT, OP_APPEND, OP_CLEAR)
+
+# Elementos de un array al que no se asigna ningún literal (los que reciben literales tienen el
+# tamaño del mayor)
+DEFAULT_ARRAY_SIZE = 100
+
+# Valor con el que se inicializa una variable que puede leerse antes de asignarse
+ZERO_VALUES = {
+    "entero": "0",
+    "flotante": "0.0",
+    "booleano": "false",
+    "caracter": "'\\0'"
+}
+
+# Terminadores de bloque básico
+TERM_NONE = 0
+TERM_JUMP = 1       # goto targets[0]
+TERM_BRANCH = 2     # si cond ir a targets[0], si no a targets[1]
+TERM_RETURN = 3     # retornar cond (-1 si no hay valor)
+
+# Clases de valor
+VALUE_VAR = 0       # Variable local o parámetro (nombre C)
+VALUE_TEMP = 1      # Temporal introducido por la traducción
+VALUE_CONST = 2     # Literal (texto C)
+VALUE_MEMBER = 3    # Miembro de un objeto (texto C: obj.miembro o this->miembro)
+
+class Value:
+    """Operando del IR: variable, temporal, constante o miembro, con su tipo de Jonson"""
+    __slots__ = ("kind", "name", "type")
+
+    def __init__(self, kind, name, type):
+        self.kind = kind
+        self.name = name
+        self.type = type
+
+    def __str__(self):
+        return self.name
+
+class IRBlock:
+    """Bloque básico: instrucciones en arrays paralelos y un terminador"""
+    def __init__(self, index):
+        self.index = index
+        self.ops = array('B')
+        self.dst = array('i')
+        self.a = array('i')
+        self.b = array('i')
+        self.calls = {}             # Posición de OP_CALL u OP_SPAWN -> (función C, receptor, argumentos)
+        self.terminator = TERM_NONE
+        self.cond = -1              # Condición del salto o valor retornado
+        self.targets = []           # Índices de los bloques sucesores
+
+    def __len__(self):
+        return len(self.ops)
+
+    def add(self, op, dst=-1, a=-1, b=-1):
+        """Añade una instrucción y devuelve su posición"""
+        self.ops.append(op)
+        self.dst.append(dst)
+        self.a.append(a)
+        self.b.append(b)
+        return len(self.ops) - 1
+
+    def insert(self, position, op, dst=-1, a=-1, b=-1):
+        """Inserta una instrucción antes de la posición indicada"""
+        self.ops.insert(position, op)
+        self.dst.insert(position, dst)
+        self.a.insert(position, a)
+        self.b.insert(position, b)
+        self.calls = {(moved + 1 if moved >= position else moved): call for moved, call in self.calls.items()}
+
+    def copy_from(self, other):
+        """Copia las instrucciones y el terminador de otro bloque (los destinos se copian tal cual)"""
+        self.ops = array('B', other.ops)
+        self.dst = array('i', other.dst)
+        self.a = array('i', other.a)
+        self.b = array('i', other.b)
+        self.calls = {position: (callee, receiver, list(args)) for position, (callee, receiver, args) in other.calls.items()}
+        self.terminator = other.terminator
+        self.cond = other.cond
+        self.targets = list(other.targets)
+
+    def extend(self, other):
+        """Añade al final las instrucciones de otro bloque y toma su terminador; el otro queda vacío"""
+        offset = len(self.ops)
+        self.ops.extend(other.ops)
+        self.dst.extend(other.dst)
+        self.a.extend(other.a)
+        self.b.extend(other.b)
+        self.calls.update((position + offset, call) for position, call in other.calls.items())
+        self.terminator = other.terminator
+        self.cond = other.cond
+        self.targets = other.targets
+        other.remove(range(len(other)))
+        other.terminator = TERM_NONE
+        other.cond = -1
+        other.targets = []
+
+    def reads(self, position, in_place=True):
+        """Valores leídos por una instrucción.
+
+        Con in_place=False no se cuenta como lectura el destino que store_index y concat
+        modifican en sitio (solo importa si el valor se lee después)."""
+        op = self.ops[position]
+        if op in (OP_CALL, OP_SPAWN):
+            _, receiver, args = self.calls[position]
+            return ([receiver] if receiver >= 0 else []) + list(args)
+        if op == OP_SYNC:
+            # La tarea pudo leer el valor anterior
+            return [self.dst[position]]
+        operands = []
+        if self.a[position] >= 0:
+            operands.append(self.a[position])
+        if self.b[position] >= 0:
+            operands.append(self.b[position])
+        if in_place and op in IN_PLACE_OPCODES:
+            operands.append(self.dst[position])
+        return operands
+
+    def writes(self, position):
+        """Valor que una instrucción redefine por completo (-1 si no hay)"""
+        if self.ops[position] in IN_PLACE_OPCODES:
+            return -1
+        return self.dst[position]
+
+    def remove(self, positions):
+        """Elimina las instrucciones en las posiciones indicadas (conserva la tabla de llamadas)"""
+        positions = set(positions)
+        if not positions:
+            return
+        keep = [position for position in range(len(self.ops)) if position not in positions]
+        moved = {old: new for new, old in enumerate(keep)}
+        self.calls = {moved[position]: call for position, call in self.calls.items() if position in moved}
+        self.ops = array('B', [self.ops[position] for position in keep])
+        self.dst = array('i', [self.dst[position] for position in keep])
+        self.a = array('i', [self.a[position] for position in keep])
+        self.b = array('i', [self.b[position] for position in keep])
+
+    def jump(self, target):
+        self.terminator = TERM_JUMP
+        self.targets = [target.index]
+
+    def branch(self, cond, if_true, if_false):
+        self.terminator = TERM_BRANCH
+        self.cond = cond
+        self.targets = [if_true.index, if_false.index]
+
+    def ret(self, value=-1):
+        self.terminator = TERM_RETURN
+        self.cond = value
+        self.targets = []
+
+class Liveness:
+    """Vida de los valores entre bloques como conjuntos de bits (enteros de Python).
+
+    Solo tienen bit los valores que algún bloque lee antes de escribirlos; el resto (la mayoría
+    de los temporales) nunca está vivo a la entrada de un bloque."""
+    def __init__(self, bits, live_in):
+        self.bits = bits            # Índice de valor -> posición de su bit
+        self.live_in = live_in      # Bloque -> bits vivos a su entrada
+
+    def live_out(self, block):
+        live = 0
+        for target in block.targets:
+            live |= self.live_in[target]
+        return live
+
+    def contains(self, live, index):
+        """Si el valor está en el conjunto de bits"""
+        bit = self.bits.get(index)
+        return bit is not None and live >> bit & 1 == 1
+
+class IRLoop:
+    """Bucle del programa fuente: bloques de cabecera, cuerpo, actualización y salida"""
+    def __init__(self, kind, header, body, latch, exit, variable=-1):
+        self.kind = kind            # "para", "mientras" o "hacer"
+        self.header = header        # Bloque que evalúa la condición
+        self.body = body            # Primer bloque del cuerpo
+        self.latch = latch          # Bloque que vuelve a la cabecera
+        self.exit = exit            # Bloque tras el bucle
+        self.variable = variable    # Variable de control de 'para' (-1 si no hay)
+        self.vectorizable = False   # 'para' por elementos que se emite como 'for' con indicaciones SIMD
+        self.start = -1             # Valor inicial de la variable del 'for' vectorizable (constante o la propia variable)
+        self.parallel = False       # 'para' paralelo: se emite como un 'for' repartido entre hilos con OpenMP
+        self.step = 0               # Paso constante de la variable de control del 'para' paralelo
+        self.reductions = {}        # Variable de reducción del 'para' paralelo -> operador de C
+
+class IRFunction:
+    """Función del programa en código de tres direcciones"""
+    def __init__(self, name, c_name, return_type, class_name=None):
+        self.name = name                # Nombre en Jonson (principal o el método)
+        self.c_name = c_name            # Nombre de la función C
+        self.return_type = return_type  # Tipo de retorno de Jonson
+        self.class_name = class_name    # Clase del método (None en principal)
+        self.values = []                # Tabla de valores; las instrucciones guardan índices
+        self.params = []                # Índices de los parámetros (sin this)
+        self.locals = []                # Índices de las variables locales, en orden de declaración
+        self.initializers = {}          # Índice -> inicializador C constante de la declaración
+        self.array_sizes = {}           # Índice -> número de elementos de un array local
+        self.dynamic_arrays = set()     # Índices de los arrays locales que crecen con agregar
+        self.element_fields = {}        # Índice del campo de los elementos de un array de objetos
+                                        # (arr[].campo, un array en memoria) -> (índice de arr, campo)
+        self.zero_initialized = set()   # Índices que deben declararse con valor cero
+        self.captures = None            # Tarea de principal: [(miembro del entorno, variable de principal)]
+                                        # de las variables de principal que usa; None si no es una tarea
+        self.blocks = []
+        self.layout = []                # Orden de emisión de los bloques (índices)
+        self.loops = []
+        self.temp_count = 0
+        self._interned = {}
+
+    def _intern(self, key, kind, name, type):
+        index = self._interned.get(key)
+        if index is None:
+            index = len(self.values)
+            self.values.append(Value(kind, name, type))
+            self._interned[key] = index
+        return index
+
+    def var(self, name, type):
+        return self._intern((VALUE_VAR, name), VALUE_VAR, name, type)
+
+    def member(self, c_text, type):
+        return self._intern((VALUE_MEMBER, c_text), VALUE_MEMBER, c_text, type)
+
+    def const(self, literal, type):
+        return self._intern((VALUE_CONST, literal, type), VALUE_CONST, literal, type)
+
+    def temp(self, type):
+        self.temp_count += 1
+        self.values.append(Value(VALUE_TEMP, f"t{self.temp_count}", type))
+        return len(self.values) - 1
+
+    def fresh_var(self, name, type):
+        """Variable nueva con un nombre que no usa otra variable de la función (name, name_2, ...)"""
+        candidate = name
+        suffix = 1
+        while (VALUE_VAR, candidate) in self._interned:
+            suffix += 1
+            candidate = f"{name}_{suffix}"
+        return self.var(candidate, type)
+
+    def new_block(self, after=None):
+        """Crea un bloque al final del orden de emisión o justo después del bloque indicado"""
+        block = IRBlock(len(self.blocks))
+        self.blocks.append(block)
+        if after is None:
+            self.layout.append(block.index)
+        else:
+            self.layout.insert(self.layout.index(after.index) + 1, block.index)
+        return block
+
+    def predecessors(self):
+        """Índices de los predecesores de cada bloque"""
+        preds = [[] for _ in self.blocks]
+        for block in self.blocks:
+            for target in block.targets:
+                preds[target].append(block.index)
+        return preds
+
+    def reachable(self):
+        """Índices de los bloques alcanzables desde la entrada, en orden de bloque"""
+        seen = {0}
+        pending = [0]
+        while pending:
+            for target in self.blocks[pending.pop()].targets:
+                if target not in seen:
+                    seen.add(target)
+                    pending.append(target)
+        return sorted(seen)
+
+    def natural_loops(self):
+        """Bucles naturales del CFG alcanzable: lista de (cabecera, conjunto de bloques), internos primero.
+
+        Las aristas de retroceso son las que vuelven a un bloque en la pila del recorrido en
+        profundidad; el IR se construye con control estructurado, así que el CFG es reducible."""
+        preds = self.predecessors()
+        back_edges = []
+        state = {0: 1}                  # 1: en la pila del recorrido, 2: terminado
+        stack = [(0, iter(self.blocks[0].targets))]
+        while stack:
+            index, successors = stack[-1]
+            target = next(successors, None)
+            if target is None:
+                state[index] = 2
+                stack.pop()
+            elif target not in state:
+                state[target] = 1
+                stack.append((target, iter(self.blocks[target].targets)))
+            elif state[target] == 1:
+                back_edges.append((index, target))
+
+        # El cuerpo de cada arista tail -> cabecera es lo alcanzable que llega a tail sin pasar por la cabecera
+        loops = {}
+        for tail, header in back_edges:
+            body = loops.setdefault(header, {header})
+            pending = [tail]
+            while pending:
+                block = pending.pop()
+                if block not in body and block in state:
+                    body.add(block)
+                    pending.extend(preds[block])
+        return sorted(loops.items(), key=lambda loop: len(loop[1]))
+
+    def loop_start(self, loop, body, preds):
+        """Valor inicial de la variable de control de un 'para': la constante que le asigna el
+        preencabezado o, si no se conoce, la propia variable"""
+        outside = [pred for pred in preds[loop.header] if pred not in body]
+        if len(outside) == 1:
+            preheader = self.blocks[outside[0]]
+            for position in reversed(range(len(preheader))):
+                if preheader.dst[position] == loop.variable:
+                    constant = preheader.a[position]
+                    if preheader.ops[position] == OP_MOV and self.values[constant].kind == VALUE_CONST:
+                        return constant
+                    break
+        return loop.variable
+
+    def liveness(self, tracked=None, in_place=True):
+        """Vida de las variables y temporales a la entrada de cada bloque.
+
+        Con tracked solo se calcula la vida de los valores de ese conjunto; in_place se pasa a
+        IRBlock.reads."""
+        if tracked is None:
+            tracked = {index for index, value in enumerate(self.values) if value.kind in (VALUE_VAR, VALUE_TEMP)}
+        uses = []
+        defs = []
+        for block in self.blocks:
+            used = set()
+            defined = set()
+            for position in range(len(block)):
+                used.update(operand for operand in block.reads(position, in_place) if operand not in defined)
+                defined.add(block.writes(position))
+            if block.cond >= 0 and block.cond not in defined:
+                used.add(block.cond)
+            uses.append(used & tracked)
+            defs.append(defined)
+
+        # Solo los valores que algún bloque lee antes de escribir pueden estar vivos entre bloques
+        bits = {}
+        for used in uses:
+            for index in used:
+                if index not in bits:
+                    bits[index] = len(bits)
+        gen = [sum(1 << bits[index] for index in used) for used in uses]
+        kill = [sum(1 << bits[index] for index in defined if index in bits) for defined in defs]
+
+        # Lista de trabajo hacia atrás: al crecer la entrada de un bloque se revisan sus predecesores
+        live = [0] * len(self.blocks)
+        preds = self.predecessors()
+        pending = list(range(len(self.blocks)))
+        queued = set(pending)
+        while pending:
+            index = pending.pop()
+            queued.discard(index)
+            live_out = 0
+            for target in self.blocks[index].targets:
+                live_out |= live[target]
+            live_in = gen[index] | (live_out & ~kill[index])
+            if live_in != live[index]:
+                live[index] = live_in
+                for pred in preds[index]:
+                    if pred not in queued:
+                        queued.add(pred)
+                        pending.append(pred)
+        return Liveness(bits, live)
+
+    def instruction_count(self):
+        """Instrucciones del IR, contando los terminadores"""
+        return sum(len(block) + (block.terminator != TERM_NONE) for block in self.blocks)
+
+    def operand(self, index):
+        return self.values[index].name if index >= 0 else "_"
+
+    def instruction_text(self, block, position):
+        """Texto de una instrucción para el volcado"""
+        op = block.ops[position]
+        dst = self.operand(block.dst[position])
+        a = self.operand(block.a[position])
+        b = self.operand(block.b[position])
+
+        if op in BINARY_SYMBOLS:
+            return f"{dst} = {a} {BINARY_SYMBOLS[op]} {b}"
+        if op == OP_MOV:
+            return f"{dst} = {a}"
+        if op == OP_NOT:
+            return f"{dst} = !{a}"
+        if op == OP_I2F:
+            return f"{dst} = (flotante) {a}"
+        if op == OP_LOAD_INDEX:
+            return f"{dst} = {self.element_text(block.a[position], b)}"
+        if op == OP_STORE_INDEX:
+            return f"{self.element_text(block.dst[position], a)} = {b}"
+        if op == OP_CONCAT:
+            return f"{dst} += {a}"
+        if op == OP_PRINT:
+            return f"imprimir {a}"
+        if op == OP_CHECK_INDEX:
+            if self.values[block.b[position]].kind != VALUE_CONST:
+                return f"comprobar 0 <= {a} < longitud({b})"
+            return f"comprobar 0 <= {a} < {b}"
+        if op == OP_APPEND:
+            return f"{dst}.agregar({a})"
+        if op == OP_CLEAR:
+            return f"vaciar {dst}"
+        if op == OP_CALL:
+            function, receiver, args = block.calls[position]
+            operands = ([self.operand(receiver)] if receiver >= 0 else []) + [self.operand(arg) for arg in args]
+            call = f"llamar {function}({', '.join(operands)})"
+            return f"{dst} = {call}" if block.dst[position] >= 0 else call
+        if op == OP_SPAWN:
+            function, _, args = block.calls[position]
+            return f"lanzar {function}({', '.join(self.operand(arg) for arg in args)})"
+        if op == OP_WAIT:
+            return "esperar"
+        if op == OP_SYNC:
+            return f"{dst} = resultado de las tareas"
+        return f"{OPCODE_NAMES[op]} {dst}, {a}, {b}"
+
+    def element_text(self, array, index):
+        """Texto de un elemento: arr[i] o, en un campo de los elementos, arr[i].campo"""
+        if array in self.element_fields:
+            base, field = self.element_fields[array]
+            return f"{self.operand(base)}[{index}].{field}"
+        return f"{self.operand(array)}[{index}]"
+
+    def terminator_text(self, block):
+        if block.terminator == TERM_JUMP:
+            return f"ir a B{block.targets[0]}"
+        if block.terminator == TERM_BRANCH:
+            return f"si {self.operand(block.cond)} ir a B{block.targets[0]} sino B{block.targets[1]}"
+        if block.terminator == TERM_RETURN:
+            return f"retornar {self.operand(block.cond)}" if block.cond >= 0 else "retornar"
+        return None
+
+    def dump(self):
+        """Volcado textual de la función"""
+        params = ", ".join(f"{self.values[p].name}: {self.values[p].type}" for p in self.params)
+        lines = [f"función {self.c_name}({params}) -> {self.return_type}"]
+        for index in self.locals:
+            value = self.values[index]
+            initial = self.initializers.get(index)
+            if isinstance(initial, list):
+                initial = "{" + ", ".join(initial) + "}"
+            dynamic = " (dinámico)" if index in self.dynamic_arrays else ""
+            lines.append(f"  local {value.name}: {value.type}{dynamic}" + (f" = {initial}" if initial is not None else ""))
+        for member, _ in self.captures or ():
+            lines.append(f"  entorno {self.values[member].name}: {self.values[member].type}")
+        for block in (self.blocks[index] for index in self.layout):
+            lines.append(f"B{block.index}:")
+            for position in range(len(block)):
+                lines.append(f"    {self.instruction_text(block, position)}")
+            terminator = self.terminator_text(block)
+            if terminator:
+                lines.append(f"    {terminator}")
+        return "\n".join(lines)
+
+class IRProgram:
+    """Programa completo en IR: una función por método y una para principal"""
+    def __init__(self):
+        self.functions = []
+        self.member_array_sizes = {}    # (clase, miembro) -> número de elementos de un array miembro
+        self._by_name = {}
+
+    def add(self, function):
+        self.functions.append(function)
+        self._by_name[function.c_name] = function
+
+    def function(self, c_name):
+        return self._by_name.get(c_name)
+
+    def instruction_counts(self):
+        """Número de instrucciones de cada función: {nombre C: instrucciones}"""
+        return {function.c_name: function.instruction_count() for function in self.functions}
+
+    def dump(self):
+        return "\n\n".join(function.dump() for function in self.functions)
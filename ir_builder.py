@@ -0,0 +1,732 @@
+from semantic_analyzer import declared_type, parameter_pairs, call_arguments, parallel_clause, loop_step, ARRAY_APPEND
+from ir import (IRProgram, IRFunction, IRLoop, BINARY_OPCODES, OP_MOV, OP_ADD, OP_DIV, OP_EQ, OP_NOT,
+                OP_I2F, OP_LOAD_INDEX, OP_STORE_INDEX, OP_CONCAT, OP_CALL, OP_PRINT, OP_CHECK_INDEX,
+                OP_APPEND, OP_CLEAR, OP_SPAWN, OP_WAIT, OP_SYNC, DEFAULT_ARRAY_SIZE, VALUE_TEMP, VALUE_MEMBER)
+
+# Operador de C de cada reducción de un 'para' paralelo
+REDUCTION_OPERATORS = {"+": "+", "*": "*", "AND": "&&", "OR": "||"}
+
+# Tipos que se copian por valor: una tarea solo los cambia si los asigna
+SCALAR_TYPES = ("entero", "flotante", "booleano", "caracter")
+
+# Nodos de expresión que, con un solo hijo, solo envuelven a ese hijo
+WRAPPER_NODES = ("expresion", "expresion_logica", "expresion_relacional", "expresion_aritmetica", "termino", "factor")
+
+class IRBuilder:
+    """Traduce el AST anotado por el análisis semántico a código de tres direcciones.
+
+    Cada array tiene los elementos del mayor literal que se le asigna; los arrays locales con
+    los que se llama a agregar son dinámicos. En modo seguro cada acceso a un array de longitud
+    conocida va precedido de una comprobación del índice contra esa longitud.
+
+    El cuerpo de cada tarea de principal es una función aparte (principal_tareaN) que recibe un
+    entorno con la dirección de las variables de principal que usa: en ella son miembros
+    (*this->x). Principal la lanza con esas variables y, tras esperar, las que la tarea puede
+    haber cambiado se vuelven a dar por desconocidas."""
+    def __init__(self, typed_ast, safe=False):
+        self.typed_ast = typed_ast
+        self.safe = safe            # Emitir comprobaciones de límites de los arrays
+        self.function = None        # Función en construcción
+        self.block = None           # Bloque actual (None tras un salto incondicional)
+        self.break_targets = []     # Bloques que rompen cada bucle o switch abierto
+        self.loop_depth = 0
+        self.current_class = None
+        self.member_sizes = {}      # (clase, miembro) -> elementos de los arrays miembro
+        self.member_keys = {}       # Valor de un array miembro de la función -> (clase, miembro)
+        self.program = None
+        self.principal = None       # principal mientras se construyen sus tareas
+        self.principal_body = None
+        self.task_count = 0
+        self.task_scope = None      # Ámbito del cuerpo de la tarea en construcción
+        self.captures = None        # Variable de principal -> miembro del entorno de la tarea en construcción
+        self.capture_sizes = {}     # Miembro del entorno de un array de principal -> sus elementos
+        self.task_results = []      # Variables de principal que pueden cambiar las tareas aún sin esperar
+
+    def build(self, ast_root):
+        """Construye el programa IR: primero los métodos de cada clase y después principal"""
+        program = self.program = IRProgram()
+        program.member_array_sizes = self.member_sizes = self._member_array_sizes(ast_root)
+        pending = [ast_root] if ast_root else []
+        while pending:
+            node = pending.pop(0)
+            if not hasattr(node, 'type'):
+                continue
+            if node.type in ("programa", "declaraciones_clases"):
+                pending[0:0] = node.children
+            elif node.type == "declaracion_clase":
+                for method in self._class_methods(node):
+                    program.add(self._build_method(method, node.leaf))
+            elif node.type == "principal":
+                program.add(self._build_principal(node))
+        return program
+
+    def _class_methods(self, class_node):
+        """Nodos declaracion_metodo de una clase, en orden"""
+        methods = []
+        members = class_node.children[-1] if class_node.children else None
+        if members is not None and members.type == "miembros_clase":
+            for member in members.children:
+                if member.type == "miembro_clase" and len(member.children) > 1:
+                    if member.children[1].type == "declaracion_metodo":
+                        methods.append(member.children[1])
+        return methods
+
+    # Funciones
+
+    def _begin_function(self, function, scope, body, parameters=(), flow_body=None):
+        """Prepara una función: parámetros, variables locales y bloque de entrada. flow_body es
+        el cuerpo cuyo análisis de flujo cubre la función (el de principal para sus tareas)"""
+        self.function = function
+        self.break_targets = []
+        self.loop_depth = 0
+        self.member_keys = {}
+        for name in parameters:
+            function.params.append(function.var(name, parameters[name]))
+
+        # Solo se inicializan a cero las variables que pueden leerse antes de asignarse
+        dataflow = self.typed_ast.dataflow_of(flow_body if flow_body is not None else body)
+        uninitialized = {name for name, _ in dataflow.uninitialized_uses()} if dataflow else set()
+
+        sizes, appended = self._scan_arrays(body)
+        nested = self.typed_ast.nested_names(scope)
+        for symbol in self.typed_ast.function_locals(scope):
+            if symbol.name in parameters:
+                continue
+            index = self._declare_local(symbol.name, symbol.type)
+            if symbol.name in appended:
+                # Empieza vacío; su literal inicial se agrega elemento a elemento
+                function.dynamic_arrays.add(index)
+                continue
+            if symbol.name in uninitialized:
+                function.zero_initialized.add(index)
+            self._record_initializer(index, self.typed_ast.initializer_of(symbol))
+            if symbol.scope == scope and symbol.name in nested:
+                # Un bucle anterior puede haberla usado: se inicializa donde se declara
+                function.initializers.pop(index, None)
+            if symbol.name in sizes:
+                function.array_sizes[index] = max(function.array_sizes.get(index, 1), sizes[symbol.name])
+
+        self.block = function.new_block()
+
+    def _scan_arrays(self, body):
+        """Arrays locales de una función por nombre: elementos del mayor literal que se asigna a
+        cada uno después de declararlo y los que crecen con agregar"""
+        sizes = {}
+        appended = set()
+        for node in self._preorder(body):
+            if node.type == "asignacion":
+                target, expr = node.children[0], self._unwrap(node.children[1])
+                symbol = self.typed_ast.symbol_of(target)
+                if (expr.type == "array_literal" and symbol and not symbol.owner
+                        and not self._access_path(target)):
+                    sizes[target.leaf] = max(sizes.get(target.leaf, 1), len(self._array_elements(expr)))
+            elif node.type in ("llamada_funcion", "llamada_metodo") and self._is_append(node):
+                appended.add(node.children[0].leaf)
+        return sizes, appended
+
+    def _member_array_sizes(self, ast_root):
+        """Elementos de cada array miembro: los del mayor literal que se le asigna en el programa"""
+        sizes = {}
+        for node in self._preorder(ast_root):
+            if node.type != "asignacion":
+                continue
+            target, expr = node.children[0], self._unwrap(node.children[1])
+            symbol = self.typed_ast.symbol_of(target)
+            if expr.type != "array_literal" or symbol is None:
+                continue
+            path = self._access_path(target)
+            if symbol.owner:
+                key = self._member_key(symbol.owner, [target.leaf] + path)
+            elif path:
+                key = self._member_key(symbol.type, path)
+            else:
+                continue
+            sizes[key] = max(sizes.get(key, 1), len(self._array_elements(expr)))
+        return sizes
+
+    def _member_key(self, class_name, names):
+        """(clase, miembro) del último nombre de una cadena de miembros que empieza en la clase"""
+        for name in names[:-1]:
+            class_name = self.typed_ast.class_info(class_name)["members"][name]
+        return class_name, names[-1]
+
+    def _is_append(self, call_node):
+        """Si la llamada es lista.agregar(valor) sobre un array"""
+        id_node = call_node.children[0]
+        symbol = self.typed_ast.symbol_of(id_node)
+        return (symbol is not None and symbol.type.endswith("[]")
+                and self._access_path(id_node) == [ARRAY_APPEND])
+
+    def _preorder(self, root):
+        """Nodos de un subárbol del AST"""
+        pending = [root] if root is not None else []
+        while pending:
+            node = pending.pop()
+            if hasattr(node, 'type'):
+                yield node
+                pending.extend(reversed(node.children))
+
+    def _declare_local(self, name, tipo):
+        index = self.function.var(name, tipo)
+        if index not in self.function.locals and index not in self.function.params:
+            self.function.locals.append(index)
+        return index
+
+    def _record_initializer(self, index, initializer):
+        """Registra el inicializador constante de una variable y el tamaño de los arrays"""
+        if initializer is None:
+            return
+        initializer = self._unwrap(initializer)
+        if initializer.type == "array_literal":
+            elements = self._array_elements(initializer)
+            self.function.array_sizes[index] = max(1, len(elements))
+            constants = [self._constant(element) for element in elements]
+            if constants and None not in constants:
+                self.function.initializers[index] = constants
+            return
+        constant = self._constant(initializer)
+        if constant is not None:
+            self.function.initializers[index] = constant
+
+    def _build_method(self, node, class_name):
+        method_name = node.children[-3].leaf
+        return_type = node.children[0].leaf if len(node.children) >= 4 else "vacio"
+        function = IRFunction(method_name, f"{class_name}_{method_name}", return_type, class_name)
+
+        parameters = {}
+        for tipo_node, id_node in parameter_pairs(node.children[-2]):
+            parameters[id_node.leaf] = declared_type(tipo_node)
+
+        body = node.children[-1]
+        self.current_class = class_name
+        self._begin_function(function, self.typed_ast.function_scope(class_name, method_name), body, parameters)
+        self._statement(body)
+        if self.block is not None:
+            self.block.ret()
+        self.current_class = None
+        return function
+
+    def _build_principal(self, node):
+        function = IRFunction("principal", "main", "entero")
+        body = self.principal_body = node.children[0] if node.children else None
+        self._begin_function(function, self.typed_ast.function_scope(), body)
+        if body is not None:
+            self._statement(body)
+
+        # main termina con return 0 salvo que el programa ya retorne
+        if self.block is not None:
+            self.block.ret(function.const("0", "entero"))
+        return function
+
+    # Sentencias
+
+    def _current(self):
+        """Bloque actual; tras un salto las sentencias van a un bloque inalcanzable"""
+        if self.block is None:
+            self.block = self.function.new_block()
+        return self.block
+
+    def _emit(self, op, dst=-1, a=-1, b=-1):
+        return self._current().add(op, dst, a, b)
+
+    def _statement(self, node):
+        if not hasattr(node, 'type'):
+            return
+
+        if node.type in ("bloque", "sentencias", "sentencia"):
+            for child in node.children:
+                self._statement(child)
+
+        elif node.type in ("declaracion_variable", "declaracion_array"):
+            target = node.children[1] if len(node.children) > 1 else None
+            if target is not None and target.type == "lista_ids_inicializadas":
+                pairs = target.children
+                for i in range(0, len(pairs) - 1, 2):
+                    self._initialize(pairs[i], pairs[i + 1])
+            elif len(node.children) >= 3 and target.type == "id":
+                self._initialize(target, node.children[2])
+
+        elif node.type == "asignacion":
+            self._assignment(node.children[0], node.children[1])
+
+        elif node.type == "asignacion_compuesta":
+            self._compound_assignment(node.children[0], node.children[1])
+
+        elif node.type in ("llamada_funcion", "llamada_metodo"):
+            self._call(node, want_result=False)
+
+        elif node.type == "sentencia_print":
+            if node.children:
+                self._emit(OP_PRINT, a=self._expression(node.children[0]))
+
+        elif node.type == "sentencia_return":
+            value = self._expression(node.children[0]) if node.children else -1
+            self._current().ret(value)
+            self.block = None
+
+        elif node.type == "sentencia_break":
+            # El salto se completa al crear el bloque de salida del bucle o switch
+            if self.break_targets:
+                self.break_targets[-1].append(self._current())
+                self.block = None
+
+        elif node.type == "sentencia_if":
+            self._if_statement(node)
+
+        elif node.type == "sentencia_while":
+            self._while_statement(node)
+
+        elif node.type == "sentencia_do_while":
+            self._do_while_statement(node)
+
+        elif node.type == "sentencia_for":
+            self._for_statement(node)
+
+        elif node.type == "sentencia_switch":
+            self._switch_statement(node)
+
+        elif node.type == "sentencia_tarea":
+            self._task_statement(node)
+
+        elif node.type == "sentencia_esperar":
+            # Lo que han escrito las tareas se conoce ya en principal
+            self._emit(OP_WAIT)
+            for index in self.task_results:
+                self._emit(OP_SYNC, index)
+            self.task_results = []
+
+    def _task_statement(self, node):
+        """Construye la función de la tarea y la lanza con las variables de principal que usa"""
+        principal = self.function
+        saved = (self.block, self.break_targets, self.loop_depth, self.member_keys)
+        self.task_count += 1
+        task = IRFunction(f"tarea{self.task_count}", f"principal_tarea{self.task_count}", "vacio")
+        task.captures = []
+        self.principal, self.captures, self.task_scope = principal, {}, self.typed_ast.task_scope(node)
+        self._begin_function(task, self.task_scope, node.children[0], flow_body=self.principal_body)
+        self._statement(node.children[0])
+        if self.block is not None:
+            self.block.ret()
+        self.principal, self.captures, self.task_scope = None, None, None
+        self.function = principal
+        self.block, self.break_targets, self.loop_depth, self.member_keys = saved
+        self.program.add(task)
+
+        sources = [source for _, source in task.captures]
+        position = self._emit(OP_SPAWN)
+        self._current().calls[position] = (task.c_name, -1, tuple(sources))
+        # Las tareas escriben en sus cadenas, arrays y objetos a través del entorno; los escalares,
+        # solo si la función de la tarea los asigna
+        written = {dst for block in task.blocks for dst in block.dst}
+        for member, source in task.captures:
+            if (member in written or principal.values[source].type not in SCALAR_TYPES) and source not in self.task_results:
+                self.task_results.append(source)
+
+    def _captured(self, symbol):
+        """Si el símbolo es una variable de principal que usa la tarea en construcción"""
+        return (self.captures is not None and symbol is not None and symbol.owner is None
+                and symbol.scope != self.task_scope and not symbol.scope.startswith(self.task_scope + "."))
+
+    def _capture(self, symbol):
+        """Miembro del entorno de la tarea con la dirección de una variable de principal"""
+        if symbol.name in self.captures:
+            return self.captures[symbol.name]
+        principal = self.principal
+        source = principal.var(symbol.name, symbol.type)
+        member = self.function.member(f"(*this->{symbol.name})", symbol.type)
+        self.captures[symbol.name] = member
+        self.function.captures.append((member, source))
+        if source in principal.dynamic_arrays:
+            self.function.dynamic_arrays.add(member)
+        elif symbol.type.endswith("[]"):
+            self.capture_sizes[member] = principal.array_sizes.get(source, DEFAULT_ARRAY_SIZE)
+        return member
+
+    def _initialize(self, id_node, expr_node):
+        """Asignación inicial de una variable declarada con valor"""
+        index = self._lvalue(id_node)
+
+        # Con inicializador constante en la declaración C, solo hay que repetirlo dentro de bucles
+        if index in self.function.initializers and self.loop_depth == 0:
+            return
+        # Un array dinámico se declara vacío: solo hay que vaciarlo si la declaración se repite
+        self._assign_value(index, expr_node, empty=self.loop_depth == 0)
+
+    def _assignment(self, target_node, expr_node):
+        if target_node.type == "acceso_array":
+            array, base = self._indexed_array(target_node)
+            index = self._expression(target_node.children[1])
+            value = self._expression(expr_node)
+            self._check_index(base, index)
+            self._emit(OP_STORE_INDEX, array, index, value)
+            return
+        self._assign_value(self._lvalue(target_node), expr_node)
+
+    def _assign_value(self, target, expr_node, empty=False):
+        """Guarda una expresión en una variable o miembro (los arrays literales elemento a elemento;
+        un array dinámico se vacía, salvo si ya está vacío, y se le agregan)"""
+        expr_node = self._unwrap(expr_node)
+        if expr_node.type == "array_literal" and target in self.function.dynamic_arrays:
+            if not empty:
+                self._emit(OP_CLEAR, target)
+            for element in self._array_elements(expr_node):
+                self._emit(OP_APPEND, target, self._expression(element))
+            return
+        if expr_node.type == "array_literal":
+            for position, element in enumerate(self._array_elements(expr_node)):
+                index = self.function.const(str(position), "entero")
+                value = self._expression(element)
+                self._check_index(target, index)
+                self._emit(OP_STORE_INDEX, target, index, value)
+            return
+
+        value = self._expression(expr_node)
+
+        # Si el valor es el temporal recién calculado, se calcula directamente sobre el destino
+        # (una concatenación solo si el destino no es su segundo operando, que se sobrescribiría)
+        block = self._current()
+        values = self.function.values
+        target_type = values[target].type
+        if (values[value].kind == VALUE_TEMP and len(block) and block.dst[-1] == value
+                and values[value].type == target_type and not target_type.endswith("[]")
+                and (target_type != "cadena" or (block.ops[-1] == OP_ADD and block.b[-1] != target))):
+            block.dst[-1] = target
+            return
+        self._emit(OP_MOV, target, value)
+
+    def _compound_assignment(self, target_node, expr_node):
+        """x += expr (concatenación para cadenas)"""
+        target = self._lvalue(target_node)
+        value = self._expression(expr_node)
+        if self.function.values[target].type == "cadena":
+            self._emit(OP_CONCAT, target, value)
+        else:
+            self._emit(OP_ADD, target, target, value)
+
+    def _if_statement(self, node):
+        # Los bloques se crean en el orden del código fuente; los saltos se completan al final
+        branch = self._current()
+        cond = self._expression(node.children[0])
+        then_block = self.function.new_block()
+        self.block = then_block
+        self._statement(node.children[1])
+        ends = [self.block]
+
+        else_block = None
+        if len(node.children) >= 3:
+            else_block = self.function.new_block()
+            self.block = else_block
+            self._statement(node.children[2])
+            ends.append(self.block)
+
+        join = self.function.new_block()
+        branch.branch(cond, then_block, else_block or join)
+        for end in ends:
+            if end is not None:
+                end.jump(join)
+        self.block = join
+
+    def _while_statement(self, node):
+        header = self.function.new_block()
+        self._current().jump(header)
+        self.block = header
+        cond = self._expression(node.children[0])
+        header_end = self.block
+
+        body = self.function.new_block()
+        latch, breaks = self._loop_body(node.children[1], body)
+        if latch is not None:
+            latch.jump(header)
+        after = self._close_breaks(breaks)
+        header_end.branch(cond, body, after)
+        self.function.loops.append(IRLoop("mientras", header.index, body.index,
+                                          latch.index if latch else -1, after.index))
+
+    def _do_while_statement(self, node):
+        body = self.function.new_block()
+        self._current().jump(body)
+        end, breaks = self._loop_body(node.children[0], body)
+
+        condition = self.function.new_block()
+        if end is not None:
+            end.jump(condition)
+        self.block = condition
+        cond = self._expression(node.children[1])
+        condition_end = self.block
+        after = self._close_breaks(breaks)
+        condition_end.branch(cond, body, after)
+        self.function.loops.append(IRLoop("hacer", condition.index, body.index, condition_end.index, after.index))
+
+    def _for_statement(self, node):
+        init, cond_node, update, body_node = node.children[:4]
+
+        # Inicialización: [tipo] id = expresión; la variable de control se declara en la función
+        if len(init.children) >= 3:
+            tipo = self.typed_ast.type_of(init.children[1]) or init.children[0].leaf
+            variable = self._declare_local(init.children[1].leaf, tipo)
+            self._assign_value(variable, init.children[2])
+        else:
+            variable = self._lvalue(init.children[0])
+            self._assign_value(variable, init.children[1])
+
+        header = self.function.new_block()
+        self._current().jump(header)
+        self.block = header
+        cond = self._expression(cond_node)
+        header_end = self.block
+
+        body = self.function.new_block()
+        end, breaks = self._loop_body(body_node, body)
+        latch = None
+        if end is not None:
+            latch = self.function.new_block()
+            end.jump(latch)
+            self.block = latch
+            if update.leaf == "+=":
+                self._compound_assignment(update.children[0], update.children[1])
+            else:
+                self._assign_value(self._lvalue(update.children[0]), update.children[1])
+            self._current().jump(header)
+
+        after = self._close_breaks(breaks)
+        header_end.branch(cond, body, after)
+        loop = IRLoop("para", header.index, body.index, latch.index if latch else -1, after.index, variable)
+        clause = parallel_clause(node)
+        if clause is not None:
+            # El análisis semántico ya comprobó la forma del bucle y sus reducciones
+            loop.parallel = True
+            loop.step = loop_step(update, init.children[1].leaf)
+            loop.reductions = {self._lvalue(reduction.children[0]): REDUCTION_OPERATORS[reduction.leaf]
+                               for reduction in clause.children}
+        self.function.loops.append(loop)
+
+    def _loop_body(self, body_node, body):
+        """Traduce el cuerpo de un bucle; devuelve el bloque activo al terminar (None si no hay salida) y los romper"""
+        breaks = []
+        self.break_targets.append(breaks)
+        self.loop_depth += 1
+        self.block = body
+        self._statement(body_node)
+        self.loop_depth -= 1
+        self.break_targets.pop()
+        return self.block, breaks
+
+    def _close_breaks(self, breaks):
+        """Crea el bloque de salida de un bucle o switch y dirige a él los romper pendientes"""
+        after = self.function.new_block()
+        for block in breaks:
+            block.jump(after)
+        self.block = after
+        return after
+
+    def _switch_statement(self, node):
+        """Los casos se comparan en orden; cada caso salta al final al terminar (sin caída)"""
+        value = self._expression(node.children[0])
+        default_body = None
+        breaks = []
+        self.break_targets.append(breaks)
+
+        for case in node.children[1].children if len(node.children) > 1 else []:
+            if case.type == "caso_default":
+                default_body = case.children[0] if case.children else None
+                continue
+            if case.type != "caso_switch" or len(case.children) < 2:
+                continue
+            test = self.function.temp("booleano")
+            self._emit(OP_EQ, test, value, self._expression(case.children[0]))
+            branch = self._current()
+            case_block = self.function.new_block()
+            self.block = case_block
+            self._statement(case.children[1])
+            if self.block is not None:
+                breaks.append(self.block)
+            next_test = self.function.new_block()
+            branch.branch(test, case_block, next_test)
+            self.block = next_test
+
+        if default_body is not None:
+            self._statement(default_body)
+        if self.block is not None:
+            breaks.append(self.block)
+        self.break_targets.pop()
+        self._close_breaks(breaks)
+
+    # Expresiones
+
+    def _unwrap(self, node):
+        while node.type in WRAPPER_NODES and node.leaf is None and len(node.children) == 1:
+            node = node.children[0]
+        return node
+
+    def _array_elements(self, literal):
+        if literal.children and literal.children[0].type == "lista_expresiones":
+            return literal.children[0].children
+        return []
+
+    def _constant(self, node):
+        """Texto C de un literal (None si la expresión no es constante)"""
+        node = self._unwrap(node)
+        if node.type == "booleano":
+            return "true" if node.leaf.lower() == "verdadero" else "false"
+        if node.type == "factor" and node.leaf is not None:
+            return str(node.leaf)
+        return None
+
+    def _type_of(self, node, default="entero"):
+        return self.typed_ast.type_of(node) or default
+
+    def _lvalue(self, id_node):
+        """Valor de una variable o miembro nombrado por un nodo id"""
+        symbol = self.typed_ast.symbol_of(id_node)
+        path = self._access_path(id_node)
+        name = id_node.leaf
+        tipo = self._type_of(id_node)
+        if symbol and self.current_class and symbol.owner == self.current_class:
+            index = self.function.member(".".join([f"this->{name}"] + path), tipo)
+            if tipo.endswith("[]"):
+                self.member_keys[index] = self._member_key(self.current_class, [name] + path)
+            return index
+        if self._captured(symbol):
+            base = self._capture(symbol)
+            if not path:
+                return base
+            name = self.function.values[base].name
+        if path:
+            index = self.function.member(".".join([name] + path), tipo)
+            if symbol and tipo.endswith("[]"):
+                self.member_keys[index] = self._member_key(symbol.type, path)
+            return index
+        return self.function.var(name, symbol.type if symbol else self._type_of(id_node))
+
+    def _indexed_array(self, node):
+        """Array que indexa un acceso arr[i] y el array cuya longitud lo limita: el propio arr o,
+        en arr[i].campo, el campo de los elementos (un array en memoria que recorre arr)"""
+        array = self._lvalue(node.children[0])
+        if len(node.children) < 3:
+            return array, array
+        function = self.function
+        field = node.children[2].children[0].leaf
+        index = function.member(f"{function.values[array].name}[].{field}", f"{self._type_of(node)}[]")
+        function.element_fields[index] = (array, field)
+        return index, array
+
+    def _check_index(self, array, index):
+        """En modo seguro, comprueba el índice antes del acceso; los arrays recibidos como parámetro
+        no tienen longitud conocida y no se comprueban"""
+        if not self.safe:
+            return
+        function = self.function
+        value = function.values[array]
+        if not value.type.endswith("[]"):
+            return
+        if array in function.dynamic_arrays:
+            # La longitud del array dinámico se consulta en ejecución
+            self._emit(OP_CHECK_INDEX, a=index, b=array)
+            return
+        if array in self.capture_sizes:
+            length = self.capture_sizes[array]
+        elif value.kind == VALUE_MEMBER:
+            length = self.member_sizes.get(self.member_keys.get(array), DEFAULT_ARRAY_SIZE)
+        elif array in function.locals:
+            length = function.array_sizes.get(array, DEFAULT_ARRAY_SIZE)
+        else:
+            return
+        self._emit(OP_CHECK_INDEX, a=index, b=function.const(str(length), "entero"))
+
+    def _access_path(self, id_node):
+        """Nombres de la cadena de accesos de un id (obj.a.b -> ['a', 'b'])"""
+        path = []
+        access = id_node.children[0] if id_node.children and id_node.children[0].type == "acceso_objeto" else None
+        while access is not None and access.children:
+            path.append(access.children[0].leaf)
+            access = access.children[1] if len(access.children) > 1 else None
+        return path
+
+    def _expression(self, node):
+        """Traduce una expresión y devuelve el índice del valor con su resultado"""
+        node = self._unwrap(node)
+        function = self.function
+
+        if node.type == "expresion_logica" and node.leaf == "NOT":
+            result = function.temp("booleano")
+            self._emit(OP_NOT, result, self._expression(node.children[0]))
+            return result
+
+        if node.type in WRAPPER_NODES and len(node.children) >= 2:
+            left = self._expression(node.children[0])
+            right = self._expression(node.children[1])
+            op = BINARY_OPCODES[node.leaf]
+
+            # En Jonson entero / entero es flotante; en C sería una división entera
+            if (op == OP_DIV and self._type_of(node.children[0]) == "entero"
+                    and self._type_of(node.children[1]) == "entero"):
+                converted = function.temp("flotante")
+                self._emit(OP_I2F, converted, left)
+                left = converted
+
+            result = function.temp(self._type_of(node))
+            self._emit(op, result, left, right)
+            return result
+
+        if node.type == "booleano" or (node.type == "factor" and node.leaf is not None):
+            return function.const(self._constant(node), self._type_of(node))
+
+        if node.type == "id":
+            return self._lvalue(node)
+
+        if node.type == "acceso_array":
+            array, base = self._indexed_array(node)
+            index = self._expression(node.children[1])
+            result = function.temp(self._type_of(node))
+            self._check_index(base, index)
+            self._emit(OP_LOAD_INDEX, result, array, index)
+            return result
+
+        if node.type in ("llamada_metodo", "llamada_funcion"):
+            return self._call(node, want_result=True)
+
+        # Nodo sin traducción (p. ej. un array literal fuera de una asignación)
+        return function.const("0", "entero")
+
+    def _call(self, node, want_result):
+        """obj.metodo(args) llama a Clase_metodo(&obj, args); metodo(args) dentro de una clase usa this"""
+        id_node = node.children[0]
+        args = [self._expression(expr) for expr in call_arguments(node)]
+        if self._is_append(node):
+            symbol = self.typed_ast.symbol_of(id_node)
+            array = self._capture(symbol) if self._captured(symbol) else self.function.var(id_node.leaf, symbol.type)
+            self._emit(OP_APPEND, array, args[0])
+            return -1
+
+        symbol = self.typed_ast.symbol_of(id_node)
+        path = self._access_path(id_node)
+        receiver = -1
+        if symbol and path:
+            # obj.a.metodo(...): la clase del método es el tipo del último miembro recorrido
+            class_name = symbol.type
+            for member_name in path[:-1]:
+                class_name = self.typed_ast.class_info(class_name)["members"][member_name]
+            callee = f"{class_name}_{path[-1]}"
+            if self._captured(symbol):
+                receiver = self._capture(symbol)
+                if path[:-1]:
+                    prefix = self.function.values[receiver].name
+                    receiver = self.function.member(".".join([prefix] + path[:-1]), class_name)
+            elif path[:-1] or (self.current_class and symbol.owner == self.current_class):
+                prefix = f"this->{id_node.leaf}" if symbol.owner == self.current_class and self.current_class else id_node.leaf
+                receiver = self.function.member(".".join([prefix] + path[:-1]), class_name)
+            else:
+                receiver = self.function.var(id_node.leaf, class_name)
+        elif not symbol and self.current_class and id_node.leaf in self.typed_ast.class_info(self.current_class)["methods"]:
+            callee = f"{self.current_class}_{id_node.leaf}"
+            receiver = self.function.var("this", self.current_class)
+        else:
+            callee = id_node.leaf
+
+        result_type = self.typed_ast.type_of(node) or self.typed_ast.type_of(id_node)
+        result = -1
+        if want_result and result_type not in (None, "vacio"):
+            result = self.function.temp(result_type)
+        position = self._emit(OP_CALL, result)
+        self._current().calls[position] = (callee, receiver, tuple(args))
+        return result
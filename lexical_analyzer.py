@@ -53,6 +53,7 @@ class LexicalAnalyzer:
             # Keywords for loops and conditionals with special handling
             (re.compile(r'^mientras'), TOK_CICLO),
             (re.compile(r'^hacer'), TOK_CICLO),
+            (re.compile(r'^paralelo'), TOK_PAL_RES),
             (re.compile(r'^para'), TOK_CICLO),
             
             # Data types
@@ -60,6 +61,7 @@ class LexicalAnalyzer:
             
             # Reserved words
             (re.compile(r'^(principal|publico|privado|clase|imprimir|escribir|romper|retornar|predeterminado|cambio)'), TOK_PAL_RES),
+            (re.compile(r'^(tarea|esperar)\b'), TOK_PAL_RES),
             
             # Boolean literals
             (re.compile(r'^(verdadero|falso)'), TOK_PAL_RES),
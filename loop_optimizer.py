@@ -0,0 +1,384 @@
+from ir import (OP_ADD, OP_SUB, OP_MUL, OP_DIV, OP_MOD, OP_LT, OP_GT, OP_LE, OP_GE, OP_MOV, OP_CALL, OP_LOAD_INDEX,
+                OP_WAIT, PURE_OPCODES, TERM_JUMP, TERM_BRANCH, VALUE_VAR, VALUE_TEMP, VALUE_CONST, VALUE_MEMBER)
+from constant_propagation import INT_MIN, INT_MAX, wrap_int
+
+# Instrucciones (terminadores incluidos) que puede ocupar el cuerpo de un 'para' una vez desenrollado
+UNROLL_BUDGET = 128
+
+# Iteraciones máximas de un desenrollado completo
+FULL_UNROLL_TRIPS = 16
+
+# Factores del desenrollado parcial, de mayor a menor
+PARTIAL_UNROLL_FACTORS = (4, 2)
+
+# Comparación equivalente con los operandos intercambiados (límite < i  <=>  i > límite)
+SWAPPED_COMPARISONS = {OP_LT: OP_GT, OP_GT: OP_LT, OP_LE: OP_GE, OP_GE: OP_LE}
+
+class LoopOptimizer:
+    """Optimización de los bucles de una función del IR: extracción de expresiones invariantes,
+    reducción de fuerza de las multiplicaciones por variables de inducción y desenrollado de 'para'"""
+    def __init__(self, function):
+        self.function = function
+        self.values = function.values
+        self.hoisted = 0        # Instrucciones invariantes movidas al preencabezado
+        self.reduced = 0        # Multiplicaciones sustituidas por una suma por iteración
+        self.unrolled = 0       # Bucles 'para' desenrollados (total o parcialmente)
+
+    # Extracción de invariantes y reducción de fuerza
+
+    def optimize_loops(self):
+        """Extrae invariantes y reduce multiplicaciones en cada bucle, de los internos a los externos"""
+        function = self.function
+        self.definitions = self._count_definitions()
+        preds = function.predecessors()
+        reachable = set(function.reachable())
+        # En un 'para' paralelo cada iteración puede ejecutarse en otro hilo: nada pasa de una a otra
+        parallel = {loop.header for loop in function.loops if loop.parallel}
+        for header, body in function.natural_loops():
+            preheader = self._preheader(header, body, preds, reachable)
+            if preheader is None:
+                continue
+            self._hoist_invariants(preheader, body)
+            if header not in parallel:
+                self._reduce_strength(preheader, body)
+        return self.hoisted + self.reduced
+
+    def _count_definitions(self):
+        """Número de instrucciones que escriben cada valor en la función"""
+        definitions = {}
+        for block in self.function.blocks:
+            for dst in block.dst:
+                definitions[dst] = definitions.get(dst, 0) + 1
+        return definitions
+
+    def _preheader(self, header, body, preds, reachable):
+        """Único predecesor de la cabecera fuera del bucle, si entra con un salto incondicional"""
+        outside = [pred for pred in preds[header] if pred not in body and pred in reachable]
+        if len(outside) != 1:
+            return None
+        block = self.function.blocks[outside[0]]
+        return block if block.terminator == TERM_JUMP else None
+
+    def _loop_blocks(self, body):
+        """Bloques del bucle en orden de emisión (las definiciones preceden a sus usos)"""
+        return [self.function.blocks[index] for index in self.function.layout if index in body]
+
+    def _written(self, blocks):
+        """Valores modificados dentro del bucle y si el bucle contiene llamadas (o esperas a
+        tareas, que también pueden cambiar los miembros)"""
+        written = set()
+        has_call = False
+        for block in blocks:
+            written.update(block.dst)
+            has_call = has_call or OP_CALL in block.ops or OP_WAIT in block.ops
+        return written, has_call
+
+    def _invariant(self, operand, written, has_call):
+        if operand < 0:
+            return True
+        value = self.values[operand]
+        if value.kind == VALUE_CONST:
+            return True
+        if operand in written:
+            return False
+        if value.kind == VALUE_MEMBER:
+            # Un miembro cambia si se llama a un método o se reasigna el objeto que lo contiene
+            if has_call:
+                return False
+            base = value.name.split(".")[0]
+            return base.startswith("this->") or not any(
+                self.values[index].kind == VALUE_VAR and self.values[index].name == base for index in written if index >= 0)
+        return True
+
+    def _hoistable(self, block, position, written, has_call):
+        op = block.ops[position]
+        dst = block.dst[position]
+        if op not in PURE_OPCODES or op == OP_LOAD_INDEX or dst < 0:
+            return False
+        value = self.values[dst]
+        if value.kind != VALUE_TEMP or value.type == "cadena" or self.definitions.get(dst) != 1:
+            return False
+
+        # Una división entera se ejecutaría aunque el bucle no iterase: solo con divisor constante no nulo
+        if op in (OP_DIV, OP_MOD) and value.type == "entero":
+            divisor = self.values[block.b[position]]
+            if divisor.kind != VALUE_CONST or divisor.name in ("0", "-1"):
+                return False
+        return (self._invariant(block.a[position], written, has_call)
+                and self._invariant(block.b[position], written, has_call))
+
+    def _hoist_invariants(self, preheader, body):
+        """Mueve al preencabezado las operaciones cuyos operandos no cambian dentro del bucle"""
+        blocks = self._loop_blocks(body)
+        written, has_call = self._written(blocks)
+        changed = True
+        while changed:
+            changed = False
+            for block in blocks:
+                moved = [position for position in range(len(block))
+                         if self._hoistable(block, position, written, has_call)]
+                for position in moved:
+                    preheader.add(block.ops[position], block.dst[position], block.a[position], block.b[position])
+                    written.discard(block.dst[position])
+                block.remove(moved)
+                self.hoisted += len(moved)
+                changed = changed or bool(moved)
+
+    def _induction_variables(self, blocks):
+        """Variables enteras cuya única escritura en el bucle es v = v ± paso: {v: (bloque, posición, paso)}"""
+        writes = {}
+        for block in blocks:
+            for position in range(len(block)):
+                writes.setdefault(block.dst[position], []).append((block, position))
+
+        inductions = {}
+        for variable, sites in writes.items():
+            if variable < 0 or len(sites) != 1:
+                continue
+            value = self.values[variable]
+            block, position = sites[0]
+            if value.kind != VALUE_VAR or value.type != "entero":
+                continue
+            step = self._step(variable, block, position)
+            if step is not None:
+                inductions[variable] = (block, position, step)
+        return inductions
+
+    def _step(self, variable, block, position):
+        """Paso constante de v = v + c, v = c + v o v = v - c; None si la instrucción no tiene esa forma"""
+        op, a, b = block.ops[position], block.a[position], block.b[position]
+        if op == OP_ADD:
+            step = self._integer_constant(b if a == variable else a if b == variable else -1)
+        elif op == OP_SUB and a == variable:
+            step = self._integer_constant(b)
+            step = -step if step is not None else None
+        else:
+            return None
+        return step
+
+    def _reduce_strength(self, preheader, body):
+        """Sustituye t = i * k (k constante o invariante) por un temporal que se inicializa antes
+        del bucle y suma k * paso con cada i = i + paso"""
+        function = self.function
+        blocks = self._loop_blocks(body)
+        inductions = self._induction_variables(blocks)
+        if not inductions:
+            return
+        written, has_call = self._written(blocks)
+
+        reduced = {}        # (variable, factor) -> temporal reducido
+        for block in blocks:
+            for position in range(len(block)):
+                dst = block.dst[position]
+                if (block.ops[position] != OP_MUL or dst < 0 or self.values[dst].kind != VALUE_TEMP
+                        or self.values[dst].type != "entero" or self.definitions.get(dst) != 1):
+                    continue
+                a, b = block.a[position], block.b[position]
+                variable, factor = (a, b) if a in inductions else (b, a) if b in inductions else (-1, -1)
+                if (variable < 0 or self.values[factor].type != "entero"
+                        or not self._invariant(factor, written, has_call)):
+                    continue
+
+                key = (variable, factor)
+                if key not in reduced:
+                    reduced[key] = function.temp("entero")
+                    preheader.add(OP_MUL, reduced[key], variable, factor)
+                block.ops[position] = OP_MOV
+                block.a[position] = reduced[key]
+                block.b[position] = -1
+                self.reduced += 1
+
+        # El temporal avanza junto a la variable de inducción; se inserta de atrás adelante porque
+        # cada inserción desplaza las posiciones siguientes del bloque
+        order = sorted(reduced, key=lambda key: (inductions[key[0]][0].index, inductions[key[0]][1]), reverse=True)
+        for variable, factor in order:
+            temp = reduced[(variable, factor)]
+            block, position, step = inductions[variable]
+            constant = self._integer_constant(factor)
+            if constant is not None:
+                increment = function.const(str(wrap_int(step * constant)), "entero")
+            elif step == 1:
+                increment = factor
+            else:
+                increment = function.temp("entero")
+                preheader.add(OP_MUL, increment, factor, function.const(str(step), "entero"))
+                self.definitions[increment] = 1
+            block.insert(position + 1, OP_ADD, temp, temp, increment)
+            self.definitions[temp] = 2
+
+    # Desenrollado
+
+    def unroll_loops(self):
+        """Desenrolla los 'para' más internos con número de iteraciones constante"""
+        function = self.function
+        natural = dict(function.natural_loops())
+        preds = function.predecessors()
+        reachable = set(function.reachable())
+
+        # De dentro afuera: al desenrollar por completo un bucle interno, el externo pasa a ser interno
+        for loop in sorted(function.loops, key=lambda loop: len(natural.get(loop.header, ()))):
+            body = natural.get(loop.header)
+            if loop.kind != "para" or loop.variable < 0 or body is None or loop.parallel:
+                continue
+            if any(header != loop.header and header in body for header in natural):
+                continue
+            preheader = self._preheader(loop.header, body, preds, reachable)
+            plan = self._unroll_plan(loop, body, preheader, preds) if preheader is not None else None
+            if plan is None:
+                continue
+
+            trips, copies, full = plan
+            added = self._unroll(loop, body, trips, copies, full)
+            self.unrolled += 1
+            for header, other in natural.items():
+                if loop.header in other and header != loop.header:
+                    other.update(added)
+            if full:
+                del natural[loop.header]
+                function.loops.remove(loop)
+            else:
+                body.update(added)
+            # Los predecesores de las demás cabeceras no cambian: el cuerpo desenrollado solo salta
+            # a bloques propios, a su cabecera o a su bloque de salida
+        return self.unrolled
+
+    def _unroll_plan(self, loop, body, preheader, preds):
+        """(iteraciones, copias, completo) si el bucle es desenrollable; None si no"""
+        blocks = self.function.blocks
+        header = blocks[loop.header]
+        variable = loop.variable
+        if (loop.latch < 0 or loop.latch not in body or header.terminator != TERM_BRANCH
+                or header.targets != [loop.body, loop.exit] or len(header) != 1 or header.dst[0] != header.cond):
+            return None
+
+        # Cabecera: t = i <op> límite (o límite <op> i) con límite constante
+        op = header.ops[0]
+        a, b = header.a[0], header.b[0]
+        if op not in SWAPPED_COMPARISONS:
+            return None
+        if b == variable:
+            a, b, op = b, a, SWAPPED_COMPARISONS[op]
+        bound = self._integer_constant(b)
+        if a != variable or bound is None:
+            return None
+
+        # Actualización: la única escritura de la variable en el bucle, i = i + paso, y la única vuelta a la cabecera
+        latch = blocks[loop.latch]
+        if ([pred for pred in preds[loop.header] if pred in body] != [loop.latch] or len(latch) != 1
+                or latch.dst[0] != variable):
+            return None
+        step = self._step(variable, latch, 0)
+        writes = sum(block.dst.count(variable) for block in self._loop_blocks(body))
+        if not step or writes != 1:
+            return None
+
+        # Valor inicial: la última escritura de la variable antes del bucle debe ser una constante
+        start = None
+        for position in reversed(range(len(preheader))):
+            if preheader.dst[position] == variable:
+                if preheader.ops[position] == OP_MOV:
+                    start = self._integer_constant(preheader.a[position])
+                break
+        if start is None:
+            return None
+
+        trips = self._trip_count(op, start, bound, step)
+        if trips is None:
+            return None
+
+        size = sum(len(blocks[index]) + 1 for index in body if index != loop.header)
+        if trips <= FULL_UNROLL_TRIPS and trips * size <= UNROLL_BUDGET:
+            return trips, max(0, trips - 1), True
+        for factor in PARTIAL_UNROLL_FACTORS:
+            if trips % factor == 0 and factor * size <= UNROLL_BUDGET:
+                return trips, factor - 1, False
+        return None
+
+    def _integer_constant(self, index):
+        if index < 0:
+            return None
+        value = self.values[index]
+        if value.kind != VALUE_CONST or value.type != "entero":
+            return None
+        try:
+            return int(value.name)
+        except ValueError:
+            return None
+
+    def _trip_count(self, op, start, bound, step):
+        """Iteraciones de i = inicio; i <op> límite; i = i + paso (None si no termina sin desbordar)"""
+        if op == OP_LE:
+            op, bound = OP_LT, bound + 1
+        elif op == OP_GE:
+            op, bound = OP_GT, bound - 1
+        if op == OP_LT:
+            if start >= bound:
+                return 0
+            if step <= 0:
+                return None
+            trips = -((start - bound) // step)
+        else:
+            if start <= bound:
+                return 0
+            if step >= 0:
+                return None
+            trips = -((bound - start) // -step)
+        last = start + trips * step
+        return trips if INT_MIN <= last <= INT_MAX else None
+
+    def _unroll(self, loop, body, trips, copies, full):
+        """Encadena copias del cuerpo; devuelve los bloques añadidos"""
+        function = self.function
+        blocks = function.blocks
+        header = blocks[loop.header]
+        region = [index for index in function.layout if index in body and index != loop.header]
+
+        if full:
+            # La cabecera ya no compara: entra en la primera iteración (o salta a la salida)
+            header.remove([0])
+            header.terminator = TERM_JUMP
+            header.cond = -1
+            header.targets = [loop.body if trips else loop.exit]
+            if not trips:
+                return []
+
+        # Cada copia usa temporales propios para que sigan definiéndose una sola vez
+        temps = {dst for index in region for dst in blocks[index].dst
+                 if dst >= 0 and self.values[dst].kind == VALUE_TEMP}
+        mappings = [{index: index for index in region}]
+        added = []
+        last = blocks[region[-1]]
+        for _ in range(copies):
+            mapping = {}
+            for index in region:
+                last = function.new_block(after=last)
+                mapping[index] = last.index
+                added.append(last.index)
+            renamed = {temp: function.temp(self.values[temp].type) for temp in temps}
+            for index in region:
+                self._copy_block(blocks[mapping[index]], blocks[index], mapping, renamed)
+            mappings.append(mapping)
+
+        # La actualización de cada copia continúa en la siguiente; la última vuelve a la cabecera o sale
+        for number, mapping in enumerate(mappings):
+            latch = blocks[mapping[loop.latch]]
+            if number + 1 < len(mappings):
+                latch.targets = [mappings[number + 1][loop.body]]
+            else:
+                latch.targets = [loop.exit if full else loop.header]
+        if not full:
+            loop.latch = mappings[-1][loop.latch]
+        return added
+
+    def _copy_block(self, block, source, mapping, renamed):
+        """Copia un bloque del cuerpo con los saltos internos y los temporales renombrados"""
+        block.copy_from(source)
+        rename = lambda index: renamed.get(index, index)
+        for position in range(len(block)):
+            block.dst[position] = rename(block.dst[position])
+            block.a[position] = rename(block.a[position])
+            block.b[position] = rename(block.b[position])
+        for position, (callee, receiver, args) in block.calls.items():
+            block.calls[position] = (callee, rename(receiver), [rename(arg) for arg in args])
+        block.cond = rename(block.cond)
+        block.targets = [mapping.get(target, target) for target in block.targets]
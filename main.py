@@ -2,15 +2,32 @@ from lexical_analyzer import LexicalAnalyzer
 from syntax_analyzer import SyntaxAnalyzer
 from semantic_analyzer import SemanticAnalyzer
 from code_generator import CodeGenerator
+from ir_builder import IRBuilder
+from optimizer import Optimizer, DEFAULT_LEVEL
+from semantic_cache import SemanticCache
 import sys
 import os
+import shutil
 
 def main():
-    if len(sys.argv) < 2:
-        print(f"Uso: {sys.argv[0]} <archivo.jonson>")
+    # Separar las opciones (--nombre=valor y -O<nivel>) de los archivos
+    options = {}
+    args = []
+    level = DEFAULT_LEVEL
+    for arg in sys.argv[1:]:
+        if arg.startswith("--"):
+            name, _, value = arg[2:].partition("=")
+            options[name] = value
+        elif arg.startswith("-O") and arg[2:].isdigit():
+            level = int(arg[2:])
+        else:
+            args.append(arg)
+            
+    if len(args) < 1:
+        print(f"Uso: {sys.argv[0]} [-O<nivel>] [--seguro] [--arena] [--reordenar] [--soa[=Clase,...]] [--pases] [--desactivar=pase,...] [--cache=archivo] [--sin-arboles] [--xref] [--ir] <archivo.jonson>")
         return 1
         
-    filename = sys.argv[1]
+    filename = args[0]
     
     try:
         with open(filename, 'r') as file:
@@ -44,15 +61,30 @@ def main():
         print("ANÁLISIS SEMÁNTICO")
         print("="*50)
         
-        semantic_analyzer = SemanticAnalyzer()
+        # Caché persistente de resultados semánticos por clase (opcional)
+        semantic_cache = SemanticCache(options["cache"]) if options.get("cache") else None
+        
+        # El árbol semántico solo se construye si se va a imprimir
+        semantic_analyzer = SemanticAnalyzer(cache=semantic_cache, build_tree="sin-arboles" not in options)
         semantic_success = semantic_analyzer.analyze(ast)
         
+        if semantic_cache is not None:
+            semantic_cache.print_stats()
+            semantic_cache.save()
+            
+        # Índice de referencias cruzadas junto a la salida (opcional)
+        if "xref" in options:
+            xref_filename = os.path.splitext(filename)[0] + ".xref.json"
+            semantic_analyzer.xref.save(xref_filename)
+            print(f"Índice de referencias cruzadas guardado en: {xref_filename}")
+        
         # Mostrar errores y advertencias semánticas
         semantic_analyzer.print_errors()
         semantic_analyzer.print_warnings()
         
         # Mostrar árboles de análisis semántico
-        semantic_analyzer.print_semantic_trees()
+        if "sin-arboles" not in options:
+            semantic_analyzer.print_semantic_trees()
         
         print("\n" + "="*50)
         print("RESUMEN DEL ANÁLISIS")
@@ -68,18 +100,44 @@ def main():
             print("GENERACIÓN DE CÓDIGO C")
             print("="*50)
             
-            code_generator = CodeGenerator()
-            c_code = code_generator.generate(ast)
+            # Traducir el AST anotado a código de tres direcciones (con comprobación de límites en modo seguro)
+            ir_program = IRBuilder(semantic_analyzer.typed_ast, safe="seguro" in options).build(ast)
+            disabled = [name for name in options.get("desactivar", "").split(",") if name]
+            optimizer = Optimizer(level, disabled, trace_memory="pases" in options)
+            optimizer.optimize(ir_program)
+            optimizer.print_stats()
+            if "pases" in options:
+                optimizer.print_pass_report()
+            if "ir" in options:
+                print("\nCódigo intermedio (tres direcciones):")
+                print("-" * 30)
+                print(ir_program.dump())
+                print("-" * 30)
+            counts = ir_program.instruction_counts()
+            print("Instrucciones IR: " + ", ".join(f"{name} {count}" for name, count in counts.items()))
             
-            # Crear el archivo de salida .c
+            # El generador emite C desde el IR y escribe el archivo .c a medida que lo recorre
+            # --soa sin valor emite por campos los arrays de objetos de todas las clases
+            soa = options.get("soa")
+            if soa is not None:
+                soa = set(soa.split(",")) if soa else True
+            code_generator = CodeGenerator(arena="arena" in options, reorder="reordenar" in options, soa=soa)
             output_filename = os.path.splitext(filename)[0] + ".c"
             with open(output_filename, 'w') as c_file:
-                c_file.write(c_code)
+                code_generator.generate_to(c_file, ast, semantic_analyzer.typed_ast, ir_program)
                 
+            for class_name, (before, after) in code_generator.struct_sizes.items():
+                print(f"Estructura {class_name}: {before} -> {after} bytes con los miembros reordenados")
+            for line in code_generator.soa_report:
+                print(f"Struct-of-arrays en {line}")
             print(f"✅ Código C generado exitosamente en: {output_filename}")
             print("\nCódigo C generado:")
             print("-" * 30)
-            print(c_code)
+            
+            # Mostrar el código desde el archivo, por bloques
+            sys.stdout.flush()
+            with open(output_filename, 'r') as c_file:
+                shutil.copyfileobj(c_file, sys.stdout)
             print("-" * 30)
             
         elif syntax_success:
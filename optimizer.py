@@ -0,0 +1,154 @@
+from pass_manager import PassManager, Pass, PROGRAM
+from constant_propagation import ConstantPropagation
+from loop_optimizer import LoopOptimizer
+from inliner import Inliner
+from compile_time import CompileTimeEvaluator
+from range_analysis import RangeAnalysis
+from common_subexpressions import CommonSubexpressions, pure_functions
+from dead_code import DeadCodeElimination
+from vectorizer import LoopVectorizer
+
+# Nivel de optimización por defecto (equivalente a -O1)
+DEFAULT_LEVEL = 1
+
+class Optimizer:
+    """Aplica al programa IR los pases de optimización del nivel indicado.
+
+    -O1 pliega y propaga constantes (evaluando las llamadas a métodos puros con argumentos constantes),
+    elimina las comprobaciones de límites que el análisis de rangos demuestra innecesarias, reutiliza
+    las subexpresiones comunes de cada bloque y elimina el código muerto; -O2 añade la copia de
+    métodos pequeños en sus llamadas, la extracción de invariantes de bucle, la reducción de fuerza y
+    la detección de los 'para' por elementos que se emiten vectorizables; -O3 desenrolla además los
+    'para' con número de iteraciones constante."""
+    def __init__(self, level=DEFAULT_LEVEL, disabled=(), trace_memory=False):
+        self.level = level
+        self.removed_variables = []     # "función: variables" locales eliminadas por no usarse
+        self.pure = set()               # Funciones sin efectos laterales (pase "pureza")
+        self.evaluator = None
+        self.active = set()             # Nombres de los pases de la cadena en ejecución
+
+        # Orden de la cadena; los pases de función consecutivos se aplican función a función
+        self.manager = PassManager(level, disabled, trace_memory)
+        self.manager.register(Pass("inlining", self._inline, level=2, scope=PROGRAM))
+        self.manager.register(Pass("pureza", self._purity, scope=PROGRAM))
+        self.manager.register(Pass("constantes", self._constant_propagation))
+        self.manager.register(Pass("evaluación", self._evaluate, requires=("pureza", "constantes")))
+        self.manager.register(Pass("bucles", self._loops, level=2, requires=("constantes",)))
+        self.manager.register(Pass("rangos", self._ranges, requires=("constantes",)))
+        self.manager.register(Pass("subexpresiones", self._common_subexpressions, requires=("pureza",)))
+        self.manager.register(Pass("código muerto", self._dead_code))
+        self.manager.register(Pass("vectorización", self._vectorize, level=2))
+
+    @property
+    def stats(self):
+        """Pase -> contadores acumulados en todas las funciones"""
+        return {name: stats.counters for name, stats in self.manager.stats.items()}
+
+    def optimize(self, program):
+        """Optimiza en sitio cada función del programa y devuelve el programa"""
+        if self.level < 1:
+            return program
+        self.active = {pass_.name for pass_ in self.manager.pipeline()}
+        return self.manager.run(program)
+
+    # Pases
+
+    def _inline(self, program):
+        inliner = Inliner(program)
+        inliner.run()
+        return {"llamadas": inliner.inlined, "métodos": len(inliner.methods)}
+
+    def _purity(self, program):
+        self.pure = pure_functions(program)
+        self.evaluator = CompileTimeEvaluator(program, self.pure)
+
+    def _constant_propagation(self, function):
+        constants = ConstantPropagation(function)
+        constants.run()
+        return {"plegadas": constants.folded, "propagadas": constants.propagated, "saltos": constants.branches}
+
+    def _evaluate(self, function):
+        # El resultado de las llamadas evaluadas se vuelve a propagar
+        evaluated = self.evaluator.run(function)
+        if evaluated:
+            self._refold(function)
+        return {"llamadas": evaluated}
+
+    def _refold(self, function):
+        """Vuelve a plegar constantes después de un pase que las ha hecho aparecer. Los cambios se
+        cuentan en los pases de constantes y evaluación; el tiempo, en el pase que lo pide"""
+        self.manager.count("constantes", self._constant_propagation(function))
+        if "evaluación" in self.active:
+            evaluated = self.evaluator.run(function)
+            if evaluated:
+                self.manager.count("evaluación", {"llamadas": evaluated})
+                self._refold(function)
+
+    def _loops(self, function):
+        loops = LoopOptimizer(function)
+        # Las copias desenrolladas usan valores conocidos de la variable de control: se vuelven a plegar
+        if self.level >= 3 and loops.unroll_loops():
+            self._refold(function)
+        # El valor inicial de los temporales reducidos suele ser constante
+        if loops.optimize_loops():
+            self._refold(function)
+        return {"invariantes": loops.hoisted, "reducidas": loops.reduced, "desenrollados": loops.unrolled}
+
+    def _ranges(self, function):
+        ranges = RangeAnalysis(function)
+        ranges.run()
+        return {"eliminadas": ranges.removed, "conservadas": ranges.kept}
+
+    def _common_subexpressions(self, function):
+        common = CommonSubexpressions(function, self.pure)
+        common.run()
+        return {"eliminadas": common.eliminated, "llamadas": common.calls}
+
+    def _dead_code(self, function):
+        dead = DeadCodeElimination(function)
+        dead.run()
+        if dead.variables:
+            self.removed_variables.append(f"{function.c_name}: {', '.join(dead.variables)}")
+        return {"bloques": dead.blocks, "inalcanzables": dead.unreachable, "escrituras": dead.stores,
+                "variables": len(dead.variables)}
+
+    def _vectorize(self, function):
+        vectorizer = LoopVectorizer(function)
+        vectorizer.run()
+        return {"bucles": vectorizer.vectorized}
+
+    # Informes
+
+    def print_stats(self):
+        """Imprime los cambios de cada pase"""
+        if self.level < 1:
+            print("Optimización desactivada (-O0)")
+            return
+        stats = self.manager.counters("constantes")
+        print(f"Plegado de constantes: {stats.get('plegadas', 0)} instrucciones plegadas, "
+              f"{stats.get('propagadas', 0)} operandos propagados, {stats.get('saltos', 0)} saltos resueltos, "
+              f"{self.manager.counters('evaluación').get('llamadas', 0)} llamadas evaluadas")
+        if self.level >= 2:
+            stats = self.manager.counters("inlining")
+            print(f"Inlining: {stats.get('llamadas', 0)} llamadas sustituidas por el cuerpo de {stats.get('métodos', 0)} métodos")
+            stats = self.manager.counters("bucles")
+            print(f"Bucles: {stats.get('invariantes', 0)} instrucciones invariantes extraídas, "
+                  f"{stats.get('reducidas', 0)} multiplicaciones reducidas, {stats.get('desenrollados', 0)} bucles desenrollados, "
+                  f"{self.manager.counters('vectorización').get('bucles', 0)} bucles por elementos vectorizables")
+        stats = self.manager.counters("rangos")
+        if stats.get("eliminadas", 0) or stats.get("conservadas", 0):
+            print(f"Comprobaciones de límites: {stats['eliminadas']} eliminadas por el análisis de rangos, "
+                  f"{stats['conservadas']} conservadas")
+        stats = self.manager.counters("subexpresiones")
+        print(f"Subexpresiones comunes: {stats.get('eliminadas', 0)} reutilizadas "
+              f"({stats.get('llamadas', 0)} llamadas a métodos puros)")
+        stats = self.manager.counters("código muerto")
+        print(f"Código muerto: {stats.get('bloques', 0)} bloques inalcanzables ({stats.get('inalcanzables', 0)} instrucciones), "
+              f"{stats.get('escrituras', 0)} escrituras sin lectura, {stats.get('variables', 0)} variables sin uso")
+        for variables in self.removed_variables:
+            print(f"  Variables eliminadas en {variables}")
+
+    def print_pass_report(self):
+        """Imprime el tiempo, la memoria y los cambios de cada pase"""
+        if self.level >= 1:
+            self.manager.print_report()
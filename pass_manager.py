@@ -0,0 +1,133 @@
+import time
+import tracemalloc
+
+# Ámbito de un pase: una vez sobre el programa completo o una vez por función
+PROGRAM = "programa"
+FUNCTION = "función"
+
+class Pass:
+    """Pase registrado en el gestor con el nivel -O a partir del cual se ejecuta y sus requisitos"""
+    def __init__(self, name, run, level=1, scope=FUNCTION, requires=()):
+        self.name = name
+        self.run = run                  # run(programa o función) -> {contador: cambios} (o None)
+        self.level = level              # Nivel de optimización mínimo
+        self.scope = scope              # PROGRAM o FUNCTION
+        self.requires = tuple(requires) # Pases que deben haberse ejecutado antes en la misma cadena
+
+class PassStats:
+    """Coste y efecto acumulados de un pase"""
+    def __init__(self, scope):
+        self.scope = scope
+        self.runs = 0           # Ejecuciones (una por función en los pases de función)
+        self.time = 0.0         # Tiempo total en segundos
+        self.peak = None        # Mayor memoria reservada en una ejecución, en bytes (None si no se mide)
+        self.counters = {}      # Contador -> cambios acumulados
+
+    def changes(self):
+        return sum(self.counters.values())
+
+class PassManager:
+    """Ejecuta los pases registrados en su orden de registro según el nivel de optimización.
+
+    Los pases de función consecutivos se aplican a cada función antes de pasar a la siguiente.
+    Un pase desactivado o cuyo requisito no se ejecuta queda fuera de la cadena, con el motivo
+    en skipped. Se mide el tiempo de cada pase y, con trace_memory, su pico de memoria."""
+    def __init__(self, level, disabled=(), trace_memory=False):
+        self.level = level
+        self.disabled = set(disabled)
+        self.trace_memory = trace_memory
+        self.passes = []
+        self.stats = {}         # Nombre del pase -> PassStats
+        self.skipped = {}       # Nombre del pase -> motivo por el que no se ejecuta
+
+    def register(self, pass_):
+        if any(registered.name == pass_.name for registered in self.passes):
+            raise ValueError(f"Pase registrado dos veces: {pass_.name}")
+        self.passes.append(pass_)
+        return pass_
+
+    def pipeline(self):
+        """Pases que se ejecutan en el nivel configurado, en orden"""
+        selected = []
+        names = set()
+        self.skipped = {}
+        for pass_ in self.passes:
+            if pass_.level > self.level:
+                continue
+            if pass_.name in self.disabled:
+                self.skipped[pass_.name] = "desactivado"
+                continue
+            missing = [name for name in pass_.requires if name not in names]
+            if missing:
+                self.skipped[pass_.name] = f"requiere {', '.join(missing)}"
+                continue
+            selected.append(pass_)
+            names.add(pass_.name)
+        return selected
+
+    def run(self, program):
+        """Ejecuta la cadena de pases sobre el programa (en sitio) y lo devuelve"""
+        pipeline = self.pipeline()
+        started = self.trace_memory and not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        try:
+            position = 0
+            while position < len(pipeline):
+                if pipeline[position].scope == PROGRAM:
+                    self._execute(pipeline[position], program)
+                    position += 1
+                    continue
+                end = position
+                while end < len(pipeline) and pipeline[end].scope == FUNCTION:
+                    end += 1
+                for function in program.functions:
+                    for pass_ in pipeline[position:end]:
+                        self._execute(pass_, function)
+                position = end
+        finally:
+            if started:
+                tracemalloc.stop()
+        return program
+
+    def _execute(self, pass_, target):
+        stats = self.stats.setdefault(pass_.name, PassStats(pass_.scope))
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        counters = pass_.run(target)
+        stats.time += time.perf_counter() - start
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] - before
+            stats.peak = peak if stats.peak is None else max(stats.peak, peak)
+        stats.runs += 1
+        self.count(pass_.name, counters or {})
+
+    def count(self, name, counters):
+        """Suma cambios a los contadores de un pase (también desde otro pase que lo vuelve a aplicar)"""
+        stats = self.stats.setdefault(name, PassStats(FUNCTION))
+        for counter, value in counters.items():
+            stats.counters[counter] = stats.counters.get(counter, 0) + value
+
+    def counters(self, name):
+        stats = self.stats.get(name)
+        return stats.counters if stats else {}
+
+    def total_time(self):
+        return sum(stats.time for stats in self.stats.values())
+
+    def print_report(self):
+        """Imprime el coste y los cambios de cada pase de la cadena"""
+        print("| Pase | Ámbito | Ejecuciones | Tiempo (ms) | Pico memoria (KiB) | Cambios |")
+        print("|------|--------|-------------|-------------|--------------------|---------|")
+        for pass_ in self.pipeline():
+            stats = self.stats.get(pass_.name)
+            if stats is None:
+                continue
+            peak = f"{stats.peak / 1024:.1f}" if stats.peak is not None else "-"
+            detail = ", ".join(f"{counter} {value}" for counter, value in stats.counters.items() if value)
+            print(f"| {pass_.name} | {stats.scope} | {stats.runs} | {stats.time * 1000:.2f} | {peak} | "
+                  f"{stats.changes()}" + (f" ({detail})" if detail else "") + " |")
+        for name, reason in self.skipped.items():
+            print(f"Pase omitido: {name} ({reason})")
@@ -0,0 +1,250 @@
+from ir import (OP_MOV, OP_ADD, OP_SUB, OP_MUL, OP_MOD, OP_EQ, OP_NE, OP_LT, OP_GT, OP_LE, OP_GE,
+                OP_CHECK_INDEX, TERM_BRANCH, VALUE_VAR, VALUE_TEMP, VALUE_CONST)
+from constant_propagation import INT_MIN, INT_MAX, parse_constant
+
+# Intervalo sin información (cualquier entero de 32 bits); los valores sin intervalo en el estado lo tienen
+TOP = (INT_MIN, INT_MAX)
+
+# Visitas a una cabecera de bucle a partir de las cuales los límites que siguen creciendo se ensanchan al máximo
+WIDEN_AFTER = 2
+
+# Comparación que se cumple en la rama falsa de un salto (negación)
+NEGATED_COMPARISONS = {OP_LT: OP_GE, OP_GE: OP_LT, OP_GT: OP_LE, OP_LE: OP_GT, OP_EQ: OP_NE, OP_NE: OP_EQ}
+
+class RangeAnalysis:
+    """Análisis de intervalos de los enteros de una función y eliminación de las comprobaciones de
+    límites que demuestra redundantes.
+
+    Cada variable y temporal entero tiene un intervalo [mínimo, máximo] que se propaga por el
+    grafo de flujo; los saltos condicionales acotan los operandos de su comparación en cada rama
+    (la variable de control de un 'para' queda acotada en el cuerpo por su condición) y una
+    comprobación acota su índice en lo que sigue del bloque. En las cabeceras de los bucles los
+    límites que siguen creciendo se ensanchan para que el punto fijo termine: hasta la siguiente
+    constante con la que se compara algún entero de la función o, si no queda ninguna, al máximo."""
+    def __init__(self, function):
+        self.function = function
+        self.values = function.values
+        self.removed = 0            # Comprobaciones eliminadas por estar el índice dentro del array
+        self.kept = 0               # Comprobaciones que se conservan
+
+    def run(self):
+        """Elimina las comprobaciones redundantes de la función y devuelve cuántas eliminó"""
+        function = self.function
+        if not any(OP_CHECK_INDEX in block.ops for block in function.blocks):
+            return 0
+        states = self._solve()
+        for index, block in enumerate(function.blocks):
+            if index not in states:
+                continue
+            redundant = []
+            self._transfer(block, dict(states[index]), redundant)
+            self.kept += block.ops.count(OP_CHECK_INDEX) - len(redundant)
+            block.remove(redundant)
+            self.removed += len(redundant)
+        return self.removed
+
+    def _solve(self):
+        """Intervalos a la entrada de cada bloque alcanzable"""
+        function = self.function
+        entry = {}
+        for index in function.locals:
+            if not self._tracked(index):
+                continue
+            initial = function.initializers.get(index)
+            if isinstance(initial, str):
+                constant = parse_constant(self.values[function.const(initial, "entero")])
+                if isinstance(constant, int):
+                    entry[index] = (constant, constant)
+            elif index in function.zero_initialized:
+                entry[index] = (0, 0)
+
+        # Todo ciclo pasa por la cabecera de un bucle natural (el CFG es reducible)
+        headers = {header for header, _ in function.natural_loops()}
+        self.thresholds = self._thresholds()
+        states = {0: entry}
+        visits = {0: 1}
+        pending = [0]
+        queued = {0}
+        while pending:
+            index = pending.pop()
+            queued.discard(index)
+            block = function.blocks[index]
+            state = self._transfer(block, dict(states[index]))
+            for target, out in self._successors(block, state):
+                old = states.get(target)
+                if old is None:
+                    new = out
+                else:
+                    new = self._join(old, out)
+                    if target in headers and visits[target] >= WIDEN_AFTER:
+                        new = self._widen(old, new)
+                    if new == old:
+                        continue
+                states[target] = new
+                visits[target] = visits.get(target, 0) + 1
+                if target not in queued:
+                    queued.add(target)
+                    pending.append(target)
+        return states
+
+    def _join(self, first, second):
+        joined = {}
+        for index, interval in first.items():
+            other = second.get(index)
+            if other == interval:
+                joined[index] = interval
+            elif other is not None:
+                joined[index] = (min(interval[0], other[0]), max(interval[1], other[1]))
+        return joined
+
+    def _thresholds(self):
+        """Constantes enteras comparadas en la función (límites de los bucles), ordenadas"""
+        constants = set()
+        for block in self.function.blocks:
+            for position in range(len(block)):
+                if block.ops[position] in NEGATED_COMPARISONS:
+                    for operand in (block.a[position], block.b[position]):
+                        value = self.values[operand]
+                        if value.kind == VALUE_CONST and value.type == "entero":
+                            constants.add(parse_constant(value))
+        return sorted(constants)
+
+    def _widen(self, old, new):
+        widened = {}
+        for index, (low, high) in new.items():
+            old_low, old_high = old[index]
+            if low < old_low:
+                low = max((constant for constant in self.thresholds if constant <= low), default=INT_MIN)
+            if high > old_high:
+                high = min((constant for constant in self.thresholds if constant >= high), default=INT_MAX)
+            interval = (low, high)
+            if interval != TOP:
+                widened[index] = interval
+        return widened
+
+    def _tracked(self, index):
+        value = self.values[index]
+        return value.kind in (VALUE_VAR, VALUE_TEMP) and value.type == "entero"
+
+    def _interval(self, state, index):
+        value = self.values[index]
+        if value.kind == VALUE_CONST and value.type == "entero":
+            constant = parse_constant(value)
+            return (constant, constant)
+        return state.get(index, TOP)
+
+    def _set(self, state, index, interval):
+        if interval is None or interval[0] < INT_MIN or interval[1] > INT_MAX or interval == TOP:
+            # Un resultado que puede desbordar da la vuelta: cualquier entero
+            state.pop(index, None)
+        else:
+            state[index] = interval
+
+    def _result(self, state, op, a, b):
+        """Intervalo del resultado de una operación entera (None si no se acota)"""
+        if op == OP_MOV:
+            return self._interval(state, a)
+        if op not in (OP_ADD, OP_SUB, OP_MUL, OP_MOD) or self.values[a].type != "entero" or self.values[b].type != "entero":
+            return None
+        a_low, a_high = self._interval(state, a)
+        b_low, b_high = self._interval(state, b)
+        if op == OP_ADD:
+            return (a_low + b_low, a_high + b_high)
+        if op == OP_SUB:
+            return (a_low - b_high, a_high - b_low)
+        if op == OP_MUL:
+            products = (a_low * b_low, a_low * b_high, a_high * b_low, a_high * b_high)
+            return (min(products), max(products))
+        if b_low <= 0 <= b_high:
+            return None
+        # El resto de C tiene el signo del dividendo y es menor en valor absoluto que el divisor
+        limit = max(abs(b_low), abs(b_high)) - 1
+        if a_low >= 0:
+            return (0, min(a_high, limit))
+        if a_high <= 0:
+            return (max(a_low, -limit), 0)
+        return (-limit, limit)
+
+    def _transfer(self, block, state, redundant=None):
+        """Aplica las instrucciones del bloque al estado; con redundant, añade las posiciones de
+        las comprobaciones cuyo índice ya está dentro del array"""
+        values = self.values
+        for position in range(len(block)):
+            op = block.ops[position]
+            if op == OP_CHECK_INDEX:
+                if values[block.b[position]].kind != VALUE_CONST:
+                    # Array dinámico: su longitud solo se conoce en ejecución
+                    continue
+                index = block.a[position]
+                length = parse_constant(values[block.b[position]])
+                low, high = self._interval(state, index)
+                if redundant is not None and low >= 0 and high < length:
+                    redundant.append(position)
+                elif self._tracked(index):
+                    # Tras la comprobación el índice está dentro del array (si no, el programa termina)
+                    self._set(state, index, (max(low, 0), min(high, length - 1)))
+                continue
+            dst = block.writes(position)
+            if dst >= 0 and self._tracked(dst):
+                self._set(state, dst, self._result(state, op, block.a[position], block.b[position]))
+        return state
+
+    def _successors(self, block, state):
+        """Estado de salida hacia cada sucesor; las ramas imposibles se omiten"""
+        if block.terminator != TERM_BRANCH:
+            return [(target, state) for target in block.targets]
+        comparison = self._comparison(block)
+        if comparison is None:
+            return [(target, state) for target in block.targets]
+        op, a, b = comparison
+        successors = []
+        for target, taken in zip(block.targets, (op, NEGATED_COMPARISONS[op])):
+            refined = self._refine(dict(state), taken, a, b)
+            if refined is not None:
+                successors.append((target, refined))
+        return successors
+
+    def _comparison(self, block):
+        """Comparación entera que calcula la condición del salto en el propio bloque, si sus
+        operandos no cambian entre la comparación y el salto"""
+        written = set()
+        for position in range(len(block) - 1, -1, -1):
+            dst = block.writes(position)
+            if dst == block.cond:
+                op = block.ops[position]
+                a, b = block.a[position], block.b[position]
+                if (op not in NEGATED_COMPARISONS or a in written or b in written
+                        or self.values[a].type != "entero" or self.values[b].type != "entero"):
+                    return None
+                return op, a, b
+            written.add(dst)
+        return None
+
+    def _refine(self, state, op, a, b):
+        """Acota los operandos con la comparación a op b; None si no puede cumplirse"""
+        if op == OP_GT:
+            op, a, b = OP_LT, b, a
+        elif op == OP_GE:
+            op, a, b = OP_LE, b, a
+        a_low, a_high = self._interval(state, a)
+        b_low, b_high = self._interval(state, b)
+        if op == OP_LT:
+            a_high, b_low = min(a_high, b_high - 1), max(b_low, a_low + 1)
+        elif op == OP_LE:
+            a_high, b_low = min(a_high, b_high), max(b_low, a_low)
+        elif op == OP_EQ:
+            a_low = b_low = max(a_low, b_low)
+            a_high = b_high = min(a_high, b_high)
+        elif a_low == a_high:
+            # a != b con a conocido descarta ese valor si está en un extremo de b
+            b_low += b_low == a_low
+            b_high -= b_high == a_low
+        elif b_low == b_high:
+            a_low += a_low == b_low
+            a_high -= a_high == b_low
+        if a_low > a_high or b_low > b_high:
+            return None
+        for index, interval in ((a, (a_low, a_high)), (b, (b_low, b_high))):
+            if self._tracked(index):
+                self._set(state, index, interval)
+        return state
@@ -1,4 +1,9 @@
 from syntax_analyzer import Node
+from semantic_cache import structural_hash, relative_line, absolute_line
+from dataflow import DataflowAnalysis
+from xref import CrossReferenceIndex, symbol_key
+import copy
+import hashlib
 
 class Symbol:
     def __init__(self, name, type, scope, line, column):
@@ -9,6 +14,7 @@ class Symbol:
         self.column = column    # Columna donde se declaró
         self.is_initialized = False  # Si ha sido inicializada
         self.is_used = False    # Si ha sido utilizada
+        self.owner = None       # Clase a la que pertenece (solo miembros)
 
     def __str__(self):
         return f"{self.name} ({self.type}) en ámbito {self.scope}, línea {self.line}"
@@ -71,6 +77,8 @@ class SemanticError:
 
 class SemanticNode:
     """Nodo para el árbol de análisis semántico"""
+    __slots__ = ("type", "value", "data_type", "children", "line", "column", "errors")
+    
     def __init__(self, type, value=None, data_type=None, children=None, line=0, column=0):
         self.type = type              # Tipo de nodo (declaración, asignación, etc.)
         self.value = value            # Valor del nodo (nombre de variable, valor literal, etc.)
@@ -128,13 +136,263 @@ class SemanticNode:
             
         return all_errors
 
+    def to_data(self, base_line=0):
+        """Serializa el subárbol a listas JSON con líneas relativas a base_line"""
+        return [
+            self.type,
+            self.value,
+            self.data_type,
+            relative_line(self.line, base_line),
+            self.column,
+            [error.message for error in self.errors],
+            [child.to_data(base_line) for child in self.children]
+        ]
+
+    @classmethod
+    def from_data(cls, data, base_line=0):
+        """Reconstruye un subárbol serializado con to_data"""
+        type, value, data_type, line, column, errors, children = data
+        node = cls(type, value=value, data_type=data_type,
+                   line=absolute_line(line, base_line), column=column)
+        for message in errors:
+            node.add_error(message)
+        for child in children:
+            node.add_child(cls.from_data(child, base_line))
+        return node
+
+
+# Único método de los arrays: lista.agregar(valor)~ añade un elemento al final (array dinámico)
+ARRAY_APPEND = "agregar"
+
+# Nodos de expresión que solo envuelven a su único hijo
+WRAPPER_NODES = ("expresion", "expresion_logica", "expresion_relacional", "expresion_aritmetica", "termino", "factor")
+
+
+def call_arguments(call_node):
+    """Expresiones de los argumentos de una llamada"""
+    if len(call_node.children) >= 2 and call_node.children[1].type == "argumentos":
+        args_node = call_node.children[1]
+        if args_node.children and args_node.children[0].type == "lista_expresiones":
+            return args_node.children[0].children
+    return []
+
+
+def declared_type(tipo_node):
+    """Tipo declarado por un nodo tipo_dato o tipo_array ('entero[]' para arrays)"""
+    if tipo_node.type == "tipo_array":
+        return f"{tipo_node.leaf}[]"
+    return tipo_node.leaf
+
+
+def parameter_pairs(params_node):
+    """Pares (nodo de tipo, nodo id) de los parámetros de un método"""
+    pairs = []
+    for list_node in params_node.children:
+        if list_node.type == "lista_parametros":
+            children = list_node.children
+            for i in range(0, len(children) - 1, 2):
+                pairs.append((children[i], children[i + 1]))
+    return pairs
+
+
+def method_scope_name(class_name, method_name):
+    """Nombre del ámbito (bajo global) en el que se analiza el cuerpo de un método"""
+    return f"{class_name}_{method_name}"
+
+
+# Operadores de reducción de un 'para' paralelo -> tipos a los que se aplican
+REDUCTION_TYPES = {"+": ("entero", "flotante"), "*": ("entero", "flotante"), "AND": ("booleano",), "OR": ("booleano",)}
+
+# Tipos de las variables que se pueden declarar en el cuerpo de un 'para' paralelo
+PARALLEL_LOCAL_TYPES = ("entero", "flotante", "booleano", "caracter")
+
+# Sentencias de las que sale un romper
+BREAKABLE_STATEMENTS = ("sentencia_while", "sentencia_do_while", "sentencia_for", "sentencia_switch")
+
+# Comparación equivalente con los operandos intercambiados (límite > i  <=>  i < límite)
+SWAPPED_RELATIONS = {"<": ">", ">": "<", "<=": ">=", ">=": "<="}
+
+
+def parallel_clause(for_node):
+    """Nodo 'paralelo' (con las reducciones) de un 'para' paralelo; None si el 'para' es secuencial"""
+    if len(for_node.children) > 4 and for_node.children[4].type == "paralelo":
+        return for_node.children[4]
+    return None
+
+
+def named_id(node, name):
+    """Nodo id de la variable si la expresión es solo esa variable (sin acceso a miembros); None si no"""
+    if node is not None and node.type == "factor" and len(node.children) == 1:
+        node = node.children[0]
+    if node is not None and node.type == "id" and node.leaf == name and not node.children:
+        return node
+    return None
+
+
+def loop_bound(cond_node, variable):
+    """(comparación, límite) de la condición 'variable op límite' de un 'para' (o 'límite op
+    variable', devuelta con la comparación intercambiada); None si no tiene esa forma"""
+    if cond_node.type != "expresion_relacional" or cond_node.leaf not in SWAPPED_RELATIONS or len(cond_node.children) < 2:
+        return None
+    left, right = cond_node.children[:2]
+    if named_id(left, variable):
+        return cond_node.leaf, right
+    if named_id(right, variable):
+        return SWAPPED_RELATIONS[cond_node.leaf], left
+    return None
+
+
+def loop_step(update_node, variable):
+    """Paso constante de la actualización de un 'para' (i += c, i = i + c, i = c + i o i = i - c);
+    None si no tiene esa forma"""
+    if len(update_node.children) < 2 or update_node.children[0].leaf != variable:
+        return None
+    expr = update_node.children[1]
+    if update_node.leaf == "+=":
+        step, sign = expr, 1
+    elif expr.type == "expresion_aritmetica" and expr.leaf in ("+", "-") and len(expr.children) >= 2 and expr.children[0] is not None:
+        left, right = expr.children[:2]
+        if named_id(left, variable):
+            step, sign = right, 1 if expr.leaf == "+" else -1
+        elif expr.leaf == "+" and named_id(right, variable):
+            step, sign = left, 1
+        else:
+            return None
+    else:
+        return None
+    if step.type != "factor" or step.children or not str(step.leaf).isdigit():
+        return None
+    return sign * int(step.leaf)
+
+
+class ParallelLoop:
+    """Estado del análisis de un 'para' paralelo: lo declarado en su ámbito es de cada iteración y
+    el resto es compartido entre los hilos"""
+    def __init__(self, scope, variable, update):
+        self.scope = scope              # Ámbito del 'para'
+        self.variable = variable        # Símbolo de la variable de control
+        self.update = update            # Nodo de la actualización del propio 'para'
+        self.reductions = {}            # Nombre -> (símbolo, operador) de las reducciones
+        self.updated = set()            # Reducciones que el cuerpo actualiza
+        self.reads = set()              # id(nodo id) de las lecturas de una reducción en su actualización
+        self.nested = 0                 # Bucles y switch del cuerpo abiertos (romper sale de ellos)
+        self.outer = None               # 'para' paralelo que lo contiene (anidarlos es un error)
+        self.node = None                # Nodo semántico de la cláusula 'paralelo'
+
+    def owns(self, symbol):
+        """Si el símbolo se declara dentro del 'para' (una copia por iteración)"""
+        return symbol.scope == self.scope or symbol.scope.startswith(self.scope + ".")
+
+
+class TaskBlock:
+    """Estado del análisis de una tarea: lo declarado en su ámbito es suyo y el resto de variables
+    de principal se comparte con el hilo principal hasta el esperar"""
+    def __init__(self, scope):
+        self.scope = scope              # Ámbito del cuerpo de la tarea
+        self.nested = 0                 # Bucles y switch del cuerpo abiertos (romper sale de ellos)
+
+    def owns(self, symbol):
+        """Si el símbolo se declara dentro de la tarea"""
+        return symbol.scope == self.scope or symbol.scope.startswith(self.scope + ".")
+
+
+class TypedAST:
+    """AST anotado que el analizador entrega al generador: tipo y símbolo de cada nodo en O(1)"""
+    def __init__(self, root, node_types, node_symbols, symbol_table, user_defined_types, dataflow,
+                 initializers, loop_variables, task_scopes=None):
+        self.root = root
+        self.node_types = node_types            # id(nodo) -> tipo de dato
+        self.node_symbols = node_symbols        # id(nodo) -> símbolo referenciado
+        self.symbol_table = symbol_table
+        self.user_defined_types = user_defined_types
+        self.dataflow = dataflow                # id(bloque de función) -> DataflowAnalysis
+        self.initializers = initializers        # id(símbolo) -> expresión de inicialización
+        self.loop_variables = loop_variables    # (ámbito, nombre) de las variables de control de 'para'
+        self.task_scopes = task_scopes or {}    # id(nodo sentencia_tarea) -> ámbito de su cuerpo
+
+    def type_of(self, node):
+        return self.node_types.get(id(node))
+
+    def symbol_of(self, node):
+        return self.node_symbols.get(id(node))
+
+    def initializer_of(self, symbol):
+        return self.initializers.get(id(symbol))
+
+    def function_scope(self, class_name=None, method_name=None):
+        """Ámbito de principal o, si se indica la clase y el método, del cuerpo del método"""
+        if class_name:
+            return f"global.{method_scope_name(class_name, method_name)}"
+        return "global.principal"
+
+    def task_scope(self, task_node):
+        """Ámbito del cuerpo de una tarea (la función que la ejecuta)"""
+        return self.task_scopes[id(task_node)]
+
+    def function_locals(self, scope):
+        """Variables locales de una función, incluidas las de sus bucles, sin las de control de 'para'
+        ni las de sus tareas (que son locales de la función de cada tarea)"""
+        prefix = scope + "."
+        nested = [task for task in self.task_scopes.values() if task.startswith(prefix)]
+        seen = set()
+        symbols = []
+        for scope_name, scope_symbols in self.symbol_table.symbols.items():
+            if scope_name != scope and not scope_name.startswith(prefix):
+                continue
+            if any(scope_name == task or scope_name.startswith(task + ".") for task in nested):
+                continue
+            for name, symbol in scope_symbols.items():
+                if (scope_name, name) in self.loop_variables or name in seen:
+                    continue
+                seen.add(name)
+                symbols.append(symbol)
+        return symbols
+
+    def nested_names(self, scope):
+        """Nombres declarados en los bloques anidados de una función ('para' y tareas), que
+        comparten la variable de C de una local del mismo nombre"""
+        prefix = scope + "."
+        return {name for scope_name, scope_symbols in self.symbol_table.symbols.items()
+                if scope_name.startswith(prefix) for name in scope_symbols}
+
+    def class_info(self, class_name):
+        """Miembros y métodos registrados para una clase (None si no existe)"""
+        return self.user_defined_types.get(class_name)
+
+    def dataflow_of(self, body):
+        """Análisis de flujo de datos del cuerpo de una función (None si no se calculó)"""
+        return self.dataflow.get(id(body))
+
+
 class SemanticAnalyzer:
-    def __init__(self):
+    def __init__(self, cache=None, build_tree=True):
         self.symbol_table = SymbolTable()
         self.errors = []
         self.warnings = []
         self.semantic_trees = []  # Lista de árboles semánticos generados
         self.user_defined_types = {}  # Diccionario de tipos definidos por el usuario
+        self.cache = cache            # Caché semántica compartida entre archivos (opcional)
+        self.class_cache_info = {}    # id(nodo de clase) -> clave, entrada y registro
+        
+        # Con build_tree=False solo se anotan los nodos del AST; el árbol semántico
+        # se construye bajo demanda al imprimirlo
+        self.build_tree = build_tree
+        self.ast_root = None
+        self.node_types = {}          # id(nodo del AST) -> tipo de dato inferido
+        self.node_symbols = {}        # id(nodo del AST) -> símbolo referenciado
+        self.dataflow = {}            # id(bloque de función) -> DataflowAnalysis
+        self.xref = CrossReferenceIndex()  # Referencias cruzadas construidas durante el recorrido
+        self.current_class = None     # Clase cuyo cuerpo se está analizando
+        self.member_owner = None      # Clase de la declaración de miembro en curso
+        self.written_element = None   # Nodo arr[i].campo que es destino de la asignación en curso
+        self.parallel_loop = None     # 'para' paralelo cuyo cuerpo se está analizando
+        self.task = None              # Tarea cuyo cuerpo se está analizando
+        self.task_scopes = {}         # id(nodo sentencia_tarea) -> ámbito de su cuerpo
+        self.block_counter = 0        # Ámbitos de bucle 'para' y de tareas abiertos en la función actual
+        self.parameter_symbols = set()  # id(símbolo) de los parámetros del método en curso
+        self.initializers = {}        # id(símbolo) -> expresión de inicialización
+        self.loop_variables = set()   # (ámbito, nombre) de las variables de control de 'para'
+        self.typed_ast = None         # Resultado para el generador de código
         
         # Definir tipos de datos básicos del lenguaje
         self.basic_types = ["entero", "flotante", "booleano", "caracter", "cadena", "vacio"]
@@ -192,21 +450,54 @@ class SemanticAnalyzer:
         self.warnings = []
         self.semantic_trees = []
         self.user_defined_types = {}
+        self.class_cache_info = {}
+        self.ast_root = ast_root
+        self.node_types = {}
+        self.node_symbols = {}
+        self.dataflow = {}
+        self.xref = CrossReferenceIndex()
+        self.current_class = None
+        self.member_owner = None
+        self.written_element = None
+        self.block_counter = 0
+        self.parameter_symbols = set()
+        self.initializers = {}
+        self.loop_variables = set()
+        self.task = None
+        self.task_scopes = {}
+        self.typed_ast = None
+        
+        # Consultar la caché para cada declaración de clase
+        if self.cache is not None:
+            self._prepare_class_cache(ast_root)
         
         # Primera pasada: recopilar declaraciones de clases
         self._collect_class_declarations(ast_root)
         
         # Realizar el análisis semántico
         semantic_root = self._analyze_node(ast_root)
-        if semantic_root:
+        if semantic_root and self.build_tree:
             self.semantic_trees.append(semantic_root)
             
             # Recopilar errores de todos los nodos del árbol
             self.errors = semantic_root.collect_errors()
         
+        # Verificar lo que comparten las tareas de principal hasta su esperar
+        self._check_tasks(ast_root)
+        
+        # Verificar que los arrays inicializados con [] reciben elementos
+        self._check_empty_array_literals(ast_root)
+        
         # Verificar variables no utilizadas (como advertencia)
         self._check_unused_variables()
         
+        # Verificar lecturas que pueden ocurrir antes de asignar (como advertencia)
+        self._check_uninitialized_uses(ast_root)
+        
+        self.typed_ast = TypedAST(ast_root, self.node_types, self.node_symbols, self.symbol_table,
+                                  self.user_defined_types, self.dataflow, self.initializers,
+                                  self.loop_variables, self.task_scopes)
+        
         return len(self.errors) == 0
     
     def _check_unused_variables(self):
@@ -219,6 +510,40 @@ class SemanticAnalyzer:
                                      symbol.line, symbol.column)
                     )
     
+    def _check_uninitialized_uses(self, ast_root):
+        """Usa asignación definida sobre el grafo de flujo para avisar de lecturas sin inicializar"""
+        for body, parameters in self._function_bodies(ast_root):
+            analysis = DataflowAnalysis(body, parameters)
+            self.dataflow[id(body)] = analysis
+            
+            for name, id_node in analysis.uninitialized_uses():
+                self.warnings.append(
+                    SemanticError(f"La variable '{name}' puede usarse sin haber sido inicializada",
+                                 id_node.line, id_node.column)
+                )
+    
+    def _function_bodies(self, ast_root):
+        """Devuelve (bloque, parámetros) de principal y de cada método de clase"""
+        bodies = []
+        pending = [ast_root]
+        while pending:
+            node = pending.pop()
+            if not hasattr(node, 'type'):
+                continue
+            if node.type == "principal" and node.children:
+                bodies.append((node.children[0], ()))
+            elif node.type == "declaracion_metodo" and node.children:
+                parameters = [(id_node.leaf, self._declared_type(tipo_node))
+                              for tipo_node, id_node in parameter_pairs(node.children[-2])]
+                bodies.append((node.children[-1], parameters))
+            else:
+                pending.extend(reversed(node.children))
+        return bodies
+    
+    def _declared_type(self, tipo_node):
+        """Tipo declarado por un nodo tipo_dato o tipo_array ('entero[]' para arrays)"""
+        return declared_type(tipo_node)
+    
     def _collect_class_declarations(self, node):
         """Recopila las declaraciones de clases para registrarlas como tipos definidos por el usuario"""
         if not hasattr(node, 'type'):
@@ -227,13 +552,22 @@ class SemanticAnalyzer:
         if node.type == "declaracion_clase" and node.leaf:
             # Registrar la clase como un tipo definido por el usuario
             class_name = node.leaf
-            self.user_defined_types[class_name] = {
-                "members": {},
-                "methods": {}
-            }
+            cache_info = self.class_cache_info.get(id(node))
+            
+            if cache_info and cache_info["entry"] is not None:
+                # Reutilizar el registro guardado en la caché
+                self.user_defined_types[class_name] = copy.deepcopy(cache_info["entry"]["registry"])
+            else:
+                self.user_defined_types[class_name] = {
+                    "members": {},
+                    "methods": {}
+                }
+                
+                # Analizar miembros y métodos de la clase
+                self._process_class_members(class_name, node)
             
-            # Analizar miembros y métodos de la clase
-            self._process_class_members(class_name, node)
+            if cache_info:
+                cache_info["registry"] = self.user_defined_types[class_name]
             
         elif node.type == "declaraciones_clases":
             # Procesar cada declaración de clase
@@ -246,6 +580,32 @@ class SemanticAnalyzer:
                 if child:
                     self._collect_class_declarations(child)
     
+    def _prepare_class_cache(self, ast_root):
+        """Calcula la clave de caché de cada declaración de clase y consulta la caché"""
+        class_nodes = []
+        pending = [ast_root]
+        while pending:
+            node = pending.pop()
+            if not hasattr(node, 'type'):
+                continue
+            if node.type == "declaracion_clase":
+                class_nodes.append(node)
+            elif node.type in ("programa", "declaraciones_clases"):
+                pending.extend(reversed(node.children))
+        
+        # El resultado de una clase depende del resto de clases del programa: sus miembros
+        # se registran en el ámbito global y los tipos se resuelven contra todo el registro
+        hashes = [structural_hash(node) for node in class_nodes]
+        context = hashlib.sha1("|".join(hashes).encode("utf-8")).hexdigest()
+        
+        for index, (node, node_hash) in enumerate(zip(class_nodes, hashes)):
+            key = f"{node_hash}:{index}:{context}"
+            self.class_cache_info[id(node)] = {
+                "key": key,
+                "entry": self.cache.get(key),
+                "registry": None
+            }
+    
     def _process_class_members(self, class_name, node):
         """Procesa los miembros y métodos de una clase"""
         if len(node.children) < 1:
@@ -274,10 +634,10 @@ class SemanticAnalyzer:
         if len(declaration.children) < 2:
             return
             
-        tipo = declaration.children[0].leaf
+        tipo = self._declared_type(declaration.children[0])
         
-        # Manejar lista de IDs o un solo ID
-        if declaration.children[1].type == "lista_ids":
+        # Manejar lista de IDs (con o sin inicialización) o un solo ID
+        if declaration.children[1].type in ("lista_ids", "lista_ids_inicializadas"):
             for id_node in declaration.children[1].children:
                 if id_node.type == "id":
                     self.user_defined_types[class_name]["members"][id_node.leaf] = tipo
@@ -286,30 +646,36 @@ class SemanticAnalyzer:
     
     def _process_class_method(self, class_name, declaration):
         """Procesa una declaración de método dentro de una clase"""
-        if len(declaration.children) < 2:
+        if len(declaration.children) < 3:
             return
             
-        return_type = declaration.children[0].leaf
-        method_name = declaration.children[1].leaf
+        return_type = declaration.children[0].leaf if len(declaration.children) >= 4 else "vacio"
+        method_name = declaration.children[-3].leaf
         
-        # Crear entrada para el método
+        # Crear entrada para el método, con sus parámetros en orden
         self.user_defined_types[class_name]["methods"][method_name] = {
             "return_type": return_type,
-            "parameters": []
+            "parameters": [{"type": self._declared_type(tipo_node), "name": id_node.leaf}
+                           for tipo_node, id_node in parameter_pairs(declaration.children[-2])]
         }
-        
-        # Procesar parámetros si existen
-        if len(declaration.children) >= 3 and declaration.children[2].type == "parametros":
-            params_node = declaration.children[2]
-            for param_node in params_node.children:
-                if param_node.type == "lista_parametros" and len(param_node.children) >= 2:
-                    self.user_defined_types[class_name]["methods"][method_name]["parameters"].append({
-                        "type": param_node.children[0].leaf,
-                        "name": param_node.children[1].leaf
-                    })
     
     def _analyze_node(self, node):
-        """Analiza un nodo del AST recursivamente y genera un nodo semántico"""
+        """Analiza un nodo del AST recursivamente y anota su tipo de dato inferido"""
+        # Un romper dentro de un bucle o switch del cuerpo de un 'para' paralelo o de una tarea no sale de él
+        regions = ()
+        if hasattr(node, 'type') and node.type in BREAKABLE_STATEMENTS:
+            regions = [region for region in (self.parallel_loop, self.task) if region is not None]
+        for region in regions:
+            region.nested += 1
+        semantic_node = self._dispatch_node(node)
+        for region in regions:
+            region.nested -= 1
+        if semantic_node is not None and semantic_node.data_type:
+            self.node_types[id(node)] = semantic_node.data_type
+        return semantic_node
+    
+    def _dispatch_node(self, node):
+        """Genera el nodo semántico de un nodo del AST según su tipo"""
         if not hasattr(node, 'type'):
             return None
             
@@ -323,6 +689,7 @@ class SemanticAnalyzer:
         elif node.type == "principal":
             # Entrar en el ámbito de la función principal
             self.symbol_table.enter_scope("principal")
+            self.block_counter = 0
             self._process_children(node, semantic_node)
             self.symbol_table.exit_scope()
             
@@ -332,32 +699,21 @@ class SemanticAnalyzer:
             if symbol:
                 semantic_node.data_type = symbol.type
                 symbol.is_used = True
+                self.node_symbols[id(node)] = symbol
+                self.xref.add_read(symbol_key(symbol), node.line, node.column)
+                self._record_member_access(symbol, node)
+                self._check_parallel_read(semantic_node, symbol, node)
+                
+                # obj.miembro: el tipo del nodo es el del miembro (o el de retorno del método)
+                if node.children and node.children[0].type == "acceso_objeto":
+                    semantic_node.data_type = self._resolve_member_type(semantic_node, symbol.type, node.children[0])
             
-        elif node.type == "acceso_objeto":
-            # Analizar acceso a miembro de objeto
-            if len(node.children) >= 1:
-                id_node = self._analyze_node(node.children[0])
-                semantic_node.add_child(id_node)
-                
-                # Verificar si el objeto es de un tipo definido por el usuario
-                object_type = id_node.data_type if id_node else None
-                if object_type in self.user_defined_types and len(node.children) >= 2:
-                    member_name = node.children[1].leaf if hasattr(node.children[1], 'leaf') else None
-                    if member_name:
-                        # Verificar si el miembro existe en la clase
-                        if member_name in self.user_defined_types[object_type]["members"]:
-                            semantic_node.data_type = self.user_defined_types[object_type]["members"][member_name]
-                        else:
-                            self._add_error(semantic_node, f"La clase '{object_type}' no tiene un miembro llamado '{member_name}'")
-                elif object_type:
-                    self._add_error(semantic_node, f"No se puede acceder a miembros de un objeto de tipo '{object_type}'")
-            
-        elif node.type == "factor" and len(node.children) == 1 and node.children[0].type == "id":
-            # Caso especial para factor que contiene un id
-            id_node = self._analyze_node(node.children[0])
-            semantic_node.add_child(id_node)
-            if id_node and id_node.data_type:
-                semantic_node.data_type = id_node.data_type
+        elif node.type == "factor" and len(node.children) == 1:
+            # Factor que envuelve un id, un acceso a objeto o una llamada: hereda su tipo
+            child_node = self._analyze_node(node.children[0])
+            self._attach(semantic_node, child_node)
+            if child_node and child_node.data_type:
+                semantic_node.data_type = child_node.data_type
                 
         elif node.type == "factor" and node.leaf is not None:
             # Determinar el tipo de dato del factor basado en su valor
@@ -366,19 +722,63 @@ class SemanticAnalyzer:
         elif node.type == "llamada_metodo":
             self._analyze_method_call(node, semantic_node)
             
+        elif node.type == "acceso_array":
+            # El tipo de arr[i] es el tipo de los elementos del array; el de arr[i].campo, el del miembro
+            for child in node.children[:2]:
+                child_node = self._analyze_node(child)
+                if child_node:
+                    self._attach(semantic_node, child_node)
+            array_type = self.type_of(node.children[0])
+            if array_type and array_type.endswith("[]"):
+                semantic_node.data_type = array_type[:-2]
+                if len(node.children) > 2:
+                    semantic_node.data_type = self._resolve_element_member_type(
+                        semantic_node, array_type[:-2], node.children[2], write=node is self.written_element)
+            elif array_type:
+                self._add_error(semantic_node, f"No se puede indexar un valor de tipo '{array_type}'")
+                
+        elif node.type == "array_literal":
+            self._process_children(node, semantic_node)
+            semantic_node.data_type = self._array_literal_type(node, semantic_node)
+            
         elif node.type == "booleano":
             semantic_node.data_type = "booleano"
             
         elif node.type in ["bloque", "sentencias", "sentencia"]:
             self._process_children(node, semantic_node)
+            
+        elif node.type == "declaracion_clase":
+            return self._analyze_class_declaration(node, semantic_node)
+            
+        elif node.type == "miembro_clase":
+            # Las variables declaradas directamente en la clase son sus miembros
+            if len(node.children) >= 2 and node.children[1].type == "declaracion_variable":
+                self.member_owner = self.current_class
+            self._process_children(node, semantic_node)
+            self.member_owner = None
+                
+        elif node.type == "declaracion_metodo":
+            return self._analyze_method_declaration(node, semantic_node)
                 
-        elif node.type == "declaracion_variable":
+        elif node.type in ("declaracion_variable", "declaracion_array"):
             return self._analyze_declaration(node)
             
         elif node.type == "asignacion":
             return self._analyze_assignment(node)
             
-        elif node.type == "expresion_aritmetica":
+        elif node.type in ("asignacion_compuesta", "actualizacion_for"):
+            # x += expr y la actualización de un for se comprueban como asignaciones
+            assignment_node = self._analyze_assignment(node)
+            assignment_node.type, assignment_node.value = node.type, node.leaf
+            symbol = self.symbol_of(node.children[0])
+            if symbol and node.leaf == "+=":
+                self.xref.add_read(symbol_key(symbol), node.children[0].line, node.children[0].column)
+            return assignment_node
+            
+        elif node.type == "asignacion_for":
+            return self._analyze_for_initialization(node)
+            
+        elif node.type in ("expresion_aritmetica", "termino"):
             return self._analyze_arithmetic_expression(node)
             
         elif node.type == "expresion_relacional":
@@ -402,19 +802,280 @@ class SemanticAnalyzer:
         elif node.type == "sentencia_print":
             return self._analyze_print_statement(node)
             
+        elif node.type in ("sentencia_break", "sentencia_return"):
+            self._check_exit(node, semantic_node)
+            self._process_children(node, semantic_node)
+            
+        elif node.type == "sentencia_tarea":
+            self._analyze_task(node, semantic_node)
+            
+        elif node.type == "sentencia_esperar":
+            if self.current_class:
+                self._add_error(semantic_node, "Solo se puede esperar a las tareas en principal")
+            self._check_task_statement(semantic_node, "No se puede esperar")
+            self._check_parallel_statement(semantic_node, "No se puede esperar a las tareas")
+            
         # Por defecto, procesar los hijos
         elif node.children:
             self._process_children(node, semantic_node)
             
         return semantic_node
     
+    def _analyze_class_declaration(self, node, semantic_node):
+        """Analiza una declaración de clase, reutilizando el resultado de la caché si existe"""
+        cache_info = self.class_cache_info.get(id(node))
+        base_line = self._first_line(node)
+        entry = cache_info["entry"] if cache_info else None
+        if entry is not None and (entry["tree"] is not None or not self.build_tree):
+            return self._replay_class_entry(node, entry, base_line)
+            
+        # Analizar la clase registrando los cambios en la tabla de símbolos
+        symbols_before = self._snapshot_symbols() if cache_info else None
+        errors_before = len(self.errors)
+        outer_xref = self.xref
+        self.xref = CrossReferenceIndex()
+        self.current_class = node.leaf
+        
+        self._record_method_declarations(node)
+        self._process_children(node, semantic_node)
+        
+        self.current_class = None
+        class_xref, self.xref = self.xref, outer_xref
+        self.xref.merge(class_xref)
+        
+        if cache_info:
+            entry = self._build_class_entry(node, cache_info["registry"], semantic_node, class_xref,
+                                            symbols_before, errors_before, base_line)
+            self.cache.put(cache_info["key"], entry)
+        return semantic_node
+    
+    def _record_method_declarations(self, node):
+        """Registra en el índice de referencias los métodos declarados en una clase"""
+        for members_node in node.children:
+            if members_node.type != "miembros_clase":
+                continue
+            for member in members_node.children:
+                if len(member.children) >= 2 and member.children[1].type == "declaracion_metodo":
+                    method_id = member.children[1].children[-3]
+                    self.xref.add_method(f"{node.leaf}.{method_id.leaf}", method_id.line, method_id.column)
+    
+    def _snapshot_symbols(self):
+        """Copia el estado de los símbolos existentes: (ámbito, nombre) -> (inicializado, usado)"""
+        return {
+            (scope, name): (symbol.is_initialized, symbol.is_used)
+            for scope, symbols in self.symbol_table.symbols.items()
+            for name, symbol in symbols.items()
+        }
+    
+    def _build_class_entry(self, node, registry, semantic_node, class_xref, symbols_before, errors_before, base_line):
+        """Construye la entrada de caché con el registro, los símbolos y los diagnósticos de una clase"""
+        declared = []
+        touched = []
+        for scope, symbols in self.symbol_table.symbols.items():
+            for name, symbol in symbols.items():
+                flags = (symbol.is_initialized, symbol.is_used)
+                previous = symbols_before.get((scope, name))
+                if previous is None:
+                    declared.append([scope, name, symbol.type, relative_line(symbol.line, base_line),
+                                     symbol.column, flags[0], flags[1], symbol.owner])
+                elif previous != flags:
+                    touched.append([scope, name, flags[0], flags[1]])
+        
+        # Anotaciones de tipo y símbolo de los nodos de la clase, por posición en preorden
+        annotations = []
+        for index, current in enumerate(self._preorder(node)):
+            node_type = self.node_types.get(id(current))
+            symbol = self.node_symbols.get(id(current))
+            if node_type or symbol:
+                annotations.append([index, node_type, symbol.scope if symbol else None,
+                                    symbol.name if symbol else None])
+        
+        return {
+            "registry": copy.deepcopy(registry) if registry else {"members": {}, "methods": {}},
+            "symbols": declared,
+            "touched": touched,
+            "errors": [[error.message, relative_line(error.line, base_line), error.column]
+                       for error in self.errors[errors_before:]],
+            "tree": semantic_node.to_data(base_line) if self.build_tree else None,
+            "xref": class_xref.to_data(base_line),
+            "annotations": annotations
+        }
+    
+    def _replay_class_entry(self, node, entry, base_line):
+        """Aplica una entrada de caché: símbolos, anotaciones, diagnósticos y subárbol semántico"""
+        for scope, name, type, line, column, initialized, used, owner in entry["symbols"]:
+            symbol = Symbol(name, type, scope, absolute_line(line, base_line), column)
+            symbol.is_initialized = initialized
+            symbol.is_used = used
+            symbol.owner = owner
+            self.symbol_table.symbols.setdefault(scope, {})[name] = symbol
+            
+        for scope, name, initialized, used in entry["touched"]:
+            symbol = self.symbol_table.symbols.get(scope, {}).get(name)
+            if symbol:
+                symbol.is_initialized = initialized
+                symbol.is_used = used
+                
+        nodes = self._preorder(node)
+        for index, node_type, scope, name in entry["annotations"]:
+            if node_type:
+                self.node_types[id(nodes[index])] = node_type
+            symbol = self.symbol_table.symbols.get(scope, {}).get(name) if name else None
+            if symbol:
+                self.node_symbols[id(nodes[index])] = symbol
+                
+        for message, line, column in entry["errors"]:
+            self.errors.append(SemanticError(message, absolute_line(line, base_line), column))
+            
+        self.xref.merge(CrossReferenceIndex.from_data(entry["xref"], base_line))
+        
+        if not self.build_tree:
+            return SemanticNode("declaracion_clase")
+        return SemanticNode.from_data(entry["tree"], base_line)
+    
+    def _preorder(self, node):
+        """Nodos de un subárbol del AST en preorden"""
+        nodes = []
+        pending = [node]
+        while pending:
+            current = pending.pop()
+            if hasattr(current, 'type'):
+                nodes.append(current)
+                pending.extend(reversed(current.children))
+        return nodes
+    
+    def _first_line(self, node):
+        """Primera línea conocida (distinta de 0) de un subárbol en preorden"""
+        pending = [node]
+        while pending:
+            current = pending.pop()
+            if not hasattr(current, 'type'):
+                continue
+            if current.line:
+                return current.line
+            pending.extend(reversed(current.children))
+        return 0
+    
+    def _record_declaration(self, id_node, initialized):
+        """Marca el dueño del símbolo recién declarado y registra su declaración en el índice"""
+        symbol = self.symbol_table.lookup(id_node.leaf)
+        if not symbol:
+            return None
+        symbol.owner = self.member_owner
+        key = symbol_key(symbol)
+        self.xref.add_declaration(key, id_node.line, id_node.column)
+        if initialized:
+            self.xref.add_write(key, id_node.line, id_node.column)
+        return symbol
+    
+    def _record_member_access(self, symbol, id_node, write=False):
+        """Registra en el índice el acceso a un miembro o la llamada a un método (obj.nombre)"""
+        if not id_node.children or id_node.children[0].type != "acceso_objeto":
+            return
+        class_info = self.user_defined_types.get(symbol.type)
+        access = id_node.children[0]
+        if not class_info or not access.children:
+            return
+            
+        member_id = access.children[0]
+        key = f"{symbol.type}.{member_id.leaf}"
+        if member_id.leaf in class_info["methods"]:
+            self.xref.add_call(key, member_id.line, member_id.column)
+        elif write:
+            self.xref.add_write(key, member_id.line, member_id.column)
+        else:
+            self.xref.add_read(key, member_id.line, member_id.column)
+    
+    def _record_own_method_call(self, id_node):
+        """Registra la llamada a un método de la propia clase sin objeto explícito y devuelve su información"""
+        if self.current_class and not id_node.children:
+            class_info = self.user_defined_types.get(self.current_class, {})
+            if id_node.leaf in class_info.get("methods", {}):
+                self.xref.add_call(f"{self.current_class}.{id_node.leaf}", id_node.line, id_node.column)
+                return class_info["methods"][id_node.leaf]
+        return None
+    
+    def _resolve_member_type(self, semantic_node, object_type, access):
+        """Tipo de una cadena de accesos obj.a.b: tipo del último miembro o retorno del último método"""
+        current_type = object_type
+        while access is not None and access.children:
+            class_info = self.user_defined_types.get(current_type)
+            if not class_info:
+                self._add_error(semantic_node, f"No se puede acceder a miembros de un objeto de tipo '{current_type}'")
+                return None
+                
+            member_name = access.children[0].leaf
+            if member_name in class_info["members"]:
+                current_type = class_info["members"][member_name]
+            elif member_name in class_info["methods"]:
+                current_type = class_info["methods"][member_name]["return_type"]
+            else:
+                self._add_error(semantic_node, f"La clase '{current_type}' no tiene un miembro llamado '{member_name}'")
+                return None
+            access = access.children[1] if len(access.children) > 1 else None
+        return current_type
+    
+    def _resolve_element_member_type(self, semantic_node, element_type, access, write=False):
+        """Tipo de arr[i].campo: un solo miembro de tipo básico de los objetos del array"""
+        class_info = self.user_defined_types.get(element_type)
+        member_id = access.children[0]
+        if not class_info:
+            self._add_error(semantic_node, f"No se puede acceder a miembros de un objeto de tipo '{element_type}'")
+            return None
+        if len(access.children) > 1 or member_id.leaf not in class_info["members"]:
+            self._add_error(semantic_node, f"Solo se puede acceder a un miembro de la clase '{element_type}' en los elementos de un array")
+            return None
+        member_type = class_info["members"][member_id.leaf]
+        if member_type not in self.basic_types:
+            self._add_error(semantic_node, f"El miembro '{member_id.leaf}' de un elemento de array debe ser de tipo básico, no '{member_type}'")
+            return None
+        key = f"{element_type}.{member_id.leaf}"
+        if write:
+            self.xref.add_write(key, member_id.line, member_id.column)
+        else:
+            self.xref.add_read(key, member_id.line, member_id.column)
+        return member_type
+    
+    def _array_literal_type(self, node, semantic_node):
+        """Tipo de un literal [a, b, ...]: 'tipo[]' si los elementos son homogéneos"""
+        if not node.children:
+            return None
+        element_types = {self.type_of(element) for element in node.children[0].children}
+        if None in element_types:
+            return None
+        if len(element_types) == 1:
+            return f"{element_types.pop()}[]"
+        if element_types == {"entero", "flotante"}:
+            return "flotante[]"
+        self._add_error(semantic_node, "Los elementos de un array deben ser del mismo tipo")
+        return None
+    
+    def _attach(self, parent, child):
+        """Enlaza un nodo semántico a su padre (solo si se construye el árbol)"""
+        if self.build_tree:
+            parent.add_child(child)
+    
+    def _annotate_symbol(self, node, symbol):
+        """Anota en la tabla lateral el símbolo y el tipo de un nodo id"""
+        if symbol:
+            self.node_symbols[id(node)] = symbol
+            self.node_types[id(node)] = symbol.type
+    
+    def type_of(self, node):
+        """Tipo de dato inferido para un nodo del AST (None si no se conoce)"""
+        return self.node_types.get(id(node))
+    
+    def symbol_of(self, node):
+        """Símbolo al que hace referencia un nodo del AST (None si no se conoce)"""
+        return self.node_symbols.get(id(node))
+    
     def _process_children(self, node, semantic_node):
         """Procesa recursivamente los hijos de un nodo"""
         for child in node.children:
             if child:  # Asegurarse de que el hijo no es None
                 child_node = self._analyze_node(child)
                 if child_node:
-                    semantic_node.add_child(child_node)
+                    self._attach(semantic_node, child_node)
     
     def _infer_data_type(self, semantic_node, value):
         """Infiere el tipo de dato basado en un valor"""
@@ -447,40 +1108,43 @@ class SemanticAnalyzer:
         node.add_error(message)
         
     def _analyze_method_call(self, node, semantic_node):
-        """Analiza una llamada a método"""
+        """Analiza una llamada a método en una expresión; su tipo es el de retorno del método"""
         if len(node.children) >= 1:
-            obj_node = self._analyze_node(node.children[0])
-            semantic_node.add_child(obj_node)
-            
-            # Verificar si el objeto tiene un acceso a objeto
-            if obj_node and obj_node.type == "id" and len(obj_node.children) >= 1 and obj_node.children[0].type == "acceso_objeto":
-                obj_type = obj_node.data_type
-                method_name = obj_node.children[0].children[0].value if len(obj_node.children[0].children) >= 1 else None
-                
-                if obj_type in self.user_defined_types and method_name:
-                    # Verificar si el método existe en la clase
-                    if method_name in self.user_defined_types[obj_type]["methods"]:
-                        method_info = self.user_defined_types[obj_type]["methods"][method_name]
-                        semantic_node.data_type = method_info["return_type"]
-                        
-                        # Verificar argumentos si hay
-                        if len(node.children) >= 2 and node.children[1].type == "argumentos":
-                            # Aquí se podría implementar la verificación de tipos de argumentos
-                            pass
-                    else:
-                        self._add_error(semantic_node, f"La clase '{obj_type}' no tiene un método llamado '{method_name}'")
+            id_node = node.children[0]
+            obj_node = self._analyze_node(id_node)
+            self._attach(semantic_node, obj_node)
+            
+            if id_node.children:
+                # obj.metodo(...): el id ya resolvió el tipo de retorno del método
+                semantic_node.data_type = obj_node.data_type if obj_node else None
+            elif not self.symbol_of(id_node):
+                # metodo(...) dentro de una clase: llamada sobre el propio objeto
+                method_info = self._record_own_method_call(id_node)
+                if method_info:
+                    semantic_node.data_type = method_info["return_type"]
+                else:
+                    self._add_error(semantic_node, f"Función '{id_node.leaf}' no declarada")
+            
+            self._check_parallel_statement(semantic_node, "No se pueden llamar métodos")
+
+            # Analizar los argumentos
+            if len(node.children) >= 2:
+                args_node = self._analyze_node(node.children[1])
+                self._attach(semantic_node, args_node)
+            self._check_call_arguments(node, semantic_node)
         
     def _analyze_declaration(self, node):
-        """Analiza una declaración de variable y genera un nodo semántico"""
-        semantic_node = SemanticNode("declaracion_variable", line=node.line, column=node.column)
+        """Analiza una declaración de variable (o de array) y genera un nodo semántico"""
+        semantic_node = SemanticNode(node.type, line=node.line, column=node.column)
         
-        # Obtener el tipo de dato
+        # Obtener el tipo de dato ('entero[]' para arrays)
         tipo_dato_node = node.children[0]
-        tipo = tipo_dato_node.leaf
+        tipo = self._declared_type(tipo_dato_node)
+        base_tipo = tipo[:-2] if tipo.endswith("[]") else tipo
         
         # Verificar si es un tipo válido
-        if tipo not in self.basic_types and not self._is_user_defined_type(tipo):
-            error_msg = f"Tipo de dato '{tipo}' no definido"
+        if base_tipo not in self.basic_types and not self._is_user_defined_type(base_tipo):
+            error_msg = f"Tipo de dato '{base_tipo}' no definido"
             self.errors.append(
                 SemanticError(error_msg, 
                              tipo_dato_node.line if hasattr(tipo_dato_node, 'line') else 0,
@@ -491,14 +1155,16 @@ class SemanticAnalyzer:
             
         # Añadir el tipo al nodo semántico
         tipo_node = SemanticNode("tipo_dato", value=tipo, line=tipo_dato_node.line, column=tipo_dato_node.column)
-        semantic_node.add_child(tipo_node)
+        self._attach(semantic_node, tipo_node)
+        if tipo not in PARALLEL_LOCAL_TYPES:
+            self._check_parallel_statement(tipo_node, f"No se pueden declarar variables de tipo '{tipo}'")
             
         # Procesar la lista de identificadores
         if len(node.children) >= 2:
             if node.children[1].type == "lista_ids":
                 # Declaración simple: tipo id1, id2, ...
                 ids_node = SemanticNode("lista_ids", line=node.children[1].line, column=node.children[1].column)
-                semantic_node.add_child(ids_node)
+                self._attach(semantic_node, ids_node)
                 
                 for id_node in node.children[1].children:
                     nombre = id_node.leaf
@@ -506,81 +1172,135 @@ class SemanticAnalyzer:
                     columna = id_node.column if hasattr(id_node, 'column') else 0
                     
                     var_node = SemanticNode("variable", value=nombre, data_type=tipo, line=linea, column=columna)
-                    ids_node.add_child(var_node)
+                    self._attach(ids_node, var_node)
                     
-                    # Verificar si ya existe en el ámbito actual
-                    if not self.symbol_table.add_symbol(nombre, tipo, linea, columna):
+                    # Verificar si ya existe en el ámbito actual o choca con otra local de la función
+                    error_msg = self._local_conflict(nombre, tipo)
+                    if error_msg is None and not self.symbol_table.add_symbol(nombre, tipo, linea, columna):
                         error_msg = f"Variable '{nombre}' ya declarada en este ámbito"
+                    if error_msg:
                         self.errors.append(SemanticError(error_msg, linea, columna))
                         var_node.add_error(error_msg)
+                    else:
+                        self._annotate_symbol(id_node, self._record_declaration(id_node, False))
+                        
+            elif node.children[1].type == "lista_ids_inicializadas":
+                # Declaración múltiple con inicialización: tipo id1 = expr1, id2 = expr2, ...
+                pairs = node.children[1].children
+                for i in range(0, len(pairs) - 1, 2):
+                    self._analyze_initialized_variable(semantic_node, pairs[i], pairs[i + 1], tipo)
                     
             elif len(node.children) >= 3 and node.children[1].type == "id":
                 # Declaración con inicialización: tipo id = expresion
-                nombre = node.children[1].leaf
-                linea = node.children[1].line if hasattr(node.children[1], 'line') else 0
-                columna = node.children[1].column if hasattr(node.children[1], 'column') else 0
-                
-                var_node = SemanticNode("variable", value=nombre, data_type=tipo, line=linea, column=columna)
-                semantic_node.add_child(var_node)
-                
-                # Verificar si ya existe en el ámbito actual
-                if not self.symbol_table.add_symbol(nombre, tipo, linea, columna):
-                    error_msg = f"Variable '{nombre}' ya declarada en este ámbito"
-                    self.errors.append(SemanticError(error_msg, linea, columna))
-                    var_node.add_error(error_msg)
-                else:
-                    # Marcar como inicializada
-                    symbol = self.symbol_table.lookup(nombre)
-                    if symbol:
-                        symbol.is_initialized = True
-                        
-                    # Verificar compatibilidad de tipos en la inicialización
-                    if len(node.children) >= 3:
-                        expr_node = self._analyze_node(node.children[2])
-                        
-                        # Inferencia de tipos para literales
-                        if expr_node and expr_node.type == "factor" and expr_node.value is not None:
-                            if isinstance(expr_node.value, int) or (
-                                isinstance(expr_node.value, str) and 
-                                expr_node.value.isdigit()
-                            ):
-                                expr_node.data_type = "entero"
-                            elif isinstance(expr_node.value, float) or (
-                                isinstance(expr_node.value, str) and 
-                                '.' in expr_node.value and 
-                                all(c.isdigit() or c == '.' for c in expr_node.value)
-                            ):
-                                expr_node.data_type = "flotante"
-                            elif isinstance(expr_node.value, str) and (
-                                expr_node.value.startswith('"') or 
-                                expr_node.value.startswith("'")
-                            ):
-                                expr_node.data_type = "cadena"
-                            elif expr_node.value in ["verdadero", "falso"]:
-                                expr_node.data_type = "booleano"
-                                
-                        expr_type = expr_node.data_type if expr_node else None
-                        
-                        # Añadir la expresión al nodo semántico
-                        if expr_node:
-                            semantic_node.add_child(expr_node)
-                        
-                        if expr_type and expr_type != tipo:
-                            # Permitir asignaciones compatibles (entero a flotante, etc.)
-                            is_compatible = False
-                            
-                            if tipo == "flotante" and expr_type == "entero":
-                                is_compatible = True
-                            elif tipo == expr_type:
-                                is_compatible = True
-                            
-                            if not is_compatible:
-                                error_msg = f"No se puede asignar un valor de tipo '{expr_type}' a una variable de tipo '{tipo}'"
-                                self.errors.append(SemanticError(error_msg, linea, columna))
-                                var_node.add_error(error_msg)
+                self._analyze_initialized_variable(semantic_node, node.children[1], node.children[2], tipo)
         
         return semantic_node
     
+    def _check_array_copy(self, semantic_node, tipo, expr_type, expr_ast, linea, columna):
+        """Rechaza copiar un array entero a otro (b = a): en C los arrays no se asignan,
+        así que solo se admite un literal de array, que se copia elemento a elemento"""
+        if not (tipo.endswith("[]") and expr_type and expr_type.endswith("[]")):
+            return
+        while expr_ast.type in WRAPPER_NODES and expr_ast.leaf is None and len(expr_ast.children) == 1:
+            expr_ast = expr_ast.children[0]
+        if expr_ast.type != "array_literal":
+            error_msg = f"No se puede asignar un array completo de tipo '{expr_type}': copie sus elementos uno a uno"
+            self.errors.append(SemanticError(error_msg, linea, columna))
+            semantic_node.add_error(error_msg)
+
+    def _local_conflict(self, nombre, tipo):
+        """Error por declarar 'nombre' en el ámbito actual si choca con otra local de la función
+        (None si no choca). Las locales de los bloques 'para' y 'tarea' se declaran en C como una
+        sola variable por nombre, así que no pueden ocultar a otra visible ni cambiar de tipo"""
+        current = self.symbol_table.current_scope
+        parts = current.split(".")
+        if len(parts) < 2:
+            return None
+        function = ".".join(parts[:2])
+        for scope_name, scope_symbols in self.symbol_table.symbols.items():
+            symbol = scope_symbols.get(nombre)
+            if symbol is None or scope_name == current:
+                continue
+            if scope_name != function and not scope_name.startswith(function + "."):
+                continue
+            if current.startswith(scope_name + "."):
+                return f"Variable '{nombre}' ya declarada en un ámbito exterior (línea {symbol.line})"
+            if symbol.type != tipo:
+                return f"Variable '{nombre}' ya declarada como '{symbol.type}' en otro bloque de la función (línea {symbol.line})"
+        return None
+
+    def _analyze_initialized_variable(self, semantic_node, id_ast, expr_ast, tipo):
+        """Declara una variable inicializada (tipo id = expresion) y comprueba el tipo de la expresión"""
+        nombre = id_ast.leaf
+        linea = id_ast.line if hasattr(id_ast, 'line') else 0
+        columna = id_ast.column if hasattr(id_ast, 'column') else 0
+        
+        var_node = SemanticNode("variable", value=nombre, data_type=tipo, line=linea, column=columna)
+        self._attach(semantic_node, var_node)
+        
+        # Verificar si ya existe en el ámbito actual o choca con otra local de la función
+        error_msg = self._local_conflict(nombre, tipo)
+        if error_msg is None and not self.symbol_table.add_symbol(nombre, tipo, linea, columna):
+            error_msg = f"Variable '{nombre}' ya declarada en este ámbito"
+        if error_msg:
+            self.errors.append(SemanticError(error_msg, linea, columna))
+            var_node.add_error(error_msg)
+            return
+            
+        # Marcar como inicializada
+        symbol = self._record_declaration(id_ast, True)
+        if symbol:
+            symbol.is_initialized = True
+            self._annotate_symbol(id_ast, symbol)
+            self.initializers[id(symbol)] = expr_ast
+            
+        # Verificar compatibilidad de tipos en la inicialización
+        expr_node = self._analyze_node(expr_ast)
+        
+        # Inferencia de tipos para literales
+        if expr_node and expr_node.type == "factor" and expr_node.value is not None:
+            if isinstance(expr_node.value, int) or (
+                isinstance(expr_node.value, str) and 
+                expr_node.value.isdigit()
+            ):
+                expr_node.data_type = "entero"
+            elif isinstance(expr_node.value, float) or (
+                isinstance(expr_node.value, str) and 
+                '.' in expr_node.value and 
+                all(c.isdigit() or c == '.' for c in expr_node.value)
+            ):
+                expr_node.data_type = "flotante"
+            elif isinstance(expr_node.value, str) and (
+                expr_node.value.startswith('"') or 
+                expr_node.value.startswith("'")
+            ):
+                expr_node.data_type = "cadena"
+            elif expr_node.value in ["verdadero", "falso"]:
+                expr_node.data_type = "booleano"
+                
+        expr_type = expr_node.data_type if expr_node else None
+        
+        # Añadir la expresión al nodo semántico
+        if expr_node:
+            self._attach(semantic_node, expr_node)
+        
+        if expr_type and expr_type != tipo:
+            # Permitir asignaciones compatibles (entero a flotante, etc.)
+            is_compatible = False
+            
+            if tipo == "flotante" and expr_type == "entero":
+                is_compatible = True
+            elif tipo == "flotante[]" and expr_type == "entero[]":
+                is_compatible = True
+            elif tipo == expr_type:
+                is_compatible = True
+            
+            if not is_compatible:
+                error_msg = f"No se puede asignar un valor de tipo '{expr_type}' a una variable de tipo '{tipo}'"
+                self.errors.append(SemanticError(error_msg, linea, columna))
+                var_node.add_error(error_msg)
+        self._check_array_copy(var_node, tipo, expr_type, expr_ast, linea, columna)
+    
     def _analyze_assignment(self, node):
         """Analiza una asignación y genera un nodo semántico"""
         semantic_node = SemanticNode("asignacion", line=node.line, column=node.column)
@@ -597,7 +1317,7 @@ class SemanticAnalyzer:
             if len(id_node.children) > 0 and id_node.children[0].type == "acceso_objeto":
                 # Es una asignación a un miembro de objeto
                 var_node = SemanticNode("variable", value=nombre, line=linea, column=columna)
-                semantic_node.add_child(var_node)
+                self._attach(semantic_node, var_node)
                 
                 # Verificar si la variable (objeto) está declarada
                 symbol = self.symbol_table.lookup(nombre)
@@ -609,6 +1329,10 @@ class SemanticAnalyzer:
                 
                 # Establecer el tipo de la variable en el nodo semántico
                 var_node.data_type = symbol.type
+                self._annotate_symbol(id_node, symbol)
+                self.xref.add_write(symbol_key(symbol), linea, columna)
+                self._record_member_access(symbol, id_node, write=True)
+                self._check_parallel_write(semantic_node, symbol, node)
                 
                 # Marcar la variable como inicializada y utilizada
                 symbol.is_initialized = True
@@ -623,6 +1347,7 @@ class SemanticAnalyzer:
                     # Verificar si el miembro existe en la clase
                     if member_name in self.user_defined_types[symbol.type]["members"]:
                         member_type = self.user_defined_types[symbol.type]["members"][member_name]
+                        self.node_types[id(id_node)] = member_type
                         
                         # Analizar la expresión a asignar
                         expr_node = self._analyze_node(node.children[1])
@@ -630,7 +1355,7 @@ class SemanticAnalyzer:
                         
                         # Añadir la expresión al nodo semántico
                         if expr_node:
-                            semantic_node.add_child(expr_node)
+                            self._attach(semantic_node, expr_node)
                         
                         # Verificar compatibilidad de tipos para la asignación al miembro
                         if expr_type and expr_type != member_type:
@@ -659,7 +1384,7 @@ class SemanticAnalyzer:
             
             # Es una asignación normal a una variable
             var_node = SemanticNode("variable", value=nombre, line=linea, column=columna)
-            semantic_node.add_child(var_node)
+            self._attach(semantic_node, var_node)
             
             # Verificar si la variable está declarada
             symbol = self.symbol_table.lookup(nombre)
@@ -671,6 +1396,9 @@ class SemanticAnalyzer:
             
             # Establecer el tipo de la variable en el nodo semántico
             var_node.data_type = symbol.type
+            self._annotate_symbol(id_node, symbol)
+            self.xref.add_write(symbol_key(symbol), linea, columna)
+            self._check_parallel_write(semantic_node, symbol, node)
                 
             # Marcar la variable como inicializada y utilizada
             symbol.is_initialized = True
@@ -682,7 +1410,7 @@ class SemanticAnalyzer:
             
             # Añadir la expresión al nodo semántico
             if expr_node:
-                semantic_node.add_child(expr_node)
+                self._attach(semantic_node, expr_node)
             
             # Verificar asignación a tipos definidos por el usuario
             if symbol.type in self.user_defined_types:
@@ -705,10 +1433,26 @@ class SemanticAnalyzer:
                     error_msg = f"No se puede asignar un valor de tipo '{expr_type}' a una variable de tipo '{symbol.type}'"
                     self.errors.append(SemanticError(error_msg, linea, columna))
                     semantic_node.add_error(error_msg)
+            self._check_array_copy(semantic_node, symbol.type, expr_type, node.children[1], linea, columna)
             
             return semantic_node
         
-        # Para otros tipos de asignación (acceso a arrays, etc.)
+        # Asignación a un elemento de array: analizar el índice y la expresión
+        if id_node.type == "acceso_array":
+            self.written_element = id_node
+            self._process_children(node, semantic_node)
+            self.written_element = None
+            if self.type_of(id_node) == "cadena":
+                self._check_parallel_statement(semantic_node, "No se pueden asignar cadenas")
+            array_id = id_node.children[0]
+            symbol = self.symbol_table.lookup(array_id.leaf)
+            if symbol:
+                self.xref.add_write(symbol_key(symbol), array_id.line, array_id.column)
+            member_type = self.type_of(id_node) if len(id_node.children) > 2 else None
+            expr_type = self.type_of(node.children[1])
+            if member_type and expr_type and expr_type != member_type and not (member_type == "flotante" and expr_type == "entero"):
+                self._add_error(semantic_node, f"No se puede asignar un valor de tipo '{expr_type}' al miembro '{id_node.children[2].children[0].leaf}' de tipo '{member_type}'")
+            
         return semantic_node
     
     def _analyze_binary_operation(self, node, left_node, right_node, operator, operation_type):
@@ -717,16 +1461,18 @@ class SemanticAnalyzer:
         
         # Añadir los operandos al nodo semántico
         if left_node:
-            semantic_node.add_child(left_node)
+            self._attach(semantic_node, left_node)
         if right_node:
-            semantic_node.add_child(right_node)
+            self._attach(semantic_node, right_node)
             
         left_type = left_node.data_type if left_node else None
         right_type = right_node.data_type if right_node else None
         
         # Verificar compatibilidad de tipos según el operador
-        if operation_type == "expresion_aritmetica":
+        if operation_type in ("expresion_aritmetica", "termino"):
             self._check_arithmetic_compatibility(semantic_node, left_type, right_type, operator)
+            if semantic_node.data_type == "cadena":
+                self._check_parallel_statement(semantic_node, "No se pueden concatenar cadenas")
         elif operation_type == "expresion_relacional":
             semantic_node.data_type = "booleano"  # Las expresiones relacionales siempre devuelven booleano
             self._check_relational_compatibility(semantic_node, left_type, right_type, operator)
@@ -782,16 +1528,16 @@ class SemanticAnalyzer:
             child_node = self._analyze_node(node.children[0])
             if child_node:
                 semantic_node = SemanticNode("expresion_aritmetica", line=node.line, column=node.column)
-                semantic_node.add_child(child_node)
+                self._attach(semantic_node, child_node)
                 semantic_node.data_type = child_node.data_type
                 return semantic_node
             
-        elif len(node.children) == 2 and node.leaf == "-":
-            # Es una operación unaria (negación)
+        elif len(node.children) == 2 and node.leaf == "-" and node.children[0] is None:
+            # Es una operación unaria (negación): sin operando izquierdo
             operand_node = self._analyze_node(node.children[1])
             if operand_node:
                 semantic_node = SemanticNode("expresion_aritmetica", value=node.leaf, line=node.line, column=node.column)
-                semantic_node.add_child(operand_node)
+                self._attach(semantic_node, operand_node)
                 
                 # Verificar compatibilidad con operador unario
                 if operand_node.data_type in ["entero", "flotante"]:
@@ -804,7 +1550,7 @@ class SemanticAnalyzer:
             # Es una operación binaria
             left_node = self._analyze_node(node.children[0])
             right_node = self._analyze_node(node.children[1])
-            return self._analyze_binary_operation(node, left_node, right_node, node.leaf, "expresion_aritmetica")
+            return self._analyze_binary_operation(node, left_node, right_node, node.leaf, node.type)
                 
         # Por defecto
         return SemanticNode("expresion_aritmetica", line=node.line, column=node.column)
@@ -816,7 +1562,7 @@ class SemanticAnalyzer:
             child_node = self._analyze_node(node.children[0])
             if child_node:
                 semantic_node = SemanticNode("expresion_relacional", line=node.line, column=node.column)
-                semantic_node.add_child(child_node)
+                self._attach(semantic_node, child_node)
                 semantic_node.data_type = child_node.data_type
                 return semantic_node
             
@@ -836,7 +1582,7 @@ class SemanticAnalyzer:
             child_node = self._analyze_node(node.children[0])
             if child_node:
                 semantic_node = SemanticNode("expresion_logica", line=node.line, column=node.column)
-                semantic_node.add_child(child_node)
+                self._attach(semantic_node, child_node)
                 semantic_node.data_type = child_node.data_type
                 
                 # Si es una expresión relacional, el resultado es booleano
@@ -849,7 +1595,7 @@ class SemanticAnalyzer:
             operand_node = self._analyze_node(node.children[0])
             if operand_node:
                 semantic_node = SemanticNode("expresion_logica", value=node.leaf, line=node.line, column=node.column)
-                semantic_node.add_child(operand_node)
+                self._attach(semantic_node, operand_node)
                 
                 if operand_node.data_type == "booleano":
                     semantic_node.data_type = "booleano"
@@ -886,14 +1632,14 @@ class SemanticAnalyzer:
         if len(node.children) >= 1:
             condition_node = self._analyze_node(node.children[0])
             if condition_node:
-                semantic_node.add_child(condition_node)
+                self._attach(semantic_node, condition_node)
                 self._check_boolean_condition(semantic_node, condition_node, "if")
         
         # Procesar los bloques then y else
         for i in range(1, len(node.children)):
             child_node = self._analyze_node(node.children[i])
             if child_node:
-                semantic_node.add_child(child_node)
+                self._attach(semantic_node, child_node)
                 
         return semantic_node
     
@@ -905,14 +1651,14 @@ class SemanticAnalyzer:
         if len(node.children) >= 1:
             condition_node = self._analyze_node(node.children[0])
             if condition_node:
-                semantic_node.add_child(condition_node)
+                self._attach(semantic_node, condition_node)
                 self._check_boolean_condition(semantic_node, condition_node, "while")
         
         # Analizar el bloque del ciclo
         if len(node.children) >= 2:
             body_node = self._analyze_node(node.children[1])
             if body_node:
-                semantic_node.add_child(body_node)
+                self._attach(semantic_node, body_node)
                 
         return semantic_node
     
@@ -920,16 +1666,469 @@ class SemanticAnalyzer:
         """Analiza una sentencia for y genera un nodo semántico"""
         semantic_node = SemanticNode("sentencia_for", line=node.line, column=node.column)
         
+        # La variable declarada en la inicialización solo existe dentro del for
+        self.block_counter += 1
+        self.symbol_table.enter_scope(f"para{self.block_counter}")
+        
         # Procesar componentes del for (inicialización, condición, actualización, bloque)
+        clause = parallel_clause(node)
         for i, component in enumerate(node.children[:min(4, len(node.children))]):
+            if i == 1 and clause is not None:
+                # La condición, la actualización y el cuerpo se ejecutan repartidos entre hilos
+                self._begin_parallel_loop(node, clause, semantic_node)
             child_node = self._analyze_node(component)
             if child_node:
-                semantic_node.add_child(child_node)
-                
+                self._attach(semantic_node, child_node)
+
                 # Verificar que la condición (índice 1) sea de tipo booleano
                 if i == 1:
                     self._check_boolean_condition(semantic_node, child_node, "for")
-                
+        if clause is not None:
+            self._end_parallel_loop(node, clause, semantic_node)
+
+        self.symbol_table.exit_scope()
+        return semantic_node
+
+    def _begin_parallel_loop(self, node, clause, semantic_node):
+        """Comprueba la forma de un 'para' paralelo y sus reducciones antes de analizar el resto.
+
+        Las iteraciones se reparten entre hilos: la variable de control, declarada en la
+        inicialización, avanza con un paso constante hacia un límite que no cambia en el bucle."""
+        init, cond, update = node.children[:3]
+        outer = self.parallel_loop
+        variable = self.symbol_of(init.children[1]) if len(init.children) >= 3 else None
+        self.parallel_loop = ParallelLoop(self.symbol_table.current_scope, variable, update)
+        self.parallel_loop.outer = outer
+        clause_node = SemanticNode("paralelo", line=clause.line, column=clause.column)
+        self._attach(semantic_node, clause_node)
+        self.parallel_loop.node = clause_node
+        if outer is not None:
+            self._add_error(clause_node, "Un 'para' paralelo no puede anidarse en otro")
+        if variable is None or variable.type != "entero":
+            self._add_error(clause_node, "La variable de control de un 'para' paralelo debe declararse de tipo entero en su inicialización")
+            return
+
+        bound = loop_bound(cond, variable.name)
+        if bound is None:
+            self._add_error(clause_node, f"La condición de un 'para' paralelo debe comparar '{variable.name}' con un límite (<, <=, > o >=)")
+        else:
+            for current in self._preorder(bound[1]):
+                if current.type in ("acceso_array", "llamada_metodo", "llamada_funcion") or named_id(current, variable.name):
+                    self._add_error(clause_node, "El límite de un 'para' paralelo no puede depender de la variable de control, de arrays ni de llamadas")
+                    break
+        step = loop_step(update, variable.name)
+        if step is None or step == 0 or (bound is not None and (step > 0) != (bound[0] in ("<", "<="))):
+            self._add_error(clause_node, f"La actualización de un 'para' paralelo debe sumar o restar a '{variable.name}' una constante que la acerque al límite")
+
+        for reduction in clause.children:
+            id_node = reduction.children[0]
+            reduction_node = SemanticNode("reduccion", value=reduction.leaf, line=reduction.line, column=reduction.column)
+            self._attach(clause_node, reduction_node)
+            symbol = self.symbol_table.lookup(id_node.leaf)
+            if symbol is None:
+                self._add_error(reduction_node, f"Variable '{id_node.leaf}' no declarada")
+            elif self.parallel_loop.owns(symbol) or symbol.owner:
+                self._add_error(reduction_node, f"La reducción '{id_node.leaf}' debe ser una variable declarada fuera del 'para'")
+            elif symbol.type not in REDUCTION_TYPES[reduction.leaf]:
+                self._add_error(reduction_node, f"La reducción '{reduction.leaf}' no se aplica a '{id_node.leaf}' de tipo '{symbol.type}'")
+            elif id_node.leaf in self.parallel_loop.reductions:
+                self._add_error(reduction_node, f"Reducción '{id_node.leaf}' repetida")
+            else:
+                symbol.is_used = True
+                self._annotate_symbol(id_node, symbol)
+                self.parallel_loop.reductions[id_node.leaf] = (symbol, reduction.leaf)
+
+    def _end_parallel_loop(self, node, clause, semantic_node):
+        """Cierra el análisis del 'para' paralelo: cada reducción debe actualizarse en el cuerpo"""
+        for name, (symbol, operator) in self.parallel_loop.reductions.items():
+            if name not in self.parallel_loop.updated:
+                self._add_error(self.parallel_loop.node, f"La reducción '{name}' no se actualiza en el 'para' paralelo")
+        self.parallel_loop = self.parallel_loop.outer
+
+    def _check_parallel_write(self, semantic_node, symbol, node):
+        """Comprueba una asignación a una variable (o a un miembro de un objeto) dentro de un 'para'
+        paralelo: solo se escriben las variables de cada iteración y las reducciones, estas con
+        'x = x op expresión' (o 'x += expresión') y el operador declarado"""
+        loop = self.parallel_loop
+        if loop is None:
+            return
+        name = symbol.name
+        if symbol is loop.variable:
+            if node is not loop.update:
+                self._add_error(semantic_node, f"La variable de control '{name}' no puede modificarse en el cuerpo del 'para' paralelo")
+            return
+        if loop.owns(symbol) and not node.children[0].children:
+            return
+        if name not in loop.reductions or node.children[0].children:
+            access = node.children[0].children
+            if access and access[0].children:
+                name = f"{name}.{access[0].children[0].leaf}"
+            self._add_error(semantic_node, f"Asignación a '{name}', compartida entre los hilos del 'para' paralelo; "
+                                           "solo pueden modificarse sus variables locales y sus reducciones")
+            return
+        operator = loop.reductions[name][1]
+        if node.type == "asignacion_compuesta":
+            if operator != "+":
+                self._add_error(semantic_node, f"La reducción '{name}' es de '{operator}' y se actualiza con '+='")
+            loop.updated.add(name)
+            return
+        read = self._reduction_operand(node.children[1], name, operator)
+        if read is None:
+            self._add_error(semantic_node, f"La reducción '{name}' solo puede actualizarse con '{name} = {name} {operator} expresión'")
+            return
+        loop.reads.add(id(read))
+        loop.updated.add(name)
+
+    def _reduction_operand(self, expr, name, operator):
+        """Nodo id de la variable de reducción en 'x op expr' (también al principio de una cadena de
+        operaciones con el mismo operador, restas incluidas en las sumas) o en 'expr op x'"""
+        operators = ("+", "-") if operator == "+" else (operator,)
+
+        def binary(current):
+            return (current is not None and current.type in ("expresion_aritmetica", "termino", "expresion_logica")
+                    and current.leaf in operators and len(current.children) >= 2 and current.children[0] is not None)
+
+        if not binary(expr):
+            return None
+        if expr.leaf != "-" and named_id(expr.children[1], name):
+            return named_id(expr.children[1], name)
+        while binary(expr):
+            expr = expr.children[0]
+        return named_id(expr, name)
+
+    def _check_parallel_read(self, semantic_node, symbol, node):
+        """Una reducción solo se lee en su propia actualización: cada hilo acumula un resultado parcial"""
+        loop = self.parallel_loop
+        if loop is not None and symbol.name in loop.reductions and loop.reductions[symbol.name][0] is symbol and id(node) not in loop.reads:
+            self._add_error(semantic_node, f"La reducción '{symbol.name}' solo puede leerse en su actualización dentro del 'para' paralelo")
+
+    def _check_parallel_statement(self, semantic_node, message):
+        """Rechaza dentro de un 'para' paralelo una sentencia que no puede repartirse entre hilos"""
+        if self.parallel_loop is not None:
+            self._add_error(semantic_node, f"{message} dentro de un 'para' paralelo")
+
+    def _check_exit(self, node, semantic_node):
+        """Las iteraciones de un 'para' paralelo no pueden terminarlo ni una tarea salir de su
+        cuerpo: sin retornar ni romper (salvo el de un bucle o switch de su cuerpo)"""
+        if node.type == "sentencia_return":
+            self._check_parallel_statement(semantic_node, "No se puede retornar")
+            self._check_task_statement(semantic_node, "No se puede retornar")
+            return
+        if self.parallel_loop is not None and not self.parallel_loop.nested:
+            self._check_parallel_statement(semantic_node, "No se puede romper el bucle")
+        if self.task is not None and not self.task.nested:
+            self._check_task_statement(semantic_node, "No se puede romper un bucle de fuera")
+
+    def _analyze_task(self, node, semantic_node):
+        """Analiza el cuerpo de una tarea en su propio ámbito: lo que declara es suyo y el resto
+        de variables de principal se comprueba al terminar el análisis (ver _check_tasks)"""
+        if self.current_class:
+            self._add_error(semantic_node, "Las tareas solo pueden lanzarse en principal")
+        self._check_task_statement(semantic_node, "No se puede lanzar una tarea")
+        self._check_parallel_statement(semantic_node, "No se pueden lanzar tareas")
+
+        outer = self.task
+        self.block_counter += 1
+        scope = self.symbol_table.enter_scope(f"tarea{self.block_counter}")
+        self.task = TaskBlock(scope)
+        self.task_scopes[id(node)] = scope
+        self._process_children(node, semantic_node)
+        self.symbol_table.exit_scope()
+        self.task = outer
+
+    def _check_task_statement(self, semantic_node, message):
+        """Rechaza dentro de una tarea una sentencia que solo puede ejecutar el hilo principal"""
+        if self.task is not None:
+            self._add_error(semantic_node, f"{message} dentro de una tarea")
+
+    def _check_tasks(self, ast_root):
+        """Comprueba las tareas una vez conocidos los símbolos de todo el programa: cada lista de
+        sentencias espera a las tareas que lanza antes de terminar; hasta el esperar, ni las otras
+        tareas ni las sentencias intermedias escriben lo que una tarea usa ni leen lo que escribe,
+        ni salen con retornar o romper; y las tareas no llaman a métodos que imprimen"""
+        if not self.task_scopes:
+            return
+        printing = self._printing_methods(ast_root)
+        for node in self._preorder(ast_root):
+            if node.type == "sentencias":
+                self._check_task_region(node)
+            elif node.type == "sentencia_tarea":
+                for id_node, method in self._called_methods(node, None):
+                    if method in printing:
+                        self.errors.append(SemanticError(
+                            f"La tarea llama a '{method[0]}.{method[1]}', que imprime; solo el hilo principal puede imprimir",
+                            id_node.line, id_node.column))
+
+    def _check_empty_array_literals(self, ast_root):
+        """Un array al que se asigna el literal vacío [] debe recibir en otro punto un literal con
+        elementos o crecer con agregar: si no, tendría un solo elemento y las escrituras más allá
+        de él no se comprobarían fuera del modo seguro"""
+        sized = set()
+        empty = []
+        for node in self._preorder(ast_root):
+            if node.type in ("declaracion_variable", "declaracion_array") and len(node.children) >= 2:
+                target = node.children[1]
+                if target.type == "lista_ids_inicializadas":
+                    pairs = [(target.children[i], target.children[i + 1]) for i in range(0, len(target.children) - 1, 2)]
+                elif len(node.children) >= 3 and target.type == "id":
+                    pairs = [(target, node.children[2])]
+                else:
+                    continue
+            elif node.type == "asignacion" and node.children[0].type == "id":
+                pairs = [(node.children[0], node.children[1])]
+            elif node.type in ("llamada_funcion", "llamada_metodo"):
+                symbol = self.symbol_of(node.children[0])
+                if symbol and symbol.type.endswith("[]") and self._access_names(node.children[0]) == [ARRAY_APPEND]:
+                    sized.add(id(symbol))
+                continue
+            else:
+                continue
+            for id_node, expr in pairs:
+                while expr.type in WRAPPER_NODES and expr.leaf is None and len(expr.children) == 1:
+                    expr = expr.children[0]
+                key = self._array_key(id_node) if expr.type == "array_literal" else None
+                if key is None:
+                    continue
+                if expr.children and expr.children[0].children:
+                    sized.add(key)
+                else:
+                    empty.append((key, id_node))
+        for key, id_node in empty:
+            if key not in sized:
+                self.errors.append(SemanticError(
+                    f"El array '{id_node.leaf}' solo recibe el literal vacío []: debe asignársele un literal "
+                    f"con elementos o crecer con '{ARRAY_APPEND}'", id_node.line, id_node.column))
+
+    def _access_names(self, id_node):
+        """Nombres de la cadena de accesos de un id (obj.a.b -> ['a', 'b'])"""
+        names = []
+        access = id_node.children[0] if id_node.children and id_node.children[0].type == "acceso_objeto" else None
+        while access is not None and access.children:
+            names.append(access.children[0].leaf)
+            access = access.children[1] if len(access.children) > 1 else None
+        return names
+
+    def _array_key(self, id_node):
+        """Array al que se asigna a través de un id: el símbolo de un array local o (clase, miembro)
+        para un array miembro, que tiene el mismo tamaño en todos los objetos; None si no se conoce"""
+        symbol = self.symbol_of(id_node)
+        if symbol is None:
+            return None
+        names = self._access_names(id_node)
+        if not names:
+            return (symbol.owner, symbol.name) if symbol.owner else id(symbol)
+        class_name = symbol.type
+        for name in names[:-1]:
+            info = self.user_defined_types.get(class_name)
+            if info is None or name not in info["members"]:
+                return None
+            class_name = info["members"][name]
+        return class_name, names[-1]
+
+    def _check_task_region(self, node):
+        """Comprueba las tareas lanzadas en una lista de sentencias hasta el esperar que las sigue"""
+        pending = []        # (nodo, lecturas, escrituras) de las tareas lanzadas sin esperar
+        for child in node.children:
+            statement = child.children[0] if child.type == "sentencia" and child.children else child
+            if statement.type == "sentencia_esperar":
+                pending = []
+                continue
+            task = statement.type == "sentencia_tarea"
+            if not pending and not task:
+                continue
+            owner = TaskBlock(self.task_scopes[id(statement)]) if task else None
+            reads, writes = self._shared_accesses(statement, owner)
+            for launched, task_reads, task_writes in pending:
+                shared = [(symbol, id_node) for symbol, id_node in writes.items()
+                          if symbol in task_reads or symbol in task_writes]
+                shared.extend((symbol, id_node) for symbol, id_node in reads.items()
+                              if symbol in task_writes and symbol not in writes)
+                for symbol, id_node in shared:
+                    self.errors.append(SemanticError(
+                        f"'{symbol.name}' se comparte con la tarea de la línea {launched.line} antes del esperar "
+                        "y una de las dos la modifica", id_node.line, id_node.column))
+            if task:
+                pending.append((statement, reads, writes))
+                continue
+            exit = self._region_exit(statement)
+            if exit is not None:
+                action = "retornar" if exit.type == "sentencia_return" else "romper el bucle"
+                self.errors.append(SemanticError(f"No se puede {action} antes de esperar a las tareas lanzadas",
+                                                 exit.line, exit.column))
+        for launched, _, _ in pending:
+            self.errors.append(SemanticError("Falta 'esperar' después de la tarea, en el mismo bloque",
+                                             launched.line, launched.column))
+
+    def _shared_accesses(self, node, task=None):
+        """Variables de principal que lee y que escribe una sentencia: {símbolo: primer nodo id}.
+        Con task, sin las declaradas dentro de la tarea. Asignar un miembro o un elemento escribe
+        el objeto o el array, llamar a un método de un objeto (o a agregar) también, y pasar un
+        array como argumento a un método lo escribe"""
+        reads = {}
+        writes = {}
+
+        def add(accesses, id_node):
+            symbol = self.symbol_of(id_node)
+            if symbol is not None and symbol.owner is None and (task is None or not task.owns(symbol)):
+                accesses.setdefault(symbol, id_node)
+
+        pending = [node]
+        while pending:
+            current = pending.pop()
+            if not hasattr(current, 'type') or current.type == "acceso_objeto":
+                continue
+            children = current.children
+            if current.type in ("asignacion", "asignacion_compuesta", "actualizacion_for", "asignacion_for") and children:
+                target = children[1] if current.type == "asignacion_for" and len(children) >= 3 else children[0]
+                if target.type == "acceso_array":
+                    add(writes, target.children[0])
+                    pending.extend(target.children[1:2])
+                else:
+                    add(writes, target)
+                pending.extend(children[children.index(target) + 1:])
+            elif current.type in ("declaracion_variable", "declaracion_array") and len(children) >= 2:
+                declared = children[1]
+                if declared.type == "id":
+                    add(writes, declared)
+                    pending.extend(children[2:])
+                elif declared.type == "lista_ids_inicializadas":
+                    for id_node in declared.children[0::2]:
+                        add(writes, id_node)
+                    pending.extend(declared.children[1::2])
+                else:
+                    for id_node in declared.children:
+                        add(writes, id_node)
+            elif current.type in ("llamada_funcion", "llamada_metodo") and children:
+                add(writes if children[0].children else reads, children[0])
+                for arg in call_arguments(current):
+                    argument = arg.children[0] if arg.type == "factor" and len(arg.children) == 1 else arg
+                    type = self.type_of(argument)
+                    if argument.type == "id" and not argument.children and type and type.endswith("[]"):
+                        add(writes, argument)
+                    else:
+                        pending.append(arg)
+            elif current.type == "id":
+                add(reads, current)
+            else:
+                pending.extend(children)
+        return reads, writes
+
+    def _region_exit(self, node, depth=0):
+        """Primer retornar o romper que sale de la sentencia (no el de un bucle o switch suyo)"""
+        if not hasattr(node, 'type'):
+            return None
+        if node.type == "sentencia_return" or (node.type == "sentencia_break" and depth == 0):
+            return node
+        if node.type in BREAKABLE_STATEMENTS:
+            depth += 1
+        for child in node.children:
+            found = self._region_exit(child, depth)
+            if found is not None:
+                return found
+        return None
+
+    def _printing_methods(self, ast_root):
+        """Métodos que imprimen, directamente o a través de los métodos que llaman: {(clase, método)}"""
+        calls = {}
+        printing = set()
+        for node in self._preorder(ast_root):
+            if node.type != "declaracion_clase" or not node.children or node.children[-1].type != "miembros_clase":
+                continue
+            for member in node.children[-1].children:
+                if len(member.children) < 2 or member.children[1].type != "declaracion_metodo":
+                    continue
+                method = member.children[1]
+                key = (node.leaf, method.children[-3].leaf)
+                body = method.children[-1]
+                calls[key] = {called for _, called in self._called_methods(body, node.leaf)}
+                if any(current.type == "sentencia_print" for current in self._preorder(body)):
+                    printing.add(key)
+
+        changed = True
+        while changed:
+            changed = False
+            for key, called in calls.items():
+                if key not in printing and called & printing:
+                    printing.add(key)
+                    changed = True
+        return printing
+
+    def _called_methods(self, node, class_name):
+        """(nodo id, (clase, método)) de las llamadas a métodos de un subárbol; class_name es la
+        clase de las llamadas sin objeto (None fuera de una clase)"""
+        calls = []
+        for current in self._preorder(node):
+            if current.type not in ("llamada_funcion", "llamada_metodo") or not current.children:
+                continue
+            id_node = current.children[0]
+            symbol = self.symbol_of(id_node)
+            access = id_node.children[0] if id_node.children and id_node.children[0].type == "acceso_objeto" else None
+            if symbol is None:
+                if class_name and access is None:
+                    calls.append((id_node, (class_name, id_node.leaf)))
+                continue
+            # obj.a.metodo(...): el método es de la clase del último miembro recorrido
+            current_type = symbol.type
+            while access is not None and access.children:
+                info = self.user_defined_types.get(current_type)
+                name = access.children[0].leaf
+                if info is None:
+                    break
+                if name in info["methods"]:
+                    calls.append((access.children[0], (current_type, name)))
+                    break
+                current_type = info["members"].get(name)
+                access = access.children[1] if len(access.children) > 1 else None
+        return calls
+    
+    def _analyze_for_initialization(self, node):
+        """Analiza la inicialización de un for: declara la variable de control o asigna una existente"""
+        if len(node.children) < 3:
+            semantic_node = self._analyze_assignment(node)
+            semantic_node.type = node.type
+            return semantic_node
+            
+        semantic_node = SemanticNode(node.type, line=node.line, column=node.column)
+        tipo_dato_node = node.children[0]
+        tipo = self._declared_type(tipo_dato_node)
+        self._attach(semantic_node, SemanticNode("tipo_dato", value=tipo, line=tipo_dato_node.line,
+                                                 column=tipo_dato_node.column))
+        self._analyze_initialized_variable(semantic_node, node.children[1], node.children[2], tipo)
+        self.loop_variables.add((self.symbol_table.current_scope, node.children[1].leaf))
+        return semantic_node
+    
+    def _analyze_method_declaration(self, node, semantic_node):
+        """Analiza un método en su propio ámbito, con los parámetros declarados como símbolos"""
+        method_id = node.children[-3]
+        if len(node.children) >= 4:
+            tipo_node = node.children[0]
+            self._attach(semantic_node, SemanticNode("tipo_dato", value=tipo_node.leaf,
+                                                     line=tipo_node.line, column=tipo_node.column))
+        self._attach(semantic_node, SemanticNode("id", value=method_id.leaf,
+                                                 line=method_id.line, column=method_id.column))
+        
+        self.symbol_table.enter_scope(method_scope_name(self.current_class, method_id.leaf))
+        self.block_counter = 0
+        self.parameter_symbols = set()
+        
+        params_node = SemanticNode("parametros")
+        self._attach(semantic_node, params_node)
+        for tipo_node, id_node in parameter_pairs(node.children[-2]):
+            tipo = self._declared_type(tipo_node)
+            param_node = SemanticNode("parametro", value=id_node.leaf, data_type=tipo,
+                                      line=id_node.line, column=id_node.column)
+            self._attach(params_node, param_node)
+            if not self.symbol_table.add_symbol(id_node.leaf, tipo, id_node.line, id_node.column):
+                self._add_error(param_node, f"Parámetro '{id_node.leaf}' duplicado")
+            else:
+                symbol = self._record_declaration(id_node, True)
+                symbol.is_initialized = True
+                self._annotate_symbol(id_node, symbol)
+                self.parameter_symbols.add(id(symbol))
+        
+        body_node = self._analyze_node(node.children[-1])
+        self._attach(semantic_node, body_node)
+        self.symbol_table.exit_scope()
         return semantic_node
     
     def _analyze_function_call(self, node):
@@ -942,26 +2141,115 @@ class SemanticAnalyzer:
             
             # Procesar el identificador de la función
             function_node = SemanticNode("id", value=function_name, line=node.children[0].line, column=node.children[0].column)
-            semantic_node.add_child(function_node)
+            self._attach(semantic_node, function_node)
             
             # Verificar si la función está definida
             symbol = self.symbol_table.lookup(function_name)
             if not symbol:
-                self._add_error(semantic_node, f"Función '{function_name}' no declarada")
+                method_info = self._record_own_method_call(node.children[0])
+                if method_info:
+                    semantic_node.data_type = method_info["return_type"]
+                else:
+                    self._add_error(semantic_node, f"Función '{function_name}' no declarada")
             else:
+                symbol.is_used = True
                 semantic_node.data_type = symbol.type
+                self._annotate_symbol(node.children[0], symbol)
+                self.xref.add_read(symbol_key(symbol), node.children[0].line, node.children[0].column)
+                self._record_member_access(symbol, node.children[0])
+                
+                # obj.metodo(...)~: el tipo de la llamada es el de retorno del método
+                array_method = symbol.type.endswith("[]")
+                if array_method:
+                    semantic_node.data_type = "vacio"
+                elif node.children[0].children and node.children[0].children[0].type == "acceso_objeto":
+                    semantic_node.data_type = self._resolve_member_type(semantic_node, symbol.type,
+                                                                        node.children[0].children[0])
+                    self.node_types[id(node.children[0])] = semantic_node.data_type
             
             # Procesar los argumentos si existen
             if len(node.children) >= 2:
                 args_node = self._analyze_node(node.children[1])
                 if args_node:
-                    semantic_node.add_child(args_node)
+                    self._attach(semantic_node, args_node)
+            if symbol and array_method:
+                self._check_array_append(node, semantic_node, symbol)
+            else:
+                self._check_parallel_statement(semantic_node, "No se pueden llamar métodos")
+                self._check_call_arguments(node, semantic_node)
             
         return semantic_node
     
+    def _called_method(self, id_node):
+        """(nombre, información) del método al que llama metodo(...) u obj.a.metodo(...); None si
+        no es una llamada a un método conocido"""
+        symbol = self.symbol_of(id_node)
+        if symbol is None:
+            if id_node.children or not self.current_class:
+                return None
+            info = self.user_defined_types.get(self.current_class, {}).get("methods", {}).get(id_node.leaf)
+            return (id_node.leaf, info) if info else None
+        access = id_node.children[0] if id_node.children and id_node.children[0].type == "acceso_objeto" else None
+        current_type = symbol.type
+        while access is not None and access.children:
+            class_info = self.user_defined_types.get(current_type)
+            name = access.children[0].leaf
+            if class_info is None:
+                return None
+            if len(access.children) == 1:
+                info = class_info["methods"].get(name)
+                return (name, info) if info else None
+            current_type = class_info["members"].get(name)
+            access = access.children[1]
+        return None
+
+    def _check_call_arguments(self, node, semantic_node):
+        """Los argumentos de una llamada a un método deben coincidir en número con sus parámetros y
+        poder pasarse a ellos: del mismo tipo o, entre entero y flotante, con la conversión de C"""
+        method = self._called_method(node.children[0])
+        if method is None:
+            return
+        name, info = method
+        args = call_arguments(node)
+        parameters = info["parameters"]
+        if len(args) != len(parameters):
+            self._add_error(semantic_node, f"El método '{name}' espera {len(parameters)} argumento{'' if len(parameters) == 1 else 's'} y recibe {len(args)}")
+            return
+        for position, (arg, parameter) in enumerate(zip(args, parameters), 1):
+            arg_type = self.type_of(arg)
+            if arg_type is None or arg_type == parameter["type"]:
+                continue
+            if {arg_type, parameter["type"]} == {"entero", "flotante"}:
+                continue
+            self._add_error(semantic_node, f"El argumento {position} de '{name}' es de tipo '{arg_type}' y el "
+                                           f"parámetro '{parameter['name']}' de tipo '{parameter['type']}'")
+
+    def _check_array_append(self, node, semantic_node, symbol):
+        """lista.agregar(valor)~: el array crece en ejecución, así que debe ser una variable local
+        con elementos de un tipo básico, y el valor debe poder guardarse en él"""
+        access = node.children[0].children[0] if node.children[0].children else None
+        if access is None or access.children[0].leaf != ARRAY_APPEND or len(access.children) > 1:
+            self._add_error(semantic_node, f"Los arrays solo tienen el método '{ARRAY_APPEND}'")
+            return
+        self._check_parallel_statement(semantic_node, f"No se puede usar '{ARRAY_APPEND}'")
+        element_type = symbol.type[:-2]
+        if symbol.owner or id(symbol) in self.parameter_symbols:
+            self._add_error(semantic_node, f"'{ARRAY_APPEND}' solo se admite en arrays declarados en la función")
+        elif element_type not in self.basic_types:
+            self._add_error(semantic_node, f"'{ARRAY_APPEND}' no admite arrays de tipo '{symbol.type}'")
+        args = call_arguments(node)
+        if len(args) != 1:
+            self._add_error(semantic_node, f"'{ARRAY_APPEND}' espera un argumento")
+            return
+        value_type = self.type_of(args[0])
+        if value_type and value_type != element_type and not (element_type == "flotante" and value_type == "entero"):
+            self._add_error(semantic_node, f"No se puede agregar un valor de tipo '{value_type}' a un array de tipo '{symbol.type}'")
+    
     def _analyze_print_statement(self, node):
         """Analiza una sentencia print y genera un nodo semántico"""
         semantic_node = SemanticNode("sentencia_print", line=node.line, column=node.column)
+        self._check_parallel_statement(semantic_node, "No se puede imprimir")
+        self._check_task_statement(semantic_node, "No se puede imprimir")
         
         # Procesar los hijos (expresión a imprimir)
         self._process_children(node, semantic_node)
@@ -988,9 +2276,17 @@ class SemanticAnalyzer:
             for warning in self.warnings:
                 print(f"  - {warning}")
                 
+    def build_semantic_trees(self):
+        """Construye bajo demanda los árboles semánticos si el análisis solo anotó el AST"""
+        if not self.semantic_trees and not self.build_tree and self.ast_root:
+            tree_analyzer = SemanticAnalyzer(build_tree=True)
+            tree_analyzer.analyze(self.ast_root)
+            self.semantic_trees = tree_analyzer.semantic_trees
+        return self.semantic_trees
+    
     def print_semantic_trees(self):
         """Imprime los árboles de análisis semántico"""
-        if self.semantic_trees:
+        if self.build_semantic_trees():
             print("\nÁrboles de análisis semántico:")
             for i, tree in enumerate(self.semantic_trees):
                 print(f"\nÁrbol semántico {i+1}:")
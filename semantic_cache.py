@@ -0,0 +1,119 @@
+import hashlib
+import json
+from collections import OrderedDict
+
+# Versión del formato de las entradas; cambiarla invalida las cachés guardadas
+CACHE_VERSION = 5
+
+def relative_line(line, base_line):
+    """Convierte una línea absoluta en relativa (None si no hay información de línea)"""
+    return line - base_line if line else None
+
+def absolute_line(line, base_line):
+    """Convierte una línea relativa en absoluta"""
+    return base_line + line if line is not None else 0
+
+def structural_hash(node):
+    """Calcula un hash estructural de un subárbol del AST (ignora línea y columna)"""
+    digest = hashlib.sha1()
+    stack = [node]
+
+    # Recorrido en preorden; el número de hijos delimita cada subárbol
+    while stack:
+        current = stack.pop()
+        if not hasattr(current, 'type'):
+            digest.update(b"\x00")
+            continue
+        digest.update(current.type.encode("utf-8"))
+        digest.update(b"\x01")
+        digest.update(repr(current.leaf).encode("utf-8"))
+        digest.update(b"\x02")
+        digest.update(str(len(current.children)).encode("utf-8"))
+        digest.update(b"\x03")
+        stack.extend(reversed(current.children))
+
+    return digest.hexdigest()
+
+class SemanticCache:
+    """Caché persistente y acotada de resultados semánticos por declaración de clase"""
+    def __init__(self, path=None, max_entries=256):
+        self.path = path                # Archivo JSON donde se persiste la caché
+        self.max_entries = max_entries  # Número máximo de entradas (LRU)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path:
+            self.load()
+
+    def get(self, key):
+        """Devuelve la entrada asociada a la clave o None, actualizando las estadísticas"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        """Guarda una entrada, desalojando las menos usadas si se supera el límite"""
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def hit_rate(self):
+        """Proporción de consultas resueltas desde la caché"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        """Estadísticas de uso de la caché"""
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate()
+        }
+
+    def load(self):
+        """Carga las entradas desde disco; una caché ilegible o de otra versión se descarta"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as cache_file:
+                data = json.load(cache_file)
+        except (OSError, ValueError):
+            return False
+
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return False
+
+        self.entries = OrderedDict()
+        for key, entry in data.get("entries", []):
+            self.put(key, entry)
+        return True
+
+    def save(self):
+        """Escribe las entradas a disco en orden LRU"""
+        if not self.path:
+            return False
+
+        data = {
+            "version": CACHE_VERSION,
+            "entries": [[key, entry] for key, entry in self.entries.items()]
+        }
+        with open(self.path, 'w', encoding='utf-8') as cache_file:
+            json.dump(data, cache_file, ensure_ascii=False)
+        return True
+
+    def print_stats(self):
+        """Imprime las estadísticas de la caché"""
+        stats = self.stats()
+        print(f"\nCaché semántica: {stats['hits']} aciertos, {stats['misses']} fallos, "
+              f"tasa de acierto {stats['hit_rate']:.0%}, {stats['entries']} entradas "
+              f"({stats['evictions']} desalojadas)")
@@ -0,0 +1,69 @@
+from ir import DEFAULT_ARRAY_SIZE
+
+# Tamaño y alineación en bytes de los tipos C de los miembros (ABI habitual de 64 bits:
+# jstr es un puntero y dos int)
+C_TYPE_LAYOUTS = {
+    "entero": (4, 4),
+    "flotante": (4, 4),
+    "booleano": (1, 1),
+    "caracter": (1, 1),
+    "cadena": (16, 8)
+}
+
+def align_up(offset, alignment):
+    return (offset + alignment - 1) // alignment * alignment
+
+class StructLayout:
+    """Disposición en memoria de las estructuras C de las clases.
+
+    Calcula el tamaño de cada estructura con los miembros en el orden del código y en el orden
+    que minimiza el relleno: de mayor a menor alineación (a igual alineación, de mayor a menor
+    tamaño; a igualdad, en el orden del código). Como en C el tamaño de un tipo es múltiplo de su
+    alineación, en ese orden ningún miembro necesita relleno delante. Los accesos a miembros del
+    C generado van por nombre, así que el orden no les afecta."""
+    def __init__(self, typed_ast, member_array_sizes=None):
+        self.typed_ast = typed_ast
+        self.member_array_sizes = member_array_sizes or {}
+        self._layouts = {}              # (tipo, reordenado) -> (tamaño, alineación)
+
+    def members(self, class_name, reordered=False):
+        """(nombre, tipo) de los miembros de la clase en el orden del código o en el de menor relleno"""
+        members = list(self.typed_ast.class_info(class_name)["members"].items())
+        if not reordered:
+            return members
+        keyed = []
+        for position, (name, tipo) in enumerate(members):
+            size, alignment = self.member_layout(class_name, name, tipo, True)
+            keyed.append((-alignment, -size, position, name, tipo))
+        return [(name, tipo) for _, _, _, name, tipo in sorted(keyed)]
+
+    def struct_size(self, class_name, reordered=False):
+        """Tamaño en bytes de la estructura de la clase (con las clases que contiene dispuestas igual)"""
+        return self.type_layout(class_name, reordered)[0]
+
+    def member_layout(self, class_name, name, tipo, reordered=False):
+        if tipo.endswith("[]"):
+            size, alignment = self.type_layout(tipo[:-2], reordered)
+            return size * self.member_array_sizes.get((class_name, name), DEFAULT_ARRAY_SIZE), alignment
+        return self.type_layout(tipo, reordered)
+
+    def type_layout(self, tipo, reordered=False):
+        """(tamaño, alineación) de un valor del tipo; un objeto se guarda dentro de la estructura"""
+        if tipo in C_TYPE_LAYOUTS:
+            return C_TYPE_LAYOUTS[tipo]
+        key = (tipo, reordered)
+        if key not in self._layouts:
+            # Un tipo que se contiene a sí mismo no es válido en C; se cuenta vacío para terminar
+            self._layouts[key] = (0, 1)
+            if self.typed_ast.class_info(tipo) is not None:
+                self._layouts[key] = self._struct_layout(tipo, self.members(tipo, reordered), reordered)
+        return self._layouts[key]
+
+    def _struct_layout(self, class_name, members, reordered):
+        offset = 0
+        struct_alignment = 1
+        for name, tipo in members:
+            size, alignment = self.member_layout(class_name, name, tipo, reordered)
+            offset = align_up(offset, alignment) + size
+            struct_alignment = max(struct_alignment, alignment)
+        return align_up(offset, struct_alignment), struct_alignment
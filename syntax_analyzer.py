@@ -48,7 +48,8 @@ class SyntaxAnalyzer:
         'NUM_ENTERO', 'NUM_FLOTANTE', 'CADENA', 'ERROR', 'PRINCIPAL', 
         'CLASE', 'PUBLICO', 'PRIVADO', 'RETORNAR', 'IMPRIMIR', 'SI', 
         'SINO', 'MIENTRAS', 'HACER', 'PARA', 'CAMBIO', 'CASO', 
-        'PREDETERMINADO', 'ROMPER', 'VERDADERO', 'FALSO'
+        'PREDETERMINADO', 'ROMPER', 'VERDADERO', 'FALSO', 'PARALELO',
+        'TAREA', 'ESPERAR'
     ]
     
     # Precedencia de operadores (de menor a mayor)
@@ -120,7 +121,7 @@ class SyntaxAnalyzer:
         elif len(p) == 4:
             p[0] = Node('miembro_clase', [p[1], p[2]])
         else:
-            p[0] = Node('miembro_clase', [p[1], Node('id', [], p[2]), p[4]])
+            p[0] = Node('miembro_clase', [p[1], Node('id', [], p[2], p.lineno(2), p.lexpos(2)), p[4]])
 
     def p_modificador_acceso(self, p):
         '''modificador_acceso : PUBLICO
@@ -158,7 +159,9 @@ class SyntaxAnalyzer:
                     | sentencia_for
                     | sentencia_return
                     | sentencia_break
-                    | sentencia_print'''
+                    | sentencia_print
+                    | sentencia_tarea
+                    | sentencia_esperar'''
         p[0] = Node('sentencia', [p[1]])
 
     def p_declaracion_variable(self, p):
@@ -188,9 +191,9 @@ class SyntaxAnalyzer:
         '''lista_ids_inicializadas : ID ASIG expresion
                                   | lista_ids_inicializadas COMA ID ASIG expresion'''
         if len(p) == 4:
-            p[0] = Node('lista_ids_inicializadas', [Node('id', [], p[1]), p[3]])
+            p[0] = Node('lista_ids_inicializadas', [Node('id', [], p[1], p.lineno(1), p.lexpos(1)), p[3]])
         else:
-            p[1].children.append(Node('id', [], p[3]))
+            p[1].children.append(Node('id', [], p[3], p.lineno(3), p.lexpos(3)))
             p[1].children.append(p[5])
             p[0] = p[1]
 
@@ -208,8 +211,9 @@ class SyntaxAnalyzer:
         '''asignacion : ID ASIG expresion CARAC_T
                      | ID acceso_objeto ASIG expresion CARAC_T
                      | ID ASIG_SUMA expresion CARAC_T
-                     | ID CORCHETE_IZQ expresion CORCHETE_DER ASIG expresion CARAC_T'''
-        if len(p) == 5:
+                     | ID CORCHETE_IZQ expresion CORCHETE_DER ASIG expresion CARAC_T
+                     | ID CORCHETE_IZQ expresion CORCHETE_DER acceso_objeto ASIG expresion CARAC_T'''
+        if len(p) == 5 and p.slice[2].type == 'ASIG':
             p[0] = Node('asignacion', [Node('id', [], p[1], p.lineno(1), p.lexpos(1)), p[3]], None, p.lineno(1), p.lexpos(1))
         elif len(p) == 6 and isinstance(p[2], Node) and p[2].type == 'acceso_objeto':
             id_node = Node('id', [], p[1], p.lineno(1), p.lexpos(1))
@@ -218,6 +222,9 @@ class SyntaxAnalyzer:
         elif len(p) == 8:  # Asignación a elemento de array
             acceso_array = Node('acceso_array', [Node('id', [], p[1], p.lineno(1), p.lexpos(1)), p[3]], None, p.lineno(1), p.lexpos(1))
             p[0] = Node('asignacion', [acceso_array, p[6]], None, p.lineno(1), p.lexpos(1))
+        elif len(p) == 9:  # Asignación a un miembro de un elemento: arr[i].campo = expr
+            acceso_array = Node('acceso_array', [Node('id', [], p[1], p.lineno(1), p.lexpos(1)), p[3], p[5]], None, p.lineno(1), p.lexpos(1))
+            p[0] = Node('asignacion', [acceso_array, p[7]], None, p.lineno(1), p.lexpos(1))
         else:
             p[0] = Node('asignacion_compuesta', [Node('id', [], p[1], p.lineno(1), p.lexpos(1)), p[3]], p[2], p.lineno(1), p.lexpos(1))
 
@@ -225,19 +232,19 @@ class SyntaxAnalyzer:
         '''acceso_objeto : PUNTO ID
                         | PUNTO ID acceso_objeto'''
         if len(p) == 3:
-            p[0] = Node('acceso_objeto', [Node('id', [], p[2])])
+            p[0] = Node('acceso_objeto', [Node('id', [], p[2], p.lineno(2), p.lexpos(2))])
         else:
-            p[0] = Node('acceso_objeto', [Node('id', [], p[2]), p[3]])
+            p[0] = Node('acceso_objeto', [Node('id', [], p[2], p.lineno(2), p.lexpos(2)), p[3]])
 
     def p_llamada_funcion(self, p):
         '''llamada_funcion : ID PAREN_IZQ argumentos PAREN_DER CARAC_T
                           | ID acceso_objeto PAREN_IZQ argumentos PAREN_DER CARAC_T'''
         if len(p) == 6:
-            p[0] = Node('llamada_funcion', [Node('id', [], p[1]), p[3]])
+            p[0] = Node('llamada_funcion', [Node('id', [], p[1], p.lineno(1), p.lexpos(1)), p[3]], None, p.lineno(1), p.lexpos(1))
         else:
-            id_node = Node('id', [], p[1])
+            id_node = Node('id', [], p[1], p.lineno(1), p.lexpos(1))
             id_node.children.append(p[2])
-            p[0] = Node('llamada_funcion', [id_node, p[4]])
+            p[0] = Node('llamada_funcion', [id_node, p[4]], None, p.lineno(1), p.lexpos(1))
 
     def p_argumentos(self, p):
         '''argumentos : lista_expresiones
@@ -300,39 +307,71 @@ class SyntaxAnalyzer:
         '''sentencia_for : PARA PAREN_IZQ asignacion_for expresion PUNTO_COMA actualizacion_for PAREN_DER bloque'''
         p[0] = Node('sentencia_for', [p[3], p[4], p[6], p[8]])
 
+    def p_sentencia_for_paralelo(self, p):
+        '''sentencia_for : PARALELO PARA PAREN_IZQ asignacion_for expresion PUNTO_COMA actualizacion_for PAREN_DER bloque
+                        | PARALELO PAREN_IZQ lista_reducciones PAREN_DER PARA PAREN_IZQ asignacion_for expresion PUNTO_COMA actualizacion_for PAREN_DER bloque'''
+        # El quinto hijo marca el 'para' paralelo y lleva sus reducciones
+        reductions = p[3].children if len(p) == 13 else []
+        offset = 4 if len(p) == 13 else 1
+        paralelo = Node('paralelo', reductions, None, p.lineno(1), p.lexpos(1))
+        p[0] = Node('sentencia_for', [p[offset + 3], p[offset + 4], p[offset + 6], p[offset + 8], paralelo])
+
+    def p_lista_reducciones(self, p):
+        '''lista_reducciones : lista_reducciones COMA reduccion
+                            | reduccion'''
+        if len(p) == 4:
+            p[0] = Node('lista_reducciones', p[1].children + [p[3]])
+        else:
+            p[0] = Node('lista_reducciones', [p[1]])
+
+    def p_reduccion(self, p):
+        '''reduccion : SUMA DOS_PUNTOS ID
+                    | MULT DOS_PUNTOS ID
+                    | AND DOS_PUNTOS ID
+                    | OR DOS_PUNTOS ID'''
+        p[0] = Node('reduccion', [Node('id', [], p[3], p.lineno(3), p.lexpos(3))], p[1], p.lineno(1), p.lexpos(1))
+
     def p_asignacion_for(self, p):
         '''asignacion_for : tipo_dato ID ASIG expresion PUNTO_COMA
                          | ID ASIG expresion PUNTO_COMA'''
         if len(p) == 6:
-            p[0] = Node('asignacion_for', [p[1], Node('id', [], p[2]), p[4]])
+            p[0] = Node('asignacion_for', [p[1], Node('id', [], p[2], p.lineno(2), p.lexpos(2)), p[4]])
         else:
-            p[0] = Node('asignacion_for', [Node('id', [], p[1]), p[3]])
+            p[0] = Node('asignacion_for', [Node('id', [], p[1], p.lineno(1), p.lexpos(1)), p[3]])
 
     def p_actualizacion_for(self, p):
         '''actualizacion_for : ID ASIG expresion
                            | ID ASIG_SUMA expresion'''
-        p[0] = Node('actualizacion_for', [Node('id', [], p[1]), p[3]], p[2])
+        p[0] = Node('actualizacion_for', [Node('id', [], p[1], p.lineno(1), p.lexpos(1)), p[3]], p[2])
 
     def p_sentencia_return(self, p):
         '''sentencia_return : RETORNAR expresion CARAC_T
                            | RETORNAR CARAC_T'''
-        p[0] = Node('sentencia_return', [p[2]] if len(p) == 4 else [])
+        p[0] = Node('sentencia_return', [p[2]] if len(p) == 4 else [], None, p.lineno(1), p.lexpos(1))
 
     def p_sentencia_break(self, p):
         '''sentencia_break : ROMPER CARAC_T'''
-        p[0] = Node('sentencia_break', [])
+        p[0] = Node('sentencia_break', [], None, p.lineno(1), p.lexpos(1))
 
     def p_sentencia_print(self, p):
         '''sentencia_print : IMPRIMIR PAREN_IZQ expresion PAREN_DER CARAC_T'''
         p[0] = Node('sentencia_print', [p[3]], None, p.lineno(1), p.lexpos(1))
 
+    def p_sentencia_tarea(self, p):
+        '''sentencia_tarea : TAREA bloque'''
+        p[0] = Node('sentencia_tarea', [p[2]], None, p.lineno(1), p.lexpos(1))
+
+    def p_sentencia_esperar(self, p):
+        '''sentencia_esperar : ESPERAR CARAC_T'''
+        p[0] = Node('sentencia_esperar', [], None, p.lineno(1), p.lexpos(1))
+
     def p_declaracion_metodo(self, p):
         '''declaracion_metodo : tipo_dato ID PAREN_IZQ parametros PAREN_DER bloque
                              | ID PAREN_IZQ parametros PAREN_DER bloque'''
         if len(p) == 7 and isinstance(p[1], Node):  # Con tipo_dato
-            p[0] = Node('declaracion_metodo', [p[1], Node('id', [], p[2]), p[4], p[6]])
+            p[0] = Node('declaracion_metodo', [p[1], Node('id', [], p[2], p.lineno(2), p.lexpos(2)), p[4], p[6]])
         else:  # Sin tipo de retorno especificado (ID directo)
-            p[0] = Node('declaracion_metodo', [Node('id', [], p[1]), p[3], p[5]])
+            p[0] = Node('declaracion_metodo', [Node('id', [], p[1], p.lineno(1), p.lexpos(1)), p[3], p[5]])
 
     def p_parametros(self, p):
         '''parametros : lista_parametros
@@ -343,10 +382,10 @@ class SyntaxAnalyzer:
         '''lista_parametros : tipo_dato ID
                            | lista_parametros COMA tipo_dato ID'''
         if len(p) == 3:
-            p[0] = Node('lista_parametros', [p[1], Node('id', [], p[2])])
+            p[0] = Node('lista_parametros', [p[1], Node('id', [], p[2], p.lineno(2), p.lexpos(2))])
         else:
             p[1].children.append(p[3])
-            p[1].children.append(Node('id', [], p[4]))
+            p[1].children.append(Node('id', [], p[4], p.lineno(4), p.lexpos(4)))
             p[0] = p[1]
 
     # Expresiones
@@ -407,6 +446,7 @@ class SyntaxAnalyzer:
                   | llamada_metodo
                   | ID acceso_objeto
                   | ID CORCHETE_IZQ expresion CORCHETE_DER
+                  | ID CORCHETE_IZQ expresion CORCHETE_DER acceso_objeto
                   | array_literal
                   | VERDADERO
                   | FALSO'''
@@ -414,6 +454,8 @@ class SyntaxAnalyzer:
             p[0] = p[2]
         elif len(p) == 5:  # Acceso a array
             p[0] = Node('acceso_array', [Node('id', [], p[1], p.lineno(1), p.lexpos(1)), p[3]], None, p.lineno(1), p.lexpos(1))
+        elif len(p) == 6:  # Miembro de un elemento de array: arr[i].campo
+            p[0] = Node('acceso_array', [Node('id', [], p[1], p.lineno(1), p.lexpos(1)), p[3], p[5]], None, p.lineno(1), p.lexpos(1))
         elif len(p) == 2:
             if p.slice[1].type in ('NUM_ENTERO', 'NUM_FLOTANTE', 'CADENA'):
                 p[0] = Node('factor', [], p[1], p.lineno(1), p.lexpos(1))
@@ -434,11 +476,11 @@ class SyntaxAnalyzer:
         '''llamada_metodo : ID PAREN_IZQ argumentos PAREN_DER
                          | ID acceso_objeto PAREN_IZQ argumentos PAREN_DER'''
         if len(p) == 5:
-            p[0] = Node('llamada_metodo', [Node('id', [], p[1]), p[3]])
+            p[0] = Node('llamada_metodo', [Node('id', [], p[1], p.lineno(1), p.lexpos(1)), p[3]], None, p.lineno(1), p.lexpos(1))
         else:
-            id_node = Node('id', [], p[1])
+            id_node = Node('id', [], p[1], p.lineno(1), p.lexpos(1))
             id_node.children.append(p[2])
-            p[0] = Node('llamada_metodo', [id_node, p[4]])
+            p[0] = Node('llamada_metodo', [id_node, p[4]], None, p.lineno(1), p.lexpos(1))
 
     def p_array_literal(self, p):
         '''array_literal : CORCHETE_IZQ lista_expresiones CORCHETE_DER
@@ -541,7 +583,8 @@ class SyntaxAnalyzer:
                     'privado': 'PRIVADO', 'retornar': 'RETORNAR', 'imprimir': 'IMPRIMIR',
                     'romper': 'ROMPER', 'cambio': 'CAMBIO', 'caso': 'CASO',
                     'predeterminado': 'PREDETERMINADO', 'verdadero': 'VERDADERO',
-                    'falso': 'FALSO'
+                    'falso': 'FALSO', 'paralelo': 'PARALELO', 'tarea': 'TAREA',
+                    'esperar': 'ESPERAR'
                 }
                 
                 # Mapeos para ciclos y condicionales
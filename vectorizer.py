@@ -0,0 +1,157 @@
+from ir import (OP_ADD, OP_SUB, OP_LT, OP_GT, OP_LE, OP_GE, OP_LOAD_INDEX, OP_STORE_INDEX,
+                PURE_OPCODES, TERM_JUMP, TERM_BRANCH, VALUE_VAR, VALUE_TEMP, VALUE_CONST, VALUE_MEMBER)
+
+# Comparaciones de la condición de un 'para' que admite la forma canónica de 'omp simd'
+CANONICAL_COMPARISONS = (OP_LT, OP_GT, OP_LE, OP_GE)
+
+class LoopVectorizer:
+    """Detección de los 'para' por elementos, que el generador emite como un 'for' de C con
+    indicaciones de vectorización.
+
+    Un bucle es por elementos si su cuerpo es una secuencia sin saltos de operaciones puras y
+    escrituras en arrays, cada acceso a un array usa como índice la variable de control, la única
+    escritura de esa variable es el paso constante del final y no escribe ninguna otra variable ni
+    miembro (ni llamadas, ni salida, ni comprobaciones de límites). Así cada iteración solo toca
+    sus propios elementos y las iteraciones no dependen unas de otras. Los temporales del cuerpo
+    no pueden pasar de una iteración a la siguiente ni usarse fuera, y la variable de control no
+    puede leerse tras el bucle, para que valga cualquier orden de ejecución de las iteraciones."""
+    def __init__(self, function):
+        self.function = function
+        self.values = function.values
+        self.vectorized = 0         # Bucles marcados como vectorizables
+
+    def run(self):
+        """Marca los bucles por elementos de la función y devuelve cuántos marcó"""
+        function = self.function
+        natural = dict(function.natural_loops())
+        preds = function.predecessors()
+        liveness = None
+        for loop in function.loops:
+            loop.vectorizable = False
+            body = natural.get(loop.header)
+            if loop.kind != "para" or loop.variable < 0 or body is None or loop.parallel:
+                continue
+            chain = self._chain(loop, body, preds)
+            if chain is None or not self._element_wise(loop, chain):
+                continue
+            if liveness is None:
+                liveness = function.liveness()
+            exit = function.blocks[loop.header].targets[1]
+            if liveness.contains(liveness.live_in[exit], loop.variable):
+                continue
+            loop.vectorizable = True
+            loop.start = function.loop_start(loop, body, preds)
+            self.vectorized += 1
+        return self.vectorized
+
+    def _chain(self, loop, body, preds):
+        """Bloques del cuerpo en orden de ejecución si forman una secuencia sin saltos que vuelve
+        a la cabecera; None si no"""
+        blocks = self.function.blocks
+        variable = loop.variable
+        header = blocks[loop.header]
+        if (header.terminator != TERM_BRANCH or header.targets[0] != loop.body or len(header) != 1
+                or header.dst[0] != header.cond or header.ops[0] not in CANONICAL_COMPARISONS):
+            return None
+        a, b = header.a[0], header.b[0]
+        bound = b if a == variable else a if b == variable else -1
+        if bound < 0 or bound == variable or self.values[variable].type != "entero" or self.values[bound].type != "entero":
+            return None
+
+        chain = []
+        index = loop.body
+        while index != loop.header:
+            block = blocks[index]
+            if (index not in body or index in chain or block.terminator != TERM_JUMP
+                    or preds[index] != [chain[-1] if chain else loop.header]):
+                return None
+            chain.append(index)
+            index = block.targets[0]
+        if not chain or chain[-1] != loop.latch or len(body) != len(chain) + 1:
+            return None
+        return chain
+
+    def _element_wise(self, loop, chain):
+        """Si el cuerpo solo lee y escribe los elementos de su iteración"""
+        function = self.function
+        values = self.values
+        variable = loop.variable
+        blocks = [function.blocks[index] for index in chain]
+
+        # La última instrucción avanza la variable de control con un paso constante
+        latch = blocks[-1]
+        if not len(latch) or not self._step(variable, latch, len(latch) - 1):
+            return False
+
+        # Temporales del cuerpo: se calculan y se usan solo en él
+        written = {block.dst[position] for block in blocks for position in range(len(block))
+                   if block.ops[position] != OP_STORE_INDEX}
+        written.discard(variable)
+        inside = set(chain)
+        for block in function.blocks:
+            if block.index in inside:
+                continue
+            if block.cond in written or any(dst in written for dst in block.dst):
+                return False
+            for position in range(len(block)):
+                if written.intersection(block.reads(position, False)):
+                    return False
+
+        header = function.blocks[loop.header]
+        bound = header.b[0] if header.a[0] == variable else header.a[0]
+        if not self._invariant(bound, written):
+            return False
+
+        defined = set()         # Temporales ya calculados en la iteración
+        for block in blocks:
+            last = len(block) - 1 if block is latch else len(block)
+            for position in range(last):
+                op = block.ops[position]
+                if op not in PURE_OPCODES and op != OP_STORE_INDEX:
+                    return False
+                if op == OP_LOAD_INDEX and (block.b[position] != variable or not self._array(block.a[position])):
+                    return False
+                if op == OP_STORE_INDEX and (block.a[position] != variable or not self._array(block.dst[position])):
+                    return False
+                for operand in block.reads(position, False):
+                    if values[operand].type in ("cadena", "cadena[]"):
+                        return False
+                    if operand in written and operand not in defined:
+                        # Temporal de la iteración anterior
+                        return False
+                if op != OP_STORE_INDEX:
+                    dst = block.dst[position]
+                    if values[dst].kind != VALUE_TEMP or values[dst].type == "cadena":
+                        return False
+                    defined.add(dst)
+        return True
+
+    def _step(self, variable, block, position):
+        """Si la instrucción es v = v + c, v = c + v o v = v - c con c constante no nula"""
+        if block.dst[position] != variable:
+            return False
+        op, a, b = block.ops[position], block.a[position], block.b[position]
+        if op == OP_ADD and b == variable:
+            a, b = b, a
+        if op not in (OP_ADD, OP_SUB) or a != variable:
+            return False
+        value = self.values[b]
+        return value.kind == VALUE_CONST and value.type == "entero" and value.name not in ("0", "-0")
+
+    def _invariant(self, index, written):
+        """Si el límite no cambia en el bucle: el cuerpo solo escribe sus temporales y elementos de arrays"""
+        value = self.values[index]
+        if value.kind == VALUE_MEMBER:
+            return not value.type.endswith("[]")
+        return value.kind != VALUE_TEMP or index not in written
+
+    def _array(self, array):
+        """Si se puede indexar en el bucle: arrays locales (también dinámicos), miembros y campos
+        de los elementos de un array de objetos no dinámico"""
+        function = self.function
+        value = self.values[array]
+        if not value.type.endswith("[]") or value.type == "cadena[]":
+            return False
+        if array in function.element_fields:
+            return function.element_fields[array][0] not in function.dynamic_arrays
+        return value.kind in (VALUE_VAR, VALUE_MEMBER)
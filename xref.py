@@ -0,0 +1,124 @@
+import json
+from semantic_cache import relative_line, absolute_line
+
+def symbol_key(symbol):
+    """Clave estable de un símbolo: Clase.miembro para miembros, ámbito.nombre para el resto"""
+    if symbol.owner:
+        return f"{symbol.owner}.{symbol.name}"
+    return f"{symbol.scope}.{symbol.name}"
+
+class CrossReferenceIndex:
+    """Índice de referencias cruzadas: símbolos a declaración, lecturas y escrituras; métodos a llamadas"""
+    def __init__(self):
+        self.declarations = {}  # Clave de símbolo -> (línea, columna)
+        self.reads = {}         # Clave de símbolo -> [(línea, columna), ...]
+        self.writes = {}        # Clave de símbolo -> [(línea, columna), ...]
+        self.methods = {}       # Clase.método -> (línea, columna)
+        self.calls = {}         # Clase.método -> [(línea, columna), ...]
+
+    def add_declaration(self, key, line, column):
+        self.declarations[key] = (line, column)
+
+    def add_read(self, key, line, column):
+        self.reads.setdefault(key, []).append((line, column))
+
+    def add_write(self, key, line, column):
+        self.writes.setdefault(key, []).append((line, column))
+
+    def add_method(self, key, line, column):
+        self.methods[key] = (line, column)
+
+    def add_call(self, key, line, column):
+        self.calls.setdefault(key, []).append((line, column))
+
+    def declaration_of(self, key):
+        """Sitio de declaración de un símbolo (None si no se conoce)"""
+        return self.declarations.get(key)
+
+    def reads_of(self, key):
+        return self.reads.get(key, [])
+
+    def writes_of(self, key):
+        return self.writes.get(key, [])
+
+    def calls_of(self, key):
+        return self.calls.get(key, [])
+
+    def references(self, key):
+        """Todos los sitios que nombran un símbolo (vista previa de un renombrado)"""
+        sites = list(self.reads_of(key)) + list(self.writes_of(key))
+        if key in self.declarations:
+            sites.append(self.declarations[key])
+        if key in self.methods:
+            sites.append(self.methods[key])
+        sites.extend(self.calls_of(key))
+        return sorted(set(sites))
+
+    def unused_members(self, user_defined_types):
+        """Miembros de clase que nunca se leen: lista de claves Clase.miembro"""
+        unused = []
+        for class_name, info in user_defined_types.items():
+            for member in info["members"]:
+                key = f"{class_name}.{member}"
+                if not self.reads.get(key):
+                    unused.append(key)
+        return unused
+
+    def uncalled_methods(self):
+        """Métodos declarados que no se llaman en ningún sitio"""
+        return [key for key in self.methods if not self.calls.get(key)]
+
+    def merge(self, other):
+        """Incorpora las referencias de otro índice"""
+        self.declarations.update(other.declarations)
+        self.methods.update(other.methods)
+        for key, sites in other.reads.items():
+            self.reads.setdefault(key, []).extend(sites)
+        for key, sites in other.writes.items():
+            self.writes.setdefault(key, []).extend(sites)
+        for key, sites in other.calls.items():
+            self.calls.setdefault(key, []).extend(sites)
+
+    def to_data(self, base_line=0):
+        """Serializa el índice a un diccionario JSON con líneas relativas a base_line"""
+        def site(value):
+            return [relative_line(value[0], base_line), value[1]]
+
+        def site_lists(table):
+            return {key: [site(value) for value in sites] for key, sites in table.items()}
+
+        return {
+            "declarations": {key: site(value) for key, value in self.declarations.items()},
+            "reads": site_lists(self.reads),
+            "writes": site_lists(self.writes),
+            "methods": {key: site(value) for key, value in self.methods.items()},
+            "calls": site_lists(self.calls)
+        }
+
+    @classmethod
+    def from_data(cls, data, base_line=0):
+        """Reconstruye un índice serializado con to_data"""
+        def site(value):
+            return (absolute_line(value[0], base_line), value[1])
+
+        def site_lists(table):
+            return {key: [site(value) for value in sites] for key, sites in table.items()}
+
+        index = cls()
+        index.declarations = {key: site(value) for key, value in data["declarations"].items()}
+        index.reads = site_lists(data["reads"])
+        index.writes = site_lists(data["writes"])
+        index.methods = {key: site(value) for key, value in data["methods"].items()}
+        index.calls = site_lists(data["calls"])
+        return index
+
+    def save(self, path):
+        """Escribe el índice en un archivo JSON"""
+        with open(path, 'w', encoding='utf-8') as xref_file:
+            json.dump(self.to_data(), xref_file, ensure_ascii=False, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        """Lee un índice escrito con save"""
+        with open(path, 'r', encoding='utf-8') as xref_file:
+            return cls.from_data(json.load(xref_file))